@@ -1,8 +1,15 @@
 #!/usr/bin/env python3
 """
 Legal Knowledge Graph - Main Entry Point
+
+    python3 main.py                      # database status
+    python3 main.py build-graph          # rebuild the graph from cases/ and scraped laws
+    python3 main.py authority --cold     # recompute authority scores from scratch
+    python3 main.py serve --port 8080    # HTTP query service (see legal_kg/service.py)
+    python3 main.py --profile build-graph   # profile the load into data/profiles/ (see legal_kg/profiling.py)
 """
 
+import argparse
 import sys
 from pathlib import Path
 
@@ -11,25 +18,80 @@ sys.path.append(str(Path(__file__).parent / "src"))
 
 from legal_kg.database import get_connection, init_database
 from legal_kg.models import CrawledPage
+from legal_kg.profiling import PROFILER, profiling
 
 def main():
     """Main entry point for the application"""
     print("Legal Knowledge Graph Backend")
     print("=" * 40)
-    
+
     # Initialize database if needed
     init_database()
-    
+
     # Example usage
     conn = get_connection()
     cursor = conn.cursor()
-    
+
     # Check if database has data
     cursor.execute("SELECT COUNT(*) FROM crawled_pages")
     count = cursor.fetchone()[0]
     print(f"Database contains {count} crawled pages")
-    
+
     conn.close()
 
+def build_graph():
+    """Rebuild the graph tables from cases/, the scraped law files and law_sections"""
+    from legal_kg.graph import build_graph as build
+
+    init_database()
+    conn = get_connection()
+    with PROFILER.stage('build_graph'):
+        stats = build(conn)
+    print(f"Graph version {stats['version']}: {stats['nodes']} nodes, {stats['edges']} edges")
+    # Warm-started from the previous scores, so a small ingest costs a few iterations
+    update_authority(conn)
+    conn.close()
+
+def update_authority(conn, warm_start=True):
+    """Recompute the authority (PageRank) scores of the graph nodes"""
+    from legal_kg.authority import update_authority as update
+
+    with PROFILER.stage('authority'):
+        stats = update(conn, warm_start=warm_start)
+    print(f"Authority: {stats['edges']} edges, {stats['iterations']} iterations "
+          f"({'warm' if stats['warm_start'] else 'cold'} start) in {stats['seconds']:.2f}s")
+
+def serve(host, port, pool_size, db_path=None):
+    """Run the HTTP query service"""
+    from legal_kg.database import DB_PATH
+    from legal_kg.service import serve as run
+
+    run(host=host, port=port, db_path=Path(db_path) if db_path else DB_PATH, pool_size=pool_size)
+
 if __name__ == "__main__":
-    main()
+    arg_parser = argparse.ArgumentParser(description="Legal Knowledge Graph backend")
+    arg_parser.add_argument("--profile", nargs="?", const=True, default=None, metavar="DIR",
+                            help="Profile build-graph/authority (default directory: data/profiles/<time>-<command>)")
+    commands = arg_parser.add_subparsers(dest="command")
+    commands.add_parser("build-graph", help="Rebuild the knowledge graph tables")
+    authority_parser = commands.add_parser("authority", help="Recompute authority scores")
+    authority_parser.add_argument("--cold", action="store_true", help="Start from uniform scores")
+    serve_parser = commands.add_parser("serve", help="Run the HTTP query service")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8080)
+    serve_parser.add_argument("--pool-size", type=int, default=4, help="Read-only SQLite connections")
+    serve_parser.add_argument("--db", help="Serve another database (e.g. from scripts/synthetic_corpus.py)")
+    args = arg_parser.parse_args()
+
+    if args.command == "build-graph":
+        with profiling(args.profile, "build-graph"):
+            build_graph()
+    elif args.command == "authority":
+        conn = get_connection()
+        with profiling(args.profile, "authority"):
+            update_authority(conn, warm_start=not args.cold)
+        conn.close()
+    elif args.command == "serve":
+        serve(args.host, args.port, args.pool_size, args.db)
+    else:
+        main()
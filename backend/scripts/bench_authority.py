@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark PageRank authority scores on a synthetic citation graph: cold
+iterations, wall time and memory, then a small ingest refreshed with a warm
+start.
+
+    python3 scripts/bench_authority.py --edges 1000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+import numpy as np
+
+from legal_kg.authority import pagerank, transition_matrix
+
+
+def synthetic_edges(rng, first_case, cases, laws, per_case):
+    """Cases citing laws and earlier cases, both with Zipf-like popularity"""
+    counts = rng.poisson(per_case, size=cases) + 1
+    src = np.repeat(np.arange(first_case, first_case + cases), counts)
+    # Laws are nodes 0..laws-1; cited cases are drawn among the cases already there
+    to_law = rng.random(len(src)) < 0.7
+    dst = np.empty(len(src), dtype=np.int64)
+    dst[to_law] = np.minimum(rng.zipf(1.6, size=int(to_law.sum())), laws) - 1
+    earlier = np.maximum(src[~to_law] - laws, 1)
+    dst[~to_law] = laws + (earlier - np.minimum(rng.zipf(1.3, size=len(earlier)), earlier))
+    return src, dst
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark PageRank authority scores")
+    arg_parser.add_argument("--edges", type=int, default=1000000)
+    arg_parser.add_argument("--laws", type=int, default=5000)
+    arg_parser.add_argument("--per-case", type=int, default=5, help="Mean citations per case")
+    arg_parser.add_argument("--ingest", type=float, default=0.01, help="Fraction of new cases in the ingest")
+    args = arg_parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    # poisson(per_case) + 1 citations per case
+    cases = args.edges // (args.per_case + 1)
+    src, dst = synthetic_edges(rng, args.laws, cases, args.laws, args.per_case)
+    n = args.laws + cases
+
+    (matrix, dangling), build_time = timed(lambda: transition_matrix(src, dst, n))
+    memory = matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes + dangling.nbytes + 3 * n * 8
+    (scores, iterations, delta), cold_time = timed(lambda: pagerank(matrix, dangling))
+    print(f"{n} nodes, {len(src)} citations ({matrix.nnz} distinct edges): matrix {build_time:.2f}s, "
+          f"{memory / 2 ** 20:.1f} MiB (matrix + dangling mask + 3 score vectors)")
+    print(f"Cold start: {iterations} iterations, {cold_time:.2f}s ({cold_time / iterations * 1000:.1f} ms each), "
+          f"L1 change {delta:.1e}")
+
+    new_cases = max(int(cases * args.ingest), 1)
+    new_src, new_dst = synthetic_edges(rng, n, new_cases, args.laws, args.per_case)
+    src, dst = np.concatenate([src, new_src]), np.concatenate([dst, new_dst])
+    total = n + new_cases
+    (matrix, dangling), build_time = timed(lambda: transition_matrix(src, dst, total))
+    start = np.concatenate([scores, np.full(new_cases, 1.0 / total)])
+    (warm, warm_iterations, _), warm_time = timed(lambda: pagerank(matrix, dangling, start))
+    (cold, cold_iterations, _), cold_time = timed(lambda: pagerank(matrix, dangling))
+    print(f"Ingest of {new_cases} cases ({len(new_src)} edges): matrix {build_time:.2f}s")
+    print(f"  warm start: {warm_iterations} iterations, {warm_time:.2f}s")
+    print(f"  cold start: {cold_iterations} iterations, {cold_time:.2f}s")
+    print(f"  max difference warm vs cold: {np.abs(warm - cold).max():.1e}")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark the packed case corpus against the directory layout.
+
+Measures full-scan throughput (with and without full_text) and random
+lookups by case_number for both layouts.
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from legal_kg.casepack import CASES_DIR, CasePack, iter_case_files, load_case_dir, pack_case_dir
+
+
+def timed(label, count, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed else float("inf")
+    print(f"{label:<40} {elapsed * 1000:10.1f} ms  {rate:12.0f} ops/s")
+    return result
+
+
+def dir_lookup(cases_dir, case_number):
+    with open(Path(cases_dir) / case_number / f"{case_number}.json", "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark case pack vs directory layout")
+    arg_parser.add_argument("--cases-dir", type=Path, default=CASES_DIR)
+    arg_parser.add_argument("--lookups", type=int, default=10000)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    case_numbers = [p.parent.name for p in iter_case_files(args.cases_dir)]
+    n = len(case_numbers)
+    print(f"Corpus: {n} cases in {args.cases_dir}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pack_dir = Path(tmp) / "cases.pack"
+        timed("pack", n, lambda: pack_case_dir(args.cases_dir, pack_dir))
+
+        rng = random.Random(args.seed)
+        sample = [rng.choice(case_numbers) for _ in range(args.lookups)]
+
+        print("\nFull scan")
+        timed("directory (json.load per file)", n, lambda: sum(1 for _ in load_case_dir(args.cases_dir)))
+        with CasePack(pack_dir) as pack:
+            timed("pack open (index only)", 1, lambda: CasePack(pack_dir).close())
+            timed("pack scan, metadata only", n, lambda: sum(1 for _ in pack.iter_cases()))
+            timed("pack scan, with full_text", n, lambda: sum(1 for _ in pack.iter_cases(with_text=True)))
+
+            print(f"\nRandom lookups ({args.lookups})")
+            timed("directory", args.lookups, lambda: [dir_lookup(args.cases_dir, c) for c in sample])
+            timed("pack get", args.lookups, lambda: [pack.get(c) for c in sample])
+            timed("pack get, metadata only", args.lookups, lambda: [pack.get(c, with_text=False) for c in sample])
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark the citation parser on the legal_references of the whole case
+corpus (cases/, or a case pack): references/s uncached, memoized and in
+batch, against the regex extraction build-graph used before, and the cache
+hit ratio.
+
+    python3 scripts/bench_citations.py
+    python3 scripts/bench_citations.py --pack data/cases.pack --repeat 50
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from legal_kg.casepack import CASES_DIR, CasePack, load_case_dir
+from legal_kg.citations import parse_batch, parse_citations
+from legal_kg.sections import extract_references
+
+
+def corpus_references(cases_dir: Path = CASES_DIR, pack: Path = None):
+    cases = CasePack(pack).iter_cases() if pack else load_case_dir(cases_dir)
+    return [(ref.get('sfs_number') or '', ref.get('reference') or '')
+            for case in cases for ref in case.get('legal_references') or []]
+
+
+def timed(label, fn, n):
+    start = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - start
+    print(f"{label:<28} {seconds:8.3f}s {n / seconds:>12.0f} refs/s")
+    return seconds
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark the citation parser on the case corpus")
+    arg_parser.add_argument("--cases-dir", type=Path, default=CASES_DIR)
+    arg_parser.add_argument("--pack", type=Path, help="Read cases from a case pack instead of --cases-dir")
+    arg_parser.add_argument("--repeat", type=int, default=20,
+                            help="Parse the corpus this many times (a larger corpus repeats the same references)")
+    args = arg_parser.parse_args()
+
+    pairs = corpus_references(args.cases_dir, args.pack)
+    references = [reference for _, reference in pairs] * args.repeat
+    distinct = len(set(references))
+    print(f"{len(pairs)} references ({distinct} distinct) x {args.repeat} = {len(references)}")
+    if not references:
+        sys.exit(0)
+
+    baseline = timed("regex (extract_references)",
+                     lambda: [extract_references(sfs, {'text': ref}) for sfs, ref in pairs * args.repeat],
+                     len(references))
+    uncached = timed("grammar, uncached", lambda: [parse_citations.__wrapped__(r) for r in references],
+                     len(references))
+    parse_citations.cache_clear()
+    cached = timed("grammar, memoized", lambda: [parse_citations(r) for r in references], len(references))
+    info = parse_citations.cache_info()
+    parse_citations.cache_clear()
+    batch = timed("grammar, parse_batch", lambda: parse_batch(references), len(references))
+
+    print(f"Cache: {info.hits} hits, {info.misses} misses ({info.hits / (info.hits + info.misses):.1%} hit ratio)")
+    print(f"Memoized is {uncached / cached:.1f}x uncached, {baseline / cached:.1f}x the regex extraction; "
+          f"parse_batch {uncached / batch:.1f}x uncached")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark the bulk exporters on the graph of a synthetic corpus: rows/s per format and
+number of worker processes, and peak memory of the exporting process.
+
+    python3 scripts/bench_export.py --cases 200000 --workers 1 4 8
+"""
+
+import argparse
+import resource
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from legal_kg.export import export_graph
+from legal_kg.graph import build_graph
+from legal_kg.synthetic import CorpusProfile, SyntheticCorpus
+
+
+def build_synthetic_graph(path: Path, cases: int, laws: int, seed: int = 0):
+    """The graph of a synthetic corpus, built through build_graph as the scraped one is"""
+    corpus = SyntheticCorpus(CorpusProfile.from_corpus(), cases=cases, laws=laws, seed=seed)
+    conn = sqlite3.connect(path)
+    stats = build_graph(conn, cases=corpus.cases(with_text=False), laws=corpus.laws(with_sections=False))
+    conn.close()
+    return stats['nodes'], stats['edges']
+
+
+def available_formats():
+    formats = ["neo4j", "graphml"]
+    try:
+        import pyarrow  # noqa: F401
+        formats.append("parquet")
+    except ImportError:
+        pass
+    return formats
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark the bulk graph exporters")
+    arg_parser.add_argument("--cases", type=int, default=200000)
+    arg_parser.add_argument("--laws", type=int, default=5000)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    arg_parser.add_argument("--rows-per-file", type=int, default=250000)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp) / "graph.db"
+        nodes, edges = build_synthetic_graph(db, args.cases, args.laws, args.seed)
+        print(f"{nodes} nodes, {edges} edges, {db.stat().st_size / 2 ** 20:.0f} MiB database")
+        print(f"{'format':>8} {'workers':>8} {'files':>6} {'seconds':>8} {'rows/s':>10} {'output':>10}")
+        for fmt in available_formats():
+            for workers in args.workers:
+                out = Path(tmp) / ("graph.graphml" if fmt == "graphml" else f"{fmt}-{workers}")
+                stats = export_graph(db, out, fmt, workers=workers, rows_per_file=args.rows_per_file)
+                size = sum(Path(f).stat().st_size for f in stats['files'])
+                print(f"{fmt:>8} {workers:>8} {len(stats['files']):>6} {stats['seconds']:>8.2f} "
+                      f"{stats['rows_per_second']:>10.0f} {size / 2 ** 20:>8.0f}MiB")
+                for f in stats['files']:
+                    Path(f).unlink()
+        # Rows are streamed, so this stays flat as --cases grows
+        print(f"Peak RSS of this process: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark the facet index on a synthetic corpus (legal_kg/synthetic.py): build time, memory and
+latency of filtered queries and per-value counts.
+
+    python3 scripts/bench_facets.py --cases 1000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from legal_kg.facets import FacetIndex
+from legal_kg.synthetic import CASES_PER_KEYWORD, CorpusProfile, SyntheticCorpus
+
+COURTS = ["HDO", "HFD", "ADO", "MMOD", "MIOD", "PMOD", "HGO", "HSV", "HNN", "HVS", "HSB", "HON"]
+AREAS = ["Straffrätt", "Skatterätt", "Arbetsrätt", "Familjerätt", "Processrätt", "Förvaltningsrätt", "Avtalsrätt"]
+
+
+def synthetic_corpus(n, seed=0):
+    """
+    The synthetic corpus, spread over the courts the harvester covers and
+    given legal areas: the scraped sample is Högsta domstolen only, without areas.
+    """
+    profile = CorpusProfile.from_corpus()
+    profile.courts = [[[code, code], 0.5 ** i] for i, code in enumerate(COURTS)]
+    profile.legal_areas = [[area, 1] for area in AREAS]
+    profile.areas_per_case = [[0, 2], [1, 2], [2, 1]]
+    return SyntheticCorpus(profile, cases=n, seed=seed)
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark the facet index")
+    arg_parser.add_argument("--cases", type=int, default=1000000)
+    arg_parser.add_argument("--repeat", type=int, default=20)
+    args = arg_parser.parse_args()
+
+    corpus = synthetic_corpus(args.cases)
+    cases = list(corpus.cases(with_text=False))
+    common, rare = corpus.keyword(2), corpus.keyword(args.cases // CASES_PER_KEYWORD // 2)
+    start = time.perf_counter()
+    index = FacetIndex.from_cases(cases)
+    build = time.perf_counter() - start
+    print(f"Built index over {len(index)} cases in {build:.1f}s ({len(index) / build:.0f} cases/s), "
+          f"{index.nbytes() / 2 ** 20:.1f} MiB")
+
+    start = time.perf_counter()
+    for case in cases[:1000]:
+        index.add(dict(case, court_code="HFD"))
+    print(f"Re-ingested 1000 cases in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    queries = {
+        "corpus counts (running totals)": lambda: index.counts(top=20),
+        "court=HDO": lambda: index.query(court_code="HDO").count,
+        "precedent + court in (HFD, ADO)": lambda: index.query(is_precedent=True, court_code=["HFD", "ADO"]).count,
+        "rare keyword": lambda: index.query(keywords=rare).count,
+        "rare keyword + counts": lambda: index.query(keywords=rare).counts(top=20),
+        "keyword + area + date range": lambda: index.query(keywords=common, legal_areas="Straffrätt",
+                                                           date_from="2024-03-01", date_to="2024-08-31").count,
+        "date range + counts": lambda: index.query(date_from="2025-01-01").counts(top=20),
+        "court=HDO + counts": lambda: index.query(court_code="HDO").counts(top=20),
+    }
+    # Merges the re-ingested rows into the date order once, outside the timings
+    index.query(date_from="2000-01-01")
+    for name, query in queries.items():
+        print(f"  {name:<34} {timed(query, args.repeat) * 1e6:10.0f} µs")
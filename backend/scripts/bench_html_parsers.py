@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmark pages/s per HTML parser backend on the recorded lagboken pages.
+
+Each iteration does what a scraper does with a page: parse it, list the
+links, build the full text and run the title/description selectors.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from legal_kg.htmlparse import available_backends, parse_html
+
+FIXTURES = Path(__file__).parent.parent.parent / "fixtures" / "lagboken"
+SELECTORS = ['h1', '.page-title', '[class*="title"]', 'h2']
+
+
+def scrape_like(markup, backend):
+    doc = parse_html(markup, backend=backend)
+    doc.links()
+    doc.text()
+    for selector in SELECTORS:
+        doc.select_text(selector)
+    doc.select_attr('meta[name="description"]', 'content')
+
+
+def enlarge(markup: bytes, factor: int) -> bytes:
+    """Repeat the law text block to mimic a consolidated statute such as brottsbalken"""
+    start = markup.index(b'<div class="lawtext">')
+    end = markup.index(b'</div>', start) + len(b'</div>')
+    return markup[:start] + markup[start:end] * factor + markup[end:]
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark HTML parser backends")
+    arg_parser.add_argument("--iterations", type=int, default=200)
+    arg_parser.add_argument("--large-factor", type=int, default=200,
+                            help="Times to repeat the law text for the large-page case")
+    args = arg_parser.parse_args()
+
+    pages = {p.name: p.read_bytes() for p in sorted(FIXTURES.glob("*.html"))}
+    pages["law_semesterlag.html x%d" % args.large_factor] = enlarge(pages["law_semesterlag.html"], args.large_factor)
+
+    print(f"{'page':<32} {'size':>10} " + " ".join(f"{b + ' pages/s':>16}" for b in available_backends()))
+    for name, markup in pages.items():
+        iterations = max(1, args.iterations // (args.large_factor if " x" in name else 1))
+        rates = []
+        for backend in available_backends():
+            scrape_like(markup, backend)  # warm up
+            start = time.perf_counter()
+            for _ in range(iterations):
+                scrape_like(markup, backend)
+            rates.append(iterations / (time.perf_counter() - start))
+        print(f"{name:<32} {len(markup):>10} " + " ".join(f"{r:>16.1f}" for r in rates))
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Peak memory of the full-tree law-page parse vs the streaming parser.
+
+The recorded rättegångsbalken page is enlarged by repeating its chapters,
+to mimic consolidated statutes of growing size. The full-tree path gets the
+whole page as bytes (like response.content); the streaming path gets 64 KB
+chunks produced on the fly (like response.iter_content()).
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from legal_kg.htmlparse import parse_html
+from legal_kg.lawstream import iter_law_events, parse_metadata
+
+FIXTURE = Path(__file__).parent.parent.parent / "fixtures" / "lagboken" / "law_rattegangsbalken.html"
+CHUNK_SIZE = 65536
+
+
+def split_fixture():
+    page = FIXTURE.read_bytes()
+    start = page.index(b'<div class="lawtext">') + len(b'<div class="lawtext">')
+    end = page.index(b'</div>', start)
+    return page[:start], page[start:end], page[end:]
+
+
+def generate_chunks(chapters: int):
+    """Yield the enlarged page in CHUNK_SIZE pieces without building it in memory"""
+    head, body, tail = split_fixture()
+    buffer = bytearray(head)
+    for i in range(chapters):
+        buffer += body.replace(b'kap.', b'kap. ' + str(i).encode() + b' ')
+        while len(buffer) >= CHUNK_SIZE:
+            yield bytes(buffer[:CHUNK_SIZE])
+            del buffer[:CHUNK_SIZE]
+    buffer += tail
+    while buffer:
+        yield bytes(buffer[:CHUNK_SIZE])
+        del buffer[:CHUNK_SIZE]
+
+
+def full_tree(chapters: int):
+    content = b"".join(generate_chunks(chapters))
+    doc = parse_html(content)
+    full_text = doc.text()
+    start = full_text.find("SFS nr:")
+    parse_metadata(full_text[start:start + 2000])
+    return len(content), full_text.count("§")
+
+
+def streaming(chapters: int):
+    size = 0
+    sections = 0
+
+    def counted():
+        nonlocal size
+        for chunk in generate_chunks(chapters):
+            size += len(chunk)
+            yield chunk
+
+    for kind, _ in iter_law_events(counted()):
+        if kind == "section":
+            sections += 1
+    return size, sections
+
+
+def measure(func, chapters):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size, _ = func(chapters)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, peak, elapsed
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Peak memory: full-tree vs streaming law-page parse")
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000],
+                            help="Number of times the chapters are repeated")
+    args = arg_parser.parse_args()
+
+    print(f"{'page size':>12} {'full peak':>12} {'full s':>8} {'stream peak':>12} {'stream s':>9}")
+    for chapters in args.sizes:
+        size, full_peak, full_s = measure(full_tree, chapters)
+        _, stream_peak, stream_s = measure(streaming, chapters)
+        print(f"{size / 1e6:>10.1f}MB {full_peak / 1e6:>10.1f}MB {full_s:>8.2f} "
+              f"{stream_peak / 1e6:>10.2f}MB {stream_s:>9.2f}")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Bytes per record: the scrapers' dicts vs the slotted records of
+legal_kg.models, for laws and cases of the synthetic corpus, and the time
+to convert them to and from JSON.
+
+Both sides are read from JSON lines, as a loader would read them, so every
+dict carries its own copy of each key and repeated value. The law dicts are
+in the scrapers' format from before topics were interned (to_dict with
+expand_topic), a copy of the topic in every law.
+
+    python3 scripts/bench_records.py --records 100000
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from legal_kg.models import CaseRecord, LawRecord, TopicTable
+from legal_kg.synthetic import CorpusProfile, SyntheticCorpus
+
+
+def traced(build):
+    """(result, bytes still allocated by build())"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def report(name, lines, to_record, n):
+    dicts, dict_bytes = traced(lambda: [json.loads(line) for line in lines])
+    del dicts
+    records, record_bytes = traced(lambda: [to_record(json.loads(line)) for line in lines])
+    _, dump_s = timed(lambda: [json.dumps(record.to_dict(), ensure_ascii=False) for record in records])
+    _, load_s = timed(lambda: [to_record(json.loads(line)) for line in lines])
+    print(f"{name:>6} {dict_bytes / n:>10.0f} {record_bytes / n:>10.0f} {dict_bytes / record_bytes:>7.2f}x "
+          f"{n / dump_s:>12.0f} {n / load_s:>12.0f}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Bytes per record: dicts vs slotted records")
+    arg_parser.add_argument("--records", type=int, default=100000)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+    n = args.records
+
+    corpus = SyntheticCorpus(CorpusProfile.from_corpus(), cases=n, laws=n, seed=args.seed)
+    law_lines = [json.dumps(LawRecord.from_dict(law, topics=corpus.topics).to_dict(expand_topic=True),
+                            ensure_ascii=False) for law in corpus.laws(with_sections=False)]
+    case_lines = [json.dumps(case, ensure_ascii=False) for case in corpus.cases(with_text=False)]
+    topics = TopicTable()
+
+    print(f"{n} records each, bytes per record and records/s")
+    print(f"{'':>6} {'dict':>10} {'record':>10} {'saved':>8} {'to JSON/s':>12} {'from JSON/s':>12}")
+    report("law", law_lines, lambda data: LawRecord.from_dict(data, topics=topics), n)
+    report("case", case_lines, CaseRecord.from_dict, n)
+    print(f"{len(topics)} distinct topics stored once")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark the TF-IDF similarity index on cases of the synthetic corpus
+(legal_kg/synthetic.py):
+build time, matrix memory, save/load time and top-k query latency.
+
+    python3 scripts/bench_similarity.py --docs 100000
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from legal_kg.similarity import SimilarityIndex, case_document
+from legal_kg.synthetic import CorpusProfile, SyntheticCorpus
+
+def synthetic_documents(n, seed=0):
+    """Case documents as the index sees them, from the synthetic corpus"""
+    corpus = SyntheticCorpus(CorpusProfile.from_corpus(), cases=n, seed=seed)
+    for case in corpus.cases():
+        yield case['case_number'], case_document(case)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark the TF-IDF similarity index")
+    arg_parser.add_argument("--docs", type=int, default=100000)
+    arg_parser.add_argument("--queries", type=int, default=256)
+    arg_parser.add_argument("-k", type=int, default=10)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    docs = list(synthetic_documents(args.docs, args.seed))
+    index = SimilarityIndex()
+    _, tokenize_time = timed(lambda: index.add_many(docs))
+    _, weight_time = timed(lambda: index.matrix)
+    print(f"Built {len(index)} docs, {len(index.vocabulary)} terms, {index.matrix.nnz} non-zeros: "
+          f"tokenize {tokenize_time:.1f}s, weight+normalize {weight_time:.2f}s, {index.nbytes() / 2 ** 20:.1f} MiB")
+
+    extra = list(synthetic_documents(1000, seed=args.seed + 1))
+    _, add_time = timed(lambda: index.add_many((f"X{doc_id}", text) for doc_id, text in extra))
+    _, refresh_time = timed(lambda: index.matrix)
+    print(f"Added 1000 docs: tokenize {add_time * 1000:.0f} ms, re-weight {refresh_time * 1000:.0f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _, save_time = timed(lambda: index.save(Path(tmp)))
+        loaded, load_time = timed(lambda: SimilarityIndex.load(Path(tmp)))
+        print(f"Save {save_time:.2f}s, load (memory-mapped) {load_time * 1000:.0f} ms")
+
+        rng = random.Random(2)
+        ids = [rng.choice(loaded.ids) for _ in range(args.queries)]
+        loaded.related(ids[0], args.k)
+        timings = []
+        for doc_id in ids[:32]:
+            _, elapsed = timed(lambda: loaded.related(doc_id, args.k))
+            timings.append(elapsed)
+        timings.sort()
+        _, batch_time = timed(lambda: loaded.related_batch(ids, args.k))
+        _, search_time = timed(lambda: loaded.search(docs[0][1][:200], args.k))
+        print(f"related(): median {timings[len(timings) // 2] * 1000:.1f} ms, max {timings[-1] * 1000:.1f} ms")
+        print(f"related_batch({args.queries}): {batch_time * 1000:.0f} ms "
+              f"({batch_time / args.queries * 1000:.2f} ms per document)")
+        print(f"search(text): {search_time * 1000:.1f} ms")
+        del loaded
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Benchmark work-queue throughput against the number of worker processes.
+
+Each item parses a recorded law page and extracts title, metadata and
+important laws (the CPU-bound part of a law item), so items/s should grow
+close to linearly with the workers up to the number of cores.
+"""
+
+import argparse
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from legal_kg.htmlparse import parse_html
+from legal_kg.workqueue import WorkQueue
+from queue_worker import run_workers
+
+FIXTURES = Path(__file__).parent.parent.parent / "fixtures" / "lagboken"
+
+
+def handle_parse(item, queue):
+    from law_datascraper import LawDataScraper
+    scraper = LawDataScraper.__new__(LawDataScraper)
+    scraper.driver = None
+    doc = parse_html((FIXTURES / item['payload']).read_bytes())
+    return {
+        'title': scraper._extract_title(doc),
+        'sfs': scraper._extract_metadata_strict(doc).get('SFS nr'),
+        'important_laws': len(scraper._extract_important_laws(doc)),
+    }
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark the work queue")
+    arg_parser.add_argument("--items", type=int, default=400)
+    arg_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    arg_parser.add_argument("--batch", type=int, default=4)
+    args = arg_parser.parse_args()
+
+    pages = sorted(p.name for p in FIXTURES.glob("law_*.html"))
+    print(f"{multiprocessing.cpu_count()} cores, {args.items} items")
+    print(f"{'workers':>8} {'items/s':>10} {'speedup':>8}")
+    baseline = None
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "queue.db"
+            queue = WorkQueue(path)
+            queue.enqueue_many('parse', [(str(i), pages[i % len(pages)]) for i in range(args.items)])
+            queue.close()
+
+            start = time.perf_counter()
+            counts = run_workers(path, workers, batch=args.batch, handlers={'parse': handle_parse})
+            rate = counts['done'] / (time.perf_counter() - start)
+            baseline = baseline or rate
+            print(f"{workers:>8} {rate:>10.1f} {rate / baseline:>7.2f}x")
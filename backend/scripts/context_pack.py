@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Build a token-budgeted context pack for a seed and print it (or its JSON).
+
+    python3 scripts/context_pack.py 1962:700 --budget 2000
+    python3 scripts/context_pack.py "B 1462-25" --json
+    python3 scripts/context_pack.py "provokation misshandel" --repeat 100   # timing
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from legal_kg.context import ContextBuilder, default_case_text
+from legal_kg.database import DB_PATH
+from legal_kg.graph import Graph
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Build a context pack from the knowledge graph")
+    arg_parser.add_argument("seed", help="SFS number, case number or free text")
+    arg_parser.add_argument("--budget", type=int, default=2000, help="Token budget")
+    arg_parser.add_argument("--db", default=str(DB_PATH))
+    arg_parser.add_argument("--json", action="store_true", help="Print the whole pack as JSON")
+    arg_parser.add_argument("--repeat", type=int, default=0, help="Time N uncached builds")
+    args = arg_parser.parse_args()
+
+    conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    graph = Graph.load(conn)
+    case_text = default_case_text()
+    builder = ContextBuilder(graph, case_text)
+
+    start = time.perf_counter()
+    pack = builder.build(conn, args.seed, args.budget)
+    first = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps(pack, ensure_ascii=False, indent=2))
+    else:
+        print(pack['text'])
+        print()
+        print(f"{len(pack['items'])} items, {pack['tokens']}/{pack['budget']} tokens, "
+              f"graph version {pack['graph_version']}, built in {first * 1000:.1f} ms")
+
+    if args.repeat:
+        timings = []
+        for _ in range(args.repeat):
+            # A new builder each time so the pack cache does not answer
+            graph.neighbourhood.cache_clear()
+            start = time.perf_counter()
+            ContextBuilder(graph, case_text).build(conn, args.seed, args.budget)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        print(f"Uncached builds: median {timings[len(timings) // 2] * 1000:.2f} ms, "
+              f"max {timings[-1] * 1000:.2f} ms over {args.repeat}")
+    conn.close()
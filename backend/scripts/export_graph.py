@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Export the knowledge graph (python3 main.py build-graph first) for other tools.
+
+    python3 scripts/export_graph.py neo4j data/export/neo4j --workers 8
+    (cd data/export/neo4j && neo4j-admin database import full @import.args legalkg)
+    python3 scripts/export_graph.py graphml data/export/legal_kg.graphml
+    python3 scripts/export_graph.py parquet data/export/parquet        # needs pyarrow
+    python3 scripts/export_graph.py neo4j data/export/neo4j --verify   # check the CSVs as neo4j-admin would
+"""
+
+import argparse
+import multiprocessing
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from legal_kg.database import DB_PATH
+from legal_kg.export import BATCH_SIZE, FORMATS, ROWS_PER_FILE, export_graph, verify_neo4j_import
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Bulk export of the graph tables")
+    arg_parser.add_argument("format", choices=FORMATS)
+    arg_parser.add_argument("out", type=Path, help="Output directory (neo4j, parquet) or .graphml file")
+    arg_parser.add_argument("--db", type=Path, default=DB_PATH)
+    arg_parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    arg_parser.add_argument("--rows-per-file", type=int, default=ROWS_PER_FILE)
+    arg_parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    arg_parser.add_argument("--verify", action="store_true", help="Read a neo4j export back and check it")
+    args = arg_parser.parse_args()
+
+    stats = export_graph(args.db, args.out, args.format, workers=args.workers,
+                         rows_per_file=args.rows_per_file, batch_size=args.batch_size)
+    print(f"{stats['nodes']} nodes, {stats['edges']} edges in {len(stats['files'])} files, "
+          f"{stats['seconds']:.1f}s ({stats['rows_per_second']:.0f} rows/s)")
+    if args.verify and args.format == "neo4j":
+        check = verify_neo4j_import(args.out)
+        print(f"Import check: {check['nodes']} nodes {check['labels']}, "
+              f"{check['relationships']} relationships {check['types']}")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Find near-duplicate cases across case directories (MinHash + LSH).
+
+    python3 scripts/find_duplicates.py                             # cases/ and .old_data/
+    python3 scripts/find_duplicates.py --field summary --threshold 0.9
+    python3 scripts/find_duplicates.py --record                    # seed the ingest-time index
+    python3 scripts/find_duplicates.py --mark                      # write duplicate_of into the JSONs
+
+Directories are read in the order given, so the first copy of a document is
+the original. --record stores the signatures in doc_signatures (the table
+court_scraper checks new cases against); --mark sets duplicate_of in the
+duplicates' JSON files so build-graph skips them.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from legal_kg.casepack import iter_case_files
+from legal_kg.database import get_connection
+from legal_kg.dedup import DEFAULT_THRESHOLD, DedupIndex, LshIndex, MinHasher, case_text
+
+ROOT = Path(__file__).parent.parent.parent
+
+
+def document(case, field):
+    if field == "full_text":
+        return case_text(case)
+    return case.get(field) or ""
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Find near-duplicate cases")
+    arg_parser.add_argument("--dirs", nargs="+", type=Path, default=[ROOT / "cases", ROOT / ".old_data"])
+    arg_parser.add_argument("--field", default="full_text", help="full_text (falls back to summary) or any text field")
+    arg_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    arg_parser.add_argument("--record", action="store_true", help="Store signatures for ingest-time checks")
+    arg_parser.add_argument("--mark", action="store_true", help="Set duplicate_of in the duplicates' JSON files")
+    args = arg_parser.parse_args()
+
+    hasher = MinHasher()
+    lsh = LshIndex(args.threshold, hasher.num_perm)
+    recorder = DedupIndex(get_connection(), 'case', args.threshold, hasher) if args.record else None
+    duplicates = []
+    seen = 0
+    start = time.perf_counter()
+    for directory in args.dirs:
+        for path in iter_case_files(directory):
+            with open(path, "r", encoding="utf-8") as f:
+                case = json.load(f)
+            key = f"{directory.name}/{case['case_number']}"
+            signature = hasher.signature(document(case, args.field))
+            if signature is None:
+                continue
+            seen += 1
+            matches = lsh.query(signature)
+            if matches:
+                duplicates.append((key, path, *matches[0]))
+            else:
+                lsh.add(key, signature)
+            if recorder and directory == args.dirs[0]:
+                recorder.check(case['case_number'], document(case, args.field))
+    elapsed = time.perf_counter() - start
+
+    for key, path, original, score in duplicates:
+        print(f"{score:.2f}  {key}  duplicates  {original}")
+        if args.mark and path.parent.parent == args.dirs[0]:
+            with open(path, "r", encoding="utf-8") as f:
+                case = json.load(f)
+            case['duplicate_of'] = original.split("/", 1)[1]
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(case, f, ensure_ascii=False, indent=2)
+    print(f"{seen} documents, {len(duplicates)} near-duplicates, {lsh.comparisons} signature comparisons "
+          f"(all pairs: {seen * (seen - 1) // 2}), {elapsed:.2f}s; LSH {lsh.bands} bands x {lsh.rows} rows")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Harvest the rattspraxis search API for several courts, partitioned by court
+and decision-date window and fetched in parallel.
+
+    python3 scripts/harvest_cases.py --courts HDO HFD ADO --from 2000-01-01
+    python3 scripts/harvest_cases.py --courts HDO --enqueue   # then: queue_worker.py work
+
+The case metadata is written as JSON lines; --enqueue also puts every case
+into the work queue as a 'case' item so queue workers fetch full texts and
+PDFs. Exits with status 1 if any partition could not be verified.
+"""
+
+import argparse
+import json
+import sys
+from datetime import date
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+sys.path.append(str(ROOT / "cases"))
+
+from legal_kg.harvest import DEFAULT_MAX_HITS, Harvester, year_partitions
+from legal_kg.workqueue import DEFAULT_QUEUE_PATH, WorkQueue
+import court_scraper
+
+
+def search(court, date_from, date_to, page):
+    data = court_scraper.search_page(page, court_codes=[court], date_from=date_from, date_to=date_to)
+    return court_scraper.result_total(data), data.get("publiceringLista", [])
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Partitioned harvest of the rattspraxis search API")
+    arg_parser.add_argument("--courts", nargs="+", default=["HDO", "HFD"], help="Court codes (domstolKod)")
+    arg_parser.add_argument("--from", dest="date_from", type=date.fromisoformat, default=date(1990, 1, 1))
+    arg_parser.add_argument("--to", dest="date_to", type=date.fromisoformat, default=date.today())
+    arg_parser.add_argument("--workers", type=int, default=8, help="Partitions fetched in parallel")
+    arg_parser.add_argument("--max-hits", type=int, default=DEFAULT_MAX_HITS,
+                            help="Split partitions with more hits than this")
+    arg_parser.add_argument("--output", default=str(ROOT / "cases" / "harvest.jsonl"))
+    arg_parser.add_argument("--enqueue", action="store_true", help="Add the cases to the work queue")
+    arg_parser.add_argument("--queue", default=str(DEFAULT_QUEUE_PATH))
+    args = arg_parser.parse_args()
+
+    harvester = Harvester(search, per_page=court_scraper.CASES_PER_PAGE, max_hits=args.max_hits, workers=args.workers)
+    partitions = year_partitions(args.courts, args.date_from, args.date_to)
+    print(f"Harvesting {len(partitions)} partitions ({', '.join(args.courts)}, {args.date_from} - {args.date_to})")
+    result = harvester.harvest(partitions)
+
+    cases = [c for c in (court_scraper.parse_case(hit) for hit in result.cases.values()) if c]
+    with open(args.output, "w", encoding="utf-8") as f:
+        for case in cases:
+            f.write(json.dumps(case, ensure_ascii=False) + "\n")
+    print(f"Wrote {len(cases)} cases to {args.output}")
+
+    if args.enqueue:
+        queue = WorkQueue(args.queue)
+        added = queue.enqueue_many("case", [(c["case_id"] or c["case_number"], c) for c in cases])
+        queue.close()
+        print(f"Enqueued {added} new cases")
+
+    summary = result.summary()
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    sys.exit(1 if summary["problems"] else 0)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Load test for the graph query service: N keep-alive clients send a mix of
+law, citing-cases, neighbourhood and search requests for a fixed time and
+report requests/s and latency percentiles.
+
+    python3 main.py serve --port 8080 &
+    python3 scripts/loadtest_service.py --url http://127.0.0.1:8080 --clients 32 --duration 10
+"""
+
+import argparse
+import asyncio
+import random
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from legal_kg.database import DB_PATH
+
+SEARCH_WORDS = ["skadestånd", "provokation", "hovrätt", "prövningstillstånd", "avtal", "arbetsgivare", "misshandel"]
+
+
+def request_mix(db_path: Path, count: int, seed: int = 0):
+    """Request paths drawn from the nodes in the graph"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    laws = [row[0][4:] for row in conn.execute("SELECT id FROM graph_nodes WHERE kind = 'law'")]
+    nodes = [row[0] for row in conn.execute("SELECT id FROM graph_nodes WHERE kind IN ('law', 'case', 'section')")]
+    conn.close()
+    if not nodes:
+        raise SystemExit("The graph is empty, run: python3 main.py build-graph")
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.25 and laws:
+            paths.append(f"/laws/{rng.choice(laws)}")
+        elif roll < 0.45 and laws:
+            paths.append(f"/laws/{rng.choice(laws)}/cases?limit=20")
+        elif roll < 0.80:
+            # Hot neighbourhoods: most requests go to a few nodes
+            node = nodes[int(rng.paretovariate(1.2)) % len(nodes)]
+            paths.append(f"/nodes/{quote(node, safe='')}/neighbourhood?k={rng.choice([1, 2])}&limit=50")
+        else:
+            paths.append(f"/search?q={quote(rng.choice(SEARCH_WORDS))}&limit=10")
+    return paths
+
+
+async def client(host, port, paths, deadline, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    i = 0
+    try:
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            start = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode('latin-1'))
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':')[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if status >= 500:
+                errors.append(path)
+    finally:
+        writer.close()
+
+
+async def run(url, clients, duration, paths):
+    parts = urlsplit(url)
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        client(parts.hostname, parts.port or 80, paths[i::clients] or paths, deadline, latencies, errors)
+        for i in range(clients)
+    ])
+    return latencies, errors, time.perf_counter() - started
+
+
+def percentile(values, p):
+    return values[min(int(len(values) * p), len(values) - 1)]
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Load test the graph query service")
+    arg_parser.add_argument("--url", default="http://127.0.0.1:8080")
+    arg_parser.add_argument("--clients", type=int, default=16)
+    arg_parser.add_argument("--duration", type=float, default=10.0)
+    arg_parser.add_argument("--db", default=str(DB_PATH), help="Database to draw request paths from")
+    args = arg_parser.parse_args()
+
+    paths = request_mix(Path(args.db), 5000)
+    latencies, errors, elapsed = asyncio.run(run(args.url, args.clients, args.duration, paths))
+    latencies.sort()
+    print(f"{len(latencies)} requests in {elapsed:.1f}s with {args.clients} clients")
+    print(f"  requests/s: {len(latencies) / elapsed:.0f}")
+    print(f"  p50: {percentile(latencies, 0.50) * 1000:.2f} ms")
+    print(f"  p99: {percentile(latencies, 0.99) * 1000:.2f} ms")
+    print(f"  max: {latencies[-1] * 1000:.2f} ms")
+    print(f"  server errors: {len(errors)}")
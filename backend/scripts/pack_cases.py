@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Pack the scraped cases (cases/<nr>/<nr>.json) into a single pack directory
+that can be memory-mapped by legal_kg.casepack.CasePack
+"""
+
+import argparse
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from legal_kg.casepack import CASES_DIR, DEFAULT_PACK_DIR, pack_case_dir
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Pack case JSON files")
+    arg_parser.add_argument("--cases-dir", type=Path, default=CASES_DIR)
+    arg_parser.add_argument("--out", type=Path, default=DEFAULT_PACK_DIR)
+    args = arg_parser.parse_args()
+
+    print(f"Packing cases from {args.cases_dir}...")
+    count = pack_case_dir(args.cases_dir, args.out)
+    print(f"Packed {count} cases into {args.out}")
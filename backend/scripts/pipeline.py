@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+The whole workflow as one incremental pipeline:
+
+    discover_cases  rattspraxis search API, partitioned harvest   -> data/pipeline/discovered_cases.jsonl
+    discover_laws   lagboken topic pages, or its sitemaps         -> data/pipeline/law_links.json
+    fetch_cases     full text and PDFs of new cases              -> cases/<case_number>/
+    fetch_laws      law pages with their §-sections              -> data/pipeline/laws.jsonl (+ laws.topics.json)
+    parse           pack the case corpus                         -> data/cases.pack
+    extract         §-sections and their references, re-linking only changed sections (law_sections),
+                    and a new law version where the text changed (law_versions, legal_kg/temporal.py)
+    load            graph tables and authority scores (build-graph)
+    index           TF-IDF related-cases/laws indexes            -> data/similarity/
+
+A stage runs only when the content of its inputs, the outputs of the stages
+it depends on or its parameters changed; independent stages (cases and laws)
+run in parallel.
+
+    python3 scripts/pipeline.py --dry-run               # what would run, and why
+    python3 scripts/pipeline.py --offline               # local stages only, from the data on disk
+    python3 scripts/pipeline.py load --force extract
+    python3 scripts/pipeline.py --refresh --courts HDO HFD --from 2020-01-01
+    python3 scripts/pipeline.py --refresh --discovery sitemap    # laws from the sitemaps, refetched when lastmod moves
+    python3 scripts/pipeline.py --offline --metrics data/pipeline/metrics.json
+"""
+
+import argparse
+import hashlib
+import json
+import sqlite3
+import sys
+from datetime import date
+from itertools import chain
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "cases"))
+
+from legal_kg.authority import update_authority
+from legal_kg.casepack import CASES_DIR, DEFAULT_PACK_DIR, pack_case_dir
+from legal_kg.database import get_connection, init_database
+from legal_kg.graph import LAW_FILE_PATTERNS, build_graph, iter_law_files
+from legal_kg.harvest import Harvester, year_partitions
+from legal_kg.httpclient import ResilientSession
+from legal_kg.metrics import METRICS
+from legal_kg.models import LawRecord, TopicTable, topics_path
+from legal_kg.pipeline import Pipeline, Stage
+from legal_kg.resolver import UrlResolver
+from legal_kg.sections import law_sfs, sync_law_sections
+from legal_kg.similarity import SIMILARITY_DIR
+from legal_kg.sitemap import SITEMAP_URL, SitemapDiscovery, http_chunks
+from legal_kg.temporal import TemporalLawStore
+
+PIPELINE_DIR = ROOT / "backend" / "data" / "pipeline"
+STATE_DB = PIPELINE_DIR / "state.db"
+DISCOVERED_CASES = PIPELINE_DIR / "discovered_cases.jsonl"
+LAW_LINKS = PIPELINE_DIR / "law_links.json"
+FETCHED_LAWS = PIPELINE_DIR / "laws.jsonl"
+FETCHED_TOPICS = topics_path(FETCHED_LAWS)
+DEFAULT_TOPICS = ["https://www.lagboken.se/lagboken/start/arbetsratt-och-arbetsmiljoratt/"]
+
+SRC = "backend/src/legal_kg"
+CASE_FILES = "cases/*/*.json"
+
+
+def rel(path: Path) -> str:
+    return str(path.relative_to(ROOT))
+
+
+def read_jsonl(path: Path):
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def all_laws():
+    """Laws from the scrapers' JSON files and from fetch_laws"""
+    return chain(iter_law_files(ROOT), read_jsonl(FETCHED_LAWS))
+
+
+def discover_cases(courts, date_from, date_to):
+    import court_scraper
+
+    def search(court, start, end, page):
+        data = court_scraper.search_page(page, court_codes=[court], date_from=start, date_to=end)
+        return court_scraper.result_total(data), data.get("publiceringLista", [])
+
+    harvester = Harvester(search, per_page=court_scraper.CASES_PER_PAGE)
+    result = harvester.harvest(year_partitions(courts, date_from, date_to or date.today()))
+    cases = [c for c in (court_scraper.parse_case(hit) for hit in result.cases.values()) if c]
+    cases.sort(key=lambda c: c['case_number'])
+    PIPELINE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(DISCOVERED_CASES, "w", encoding="utf-8") as f:
+        for case in cases:
+            f.write(json.dumps(case, ensure_ascii=False) + "\n")
+    summary = result.summary()
+    return {'cases': len(cases), 'problems': len(summary['problems'])}
+
+
+def discover_laws(topics):
+    from get_laws_on_topic_scraper import GetLawsOnTopicScraper
+
+    scraper = GetLawsOnTopicScraper()
+    table = TopicTable()
+    links = {}
+    for url in topics:
+        topic_page_data = scraper.scrape_topic_all_pages(url)
+        topic = table.intern(url, topic_page_data['topic_info'])
+        for law in topic_page_data['laws']:
+            links.setdefault(law['url'], {**law, 'topic_id': topic.id})
+    write_law_links(links.values(), table)
+    return {'laws': len(links)}
+
+
+def discover_laws_from_sitemap(sitemap_url):
+    """Every law page the sitemaps list, with its lastmod; unchanged child sitemaps are not fetched"""
+    init_database()
+    conn = get_connection()
+    try:
+        stats = SitemapDiscovery(conn, http_chunks(ResilientSession())).discover(sitemap_url)
+        links = [{'title': None, 'reference': reference, 'url': url, 'lastmod': lastmod}
+                 for reference, url, lastmod in conn.execute("SELECT reference, url, lastmod FROM law_urls")]
+    finally:
+        conn.close()
+    write_law_links(links, TopicTable())
+    return {'laws': len(links), 'changed': len(stats['changed']), 'sitemaps_read': stats['sitemaps_read'],
+            'sitemaps_skipped': stats['sitemaps_skipped'], 'failed': len(stats['failed'])}
+
+
+def write_law_links(links, topics: TopicTable):
+    """Law links, each with the 'topic_id' of the topic it was found on, and the topics once"""
+    PIPELINE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(LAW_LINKS, "w", encoding="utf-8") as f:
+        json.dump({'topics': topics.to_list(), 'laws': sorted(links, key=lambda law: law['url'])},
+                  f, ensure_ascii=False, indent=2)
+
+
+def fetch_cases():
+    import court_scraper
+
+    fetched = saved = 0
+    for case in read_jsonl(DISCOVERED_CASES):
+        if (CASES_DIR / case['case_number'] / f"{case['case_number']}.json").exists():
+            saved += 1
+            continue
+        court_scraper.save_case(case)
+        fetched += 1
+    court_scraper.write_failed_downloads()
+    return {'fetched': fetched, 'already_saved': saved}
+
+
+def fetch_laws():
+    from law_datascraper import scrape_law_data
+
+    with open(LAW_LINKS, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        # Written before topics were interned: a topic copy on every link
+        link_topics = TopicTable()
+        links = [{**link, 'topic_id': link_topics.intern(link['topic_page_url'], link.get('topic_page_info')).id}
+                 if link.get('topic_page_url') else link for link in data]
+    else:
+        links, link_topics = data['laws'], TopicTable.from_list(data['topics'])
+    # laws.jsonl is appended to across runs, so its topic ids come from a table of its own
+    topics = TopicTable.load(FETCHED_TOPICS)
+    topics.save(FETCHED_TOPICS)
+    # link url -> sitemap lastmod of the copy fetched last (None for topic-page links)
+    done = {law.get('link_url') or law.get('url'): law.get('sitemap_lastmod') for law in read_jsonl(FETCHED_LAWS)}
+    fetched = failed = broken = 0
+    init_database()
+    conn = get_connection()
+    resolver = UrlResolver(conn)
+    try:
+        # Appended one by one, so an interrupted run keeps what it fetched; a law whose
+        # sitemap lastmod moved is appended again and its later copy wins
+        with open(FETCHED_LAWS, "a", encoding="utf-8") as f:
+            for link in links:
+                lastmod = link.get('lastmod')
+                if link['url'] in done and not (lastmod and (done[link['url']] or "") < lastmod):
+                    continue
+                # The verified URL of the law, or None while its link is known to be broken
+                url = resolver.resolve(link.get('reference'), [link['url']])
+                if not url:
+                    broken += 1
+                    continue
+                law_data = scrape_law_data(url, save_to_file=False, streaming=True)
+                if not law_data:
+                    failed += 1
+                    continue
+                if url != link['url']:
+                    law_data['link_url'] = link['url']
+                if lastmod:
+                    law_data['sitemap_lastmod'] = lastmod
+                topic = None
+                if link.get('topic_id') is not None:
+                    known = len(topics)
+                    topic = link_topics[link['topic_id']]
+                    topic = topics.intern(topic.url, topic.info())
+                    if len(topics) != known:
+                        # Saved before a line refers to it
+                        topics.save(FETCHED_TOPICS)
+                f.write(LawRecord.from_dict(law_data, topic=topic).to_json() + "\n")
+                f.flush()
+                fetched += 1
+    finally:
+        conn.close()
+    return {'fetched': fetched, 'failed': failed, 'known_broken': broken, 'already_fetched': len(done)}
+
+
+def parse():
+    return {'cases': pack_case_dir(CASES_DIR, DEFAULT_PACK_DIR)}
+
+
+def extract():
+    init_database()
+    conn = get_connection()
+    try:
+        # The same law is in several topic dumps; the last copy read wins
+        laws = {}
+        for law in all_laws():
+            sfs = law_sfs(law)
+            if sfs and law.get('sections'):
+                laws[sfs] = law
+        totals = {}
+        store = TemporalLawStore(conn)
+        for sfs, law in laws.items():
+            for key, value in sync_law_sections(conn, sfs, law['sections']).items():
+                totals[key] = totals.get(key, 0) + value
+            try:
+                version = store.record_law(law)
+            except ValueError:
+                # A dump older than the newest version on record
+                totals['stale_versions'] = totals.get('stale_versions', 0) + 1
+                continue
+            if version['added'] or version['changed'] or version['repealed']:
+                totals['versions'] = totals.get('versions', 0) + 1
+        # Dependants only see a change when a section's content did change
+        digest = hashlib.sha256()
+        for sid, content_hash in conn.execute("SELECT id, content_hash FROM law_sections ORDER BY id"):
+            digest.update(f"{sid}\0{content_hash}\n".encode("utf-8"))
+        return {'laws': len(laws), **totals, 'digest': digest.hexdigest()}
+    finally:
+        conn.close()
+
+
+def load():
+    init_database()
+    conn = get_connection()
+    try:
+        stats = build_graph(conn, laws=list(all_laws()))
+        stats['authority_iterations'] = update_authority(conn)['iterations']
+        return stats
+    finally:
+        conn.close()
+
+
+def index():
+    from similarity_index import build
+
+    build(SIMILARITY_DIR, law_data=list(all_laws()))
+    return None
+
+
+def build_stages(args):
+    def discover_law_links():
+        if args.discovery == "sitemap":
+            return discover_laws_from_sitemap(args.sitemap)
+        return discover_laws(args.topics)
+
+    law_files = tuple(LAW_FILE_PATTERNS) + (rel(FETCHED_LAWS),)
+    return [
+        Stage("discover_cases", lambda: discover_cases(args.courts, args.date_from, args.date_to),
+              outputs=(rel(DISCOVERED_CASES),), network=True,
+              params={'courts': args.courts, 'from': args.date_from, 'to': args.date_to}),
+        Stage("discover_laws", discover_law_links,
+              outputs=(rel(LAW_LINKS),), network=True,
+              params={'topics': args.topics} if args.discovery == "topics"
+              else {'discovery': args.discovery, 'sitemap': args.sitemap}),
+        Stage("fetch_cases", fetch_cases, inputs=(rel(DISCOVERED_CASES),), outputs=(CASE_FILES,),
+              deps=("discover_cases",), network=True),
+        Stage("fetch_laws", fetch_laws, inputs=(rel(LAW_LINKS),), outputs=(rel(FETCHED_LAWS), rel(FETCHED_TOPICS)),
+              deps=("discover_laws",), network=True),
+        Stage("parse", parse, inputs=(CASE_FILES, f"{SRC}/casepack.py"), outputs=(rel(DEFAULT_PACK_DIR / "*"),),
+              deps=("fetch_cases",)),
+        Stage("extract", extract, inputs=law_files + (f"{SRC}/sections.py", f"{SRC}/temporal.py"), deps=("fetch_laws",)),
+        Stage("load", load, inputs=(CASE_FILES,) + law_files + (f"{SRC}/graph.py", f"{SRC}/authority.py"),
+              deps=("parse", "extract")),
+        Stage("index", index, inputs=law_files + (f"{SRC}/similarity.py",),
+              outputs=(rel(SIMILARITY_DIR / "*" / "index.json"),), deps=("parse", "fetch_laws")),
+    ]
+
+
+def report(stage, event, detail):
+    print(f"[{event:>8}] {stage}: {detail}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Run the stale stages of the data pipeline")
+    arg_parser.add_argument("targets", nargs="*", help="Stages to bring up to date (default: all)")
+    arg_parser.add_argument("--dry-run", action="store_true", help="Explain what would run, run nothing")
+    arg_parser.add_argument("--force", nargs="+", default=[], metavar="STAGE", help="Run these stages regardless")
+    arg_parser.add_argument("--refresh", action="store_true", help="Rerun the network stages")
+    arg_parser.add_argument("--offline", action="store_true", help="Skip the network stages")
+    arg_parser.add_argument("--workers", type=int, default=4, help="Stages run in parallel")
+    arg_parser.add_argument("--courts", nargs="+", default=["HDO"], help="Court codes to discover cases for")
+    arg_parser.add_argument("--from", dest="date_from", default="1990-01-01", type=date.fromisoformat)
+    arg_parser.add_argument("--to", dest="date_to", default=None, type=date.fromisoformat,
+                            help="Default: today (rerun with --refresh to pick up new cases)")
+    arg_parser.add_argument("--discovery", choices=["topics", "sitemap"], default="topics",
+                            help="Find laws by walking topic pages, or in lagboken's sitemaps")
+    arg_parser.add_argument("--topics", nargs="+", default=DEFAULT_TOPICS, help="Topic pages to discover laws on")
+    arg_parser.add_argument("--sitemap", default=SITEMAP_URL, help="Sitemap (index) URL for --discovery sitemap")
+    arg_parser.add_argument("--metrics", type=Path, default=None, metavar="PATH",
+                            help="Write the run's metrics here (.json summary, otherwise Prometheus text)")
+    args = arg_parser.parse_args()
+
+    PIPELINE_DIR.mkdir(parents=True, exist_ok=True)
+    # Own state database: stages write the main one while the runner records progress
+    pipeline = Pipeline(build_stages(args), ROOT, sqlite3.connect(STATE_DB))
+
+    if args.dry_run:
+        for decision in pipeline.plan(args.targets, args.force, args.refresh, args.offline):
+            print(f"{decision.action:<6} {decision.stage:<15} {'; '.join(decision.reasons)}")
+        sys.exit(0)
+
+    results = pipeline.run(args.targets, args.force, args.refresh, args.offline, args.workers, on_event=report)
+    for result in results:
+        stats = {k: v for k, v in (result['stats'] or {}).items() if k != 'digest'}
+        print(f"{result['status']:<8} {result['stage']:<15} {result['seconds']:6.1f}s  {stats or ''}")
+    if args.metrics:
+        print(f"Metrics written to {METRICS.write(args.metrics)}")
+    sys.exit(1 if any(r['status'] in ('failed', 'blocked') for r in results) else 0)
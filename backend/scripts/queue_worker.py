@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Sharded crawl through the SQLite work queue.
+
+Seed the queue, then start as many workers as there are cores (on one
+machine: the queue file is in WAL mode and must not be on a network share):
+
+    python3 scripts/queue_worker.py seed-topics https://www.lagboken.se/lagboken/start/arbetsratt-och-arbetsmiljoratt/
+    python3 scripts/queue_worker.py seed-court --courts HDO HFD --pages 3
+    python3 scripts/queue_worker.py work --workers 8
+    python3 scripts/queue_worker.py stats
+    python3 scripts/queue_worker.py export law laws.jsonl
+    python3 scripts/queue_worker.py failed-downloads
+
+Work item kinds:
+    topic       topic URL -> all law links, enqueued as 'law' items
+    law         law URL -> scraped law data (stored as the item result), with the
+                URL of the topic it was found on; 'export law' writes them as
+                LawRecord lines with a topic_id into <output>.topics.json
+    court_page  '<court>:<page>' search page -> its cases, enqueued as 'case' items
+    case        case dict -> full text and PDFs saved under cases/<case_number>/;
+                PDFs that failed to download are kept in the item's result and
+                merged into cases/failed_downloads.json by the parent process
+"""
+
+import argparse
+import json
+import multiprocessing
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "cases"))
+
+from legal_kg.models import LawRecord, TopicTable, topics_path
+from legal_kg.workqueue import DEFAULT_LEASE_SECONDS, DEFAULT_QUEUE_PATH, WorkQueue, run_worker
+
+# One scraper per worker process, so sessions and pacing state are reused
+_scrapers = {}
+
+
+def _scraper(name):
+    if name not in _scrapers:
+        if name == 'topic':
+            from get_laws_on_topic_scraper import GetLawsOnTopicScraper
+            _scrapers[name] = GetLawsOnTopicScraper()
+        elif name == 'law':
+            from law_datascraper import LawDataScraper
+            _scrapers[name] = LawDataScraper(headless=True)
+        elif name == 'court':
+            import court_scraper
+            _scrapers[name] = court_scraper
+    return _scrapers[name]
+
+
+def handle_topic(item, queue):
+    topic_page_data = _scraper('topic').scrape_topic_all_pages(item['key'])
+    added = queue.enqueue_many('law', [(law['url'], {**law, 'topic_page_url': item['key']})
+                                       for law in topic_page_data['laws'] if law.get('url')])
+    return {
+        'topic_info': topic_page_data['topic_info'],
+        'total_laws_found': topic_page_data['total_laws_found'],
+        'laws_enqueued': added,
+        'failed_pages': topic_page_data['failed_pages']
+    }
+
+
+def handle_law(item, queue):
+    law_data = _scraper('law').scrape_law_page(item['key'])
+    if not law_data:
+        raise RuntimeError("no law data")
+    if item['payload']:
+        # The topic's title and description are in the topic item's result
+        law_data['topic_page_url'] = item['payload'].get('topic_page_url')
+    return law_data
+
+
+def handle_court_page(item, queue):
+    court_scraper = _scraper('court')
+    court, page = item['key'].rsplit(':', 1)
+    data = court_scraper.search_page(int(page), court_codes=[court])
+    cases = [c for c in (court_scraper.parse_case(hit) for hit in data.get('publiceringLista', [])) if c]
+    added = queue.enqueue_many('case', [(c['case_id'] or c['case_number'], c) for c in cases])
+    return {'cases_found': len(cases), 'cases_enqueued': added}
+
+
+def handle_case(item, queue):
+    court_scraper = _scraper('court')
+    case = item['payload']
+    start = len(court_scraper.failed_downloads)
+    court_scraper.save_case(case, cases_dir=str(ROOT / "cases"))
+    # Workers never write the shared failed_downloads.json; see write_failed_downloads
+    failed = court_scraper.failed_downloads[start:]
+    del court_scraper.failed_downloads[start:]
+    return {'case_number': case['case_number'], 'full_text_length': len(case['full_text']),
+            'failed_downloads': failed}
+
+
+HANDLERS = {
+    'topic': handle_topic,
+    'law': handle_law,
+    'court_page': handle_court_page,
+    'case': handle_case,
+}
+
+
+def export_results(queue, kind, output):
+    """
+    The results of a kind as JSON lines of {'key', 'result'}. Laws are written
+    as LawRecord dicts whose topic_id indexes the topics saved next to output.
+    """
+    topics = TopicTable()
+    topic_infos = {url: (result or {}).get('topic_info') for url, result in queue.results('topic')}
+    n = 0
+    with open(output, 'w', encoding='utf-8') as f:
+        for key, result in queue.results(kind):
+            if kind == 'law':
+                url = result.pop('topic_page_url', None)
+                topic = topics.intern(url, topic_infos.get(url)) if url else None
+                result = LawRecord.from_dict(result, topic=topic).to_dict()
+            f.write(json.dumps({'key': key, 'result': result}, ensure_ascii=False) + "\n")
+            n += 1
+    if kind == 'law':
+        topics.save(topics_path(output))
+    return n
+
+
+def write_failed_downloads(queue, cases_dir=ROOT / "cases"):
+    """Merge the failed PDF downloads of all done case items into cases_dir/failed_downloads.json"""
+    failed = [entry for _, result in queue.results('case') for entry in (result or {}).get('failed_downloads', [])]
+    if failed:
+        with open(Path(cases_dir) / "failed_downloads.json", 'w', encoding='utf-8') as f:
+            json.dump(failed, f, ensure_ascii=False, indent=2)
+        print(f"{len(failed)} PDF downloads failed, see {cases_dir}/failed_downloads.json")
+    return len(failed)
+
+
+def run_workers(queue_path, workers, kinds=None, batch=1, lease_seconds=DEFAULT_LEASE_SECONDS, handlers=HANDLERS):
+    """Run `workers` worker processes until the queue is drained"""
+    with multiprocessing.Pool(workers) as pool:
+        results = pool.starmap(run_worker, [
+            (queue_path, handlers, i, kinds, batch, lease_seconds) for i in range(workers)
+        ])
+    return {
+        'done': sum(r['done'] for r in results),
+        'failed': sum(r['failed'] for r in results),
+    }
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Multi-process crawl via the SQLite work queue")
+    arg_parser.add_argument("--queue", default=str(DEFAULT_QUEUE_PATH), help="Queue database file")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    seed_topics = commands.add_parser("seed-topics", help="Enqueue topic page URLs")
+    seed_topics.add_argument("urls", nargs="+")
+    seed_laws = commands.add_parser("seed-laws", help="Enqueue law page URLs")
+    seed_laws.add_argument("urls", nargs="+")
+    seed_court = commands.add_parser("seed-court", help="Enqueue court search pages")
+    seed_court.add_argument("--courts", nargs="+", default=["HDO"])
+    seed_court.add_argument("--pages", type=int, default=3)
+
+    work = commands.add_parser("work", help="Run worker processes until the queue is drained")
+    work.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    work.add_argument("--kinds", nargs="+", choices=sorted(HANDLERS), help="Only these kinds (default all)")
+    work.add_argument("--batch", type=int, default=1, help="Items leased at a time")
+    work.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS, help="Lease length in seconds")
+
+    commands.add_parser("stats", help="Item counts per kind and status")
+    commands.add_parser("failed-downloads", help="Write cases/failed_downloads.json from the case results")
+    requeue = commands.add_parser("requeue-failed", help="Retry failed items")
+    requeue.add_argument("--kind")
+    export = commands.add_parser("export", help="Write the results of a kind as JSON lines")
+    export.add_argument("kind", choices=sorted(HANDLERS))
+    export.add_argument("output")
+    args = arg_parser.parse_args()
+
+    queue = WorkQueue(args.queue)
+    if args.command == "seed-topics":
+        print(f"Enqueued {queue.enqueue_many('topic', [(url, None) for url in args.urls])} topics")
+    elif args.command == "seed-laws":
+        print(f"Enqueued {queue.enqueue_many('law', [(url, None) for url in args.urls])} laws")
+    elif args.command == "seed-court":
+        keys = [(f"{court}:{page}", None) for court in args.courts for page in range(args.pages)]
+        print(f"Enqueued {queue.enqueue_many('court_page', keys)} court search pages")
+    elif args.command == "work":
+        queue.close()
+        counts = run_workers(args.queue, args.workers, args.kinds, args.batch, args.lease)
+        print(f"Workers finished: {counts['done']} done, {counts['failed']} failed attempts")
+        queue = WorkQueue(args.queue)
+        write_failed_downloads(queue)
+    elif args.command == "failed-downloads":
+        if not write_failed_downloads(queue):
+            print("No failed PDF downloads")
+    elif args.command == "requeue-failed":
+        print(f"Requeued {queue.requeue_failed(args.kind)} items")
+    elif args.command == "export":
+        n = export_results(queue, args.kind, args.output)
+        print(f"Wrote {n} {args.kind} results to {args.output}")
+
+    if args.command in ("stats", "work"):
+        for kind, counts in sorted(queue.stats().items()):
+            print(f"  {kind:<12} " + " ".join(f"{status}={n}" for status, n in counts.items()))
+    queue.close()
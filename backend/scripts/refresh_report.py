@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Show how fresh the tracked statutes are and which laws the refresh
+scheduler would fetch next (laws are refreshed by law_datascraper.refresh_due_laws)
+"""
+
+import argparse
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from legal_kg.database import get_connection
+from legal_kg.refresh import RefreshScheduler
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Statute refresh report")
+    arg_parser.add_argument("--budget", type=int, default=200, help="Daily request budget")
+    arg_parser.add_argument("--show", type=int, default=10, help="Number of planned URLs to list")
+    args = arg_parser.parse_args()
+
+    conn = get_connection()
+    scheduler = RefreshScheduler(conn, daily_budget=args.budget)
+
+    print("Corpus freshness")
+    for key, value in scheduler.freshness_report().items():
+        print(f"  {key:<24} {value}")
+
+    planned = scheduler.plan()
+    print(f"\nNext {min(args.show, len(planned))} of {len(planned)} laws due:")
+    for url in planned[:args.show]:
+        print(f"  {url}")
+    conn.close()
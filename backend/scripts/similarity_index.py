@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Build and query the TF-IDF "related cases" / "related laws" indexes.
+
+    python3 scripts/similarity_index.py build                 # cases/ (or data/cases.pack) and scraped laws
+    python3 scripts/similarity_index.py related "B 1462-25"
+    python3 scripts/similarity_index.py related 1962:700 --laws
+    python3 scripts/similarity_index.py search "skadestånd vid provokation"
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from legal_kg.casepack import DEFAULT_PACK_DIR, INDEX_FILE, CasePack, load_case_dir
+from legal_kg.graph import iter_law_files
+from legal_kg.sections import law_sfs
+from legal_kg.similarity import SIMILARITY_DIR, SimilarityIndex, case_document, law_document
+
+
+def iter_cases():
+    if (DEFAULT_PACK_DIR / INDEX_FILE).exists():
+        with CasePack(DEFAULT_PACK_DIR) as pack:
+            yield from pack.iter_cases(with_text=True)
+    else:
+        yield from load_case_dir()
+
+
+def build(out_dir: Path, law_data=None):
+    start = time.perf_counter()
+    cases = SimilarityIndex()
+    cases.add_many((case['case_number'], case_document(case)) for case in iter_cases())
+    cases.save(out_dir / "cases")
+    print(f"Indexed {len(cases)} cases ({len(cases.vocabulary)} terms) in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    laws = SimilarityIndex()
+    for law in (law_data if law_data is not None else iter_law_files()):
+        sfs = law_sfs(law)
+        # The same law shows up in several topic dumps
+        if sfs and sfs not in laws.row_of:
+            laws.add(sfs, law_document(law))
+    laws.save(out_dir / "laws")
+    print(f"Indexed {len(laws)} laws ({len(laws.vocabulary)} terms) in {time.perf_counter() - start:.1f}s")
+
+
+def show(results):
+    for doc_id, score in results:
+        print(f"  {score:.3f}  {doc_id}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="TF-IDF similarity indexes for cases and laws")
+    arg_parser.add_argument("--dir", type=Path, default=SIMILARITY_DIR)
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("build", help="Build both indexes from the local data")
+    related_parser = commands.add_parser("related", help="Documents most similar to an indexed one")
+    related_parser.add_argument("doc_id", help="Case number, or SFS number with --laws")
+    related_parser.add_argument("--laws", action="store_true")
+    related_parser.add_argument("-k", type=int, default=10)
+    search_parser = commands.add_parser("search", help="Documents most similar to a free text")
+    search_parser.add_argument("text")
+    search_parser.add_argument("--laws", action="store_true")
+    search_parser.add_argument("-k", type=int, default=10)
+    args = arg_parser.parse_args()
+
+    if args.command == "build":
+        build(args.dir)
+    else:
+        index = SimilarityIndex.load(args.dir / ("laws" if args.laws else "cases"))
+        if args.command == "related":
+            if args.doc_id not in index.row_of:
+                raise SystemExit(f"{args.doc_id} is not in the index")
+            show(index.related(args.doc_id, args.k))
+        else:
+            show(index.search(args.text, args.k))
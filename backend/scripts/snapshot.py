@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Content-addressed snapshots of scraped data
+
+    python3 scripts/snapshot.py take ../cases
+    python3 scripts/snapshot.py list
+    python3 scripts/snapshot.py diff 20250628_162542 20250701_090000
+    python3 scripts/snapshot.py checkout 20250701_090000 /tmp/cases
+"""
+
+import argparse
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from legal_kg.snapshots import DEFAULT_STORE_DIR, GC_GRACE_SECONDS, SnapshotStore
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Content-addressed snapshot store")
+    arg_parser.add_argument("--store", type=Path, default=DEFAULT_STORE_DIR)
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    take = commands.add_parser("take", help="Snapshot a directory")
+    take.add_argument("source", type=Path)
+    take.add_argument("--name")
+    take.add_argument("--parent", help="Snapshot to compare mtimes against (default: latest of the same source)")
+
+    commands.add_parser("list", help="List snapshots")
+
+    diff = commands.add_parser("diff", help="Show changes between two snapshots")
+    diff.add_argument("old")
+    diff.add_argument("new")
+
+    checkout = commands.add_parser("checkout", help="Copy a snapshot into a directory")
+    checkout.add_argument("name")
+    checkout.add_argument("dest", type=Path)
+
+    gc = commands.add_parser("gc", help="Delete unreferenced objects")
+    gc.add_argument("--grace-days", type=float, default=GC_GRACE_SECONDS / 86400,
+                    help="Keep unreferenced objects stored or reused this recently (default: %(default)g)")
+
+    args = arg_parser.parse_args()
+    store = SnapshotStore(args.store)
+
+    if args.command == "take":
+        stats = store.take_snapshot(args.source, name=args.name, parent=args.parent)
+        print(f"Snapshot {stats['name']} (parent: {stats['parent']})")
+        print(f"  files: {stats['files']}, hashed: {stats['hashed']}, "
+              f"new objects: {stats['new_objects']}, bytes written: {stats['bytes_written']}")
+        print(f"  store size: {store.disk_usage()} bytes")
+    elif args.command == "list":
+        for name in store.list_snapshots():
+            manifest = store.load_manifest(name)
+            print(f"{name}  {len(manifest['files'])} files  {manifest['source']}")
+    elif args.command == "diff":
+        changes = store.diff(args.old, args.new)
+        for kind, symbol in (("added", "+"), ("removed", "-"), ("changed", "~")):
+            for path in changes[kind]:
+                print(f"{symbol} {path}")
+        print(f"{len(changes['added'])} added, {len(changes['removed'])} removed, {len(changes['changed'])} changed")
+    elif args.command == "checkout":
+        count = store.checkout(args.name, args.dest)
+        print(f"Checked out {count} files into {args.dest}")
+    elif args.command == "gc":
+        print(f"Removed {store.gc(args.grace_days * 86400)} unreferenced objects")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic corpus with the shape of the scraped one (see
+legal_kg/synthetic.py): a case pack, the laws as JSON lines (their topic_id
+indexes laws.topics.json) and the profile it was drawn from. Optionally load
+it into a separate database for the query service and its load test.
+
+    python3 scripts/synthetic_corpus.py --cases 1000000 --laws 50000 --seed 0
+    python3 scripts/synthetic_corpus.py --cases 100000 --laws 5000 --db data/synthetic/legal_kg.db
+    python3 main.py serve --db data/synthetic/legal_kg.db &
+    python3 scripts/loadtest_service.py --db data/synthetic/legal_kg.db
+    python3 scripts/synthetic_corpus.py --profile-only          # print the measured profile
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from legal_kg.authority import update_authority
+from legal_kg.casepack import CasePack, write_pack
+from legal_kg.graph import build_graph
+from legal_kg.models import topics_path
+from legal_kg.synthetic import CorpusProfile, SyntheticCorpus
+
+SYNTHETIC_DIR = Path(__file__).parent.parent / "data" / "synthetic"
+
+
+def write_laws(laws, path: Path) -> int:
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for law in laws:
+            f.write(json.dumps(law, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def read_laws(path: Path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Generate a synthetic corpus shaped like the scraped one")
+    arg_parser.add_argument("--cases", type=int, default=100000)
+    arg_parser.add_argument("--laws", type=int, default=5000)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--out", type=Path, default=SYNTHETIC_DIR)
+    arg_parser.add_argument("--profile", type=Path, help="Use a saved profile instead of measuring cases/")
+    arg_parser.add_argument("--no-text", action="store_true", help="Leave out full_text and law sections")
+    arg_parser.add_argument("--db", type=Path, help="Also build the graph and authority scores in this database")
+    arg_parser.add_argument("--profile-only", action="store_true", help="Print the measured profile and exit")
+    args = arg_parser.parse_args()
+
+    profile = CorpusProfile.load(args.profile) if args.profile else CorpusProfile.from_corpus()
+    if args.profile_only:
+        for key, value in profile.to_dict().items():
+            shown = value[:10] if isinstance(value, list) else value
+            print(f"{key}: {json.dumps(shown, ensure_ascii=False)}" + (f" ... ({len(value)})" if shown != value else ""))
+        sys.exit(0)
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    profile.save(args.out / "profile.json")
+    corpus = SyntheticCorpus(profile, cases=args.cases, laws=args.laws, seed=args.seed)
+
+    start = time.perf_counter()
+    laws = write_laws(corpus.laws(with_sections=not args.no_text), args.out / "laws.jsonl")
+    corpus.topics.save(topics_path(args.out / "laws.jsonl"))
+    print(f"{laws} laws -> {args.out / 'laws.jsonl'} in {time.perf_counter() - start:.1f}s")
+    start = time.perf_counter()
+    cases = write_pack(corpus.cases(with_text=not args.no_text), args.out / "cases.pack")
+    print(f"{cases} cases -> {args.out / 'cases.pack'} in {time.perf_counter() - start:.1f}s")
+
+    if args.db:
+        args.db.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(args.db)
+        start = time.perf_counter()
+        with CasePack(args.out / "cases.pack") as pack:
+            stats = build_graph(conn, cases=pack.iter_cases(with_text=True), laws=read_laws(args.out / "laws.jsonl"))
+        authority = update_authority(conn)
+        conn.close()
+        print(f"Graph: {stats['nodes']} nodes, {stats['edges']} edges, authority in {authority['iterations']} "
+              f"iterations; {time.perf_counter() - start:.1f}s -> {args.db}")
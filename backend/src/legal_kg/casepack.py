@@ -0,0 +1,265 @@
+"""
+Packed case corpus.
+
+The scraper writes one pretty-printed JSON file per case (cases/<nr>/<nr>.json).
+A pack stores the same records in three files inside one directory:
+
+    records.<n>.bin   length-prefixed compact JSON, one record per case,
+                      without the large text fields
+    text.<n>.bin      the large text fields (full_text), utf-8, back to back
+    index.json        offsets into both files, keyed by case_number and case_id,
+                      and the names of the two files
+
+A text field that is missing from a case, or null, is flagged as such in the
+index and comes back the same way: missing, or None.
+
+The reader memory-maps both .bin files and only decodes the records you ask for.
+
+Rewriting a pack never touches the files an open reader has mapped (truncating
+a mapped file kills the reader with SIGBUS): a new generation <n> is written
+next to the old one, index.json is swapped in with os.replace, and the old
+generation is unlinked. Readers that have it mapped keep reading it until they
+close; readers opened afterwards see the new one.
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Default location of the scraped cases (repo root / cases)
+CASES_DIR = Path(__file__).parent.parent.parent.parent / "cases"
+# Default pack written by scripts/pack_cases.py
+DEFAULT_PACK_DIR = Path(__file__).parent.parent.parent / "data" / "cases.pack"
+
+PACK_VERSION = 2
+# Version 1 packs have no presence flag; their text fields are always present
+_READABLE_VERSIONS = (1, PACK_VERSION)
+TEXT_FIELDS = ("full_text",)
+
+# Unversioned names, used by packs written before generations
+RECORDS_FILE = "records.bin"
+TEXT_FILE = "text.bin"
+INDEX_FILE = "index.json"
+
+_GENERATION = re.compile(r'^(?:records|text)\.(\d+)\.bin$')
+
+_LENGTH = struct.Struct("<I")
+
+# Third element of a text field's [offset, length, flag] in the index
+_ABSENT, _NULL, _PRESENT = 0, 1, 2
+
+
+def iter_case_files(cases_dir: Path = CASES_DIR) -> Iterator[Path]:
+    """Yield the case JSON files in the directory layout, sorted by case folder."""
+    cases_dir = Path(cases_dir)
+    for case_dir in sorted(p for p in cases_dir.iterdir() if p.is_dir()):
+        case_file = case_dir / f"{case_dir.name}.json"
+        if case_file.exists():
+            yield case_file
+
+
+def load_case_dir(cases_dir: Path = CASES_DIR) -> Iterator[Dict[str, Any]]:
+    """Yield every case dict from the directory layout."""
+    for case_file in iter_case_files(cases_dir):
+        with open(case_file, "r", encoding="utf-8") as f:
+            yield json.load(f)
+
+
+def write_pack(cases, pack_dir: Path, text_fields=TEXT_FIELDS) -> int:
+    """
+    Write an iterable of case dicts to a pack directory.
+    Returns the number of records written.
+    """
+    pack_dir = Path(pack_dir)
+    pack_dir.mkdir(parents=True, exist_ok=True)
+    old_files = [p for p in pack_dir.iterdir() if _GENERATION.match(p.name) or p.name in (RECORDS_FILE, TEXT_FILE)]
+    generation = 1 + max((int(_GENERATION.match(p.name).group(1)) for p in old_files
+                          if _GENERATION.match(p.name)), default=0)
+    records_file, text_file = f"records.{generation}.bin", f"text.{generation}.bin"
+
+    entries = []
+    rec_pos = 0
+    text_pos = 0
+    with open(pack_dir / records_file, "xb") as rec_f, open(pack_dir / text_file, "xb") as text_f:
+        for case in cases:
+            record = dict(case)
+            texts = []
+            for field in text_fields:
+                if field not in record:
+                    texts.append([text_pos, 0, _ABSENT])
+                    continue
+                value = record.pop(field)
+                if value is None:
+                    texts.append([text_pos, 0, _NULL])
+                    continue
+                data = value.encode("utf-8")
+                text_f.write(data)
+                texts.append([text_pos, len(data), _PRESENT])
+                text_pos += len(data)
+
+            payload = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            rec_f.write(_LENGTH.pack(len(payload)))
+            rec_f.write(payload)
+            entries.append([
+                record.get("case_number", ""),
+                record.get("case_id", ""),
+                rec_pos + _LENGTH.size,
+                len(payload),
+                texts,
+            ])
+            rec_pos += _LENGTH.size + len(payload)
+
+    index = {
+        "version": PACK_VERSION,
+        "text_fields": list(text_fields),
+        "records_file": records_file,
+        "text_file": text_file,
+        "records": entries,
+    }
+    # Write the index last so a half-written pack is never picked up as complete
+    tmp_path = pack_dir / (INDEX_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, pack_dir / INDEX_FILE)
+    # Open readers keep their mapping of an unlinked file
+    for path in old_files:
+        path.unlink(missing_ok=True)
+    return len(entries)
+
+
+def pack_case_dir(cases_dir: Path, pack_dir: Path) -> int:
+    """Pack the directory layout (cases/<nr>/<nr>.json) into pack_dir."""
+    return write_pack(load_case_dir(cases_dir), pack_dir)
+
+
+def _map_file(path: Path):
+    """Memory-map a file read-only. Empty files cannot be mapped, so return b''."""
+    f = open(path, "rb")
+    try:
+        if path.stat().st_size == 0:
+            return f, b""
+        return f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except Exception:
+        f.close()
+        raise
+
+
+def _flag(span: list) -> int:
+    return span[2] if len(span) > 2 else _PRESENT
+
+
+class CasePack:
+    """
+    Read-only view of a pack directory. Records are decoded on access.
+
+        with CasePack("data/cases.pack") as pack:
+            case = pack.get("B 2822-24")
+    """
+
+    def __init__(self, pack_dir: Path):
+        self.pack_dir = Path(pack_dir)
+        try:
+            index = self._open()
+        except FileNotFoundError:
+            # A writer swapped the index and unlinked its files between our two reads
+            index = self._open()
+
+        self.text_fields: Tuple[str, ...] = tuple(index["text_fields"])
+        self._entries: List[list] = index["records"]
+        self._by_number: Dict[str, int] = {}
+        self._by_id: Dict[str, int] = {}
+        for pos, entry in enumerate(self._entries):
+            self._by_number.setdefault(entry[0], pos)
+            if entry[1]:
+                self._by_id.setdefault(entry[1], pos)
+
+    def _open(self) -> Dict[str, Any]:
+        with open(self.pack_dir / INDEX_FILE, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("version") not in _READABLE_VERSIONS:
+            raise ValueError(f"Unsupported pack version: {index.get('version')}")
+        self._rec_file, self._records = _map_file(self.pack_dir / index.get("records_file", RECORDS_FILE))
+        try:
+            self._text_file, self._text = _map_file(self.pack_dir / index.get("text_file", TEXT_FILE))
+        except Exception:
+            self._close_records()
+            raise
+        return index
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, case_number: str) -> bool:
+        return case_number in self._by_number
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _close_records(self):
+        if isinstance(self._records, mmap.mmap):
+            self._records.close()
+        self._rec_file.close()
+
+    def close(self):
+        """Unmap and close the underlying files."""
+        self._close_records()
+        if isinstance(self._text, mmap.mmap):
+            self._text.close()
+        self._text_file.close()
+
+    def case_numbers(self) -> List[str]:
+        return [entry[0] for entry in self._entries]
+
+    def _decode(self, pos: int, with_text: bool) -> Dict[str, Any]:
+        entry = self._entries[pos]
+        offset, length = entry[2], entry[3]
+        record = json.loads(self._records[offset:offset + length])
+        if with_text:
+            for field, span in zip(self.text_fields, entry[4]):
+                if _flag(span) != _ABSENT:
+                    record[field] = self._read_text(span)
+        return record
+
+    def _read_text(self, span: list) -> Optional[str]:
+        if _flag(span) != _PRESENT:
+            return None
+        return self._text[span[0]:span[0] + span[1]].decode("utf-8")
+
+    def get(self, case_number: str, with_text: bool = True) -> Optional[Dict[str, Any]]:
+        """Look up one case by case_number, or None if it is not in the pack."""
+        pos = self._by_number.get(case_number)
+        if pos is None:
+            return None
+        return self._decode(pos, with_text)
+
+    def get_by_id(self, case_id: str, with_text: bool = True) -> Optional[Dict[str, Any]]:
+        """Look up one case by case_id, or None if it is not in the pack."""
+        pos = self._by_id.get(case_id)
+        if pos is None:
+            return None
+        return self._decode(pos, with_text)
+
+    def text(self, case_number: str, field: str = "full_text") -> Optional[str]:
+        """
+        Read a single large text field without decoding the rest of the record.
+        None if the case is not in the pack, or the field is missing or null.
+        """
+        pos = self._by_number.get(case_number)
+        if pos is None:
+            return None
+        return self._read_text(self._entries[pos][4][self.text_fields.index(field)])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.iter_cases()
+
+    def iter_cases(self, with_text: bool = False) -> Iterator[Dict[str, Any]]:
+        """Full scan in pack order. Text fields are skipped unless asked for."""
+        for pos in range(len(self._entries)):
+            yield self._decode(pos, with_text)
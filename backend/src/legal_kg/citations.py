@@ -0,0 +1,273 @@
+"""
+Parser for Swedish statute citations.
+
+    parse_citations("29 kap. 3 § första stycket 1 brottsbalken (1962:700)")
+    -> (Citation(sfs='1962:700', statute='brottsbalken', chapter='29', section='3',
+                 section_to=None, stycke=1, punkt='1'),)
+
+A reference is split into tokens by one compiled pattern (numbers, 'kap.',
+'§', ordinals + 'stycket', 'p.'/'punkten', SFS numbers, words) and read by a
+small grammar:
+
+    citation  := [NUM 'kap.'] sections [stycke] [punkt] [statute] [sfs ['om' ...]]
+               | statute sfs ['om' ...]                  # a whole law: 'lag (1982:80)'
+    sections  := NUM (('och' | ',' | '-') NUM)* ('§' | '§§')
+
+so '4 och 5 §§ lagen (1982:80) om anställningsskydd' gives two citations and
+'10-13 §§' one with section_to. The codes and fundamental laws are often cited
+by name alone ('11 kap. 4 § regeringsformen'); their SFS number is filled in.
+
+The same references repeat across thousands of cases, so parse_citations()
+is memoized (LRU, CACHE_SIZE distinct strings) and returns immutable
+tuples; parse_batch() parses a list, each distinct string once.
+
+The SFS patterns the scrapers and the section extractor share live here too.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+CACHE_SIZE = 1 << 16
+
+# '1977:480' on its own, in '(1977:480)', in 'SFS 2013:950'
+SFS_NUMBER = re.compile(r'(?<![\d:])(\d{4}:\d+)(?![\d:])')
+SFS_IN_PARENS = re.compile(r'\((\d{4}:\d+)\)')
+# A law's name right before its SFS number: 'Semesterlag (1977:480)'
+NAME_AND_SFS = re.compile(r'([^,\.]+?)\s*\((\d{4}:\d+)\)')
+# '18 §', '47 kap. 3 §' in running text (sections.extract_references)
+SECTION_REF = re.compile(r'(?:(\d+\s?[a-z]?)\s*kap\.\s*)?(\d+\s?[a-z]?)\s*§(?!§)')
+
+ORDINALS = ("första", "andra", "tredje", "fjärde", "femte", "sjätte", "sjunde", "åttonde", "nionde", "tionde")
+
+# Cited by name without an SFS number
+STATUTES = {
+    'regeringsformen': '1974:152',
+    'tryckfrihetsförordningen': '1949:105',
+    'yttrandefrihetsgrundlagen': '1991:1469',
+    'rättegångsbalken': '1942:740',
+    'brottsbalken': '1962:700',
+    'jordabalken': '1970:994',
+    'ärvdabalken': '1958:637',
+    'äktenskapsbalken': '1987:230',
+    'föräldrabalken': '1949:381',
+    'miljöbalken': '1998:808',
+    'utsökningsbalken': '1981:774',
+    'socialförsäkringsbalken': '2010:110',
+    'skadeståndslagen': '1972:207',
+    'offentlighets- och sekretesslagen': '2009:400',
+    'förvaltningslagen': '2017:900',
+}
+
+_TOKEN = re.compile(r"""
+    (?P<sfs>\(?(?:SFS\s*)?(?<![\d:])\d{4}:\d+(?![\d:])\)?)
+  | (?P<kap>kap\.?)
+  | (?P<para>§§?)
+  | (?P<ordinal>""" + "|".join(ORDINALS) + r""")\b
+  | (?P<stycke>stycket\b|st\.)
+  | (?P<punkt>p\.|punkt(?:en|erna)?\b)
+  | (?P<num>\d+(?:\s?[a-z](?=\s*(?:§|kap|-|–|,|och\b)))?)
+  | (?P<range>[-–])
+  | (?P<conj>och\b|samt\b|[,;])
+  | (?P<word>[^\W\d_]+-?)
+""", re.VERBOSE)
+
+# Conjunctions that end a statute name ('plan- och bygglagen' keeps its 'och')
+_NAME_BREAKS = {',', ';', 'samt'}
+_MAX_RANGE = 50
+
+
+class Citation(NamedTuple):
+    sfs: Optional[str]
+    statute: Optional[str]
+    chapter: Optional[str] = None
+    section: Optional[str] = None
+    section_to: Optional[str] = None
+    stycke: Optional[int] = None
+    punkt: Optional[str] = None
+
+    def sections(self) -> List[str]:
+        """The §§ cited: '10-13 §§' -> ['10', '11', '12', '13']; lettered ranges give their ends"""
+        if not self.section:
+            return []
+        if not self.section_to:
+            return [self.section]
+        if self.section.isdigit() and self.section_to.isdigit():
+            first, last = int(self.section), int(self.section_to)
+            if 0 <= last - first <= _MAX_RANGE:
+                return [str(n) for n in range(first, last + 1)]
+        return [self.section, self.section_to]
+
+    def normalized(self) -> str:
+        """Canonical form: '10 kap. 17 § första stycket 2 rättegångsbalken (1942:740)'"""
+        parts = []
+        if self.chapter:
+            parts.append(f"{self.chapter} kap.")
+        if self.section:
+            parts.append(f"{self.section}-{self.section_to} §§" if self.section_to else f"{self.section} §")
+        if self.stycke:
+            parts.append(f"{ORDINALS[self.stycke - 1]} stycket" if self.stycke <= len(ORDINALS)
+                         else f"{self.stycke} st.")
+        if self.punkt:
+            parts.append(self.punkt if self.stycke else f"{self.punkt} p.")
+        name, om, subject = (self.statute or '').partition(' om ')
+        if name:
+            parts.append(name)
+        if self.sfs:
+            parts.append(f"({self.sfs})")
+        if om:
+            parts.append(f"om {subject}")
+        return " ".join(parts)
+
+
+def _num(value: str) -> str:
+    # '14a', '14  a' -> '14 a' (lagboken's form)
+    return re.sub(r'(\d)\s*([a-z])$', r'\1 \2', value)
+
+
+def _statute_name(text: str) -> Optional[str]:
+    name = re.sub(r'^(?:i|enligt)\s+', '', text.strip(" ,;"))
+    name = re.sub(r'\s+(?:och|samt)$', '', name)
+    return re.sub(r'\s+', ' ', name) or None
+
+
+def _citation(parts: Dict, sfs: Optional[str], statute: Optional[str]) -> Citation:
+    if sfs is None and statute:
+        sfs = STATUTES.get(statute.lower())
+    return Citation(sfs=sfs, statute=statute, **parts)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_citations(reference: str) -> Tuple[Citation, ...]:
+    """All statute citations in a reference string, in order (memoized)"""
+    text = reference or ''
+    tokens = [(m.lastgroup, m.group(), m.start(), m.end()) for m in _TOKEN.finditer(text)]
+    n = len(tokens)
+
+    def kind(j):
+        return tokens[j][0] if j < n else None
+
+    citations: List[Citation] = []
+    pending: List[Dict] = []      # §§ waiting for their statute
+    chapter = None
+    name_start = None             # where the words since the last § began
+
+    def flush(sfs, statute):
+        nonlocal pending
+        citations.extend(_citation(parts, sfs, statute) for parts in pending)
+        pending = []
+
+    i = 0
+    while i < n:
+        k, value, start, end = tokens[i]
+        if k == 'num' and (kind(i + 1) == 'kap' or kind(i + 1) == 'para' or kind(i + 1) in ('conj', 'range')):
+            if pending and name_start is not None:
+                # '11 kap. 4 § regeringsformen och 2 kap. 1 § ...': the name belongs to the §§ before
+                flush(None, _statute_name(text[name_start:start]))
+            name_start = None
+        if k == 'num' and kind(i + 1) == 'kap':
+            chapter = _num(value)
+            i += 2
+            continue
+        if k == 'num':
+            j, numbers = i + 1, [(None, value)]
+            while (kind(j) in ('conj', 'range') and tokens[j][1] not in _NAME_BREAKS
+                   and kind(j + 1) == 'num' and kind(j + 2) != 'kap'):
+                numbers.append((tokens[j][0], tokens[j + 1][1]))
+                j += 2
+            if kind(j) != 'para':
+                i += 1
+                continue
+            group = []
+            for op, number in numbers:
+                if op == 'range' and group:
+                    group[-1]['section_to'] = _num(number)
+                else:
+                    group.append({'chapter': chapter, 'section': _num(number)})
+            i = j + 1
+            # stycke and punkt qualify the last § of the list
+            if kind(i) == 'ordinal' and kind(i + 1) == 'stycke':
+                group[-1]['stycke'] = ORDINALS.index(tokens[i][1]) + 1
+                i += 2
+            elif kind(i) == 'num' and kind(i + 1) == 'stycke' and tokens[i][1].isdigit():
+                group[-1]['stycke'] = int(tokens[i][1])
+                i += 2
+            if kind(i) == 'num' and kind(i + 1) == 'punkt' and tokens[i + 1][1] == 'p.':
+                group[-1]['punkt'] = tokens[i][1]
+                i += 2
+            elif kind(i) == 'punkt' and kind(i + 1) == 'num':
+                group[-1]['punkt'] = tokens[i + 1][1]
+                i += 2
+            elif (group[-1].get('stycke') and kind(i) == 'num'
+                  and kind(i + 1) not in ('kap', 'para', 'conj', 'range', 'stycke', 'punkt')):
+                group[-1]['punkt'] = tokens[i][1]
+                i += 1
+            pending.extend(group)
+            continue
+        if k == 'sfs':
+            sfs = SFS_NUMBER.search(value).group(1)
+            statute = _statute_name(text[name_start:start]) if name_start is not None else None
+            # 'lagen (1980:1102) om handelsbolag och enkla bolag'
+            j = i + 1
+            if kind(j) == 'word' and tokens[j][1] == 'om':
+                while j < n and not (
+                        (kind(j) == 'conj' and tokens[j][1] in _NAME_BREAKS) or kind(j) == 'sfs'
+                        or (kind(j) == 'num' and kind(j + 1) in ('kap', 'para'))):
+                    j += 1
+                subject = _statute_name(text[end:tokens[j - 1][3]])
+                statute = f"{statute} {subject}" if statute else subject
+            if pending:
+                flush(sfs, statute)
+            else:
+                citations.append(_citation({}, sfs, statute))
+            chapter = name_start = None
+            i = j
+            continue
+        if k == 'word' and name_start is None:
+            name_start = start
+        elif k == 'conj' and value in _NAME_BREAKS:
+            if pending and name_start is not None:
+                flush(None, _statute_name(text[name_start:start]))
+            name_start = None
+        i += 1
+
+    if pending:
+        flush(None, _statute_name(text[name_start:]) if name_start is not None else None)
+    return tuple(citations)
+
+
+def parse_citation(reference: str) -> Optional[Citation]:
+    """The first citation in a reference, or None"""
+    citations = parse_citations(reference or '')
+    return citations[0] if citations else None
+
+
+def parse_batch(references: Iterable[str]) -> List[Tuple[Citation, ...]]:
+    """Citations of each reference; every distinct string is parsed (or looked up) once"""
+    parsed: Dict[str, Tuple[Citation, ...]] = {}
+    results = []
+    for reference in references:
+        reference = reference or ''
+        if reference not in parsed:
+            parsed[reference] = parse_citations(reference)
+        results.append(parsed[reference])
+    return results
+
+
+def normalize_reference(reference: str) -> str:
+    """Canonical form of every citation in a reference, '; '-separated ('' if there is none)"""
+    return "; ".join(c.normalized() for c in parse_citations(reference or ''))
+
+
+def find_sfs(text: str) -> Optional[str]:
+    """First SFS number in parentheses: 'Semesterlag (1977:480)' -> '1977:480'"""
+    match = SFS_IN_PARENS.search(text or '')
+    return match.group(1) if match else None
+
+
+def split_sfs(text: str) -> Tuple[str, Optional[str]]:
+    """A law's title and SFS number: 'Semesterlag (1977:480)' -> ('Semesterlag', '1977:480')"""
+    sfs = find_sfs(text)
+    if sfs is None:
+        return (text or '').strip(), None
+    return re.sub(r'\s*\(\d{4}:\d+\)', '', text).strip(), sfs
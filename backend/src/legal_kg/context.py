@@ -0,0 +1,238 @@
+"""
+Token-budgeted context packs for LLM agents.
+
+Given a seed - an SFS number ('1962:700'), a case number ('B 1462-25') or
+free text ('provokation misshandel') - rank the laws, sections and cases
+around it in the graph and pack their summaries and excerpts into a token
+budget:
+
+    builder = ContextBuilder(Graph.load(conn))
+    pack = builder.build(conn, '1962:700', budget=2000)
+    print(pack['text'])
+
+A node within MAX_HOPS of a seed scores seed_weight * DECAY ** distance *
+paths * kind weight, where paths counts the seed's direct neighbours it is
+linked to: a case citing the same law and the same NJA publication as the
+seed case beats one that shares only the law. Ties go to the newest
+decision. Packs are cached by (seed, budget, graph version), so a rebuilt
+graph never serves stale packs.
+"""
+
+import json
+import math
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .casepack import CASES_DIR, DEFAULT_PACK_DIR, INDEX_FILE, CasePack
+from .citations import SFS_NUMBER
+from .graph import Graph, case_node, fts_query, law_node
+
+# Rough characters per token for Swedish legal text
+CHARS_PER_TOKEN = 4
+MAX_HOPS = 2
+DECAY = 0.35
+# Only these kinds are packed; publications and keywords just connect them
+KIND_WEIGHTS = {'section': 1.2, 'law': 1.0, 'case': 1.0}
+MAX_CANDIDATES = 200
+KEYWORD_SEEDS = 10
+MIN_EXCERPT_TOKENS = 40
+MAX_EXCERPT_TOKENS = 300
+PACK_CACHE_SIZE = 256
+
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def excerpt(text: str, needles: List[str], max_chars: int) -> str:
+    """Window of text around the first needle found (else the start), cut at word boundaries"""
+    if not text or max_chars <= 0:
+        return ""
+    lowered = text.lower()
+    positions = [p for p in (lowered.find(n.lower()) for n in needles if n) if p >= 0]
+    start = max(min(positions) - max_chars // 3, 0) if positions else 0
+    window = text[start:start + max_chars]
+    if start > 0 and " " in window:
+        window = "…" + window.split(" ", 1)[1]
+    if start + max_chars < len(text) and " " in window:
+        window = window.rsplit(" ", 1)[0] + "…"
+    return re.sub(r'\s+', ' ', window).strip()
+
+
+def case_text_from_dir(case_number: str, cases_dir: Path = CASES_DIR) -> Optional[str]:
+    path = Path(cases_dir) / case_number / f"{case_number}.json"
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get('full_text')
+
+
+def default_case_text(pack_dir: Path = DEFAULT_PACK_DIR) -> Callable[[str], Optional[str]]:
+    """Full texts from the case pack when one has been built, else from cases/"""
+    if (Path(pack_dir) / INDEX_FILE).exists():
+        return CasePack(pack_dir).text
+    return case_text_from_dir
+
+
+def render_header(kind: str, label: str, data: Dict[str, Any]) -> str:
+    if kind == 'law':
+        amended = (data.get('metadata') or {}).get('Ändring införd')
+        return f"[Lag] {data.get('title') or label}" + (f" (ändrad {amended})" if amended else "")
+    if kind == 'section':
+        heading = f" - {data['heading']}" if data.get('heading') else ""
+        return f"[Paragraf] {label}{heading}"
+    nickname = f" {data['nickname']}" if data.get('nickname') else ""
+    decided = " ".join(filter(None, [data.get('court'), data.get('decision_date')]))
+    return f"[Avgörande] {data.get('case_number') or label}{nickname}" + (f" ({decided})" if decided else "")
+
+
+def render_body(kind: str, data: Dict[str, Any]) -> str:
+    if kind == 'section':
+        return data.get('text') or ""
+    if kind == 'case':
+        return data.get('summary') or ""
+    return ""
+
+
+class ContextBuilder:
+    """
+    Builds and caches context packs for one Graph. Pass any connection to
+    the graph database (the query service borrows one from its read pool).
+    case_text(case_number) supplies full texts for excerpts, e.g. CasePack.text.
+    """
+
+    def __init__(self, graph: Graph, case_text: Callable[[str], Optional[str]] = case_text_from_dir,
+                 cache_size: int = PACK_CACHE_SIZE):
+        self.graph = graph
+        self.case_text = case_text
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, int, int], Dict[str, Any]]" = OrderedDict()
+        # The query service builds packs from several threads
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def resolve_seed(self, conn, seed: str) -> Tuple[Dict[str, float], List[str]]:
+        """Seed nodes with their weights, and the words excerpts are centred on"""
+        if SFS_NUMBER.fullmatch(seed) and law_node(seed) in self.graph:
+            return {law_node(seed): 1.0}, [seed]
+        if case_node(seed) in self.graph:
+            return {case_node(seed): 1.0}, []
+        if seed in self.graph:
+            return {seed: 1.0}, []
+        match = fts_query(seed)
+        if not match:
+            return {}, []
+        rows = conn.execute("""
+            SELECT node_id, bm25(graph_search) FROM graph_search WHERE graph_search MATCH ?
+            ORDER BY bm25(graph_search) LIMIT ?
+        """, (match, KEYWORD_SEEDS)).fetchall()
+        # bm25 is negative and lower is better; the best hit gets weight 1
+        best = rows[0][1] if rows and rows[0][1] else -1.0
+        return {node_id: score / best for node_id, score in rows}, re.findall(r'\w+', seed)
+
+    def rank(self, seeds: Dict[str, float]) -> List[Tuple[str, float, int]]:
+        """(node_id, score, distance) of the packable nodes around the seeds, best first"""
+        scores: Dict[str, float] = {}
+        distances: Dict[str, int] = {}
+        for seed, weight in seeds.items():
+            nearby = self.graph.neighbourhood(seed, MAX_HOPS)
+            ring = {node_id for node_id, _, _, distance in nearby if distance == 1}
+            for node_id, kind, _, distance in nearby:
+                if kind not in KIND_WEIGHTS:
+                    continue
+                paths = 1
+                if distance == 2:
+                    linked = self.graph.outgoing(node_id) + self.graph.incoming(node_id)
+                    paths = len(ring.intersection(linked)) or 1
+                scores[node_id] = scores.get(node_id, 0.0) + weight * DECAY ** distance * paths * KIND_WEIGHTS[kind]
+                distances[node_id] = min(distances.get(node_id, distance), distance)
+        ranked = sorted(scores.items(), key=lambda item: -item[1])[:MAX_CANDIDATES]
+        return [(node_id, score, distances[node_id]) for node_id, score in ranked]
+
+    def _load(self, conn, node_ids: List[str]) -> Dict[str, Tuple[str, str, Dict[str, Any]]]:
+        rows = {}
+        for i in range(0, len(node_ids), 500):
+            chunk = node_ids[i:i + 500]
+            for node_id, kind, label, data in conn.execute(
+                f"SELECT id, kind, label, data FROM graph_nodes WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            ):
+                rows[node_id] = (kind, label, json.loads(data) if data else {})
+        return rows
+
+    def build(self, conn, seed: str, budget: int = 2000) -> Dict[str, Any]:
+        seed = seed.strip()
+        key = (seed, budget, self.graph.version)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        seeds, needles = self.resolve_seed(conn, seed)
+        ranked = self.rank(seeds)
+        rows = self._load(conn, [node_id for node_id, _, _ in ranked])
+        # Equal scores: newest decision first (laws and sections have no date and sort last)
+        ranked = [r for r in ranked if r[0] in rows]
+        ranked.sort(key=lambda r: rows[r[0]][2].get('decision_date') or "", reverse=True)
+        ranked.sort(key=lambda r: -round(r[1], 9))
+
+        items = []
+        used = 0
+        for node_id, score, distance in ranked:
+            kind, label, data = rows[node_id]
+            header = render_header(kind, label, data)
+            body = render_body(kind, data)
+            text = f"{header}\n{body}" if body else header
+            cost = estimate_tokens(text) + 1
+            if used + cost > budget:
+                # Items that do not fit whole still get their header in
+                text, cost = header, estimate_tokens(header) + 1
+                if used + cost > budget:
+                    continue
+            items.append({'id': node_id, 'kind': kind, 'score': round(score, 4), 'distance': distance,
+                          'tokens': cost, 'text': text})
+            used += cost
+
+        # Spend what is left on excerpts from the full texts of the best cases
+        for item in items:
+            remaining = budget - used
+            if remaining < MIN_EXCERPT_TOKENS:
+                break
+            if item['kind'] != 'case':
+                continue
+            full_text = self.case_text(rows[item['id']][2].get('case_number', ''))
+            # Leave room for the prefix and for rounding
+            max_chars = (min(remaining, MAX_EXCERPT_TOKENS) - 4) * CHARS_PER_TOKEN
+            snippet = excerpt(full_text or "", needles, max_chars)
+            if not snippet:
+                continue
+            addition = f"\nUtdrag: {snippet}"
+            cost = estimate_tokens(addition)
+            item['text'] += addition
+            item['tokens'] += cost
+            used += cost
+
+        pack = {
+            'seed': seed,
+            'seed_nodes': list(seeds),
+            'graph_version': self.graph.version,
+            'budget': budget,
+            'tokens': used,
+            'items': items,
+            'text': "\n\n".join(item['text'] for item in items),
+        }
+        with self._lock:
+            self._cache[key] = pack
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return pack
+
+    def cache_info(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._cache)}
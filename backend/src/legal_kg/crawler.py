@@ -1,8 +1,10 @@
-import requests
 from urllib.parse import urlparse
 from datetime import datetime
 from .models import CrawledPage
 from .database import get_connection
+from .httpclient import FetchError, ResilientSession
+
+_session = ResilientSession()
 
 
 def crawl_url(url: str) -> CrawledPage:
@@ -16,8 +18,8 @@ def crawl_url(url: str) -> CrawledPage:
         domain = parsed_url.netloc
         path = parsed_url.path or "/"
         
-        # Fetch the page
-        response = requests.get(url, timeout=30)
+        # Fetch the page (transient errors and 429s are retried)
+        response = _session.get(url, timeout=30)
         
         # Create CrawledPage object
         crawled_page = CrawledPage(
@@ -31,6 +33,16 @@ def crawl_url(url: str) -> CrawledPage:
         
         return crawled_page
         
+    except FetchError as e:
+        parsed_url = urlparse(url)
+        return CrawledPage(
+            url=url,
+            domain=parsed_url.netloc,
+            path=parsed_url.path or "/",
+            status_code=e.status or 0,
+            crawled_at=datetime.now(),
+            metadata={"error": str(e), "error_kind": e.kind, "attempts": e.attempts}
+        )
     except Exception as e:
         # Return a page object with error info
         parsed_url = urlparse(url)
@@ -7,8 +7,41 @@ DB_PATH = Path(__file__).parent.parent.parent / "data" / "legal_kg.db"
 
 def get_connection():
     """Get SQLite database connection"""
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
     return sqlite3.connect(DB_PATH)
 
+def init_section_tables(conn):
+    """Law sections and the references extracted from them (legal_kg.sections)"""
+    cursor = conn.cursor()
+    # Law sections (chapter/§) with a content hash per section
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS law_sections (
+            id TEXT PRIMARY KEY,
+            sfs TEXT NOT NULL,
+            chapter TEXT,
+            chapter_title TEXT,
+            paragraph TEXT NOT NULL,
+            heading TEXT,
+            text TEXT,
+            content_hash TEXT NOT NULL,
+            position INTEGER,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_law_sections_sfs ON law_sections (sfs)")
+    
+    # References extracted from a section: another law (SFS) or another section
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS section_references (
+            section_id TEXT NOT NULL,
+            target_sfs TEXT NOT NULL,
+            target_section_id TEXT,
+            reference TEXT NOT NULL,
+            PRIMARY KEY (section_id, reference)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_section_references_target ON section_references (target_sfs)")
+
 def init_database():
     """Initialize the database with required tables"""
     conn = get_connection()
@@ -30,6 +63,7 @@ def init_database():
         )
     """)
     
+    init_section_tables(conn)
     
     conn.commit()
     conn.close()
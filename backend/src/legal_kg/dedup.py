@@ -0,0 +1,263 @@
+"""
+Near-duplicate detection with MinHash signatures and LSH banding.
+
+A document is reduced to its word 5-shingles; NUM_PERM hash functions keep
+the minimum shingle hash each, and the fraction of equal positions in two
+signatures estimates the Jaccard similarity of their shingle sets. The
+signature is cut into bands; documents sharing any whole band become
+candidates, and only candidates are compared, so checking a new document
+costs about the same whatever the corpus size.
+
+    index = DedupIndex(conn, 'case')
+    duplicate = index.check('Ö 3646-24', case_text(case))
+    if duplicate:
+        ...  # duplicate.original, duplicate.similarity: skip PDFs, citations, graph
+
+Signatures are stored in SQLite (doc_signatures) so later runs and other
+worker processes see earlier documents.
+"""
+
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .metrics import METRICS
+from .similarity import tokenize
+
+NUM_PERM = 128
+SHINGLE_SIZE = 5
+DEFAULT_THRESHOLD = 0.8
+# Documents with fewer words than this are not signed (too little to compare)
+MIN_WORDS = 8
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_SHINGLE_BASE = np.uint64(1000003)
+
+
+def init_dedup_tables(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS doc_signatures (
+            namespace TEXT NOT NULL,
+            key TEXT NOT NULL,
+            signature BLOB NOT NULL,
+            duplicate_of TEXT,
+            similarity REAL,
+            PRIMARY KEY (namespace, key)
+        )
+    """)
+    conn.commit()
+
+
+def case_text(case: Dict[str, Any]) -> str:
+    """Text a case is compared on: the full text, else what the search API gives"""
+    return case.get('full_text') or "\n".join([case.get('nickname') or '', case.get('summary') or ''])
+
+
+def law_text(law: Dict[str, Any]) -> str:
+    """
+    Title and §-text of a law page. Empty without sections: the rest of a
+    page (the static description, metadata labels) is shared by every law.
+    """
+    sections = " ".join(section.get('text') or '' for section in law.get('sections') or [])
+    return "\n".join([law.get('title') or '', sections]) if sections.strip() else ""
+
+
+def optimal_bands(threshold: float, num_perm: int = NUM_PERM) -> Tuple[int, int]:
+    """(bands, rows) whose S-curve 1 - (1 - s^rows)^bands best separates pairs around threshold"""
+    best, best_error = (1, num_perm), float('inf')
+    grid = np.linspace(0, 1, 201)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if bands < 1:
+            break
+        curve = 1 - (1 - grid ** rows) ** bands
+        # Mean over an even grid on [0, 1] approximates the integrals
+        false_positive = np.where(grid < threshold, curve, 0).mean()
+        false_negative = np.where(grid >= threshold, 1 - curve, 0).mean()
+        error = false_positive + false_negative
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = NUM_PERM, shingle_size: int = SHINGLE_SIZE, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        # Coefficients span the whole prime field: with 32-bit ones a*x barely wraps
+        # and small shingle hashes win the minimum in most permutations at once.
+        # a*x + b then overflows 64 bits, which only adds another mixing step.
+        self.a = rng.randint(1, int(_MERSENNE), size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, int(_MERSENNE), size=num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._word_hashes: Dict[str, int] = {}
+
+    def shingle_hashes(self, text: str) -> np.ndarray:
+        words = tokenize(text)
+        if len(words) < MIN_WORDS:
+            return np.zeros(0, dtype=np.uint64)
+        cache = self._word_hashes
+        hashes = np.fromiter((cache.get(w) or cache.setdefault(w, zlib.crc32(w.encode('utf-8'))) for w in words),
+                             dtype=np.uint64, count=len(words))
+        # Polynomial hash of each window of shingle_size words, kept to 32 bits
+        k = min(self.shingle_size, len(words))
+        shingles = np.zeros(len(words) - k + 1, dtype=np.uint64)
+        for i in range(k):
+            shingles = shingles * _SHINGLE_BASE + hashes[i:len(hashes) - k + 1 + i]
+        return np.unique(shingles & np.uint64(0xFFFFFFFF))
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        shingles = self.shingle_hashes(text)
+        if not len(shingles):
+            return None
+        signature = np.full(self.num_perm, np.iinfo(np.uint64).max, dtype=np.uint64)
+        # Chunked so a long judgment does not allocate shingles x num_perm at once
+        for start in range(0, len(shingles), 4096):
+            chunk = shingles[start:start + 4096]
+            values = (np.outer(chunk, self.a) + self.b) % _MERSENNE
+            np.minimum(signature, values.min(axis=0), out=signature)
+        return signature
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+class LshIndex:
+    """In-memory banded LSH over MinHash signatures"""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, num_perm: int = NUM_PERM):
+        self.threshold = threshold
+        self.bands, self.rows = optimal_bands(threshold, num_perm)
+        self.buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(self.bands)]
+        self.signatures: Dict[str, np.ndarray] = {}
+        self.comparisons = 0
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def _band_keys(self, signature: np.ndarray) -> Iterable[bytes]:
+        for band in range(self.bands):
+            yield signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, key: str, signature: np.ndarray):
+        self.signatures[key] = signature
+        for buckets, band_key in zip(self.buckets, self._band_keys(signature)):
+            buckets.setdefault(band_key, []).append(key)
+
+    def remove(self, key: str):
+        signature = self.signatures.pop(key)
+        for buckets, band_key in zip(self.buckets, self._band_keys(signature)):
+            bucket = buckets[band_key]
+            bucket.remove(key)
+            if not bucket:
+                del buckets[band_key]
+
+    def candidates(self, signature: np.ndarray) -> set:
+        found = set()
+        for buckets, band_key in zip(self.buckets, self._band_keys(signature)):
+            found.update(buckets.get(band_key, ()))
+        return found
+
+    def query(self, signature: np.ndarray, exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Indexed documents at or above the threshold, most similar first"""
+        matches = []
+        for key in self.candidates(signature):
+            if key == exclude:
+                continue
+            self.comparisons += 1
+            score = similarity(signature, self.signatures[key])
+            if score >= self.threshold:
+                matches.append((key, score))
+        return sorted(matches, key=lambda match: (-match[1], match[0]))
+
+
+@dataclass
+class Duplicate:
+    key: str
+    original: str
+    similarity: float
+
+
+class DedupIndex:
+    """
+    LshIndex for one namespace ('case', 'law', ...) backed by doc_signatures.
+    Duplicates are recorded but not indexed, so every cluster keeps pointing
+    at the first document seen.
+
+    A verdict holds as long as the document's signature does: when a key is
+    checked again with different text (a refresh, a re-fetch) it is
+    re-evaluated, and so are the documents recorded as its duplicates.
+    """
+
+    def __init__(self, conn, namespace: str, threshold: float = DEFAULT_THRESHOLD,
+                 hasher: Optional[MinHasher] = None):
+        init_dedup_tables(conn)
+        self.conn = conn
+        self.namespace = namespace
+        self.hasher = hasher or MinHasher()
+        self.lsh = LshIndex(threshold, self.hasher.num_perm)
+        self.duplicates: Dict[str, Tuple[str, float]] = {}
+        self._duplicate_signatures: Dict[str, np.ndarray] = {}
+        for key, blob, duplicate_of, score in conn.execute(
+            "SELECT key, signature, duplicate_of, similarity FROM doc_signatures WHERE namespace = ?", (namespace,)
+        ):
+            signature = np.frombuffer(blob, dtype=np.uint64)
+            if duplicate_of:
+                self.duplicates[key] = (duplicate_of, score)
+                self._duplicate_signatures[key] = signature
+            else:
+                self.lsh.add(key, signature)
+
+    def check(self, key: str, text: str) -> Optional[Duplicate]:
+        """
+        Index a document; return what it duplicates, if anything. Text too short
+        to sign leaves an earlier verdict for the key as it is.
+        """
+        signature = self.hasher.signature(text)
+        stored = self._duplicate_signatures.get(key, self.lsh.signatures.get(key))
+        if stored is not None and (signature is None or np.array_equal(stored, signature)):
+            if key in self.duplicates:
+                return Duplicate(key, *self.duplicates[key])
+            return None
+        if signature is None:
+            return None
+
+        with METRICS.timer('db_write_seconds', table='doc_signatures'):
+            dependents = self._forget(key) if stored is not None else []
+            duplicate = self._add(key, signature)
+            # Documents that duplicated the old text may not duplicate the new one
+            for dependent, dependent_signature in dependents:
+                self._add(dependent, dependent_signature)
+            self.conn.commit()
+        return duplicate
+
+    def _forget(self, key: str) -> List[Tuple[str, np.ndarray]]:
+        """Drop a key's verdict; returns the (key, signature) of the documents recorded as its duplicates"""
+        if key in self.duplicates:
+            del self.duplicates[key]
+            del self._duplicate_signatures[key]
+            return []
+        self.lsh.remove(key)
+        dependents = sorted(k for k, (original, _) in self.duplicates.items() if original == key)
+        for dependent in dependents:
+            del self.duplicates[dependent]
+        return [(dependent, self._duplicate_signatures.pop(dependent)) for dependent in dependents]
+
+    def _add(self, key: str, signature: np.ndarray) -> Optional[Duplicate]:
+        matches = self.lsh.query(signature, exclude=key)
+        duplicate = Duplicate(key, *matches[0]) if matches else None
+        if duplicate:
+            self.duplicates[key] = (duplicate.original, duplicate.similarity)
+            self._duplicate_signatures[key] = signature
+        else:
+            self.lsh.add(key, signature)
+        self.conn.execute("""
+            INSERT OR REPLACE INTO doc_signatures (namespace, key, signature, duplicate_of, similarity)
+            VALUES (?, ?, ?, ?, ?)
+        """, (self.namespace, key, signature.tobytes(),
+              duplicate.original if duplicate else None, duplicate.similarity if duplicate else None))
+        return duplicate
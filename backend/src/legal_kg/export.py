@@ -0,0 +1,333 @@
+"""
+Bulk export of the graph tables for graph databases and analytics tools.
+
+    export_graph(db_path, 'out/neo4j', 'neo4j')       # neo4j-admin bulk-import CSVs
+    export_graph(db_path, 'out/kg.graphml', 'graphml')
+    export_graph(db_path, 'out/parquet', 'parquet')   # needs pyarrow
+
+The node and edge tables are split into rowid ranges of `rows_per_file`
+rows. Each range is written by its own worker process (multiprocessing),
+which reads it with fetchmany(batch_size), so memory does not grow with
+the graph. Neo4j and Parquet keep one file per range; the GraphML ranges
+are written as fragments and concatenated into the one document.
+
+neo4j layout, imported from inside the directory with
+
+    neo4j-admin database import full @import.args <database>
+
+    nodes_header.csv      id:ID,kind,label,data,authority:float,:LABEL
+    nodes-00000.csv ...
+    edges_header.csv      :START_ID,:END_ID,:TYPE
+    edges-00000.csv ...
+    import.args           the --nodes/--relationships options
+
+verify_neo4j_import() reads the directory back the way neo4j-admin would
+(headers, unique ids, relationship endpoints), without a Neo4j install.
+"""
+
+import csv
+import multiprocessing
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+FORMATS = ("neo4j", "graphml", "parquet")
+ROWS_PER_FILE = 1_000_000
+BATCH_SIZE = 10_000
+
+NODE_HEADER = ["id:ID", "kind", "label", "data", "authority:float", ":LABEL"]
+EDGE_HEADER = [":START_ID", ":END_ID", ":TYPE"]
+
+GRAPHML_HEAD = """<?xml version="1.0" encoding="UTF-8"?>
+<graphml xmlns="http://graphml.graphdrawing.org/xmlns">
+  <key id="kind" for="node" attr.name="kind" attr.type="string"/>
+  <key id="label" for="node" attr.name="label" attr.type="string"/>
+  <key id="data" for="node" attr.name="data" attr.type="string"/>
+  <key id="authority" for="node" attr.name="authority" attr.type="double"/>
+  <key id="edge_kind" for="edge" attr.name="kind" attr.type="string"/>
+  <graph id="legal_kg" edgedefault="directed">
+"""
+GRAPHML_TAIL = """  </graph>
+</graphml>
+"""
+
+# Characters XML 1.0 does not allow, even escaped
+_XML_INVALID = {c: None for c in range(32) if c not in (9, 10, 13)}
+
+Partition = Tuple[str, int, int, str]    # table, first rowid, last rowid, output path
+
+
+def neo4j_label(kind: str) -> str:
+    """'law' -> 'Law', 'publication' -> 'Publication'"""
+    return kind[:1].upper() + kind[1:]
+
+
+def neo4j_type(kind: str) -> str:
+    """'refers_to' -> 'REFERS_TO'"""
+    return kind.upper()
+
+
+def _connect(db_path) -> sqlite3.Connection:
+    return sqlite3.connect(f"file:{Path(db_path).resolve()}?mode=ro", uri=True)
+
+
+def _has_table(conn, name: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone() is not None
+
+
+def _rows(conn, table: str, first: int, last: int, batch_size: int) -> Iterator[tuple]:
+    if table == "graph_nodes":
+        authority = ("LEFT JOIN graph_authority a ON a.node_id = n.id" if _has_table(conn, "graph_authority") else "")
+        score = "a.score" if authority else "NULL"
+        sql = f"""
+            SELECT n.id, n.kind, n.label, n.data, {score} FROM graph_nodes n {authority}
+            WHERE n.rowid BETWEEN ? AND ? ORDER BY n.rowid
+        """
+    else:
+        sql = "SELECT src, dst, kind FROM graph_edges WHERE rowid BETWEEN ? AND ? ORDER BY rowid"
+    cursor = conn.execute(sql, (first, last))
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def partitions(conn, out_dir: Path, suffix: str, rows_per_file: int = ROWS_PER_FILE) -> List[Partition]:
+    """Rowid ranges of the node and edge tables, one output file each"""
+    plan = []
+    for table, name in (("graph_nodes", "nodes"), ("graph_edges", "edges")):
+        low, high = conn.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {table}").fetchone()
+        if low is None:
+            continue
+        for part, first in enumerate(range(low, high + 1, rows_per_file)):
+            plan.append((table, first, min(first + rows_per_file - 1, high),
+                         str(Path(out_dir) / f"{name}-{part:05d}{suffix}")))
+    return plan
+
+
+def _write_neo4j(rows: Iterator[tuple], table: str, path: str) -> int:
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        if table == "graph_nodes":
+            for node_id, kind, label, data, score in rows:
+                writer.writerow([node_id, kind, label, data, "" if score is None else repr(score), neo4j_label(kind)])
+                count += 1
+        else:
+            for src, dst, kind in rows:
+                writer.writerow([src, dst, neo4j_type(kind)])
+                count += 1
+    return count
+
+
+def _xml(value) -> str:
+    return escape(str(value).translate(_XML_INVALID))
+
+
+def _write_graphml(rows: Iterator[tuple], table: str, path: str) -> int:
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        if table == "graph_nodes":
+            for node_id, kind, label, data, score in rows:
+                f.write(f'    <node id={quoteattr(node_id.translate(_XML_INVALID))}>'
+                        f'<data key="kind">{_xml(kind)}</data>')
+                if label is not None:
+                    f.write(f'<data key="label">{_xml(label)}</data>')
+                if data is not None:
+                    f.write(f'<data key="data">{_xml(data)}</data>')
+                if score is not None:
+                    f.write(f'<data key="authority">{score!r}</data>')
+                f.write("</node>\n")
+                count += 1
+        else:
+            for src, dst, kind in rows:
+                f.write(f'    <edge source={quoteattr(src.translate(_XML_INVALID))} '
+                        f'target={quoteattr(dst.translate(_XML_INVALID))}><data key="edge_kind">{_xml(kind)}</data></edge>\n')
+                count += 1
+    return count
+
+
+def _write_parquet(rows: Iterator[tuple], table: str, path: str, batch_size: int) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if table == "graph_nodes":
+        schema = pa.schema([("id", pa.string()), ("kind", pa.string()), ("label", pa.string()),
+                            ("data", pa.string()), ("authority", pa.float64())])
+    else:
+        schema = pa.schema([("src", pa.string()), ("dst", pa.string()), ("kind", pa.string())])
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                writer.write_batch(_record_batch(pa, schema, batch))
+                count += len(batch)
+                batch = []
+        if batch:
+            writer.write_batch(_record_batch(pa, schema, batch))
+            count += len(batch)
+    return count
+
+
+def _record_batch(pa, schema, rows: List[tuple]):
+    columns = zip(*rows)
+    return pa.RecordBatch.from_arrays([pa.array(list(column), type=f.type) for column, f in zip(columns, schema)],
+                                      schema=schema)
+
+
+def export_partition(db_path: str, fmt: str, partition: Partition, batch_size: int = BATCH_SIZE) -> Tuple[str, str, int]:
+    """Write one rowid range; returns (table, path, rows). Runs in a worker process."""
+    table, first, last, path = partition
+    conn = _connect(db_path)
+    try:
+        rows = _rows(conn, table, first, last, batch_size)
+        if fmt == "neo4j":
+            count = _write_neo4j(rows, table, path)
+        elif fmt == "graphml":
+            count = _write_graphml(rows, table, path)
+        else:
+            count = _write_parquet(rows, table, path, batch_size)
+    finally:
+        conn.close()
+    return table, path, count
+
+
+def _export_partition(args):
+    return export_partition(*args)
+
+
+def export_graph(db_path, out, fmt: str = "neo4j", workers: int = 1, rows_per_file: int = ROWS_PER_FILE,
+                 batch_size: int = BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Export the graph tables of the database at db_path. out is a directory
+    (neo4j, parquet) or the .graphml file. Returns row counts, the files
+    written and rows/s.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}, expected one of {', '.join(FORMATS)}")
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError("Parquet export needs pyarrow (pip install pyarrow)") from None
+    start = time.perf_counter()
+    out = Path(out)
+    part_dir = out.parent / f".{out.name}.parts" if fmt == "graphml" else out
+    part_dir.mkdir(parents=True, exist_ok=True)
+    suffix = {"neo4j": ".csv", "graphml": ".part", "parquet": ".parquet"}[fmt]
+    conn = _connect(db_path)
+    try:
+        plan = partitions(conn, part_dir, suffix, rows_per_file)
+    finally:
+        conn.close()
+
+    jobs = [(str(db_path), fmt, partition, batch_size) for partition in plan]
+    if workers > 1 and len(jobs) > 1:
+        with multiprocessing.Pool(min(workers, len(jobs))) as pool:
+            results = pool.map(_export_partition, jobs)
+    else:
+        results = [_export_partition(job) for job in jobs]
+    counts = {"graph_nodes": 0, "graph_edges": 0}
+    for table, _, count in results:
+        counts[table] += count
+    node_files = [path for table, path, _ in results if table == "graph_nodes"]
+    edge_files = [path for table, path, _ in results if table == "graph_edges"]
+
+    if fmt == "neo4j":
+        files = _finish_neo4j(out, node_files, edge_files)
+    elif fmt == "graphml":
+        files = [str(_finish_graphml(out, node_files + edge_files))]
+        shutil.rmtree(part_dir)
+    else:
+        files = node_files + edge_files
+    seconds = time.perf_counter() - start
+    rows = counts["graph_nodes"] + counts["graph_edges"]
+    return {'format': fmt, 'nodes': counts["graph_nodes"], 'edges': counts["graph_edges"], 'files': files,
+            'seconds': seconds, 'rows_per_second': rows / seconds if seconds else 0.0}
+
+
+def _finish_neo4j(out: Path, node_files: List[str], edge_files: List[str]) -> List[str]:
+    for name, header in (("nodes_header.csv", NODE_HEADER), ("edges_header.csv", EDGE_HEADER)):
+        with open(out / name, "w", encoding="utf-8", newline="") as f:
+            csv.writer(f).writerow(header)
+    # Ids are node ids ('law:1982:80'), unique across kinds; fields may hold newlines
+    args = ["--id-type=string", "--multiline-fields=true"]
+    args.append("--nodes=" + ",".join(["nodes_header.csv"] + [Path(p).name for p in node_files]))
+    args.append("--relationships=" + ",".join(["edges_header.csv"] + [Path(p).name for p in edge_files]))
+    (out / "import.args").write_text("\n".join(args) + "\n", encoding="utf-8")
+    return [str(out / "nodes_header.csv"), str(out / "edges_header.csv")] + node_files + edge_files + \
+        [str(out / "import.args")]
+
+
+def _finish_graphml(out: Path, parts: List[str]) -> Path:
+    with open(out, "w", encoding="utf-8") as f:
+        f.write(GRAPHML_HEAD)
+        for part in parts:
+            with open(part, "r", encoding="utf-8") as fragment:
+                shutil.copyfileobj(fragment, f)
+        f.write(GRAPHML_TAIL)
+    return out
+
+
+def _read_groups(out: Path, option: str) -> List[List[Path]]:
+    groups = []
+    for line in (out / "import.args").read_text(encoding="utf-8").splitlines():
+        if line.startswith(f"--{option}="):
+            value = line.split("=", 1)[1]
+            # --nodes=Label1:Label2=header.csv,part.csv also names labels
+            files = value.split("=", 1)[1] if "=" in value else value
+            groups.append([out / name for name in files.split(",")])
+    return groups
+
+
+def _read_csv_group(files: List[Path]) -> Iterator[Dict[str, str]]:
+    with open(files[0], "r", encoding="utf-8", newline="") as f:
+        header = next(csv.reader(f))
+    for path in files[1:]:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            for line, row in enumerate(csv.reader(f), 1):
+                if len(row) != len(header):
+                    raise ValueError(f"{path.name}:{line}: {len(row)} fields, header has {len(header)}")
+                yield dict(zip(header, row))
+
+
+def verify_neo4j_import(out) -> Dict[str, Any]:
+    """
+    Check an export the way neo4j-admin's importer would: every row matches
+    its header, node ids are unique, every relationship has a type and both
+    endpoints exist, float columns parse. Returns node and relationship
+    counts per label and type. Keeps the node ids in memory.
+    """
+    out = Path(out)
+    ids = set()
+    labels: Dict[str, int] = {}
+    for files in _read_groups(out, "nodes"):
+        for row in _read_csv_group(files):
+            node_id = row["id:ID"]
+            if not node_id or node_id in ids:
+                raise ValueError(f"Missing or duplicate node id {node_id!r}")
+            ids.add(node_id)
+            for column, value in row.items():
+                if column.endswith(":float") and value:
+                    float(value)
+            for label in row.get(":LABEL", "").split(";"):
+                if not label:
+                    raise ValueError(f"Node {node_id!r} has no label")
+                labels[label] = labels.get(label, 0) + 1
+    types: Dict[str, int] = {}
+    for files in _read_groups(out, "relationships"):
+        for row in _read_csv_group(files):
+            for end in (":START_ID", ":END_ID"):
+                if row[end] not in ids:
+                    raise ValueError(f"Relationship {row[':START_ID']} -> {row[':END_ID']}: "
+                                     f"unknown node {row[end]!r}")
+            if not row[":TYPE"]:
+                raise ValueError(f"Relationship {row[':START_ID']} -> {row[':END_ID']} has no type")
+            types[row[":TYPE"]] = types.get(row[":TYPE"], 0) + 1
+    return {'nodes': len(ids), 'relationships': sum(types.values()), 'labels': labels, 'types': types}
@@ -0,0 +1,330 @@
+"""
+Faceted filtering over cases without scanning the case dicts.
+
+Every case gets a row number. For each facet value the index keeps the rows
+that have it: a sorted int32 array of row numbers while the value is rare,
+a NumPy bool bitmap once it covers more than 1/DENSE_DIVISOR of the rows
+(an int32 row costs 32 bits, a bitmap 1 bit per row of the whole corpus).
+decision_date is an int column (YYYYMMDD) with a sorted view for range
+queries.
+
+    index = FacetIndex.from_cases(load_case_dir())
+    result = index.query(court_code=['HDO', 'HFD'], is_precedent=True, date_from='2020-01-01')
+    result.count
+    result.counts(['keywords'], top=10)      # {'keywords': {'Skadestånd': 12, ...}}
+    index.counts()                           # whole corpus, kept up to date on add()
+
+Values within one facet are OR:ed, facets are AND:ed. add() is incremental:
+a case added again replaces its old row (the old row is tombstoned).
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+SINGLE_FACETS = ('court_code', 'type', 'is_precedent')
+MULTI_FACETS = ('keywords', 'legal_areas')
+FACETS = SINGLE_FACETS + MULTI_FACETS
+
+DENSE_DIVISOR = 32
+# Facets with up to this many values are counted value by value (bitmap AND),
+# larger ones (keywords) with one pass over their (row, value) pairs
+PER_VALUE_COUNT_LIMIT = 256
+INITIAL_CAPACITY = 1024
+
+
+def date_key(value: Optional[str]) -> int:
+    """'2025-04-28' -> 20250428; 0 for missing or malformed dates"""
+    if not value:
+        return 0
+    digits = value[:10].replace("-", "")
+    return int(digits) if len(digits) == 8 and digits.isdigit() else 0
+
+
+def _fit(mask: np.ndarray, size: int) -> np.ndarray:
+    """A bitmap cut or zero-padded to exactly size rows"""
+    if len(mask) >= size:
+        return mask[:size]
+    fitted = np.zeros(size, dtype=bool)
+    fitted[:len(mask)] = mask
+    return fitted
+
+
+def _grow(array: np.ndarray, size: int) -> np.ndarray:
+    if size <= len(array):
+        return array
+    grown = np.zeros(max(size, len(array) * 2), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class _Postings:
+    """Rows of one facet value: sorted row numbers, plus a bitmap once dense"""
+
+    __slots__ = ('ids', 'size', 'bitmap')
+
+    def __init__(self):
+        self.ids = np.zeros(8, dtype=np.int32)
+        self.size = 0
+        self.bitmap: Optional[np.ndarray] = None
+
+    def append(self, row: int, capacity: int):
+        self.ids = _grow(self.ids, self.size + 1)
+        self.ids[self.size] = row
+        self.size += 1
+        if self.bitmap is not None:
+            self.bitmap = _grow(self.bitmap, capacity)
+            self.bitmap[row] = True
+        elif self.size * DENSE_DIVISOR > capacity:
+            self.bitmap = np.zeros(capacity, dtype=bool)
+            self.bitmap[self.ids[:self.size]] = True
+
+    def rows(self) -> np.ndarray:
+        return self.ids[:self.size]
+
+
+class _Facet:
+    def __init__(self, name: str):
+        self.name = name
+        self.values: List[Any] = []
+        self.codes: Dict[Any, int] = {}
+        self.postings: List[_Postings] = []
+        self.totals = np.zeros(16, dtype=np.int64)
+        # (row, value code) pairs in row order, for counting within a selection
+        self.pair_rows = np.zeros(INITIAL_CAPACITY, dtype=np.int32)
+        self.pair_codes = np.zeros(INITIAL_CAPACITY, dtype=np.int32)
+        self.pairs = 0
+
+    def code(self, value) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+            self.postings.append(_Postings())
+            self.totals = _grow(self.totals, code + 1)
+        return code
+
+    def add(self, row: int, values: Iterable, capacity: int) -> List[int]:
+        codes = []
+        for value in values:
+            code = self.code(value)
+            if code in codes:
+                continue
+            codes.append(code)
+            self.postings[code].append(row, capacity)
+            self.totals[code] += 1
+            self.pair_rows = _grow(self.pair_rows, self.pairs + 1)
+            self.pair_codes = _grow(self.pair_codes, self.pairs + 1)
+            self.pair_rows[self.pairs] = row
+            self.pair_codes[self.pairs] = code
+            self.pairs += 1
+        return codes
+
+    def select(self, values: Sequence, size: int) -> np.ndarray:
+        """Rows (sorted ids, or a bitmap of size rows) having any of the values"""
+        postings = [self.postings[self.codes[v]] for v in values if v in self.codes]
+        if not postings:
+            return np.zeros(0, dtype=np.int32)
+        if len(postings) == 1:
+            p = postings[0]
+            return _fit(p.bitmap, size) if p.bitmap is not None else p.rows()
+        if all(p.bitmap is None for p in postings):
+            return np.unique(np.concatenate([p.rows() for p in postings]))
+        mask = np.zeros(size, dtype=bool)
+        for p in postings:
+            if p.bitmap is not None:
+                mask |= _fit(p.bitmap, size)
+            else:
+                mask[p.rows()] = True
+        return mask
+
+    def count_in(self, rows: Optional[np.ndarray], mask: Optional[np.ndarray]) -> np.ndarray:
+        """Per-code counts over a selection given as sorted rows or as a bitmap (large selections)"""
+        if mask is not None and len(self.values) <= PER_VALUE_COUNT_LIMIT:
+            counts = np.zeros(len(self.values), dtype=np.int64)
+            for code, p in enumerate(self.postings):
+                if p.bitmap is not None:
+                    counts[code] = np.count_nonzero(_fit(p.bitmap, len(mask)) & mask)
+                else:
+                    counts[code] = np.count_nonzero(mask[p.rows()])
+            return counts
+        pair_rows = self.pair_rows[:self.pairs]
+        pair_codes = self.pair_codes[:self.pairs]
+        if mask is not None:
+            codes = pair_codes[mask[pair_rows]]
+        else:
+            # Few rows: find each row's pairs by binary search instead of touching every pair
+            starts = np.searchsorted(pair_rows, rows, 'left')
+            lengths = np.searchsorted(pair_rows, rows, 'right') - starts
+            offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+            codes = pair_codes[np.arange(lengths.sum()) + offsets]
+        return np.bincount(codes, minlength=len(self.values))
+
+    def as_dict(self, counts: np.ndarray, top: Optional[int] = None) -> Dict[Any, int]:
+        nonzero = np.flatnonzero(counts[:len(self.values)])
+        order = nonzero[np.argsort(-counts[nonzero], kind='stable')]
+        if top is not None:
+            order = order[:top]
+        return {self.values[code]: int(counts[code]) for code in order}
+
+    def nbytes(self) -> int:
+        total = self.totals.nbytes + self.pair_rows.nbytes + self.pair_codes.nbytes
+        for p in self.postings:
+            total += p.ids.nbytes + (p.bitmap.nbytes if p.bitmap is not None else 0)
+        return total
+
+
+class FacetResult:
+    """Matching rows, kept as a bitmap or as sorted row numbers, whichever the query produced"""
+
+    def __init__(self, index: "FacetIndex", rows: Optional[np.ndarray] = None, mask: Optional[np.ndarray] = None):
+        self.index = index
+        self._rows = rows
+        self._mask = mask
+
+    @property
+    def rows(self) -> np.ndarray:
+        if self._rows is None:
+            self._rows = np.flatnonzero(self._mask).astype(np.int32)
+        return self._rows
+
+    @property
+    def count(self) -> int:
+        return len(self._rows) if self._rows is not None else int(np.count_nonzero(self._mask))
+
+    def case_numbers(self, offset: int = 0, limit: Optional[int] = None) -> List[str]:
+        rows = self.rows[offset:offset + limit if limit is not None else None]
+        return [self.index.case_numbers[row] for row in rows]
+
+    def counts(self, facets: Optional[Sequence[str]] = None, top: Optional[int] = None) -> Dict[str, Dict[Any, int]]:
+        """Counts per facet value within the result"""
+        index = self.index
+        if self._mask is None and len(self._rows) * 64 > index.size:
+            self._mask = np.zeros(index.size, dtype=bool)
+            self._mask[self._rows] = True
+        return {
+            name: index.facets[name].as_dict(index.facets[name].count_in(self._rows, self._mask), top)
+            for name in (facets or FACETS)
+        }
+
+
+class FacetIndex:
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        self.capacity = capacity
+        self.size = 0
+        self.case_numbers: List[str] = []
+        self.row_of: Dict[str, int] = {}
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.dates = np.zeros(capacity, dtype=np.int32)
+        self.facets = {name: _Facet(name) for name in FACETS}
+        self._row_codes: List[Dict[str, List[int]]] = []
+        # Rows sorted by date, up to self._date_sorted rows; later rows are merged in on demand
+        self._date_order = np.zeros(0, dtype=np.int32)
+        self._date_keys = np.zeros(0, dtype=np.int32)
+        self._date_sorted = 0
+
+    @classmethod
+    def from_cases(cls, cases: Iterable[Dict[str, Any]]) -> "FacetIndex":
+        index = cls()
+        index.add_many(cases)
+        return index
+
+    def __len__(self) -> int:
+        return int(self.alive[:self.size].sum())
+
+    def add(self, case: Dict[str, Any]) -> int:
+        case_number = case['case_number']
+        if case_number in self.row_of:
+            self._tombstone(self.row_of[case_number])
+        row = self.size
+        self.size += 1
+        if self.size > self.capacity:
+            self.capacity *= 2
+            self.alive = _grow(self.alive, self.capacity)
+            self.dates = _grow(self.dates, self.capacity)
+        self.alive[row] = True
+        self.dates[row] = date_key(case.get('decision_date'))
+        self.case_numbers.append(case_number)
+        self.row_of[case_number] = row
+
+        codes = {}
+        for name in SINGLE_FACETS:
+            value = case.get(name)
+            codes[name] = self.facets[name].add(row, [] if value is None or value == "" else [value], self.capacity)
+        for name in MULTI_FACETS:
+            codes[name] = self.facets[name].add(row, case.get(name) or [], self.capacity)
+        self._row_codes.append(codes)
+        return row
+
+    def add_many(self, cases: Iterable[Dict[str, Any]]) -> int:
+        count = 0
+        for case in cases:
+            self.add(case)
+            count += 1
+        return count
+
+    def _tombstone(self, row: int):
+        self.alive[row] = False
+        for name, codes in self._row_codes[row].items():
+            for code in codes:
+                self.facets[name].totals[code] -= 1
+        self._row_codes[row] = {}
+
+    def _dates_between(self, date_from: Optional[str], date_to: Optional[str]) -> np.ndarray:
+        if self._date_sorted < self.size:
+            new_rows = np.arange(self._date_sorted, self.size, dtype=np.int32)
+            new_rows = new_rows[np.argsort(self.dates[new_rows], kind='stable')]
+            new_keys = self.dates[new_rows]
+            positions = np.searchsorted(self._date_keys, new_keys, 'right')
+            self._date_order = np.insert(self._date_order, positions, new_rows)
+            self._date_keys = np.insert(self._date_keys, positions, new_keys)
+            self._date_sorted = self.size
+        lo = np.searchsorted(self._date_keys, max(date_key(date_from), 1), 'left')
+        hi = np.searchsorted(self._date_keys, date_key(date_to) if date_to else np.iinfo(np.int32).max, 'right')
+        rows = self._date_order[lo:hi]
+        if len(rows) * DENSE_DIVISOR > self.size:
+            # Wide ranges: a bitmap is cheaper than sorting the row numbers
+            mask = np.zeros(self.size, dtype=bool)
+            mask[rows] = True
+            return mask
+        return np.sort(rows)
+
+    def query(self, date_from: Optional[str] = None, date_to: Optional[str] = None, **filters) -> FacetResult:
+        selectors = []
+        for name, values in filters.items():
+            if name not in self.facets:
+                raise ValueError(f"Unknown facet: {name}")
+            if values is None:
+                continue
+            if isinstance(values, (str, bool)) or not isinstance(values, Iterable):
+                values = [values]
+            selectors.append(self.facets[name].select(list(values), self.size))
+        if date_from or date_to:
+            selectors.append(self._dates_between(date_from, date_to))
+
+        if not selectors:
+            return FacetResult(self, mask=self.alive[:self.size])
+
+        # Start from the smallest id list; bitmaps are only probed
+        id_lists = sorted((s for s in selectors if s.dtype != bool), key=len)
+        bitmaps = [s for s in selectors if s.dtype == bool]
+        if id_lists:
+            rows = id_lists[0]
+            for other in id_lists[1:]:
+                rows = np.intersect1d(rows, other, assume_unique=True)
+            for bitmap in bitmaps:
+                rows = rows[bitmap[rows]]
+            rows = rows[self.alive[rows]]
+            return FacetResult(self, rows=rows.astype(np.int32, copy=False))
+        mask = bitmaps[0] & self.alive[:self.size]
+        for bitmap in bitmaps[1:]:
+            mask &= bitmap
+        return FacetResult(self, mask=mask)
+
+    def counts(self, facets: Optional[Sequence[str]] = None, top: Optional[int] = None) -> Dict[str, Dict[Any, int]]:
+        """Counts per facet value over the whole corpus, from running totals"""
+        return {name: self.facets[name].as_dict(self.facets[name].totals, top) for name in (facets or FACETS)}
+
+    def nbytes(self) -> int:
+        return (self.alive.nbytes + self.dates.nbytes + self._date_order.nbytes + self._date_keys.nbytes
+                + sum(facet.nbytes() for facet in self.facets.values()))
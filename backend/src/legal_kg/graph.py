@@ -0,0 +1,333 @@
+"""
+Knowledge graph store: laws, sections, cases and what they cite.
+
+Node ids carry their kind:
+
+    law:1982:80                 a statute (SFS number)
+    section:1942:740/10kap/17§  a §-section (see sections.section_id)
+    case:B 1462-25              a court decision (case number)
+    pub:NJA 2017 s. 589         a referenced publication
+    keyword:Andelskraft         a case keyword
+
+Edges:
+
+    case    -cites->       law, section   (legal_references)
+    case    -refers_to->   pub            (referenced_publications)
+    case    -keyword->     keyword
+    section -part_of->     law
+    section -references->  section, law   (section_references)
+
+build_graph() rebuilds the tables from cases/, scraped law JSON files and the
+law_sections table, and bumps the graph version; law nodes carry the URL
+the resolver verified (legal_kg.resolver). Graph is the in-memory
+adjacency view used by the query service, with an LRU cache on
+neighbourhoods.
+"""
+
+import glob
+import json
+import re
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .casepack import CASES_DIR, load_case_dir
+from .citations import parse_citations
+from .metrics import METRICS
+from .resolver import UrlResolver
+from .sections import law_sfs, section_id
+
+ROOT_DIR = Path(__file__).parent.parent.parent.parent
+# Outputs of law_datascraper.py / get_laws_on_topic_scraper.py
+LAW_FILE_PATTERNS = ("law_data_*.json", "multiple_topics_comprehensive_*.json", "topic_all_laws_*.json")
+
+NEIGHBOURHOOD_CACHE_SIZE = 4096
+
+_TOKEN = re.compile(r'\w+')
+
+
+def init_graph_tables(conn):
+    """Create the graph tables if they do not exist"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS graph_nodes (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            label TEXT,
+            data TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS graph_edges (
+            src TEXT NOT NULL,
+            dst TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            PRIMARY KEY (src, dst, kind)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_graph_edges_dst ON graph_edges (dst)")
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS graph_search USING fts5(
+            node_id UNINDEXED, kind UNINDEXED, title, body,
+            tokenize = 'unicode61 remove_diacritics 0'
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS graph_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    """)
+    conn.commit()
+
+
+def graph_version(conn) -> int:
+    row = conn.execute("SELECT value FROM graph_meta WHERE key = 'version'").fetchone()
+    return int(row[0]) if row else 0
+
+
+def fts_query(text: str) -> str:
+    """Quote every word so user input cannot break the FTS5 query syntax"""
+    return " ".join(f'"{token}"' for token in _TOKEN.findall(text))
+
+
+def law_node(sfs: str) -> str:
+    return f"law:{sfs}"
+
+
+def case_node(case_number: str) -> str:
+    return f"case:{case_number}"
+
+
+def section_node(sid: str) -> str:
+    return f"section:{sid}"
+
+
+def iter_law_files(root: Path = ROOT_DIR, patterns: Iterable[str] = LAW_FILE_PATTERNS) -> Iterator[Dict[str, Any]]:
+    """Yield the law dicts in the scrapers' JSON outputs (single law or topic dumps)"""
+    for pattern in patterns:
+        for path in sorted(glob.glob(str(Path(root) / pattern))):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if 'all_laws' in data:
+                yield from data['all_laws']
+            elif 'detailed_laws' in data:
+                yield from data['detailed_laws']
+            elif 'metadata' in data:
+                yield data
+
+
+class GraphWriter:
+    """Collects nodes and edges and writes them in bulk"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.nodes: Dict[str, Tuple[str, str, Optional[str], str]] = {}
+        self.search_rows: List[Tuple[str, str, str, str]] = []
+        self.edges = set()
+        self._searchable = set()
+
+    def node(self, node_id: str, kind: str, label: str, data: Optional[Dict[str, Any]] = None,
+             body: Optional[str] = None):
+        existing = self.nodes.get(node_id)
+        # Stub nodes (e.g. a law only known from a citation) are replaced by full ones
+        if existing is None or (existing[3] is None and data is not None):
+            self.nodes[node_id] = (node_id, kind, label, json.dumps(data, ensure_ascii=False) if data is not None else None)
+            if body is not None and node_id not in self._searchable:
+                self._searchable.add(node_id)
+                self.search_rows.append((node_id, kind, label, body))
+
+    def edge(self, src: str, dst: str, kind: str):
+        self.edges.add((src, dst, kind))
+
+    def add_case(self, case: Dict[str, Any]):
+        node = case_node(case['case_number'])
+        data = {k: v for k, v in case.items() if k != 'full_text'}
+        body = "\n".join([case.get('nickname') or '', case.get('summary') or '',
+                          " ".join(case.get('keywords') or []), case.get('full_text') or ''])
+        self.node(node, 'case', case.get('nickname') or case['case_number'], data, body)
+
+        for ref in case.get('legal_references') or []:
+            sfs = ref.get('sfs_number')
+            if not sfs:
+                continue
+            self.node(law_node(sfs), 'law', sfs)
+            self.edge(node, law_node(sfs), 'cites')
+            # References repeat across cases; parse_citations is memoized
+            for citation in parse_citations(ref.get('reference') or ''):
+                if (citation.sfs or sfs) != sfs:
+                    continue
+                for paragraph in citation.sections():
+                    target = section_id(sfs, citation.chapter, paragraph)
+                    sid = section_node(target)
+                    self.node(sid, 'section', target)
+                    self.edge(node, sid, 'cites')
+                    self.edge(sid, law_node(sfs), 'part_of')
+        for publication in case.get('referenced_publications') or []:
+            pub = f"pub:{publication.strip()}"
+            self.node(pub, 'publication', publication.strip())
+            self.edge(node, pub, 'refers_to')
+        for keyword in case.get('keywords') or []:
+            self.node(f"keyword:{keyword}", 'keyword', keyword)
+            self.edge(node, f"keyword:{keyword}", 'keyword')
+
+    def add_law(self, law: Dict[str, Any]):
+        sfs = law_sfs(law)
+        if not sfs:
+            return
+        data = {
+            'sfs': sfs,
+            'title': law.get('title'),
+            'url': law.get('url'),
+            'metadata': law.get('metadata') or {},
+            'scraped_at': law.get('scraped_at'),
+        }
+        body = "\n".join([law.get('title') or ''] + [f"{k}: {v}" for k, v in data['metadata'].items()])
+        self.node(law_node(sfs), 'law', law.get('title') or sfs, data, body)
+
+    def add_sections(self):
+        """Sections and their references from the law_sections tables"""
+        rows = self.conn.execute("""
+            SELECT id, sfs, chapter, chapter_title, paragraph, heading, text FROM law_sections ORDER BY sfs, position
+        """).fetchall()
+        for sid, sfs, chapter, chapter_title, paragraph, heading, text in rows:
+            data = {'sfs': sfs, 'chapter': chapter, 'chapter_title': chapter_title,
+                    'paragraph': paragraph, 'heading': heading, 'text': text}
+            label = f"{chapter} kap. {paragraph} §" if chapter else f"{paragraph} §"
+            self.node(section_node(sid), 'section', f"{label} ({sfs})", data, "\n".join([heading or '', text or '']))
+            self.node(law_node(sfs), 'law', sfs)
+            self.edge(section_node(sid), law_node(sfs), 'part_of')
+        for sid, target_sfs, target_sid in self.conn.execute(
+            "SELECT section_id, target_sfs, target_section_id FROM section_references"
+        ):
+            target = section_node(target_sid) if target_sid else law_node(target_sfs)
+            if target_sid:
+                self.node(target, 'section', target_sid)
+            else:
+                self.node(target, 'law', target_sfs)
+            self.edge(section_node(sid), target, 'references')
+
+    def add_law_urls(self, resolver: UrlResolver):
+        """
+        Verified URLs (legal_kg.resolver) on the law nodes: laws only known
+        from citations get one, and a scraped link known to be broken is
+        replaced or dropped. Nothing is fetched.
+        """
+        urls = resolver.known_urls()
+        for node_id, (_, kind, label, data) in list(self.nodes.items()):
+            if kind != 'law':
+                continue
+            sfs = node_id[len("law:"):]
+            if data is None:
+                if sfs in urls:
+                    data = {'sfs': sfs, 'url': urls[sfs]}
+                    self.nodes[node_id] = (node_id, kind, label, json.dumps(data, ensure_ascii=False))
+                continue
+            data = json.loads(data)
+            url = urls.get(sfs) or (None if resolver.is_bad(data.get('url')) else data.get('url'))
+            if url != data.get('url'):
+                data['url'] = url
+                self.nodes[node_id] = (node_id, kind, label, json.dumps(data, ensure_ascii=False))
+
+    def write(self) -> Dict[str, int]:
+        self.conn.executemany("INSERT OR REPLACE INTO graph_nodes (id, kind, label, data) VALUES (?, ?, ?, ?)",
+                              list(self.nodes.values()))
+        self.conn.executemany("INSERT OR IGNORE INTO graph_edges (src, dst, kind) VALUES (?, ?, ?)", list(self.edges))
+        self.conn.executemany("INSERT INTO graph_search (node_id, kind, title, body) VALUES (?, ?, ?, ?)",
+                              self.search_rows)
+        return {'nodes': len(self.nodes), 'edges': len(self.edges)}
+
+
+def build_graph(conn, cases: Optional[Iterable[Dict[str, Any]]] = None,
+                laws: Optional[Iterable[Dict[str, Any]]] = None) -> Dict[str, int]:
+    """Rebuild the graph tables and bump the graph version"""
+    init_graph_tables(conn)
+    has_sections = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'law_sections'"
+    ).fetchone()
+    writer = GraphWriter(conn)
+    for law in (laws if laws is not None else iter_law_files()):
+        writer.add_law(law)
+    if has_sections:
+        writer.add_sections()
+    duplicates = 0
+    for case in (cases if cases is not None else load_case_dir(CASES_DIR)):
+        # Near-duplicates flagged at ingest (legal_kg.dedup) would only add a second copy
+        if case.get('duplicate_of'):
+            duplicates += 1
+            continue
+        writer.add_case(case)
+    writer.add_law_urls(UrlResolver(conn))
+
+    with METRICS.timer('db_write_seconds', table='graph'):
+        for table in ("graph_nodes", "graph_edges", "graph_search"):
+            conn.execute(f"DELETE FROM {table}")
+        stats = writer.write()
+        version = graph_version(conn) + 1
+        conn.execute("INSERT OR REPLACE INTO graph_meta (key, value) VALUES ('version', ?)", (str(version),))
+        conn.commit()
+    stats['version'] = version
+    stats['duplicates_skipped'] = duplicates
+    return stats
+
+
+class Graph:
+    """
+    In-memory adjacency view of the graph tables.
+
+        graph = Graph.load(conn)
+        graph.neighbourhood('law:1942:740', k=2)
+    """
+
+    def __init__(self, nodes: Dict[str, Tuple[str, str]], edges: Iterable[Tuple[str, str, str]],
+                 version: int = 0, cache_size: int = NEIGHBOURHOOD_CACHE_SIZE):
+        self.nodes = nodes
+        self.version = version
+        self.out_edges: Dict[str, List[Tuple[str, str]]] = {}
+        self.in_edges: Dict[str, List[Tuple[str, str]]] = {}
+        self.edge_count = 0
+        for src, dst, kind in edges:
+            self.out_edges.setdefault(src, []).append((dst, kind))
+            self.in_edges.setdefault(dst, []).append((src, kind))
+            self.edge_count += 1
+        self.neighbourhood = lru_cache(maxsize=cache_size)(self._neighbourhood)
+
+    @classmethod
+    def load(cls, conn, cache_size: int = NEIGHBOURHOOD_CACHE_SIZE) -> "Graph":
+        nodes = {node_id: (kind, label) for node_id, kind, label in conn.execute("SELECT id, kind, label FROM graph_nodes")}
+        edges = conn.execute("SELECT src, dst, kind FROM graph_edges").fetchall()
+        return cls(nodes, edges, graph_version(conn), cache_size)
+
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self.nodes
+
+    def incoming(self, node_id: str, kind: Optional[str] = None) -> List[str]:
+        return [src for src, k in self.in_edges.get(node_id, ()) if kind is None or k == kind]
+
+    def outgoing(self, node_id: str, kind: Optional[str] = None) -> List[str]:
+        return [dst for dst, k in self.out_edges.get(node_id, ()) if kind is None or k == kind]
+
+    def _neighbourhood(self, node_id: str, k: int = 1, max_nodes: int = 1000) -> Tuple[Tuple[str, str, str, int], ...]:
+        """
+        Nodes within k hops (edges followed both ways), breadth first:
+        (node_id, kind, label, distance). Cached; treat the result as read-only.
+        """
+        if node_id not in self.nodes:
+            return ()
+        seen = {node_id: 0}
+        queue = deque([node_id])
+        while queue and len(seen) < max_nodes:
+            current = queue.popleft()
+            distance = seen[current]
+            if distance == k:
+                continue
+            for neighbour, _ in self.out_edges.get(current, []) + self.in_edges.get(current, []):
+                if neighbour not in seen:
+                    seen[neighbour] = distance + 1
+                    queue.append(neighbour)
+                    if len(seen) >= max_nodes:
+                        break
+        return tuple((n, *self.nodes.get(n, ('unknown', n)), d) for n, d in seen.items())
+
+    def cache_info(self):
+        return self.neighbourhood.cache_info()
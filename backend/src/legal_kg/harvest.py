@@ -0,0 +1,205 @@
+"""
+Partitioned, parallel harvest of a paged search API.
+
+Deep paging (sidIndex 0, 1, 2, ...) over one huge result list gets slower
+and less consistent the further it goes. Instead the search space is split
+into partitions (court code x decision-date window) that are small enough to
+page through in a few requests:
+
+- partitions are fetched in parallel
+- a partition with more than `max_hits` results is split in two halves of
+  its date window, recursively, down to single days
+- hits are deduplicated by case id across partitions
+- every partition is verified: the unique hits fetched must equal the total
+  the API reported for it, and the totals of split children must add up to
+  their parent's
+
+The API is reached through a `search(court, date_from, date_to, page)`
+function returning `(total, hits)`, so the harvester itself has no HTTP
+code (see cases/court_scraper.py for the rattspraxis one).
+"""
+
+import math
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .metrics import METRICS, get_logger
+
+SearchFn = Callable[[str, date, date, int], Tuple[Optional[int], List[Dict[str, Any]]]]
+
+logger = get_logger("harvest")
+
+DEFAULT_PER_PAGE = 50
+# Deepest paging allowed in one partition before it is split
+DEFAULT_MAX_HITS = 500
+
+
+@dataclass
+class Partition:
+    court: str
+    date_from: date
+    date_to: date
+    parent: Optional[str] = None
+    total: Optional[int] = None
+    fetched: int = 0
+    status: str = "pending"  # pending / split / verified / mismatch / unverified / failed
+    error: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.court}:{self.date_from.isoformat()}..{self.date_to.isoformat()}"
+
+    def days(self) -> int:
+        return (self.date_to - self.date_from).days + 1
+
+    def halves(self) -> List["Partition"]:
+        mid = self.date_from + timedelta(days=(self.days() - 1) // 2)
+        return [
+            Partition(self.court, self.date_from, mid, parent=self.key),
+            Partition(self.court, mid + timedelta(days=1), self.date_to, parent=self.key),
+        ]
+
+
+@dataclass
+class HarvestResult:
+    cases: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    partitions: List[Partition] = field(default_factory=list)
+    requests: int = 0
+    duplicates: int = 0
+
+    def problems(self) -> List[Partition]:
+        """Partitions that could not be fetched or verified"""
+        return [p for p in self.partitions if p.status in ("mismatch", "failed", "unverified")]
+
+    def summary(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for p in self.partitions:
+            counts[p.status] = counts.get(p.status, 0) + 1
+        return {
+            'cases': len(self.cases),
+            'requests': self.requests,
+            'duplicates_dropped': self.duplicates,
+            'partitions': counts,
+            'problems': [(p.key, p.status, p.total, p.fetched, p.error) for p in self.problems()],
+        }
+
+
+def year_partitions(courts: Iterable[str], date_from: date, date_to: date) -> List[Partition]:
+    """Initial partitions: one per court and calendar year"""
+    partitions = []
+    for court in courts:
+        for year in range(date_from.year, date_to.year + 1):
+            start = max(date(year, 1, 1), date_from)
+            end = min(date(year, 12, 31), date_to)
+            partitions.append(Partition(court, start, end))
+    return partitions
+
+
+class Harvester:
+    def __init__(self, search: SearchFn, case_id: Callable[[Dict[str, Any]], str] = lambda hit: hit.get("id"),
+                 per_page: int = DEFAULT_PER_PAGE, max_hits: int = DEFAULT_MAX_HITS, workers: int = 8):
+        self.search = search
+        self.case_id = case_id
+        self.per_page = per_page
+        self.max_hits = max_hits
+        self.workers = workers
+
+    def _fetch(self, partition: Partition):
+        """Fetch one partition. Returns (partition, hits, requests, children)."""
+        total, hits = self.search(partition.court, partition.date_from, partition.date_to, 0)
+        requests = 1
+        partition.total = total
+        if total is not None and total > self.max_hits and partition.days() > 1:
+            partition.status = "split"
+            return partition, [], requests, partition.halves()
+
+        page = 1
+        if total is not None:
+            pages = math.ceil(total / self.per_page)
+            while page < pages:
+                _, page_hits = self.search(partition.court, partition.date_from, partition.date_to, page)
+                hits.extend(page_hits)
+                requests += 1
+                page += 1
+        else:
+            # No total reported: page until a short page
+            page_hits = hits
+            while len(page_hits) == self.per_page:
+                _, page_hits = self.search(partition.court, partition.date_from, partition.date_to, page)
+                hits.extend(page_hits)
+                requests += 1
+                page += 1
+        return partition, hits, requests, []
+
+    def harvest(self, partitions: Iterable[Partition]) -> HarvestResult:
+        result = HarvestResult()
+        by_key: Dict[str, Partition] = {}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            running = {}
+            for partition in partitions:
+                by_key[partition.key] = partition
+                running[pool.submit(self._fetch, partition)] = partition
+            while running:
+                METRICS.set('queue_depth', len(running), kind='harvest_partition', status='pending')
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    partition = running.pop(future)
+                    result.partitions.append(partition)
+                    try:
+                        partition, hits, requests, children = future.result()
+                    except Exception as e:
+                        partition.status = "failed"
+                        partition.error = str(e)
+                        logger.warning("Partition %s failed: %s", partition.key, e)
+                        continue
+                    result.requests += requests
+                    for child in children:
+                        by_key[child.key] = child
+                        running[pool.submit(self._fetch, child)] = child
+                    if children:
+                        continue
+                    self._collect(partition, hits, result)
+
+        METRICS.set('queue_depth', 0, kind='harvest_partition', status='pending')
+        self._verify_splits(result, by_key)
+        for partition in result.partitions:
+            METRICS.inc('harvest_partitions_total', status=partition.status)
+        return result
+
+    def _collect(self, partition: Partition, hits: List[Dict[str, Any]], result: HarvestResult):
+        unique = set()
+        for hit in hits:
+            cid = self.case_id(hit)
+            if cid is None or cid in unique:
+                continue
+            unique.add(cid)
+            if cid in result.cases:
+                result.duplicates += 1
+            else:
+                result.cases[cid] = hit
+        partition.fetched = len(unique)
+        if partition.total is None:
+            partition.status = "unverified"
+        elif partition.fetched == partition.total:
+            partition.status = "verified"
+        else:
+            partition.status = "mismatch"
+            partition.error = f"API reported {partition.total}, fetched {partition.fetched} unique"
+
+    def _verify_splits(self, result: HarvestResult, by_key: Dict[str, Partition]):
+        """A split parent's total must equal the sum of its children's totals"""
+        children: Dict[str, List[Partition]] = {}
+        for partition in by_key.values():
+            if partition.parent:
+                children.setdefault(partition.parent, []).append(partition)
+        for key, kids in children.items():
+            parent = by_key[key]
+            if any(k.total is None for k in kids) or parent.total is None:
+                continue
+            child_total = sum(k.total for k in kids)
+            if child_total != parent.total:
+                parent.status = "mismatch"
+                parent.error = f"children report {child_total} of {parent.total} (date filter ignored or data changed)"
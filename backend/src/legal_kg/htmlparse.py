@@ -0,0 +1,274 @@
+"""
+Pluggable HTML parsing for the scrapers.
+
+The scrapers only need a handful of operations on a page: the anchors, the
+visible text, and the text/attribute of the first element matching a simple
+CSS selector. HtmlDocument exposes exactly those, with two backends:
+
+    soup  BeautifulSoup + html.parser, the reference implementation
+    lxml  lxml.html (libxml2), several times faster
+
+The backend is chosen with the HTML_PARSER environment variable (see
+.env.example) or per call with parse_html(markup, backend="soup").
+"""
+
+import os
+import re
+from typing import Dict, List, NamedTuple, Optional, Union
+
+Markup = Union[str, bytes]
+
+DEFAULT_BACKEND = os.environ.get("HTML_PARSER", "lxml")
+
+
+class Anchor(NamedTuple):
+    href: Optional[str]    # None when the <a> has no href attribute
+    text: str              # get_text(strip=True)
+    string: Optional[str]  # BeautifulSoup's .string: the single text child, else None
+
+
+class HtmlDocument:
+    """Common interface of the parser backends"""
+
+    backend = ""
+
+    def anchors(self) -> List[Anchor]:
+        """Every <a> element in document order"""
+        raise NotImplementedError
+
+    def links(self) -> List[Anchor]:
+        """The <a> elements that have an href attribute"""
+        return [a for a in self.anchors() if a.href is not None]
+
+    def text(self) -> str:
+        """Visible text, one stripped string per line (get_text(separator='\\n', strip=True))"""
+        raise NotImplementedError
+
+    def select_text(self, selector: str) -> Optional[str]:
+        """Stripped text of the first element matching selector, None if nothing matches"""
+        raise NotImplementedError
+
+    def select_attr(self, selector: str, attr: str) -> Optional[str]:
+        """Attribute of the first element matching selector, None if nothing matches"""
+        raise NotImplementedError
+
+
+class SoupDocument(HtmlDocument):
+    backend = "soup"
+
+    def __init__(self, markup: Markup):
+        from bs4 import BeautifulSoup
+        self.soup = BeautifulSoup(markup, "html.parser")
+        self._anchors: Optional[List[Anchor]] = None
+        self._text: Optional[str] = None
+
+    def anchors(self) -> List[Anchor]:
+        if self._anchors is None:
+            self._anchors = []
+            for a in self.soup.find_all("a"):
+                href = a.get("href")
+                if isinstance(href, list):
+                    href = " ".join(href)
+                string = a.string
+                self._anchors.append(Anchor(
+                    href,
+                    a.get_text(strip=True),
+                    str(string) if string is not None else None,
+                ))
+        return self._anchors
+
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self.soup.get_text(separator="\n", strip=True)
+        return self._text
+
+    def select_text(self, selector: str) -> Optional[str]:
+        element = self.soup.select_one(selector)
+        if element is None:
+            return None
+        return element.get_text(strip=True)
+
+    def select_attr(self, selector: str, attr: str) -> Optional[str]:
+        element = self.soup.select_one(selector)
+        if element is None:
+            return None
+        value = element.get(attr)
+        if isinstance(value, list):
+            value = " ".join(value)
+        return value
+
+
+# Elements whose text BeautifulSoup leaves out of get_text()
+_HIDDEN_TAGS = ("script", "style", "template")
+
+_CHARSET_RE = re.compile(rb'charset=["\']?([\w-]+)', re.IGNORECASE)
+
+# The CSS subset the scrapers use: tag, .class, tag[attr], tag[attr="v"], [attr*="v"], [attr^="v"]
+_TAG_RE = re.compile(r'^([a-zA-Z][a-zA-Z0-9]*)$')
+_CLASS_RE = re.compile(r'^([a-zA-Z][a-zA-Z0-9]*)?\.([\w-]+)$')
+_ATTR_RE = re.compile(r'^([a-zA-Z][a-zA-Z0-9]*)?\[([\w-]+)(?:(\*=|\^=|=)"([^"]*)")?\]$')
+
+
+def _decode(data: bytes) -> str:
+    """Decode page bytes using the declared charset, falling back to utf-8 then cp1252"""
+    match = _CHARSET_RE.search(data[:4096])
+    encodings = [match.group(1).decode("ascii")] if match else []
+    for encoding in encodings + ["utf-8"]:
+        try:
+            return data.decode(encoding)
+        except (LookupError, UnicodeDecodeError):
+            continue
+    return data.decode("cp1252", errors="replace")
+
+
+def css_to_xpath(selector: str) -> str:
+    """Translate the supported CSS subset to XPath. Raises ValueError otherwise."""
+    selector = selector.strip()
+    match = _TAG_RE.match(selector)
+    if match:
+        return f".//{match.group(1).lower()}"
+    match = _CLASS_RE.match(selector)
+    if match:
+        tag = (match.group(1) or "*").lower()
+        return f".//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {match.group(2)} ')]"
+    match = _ATTR_RE.match(selector)
+    if match:
+        tag = (match.group(1) or "*").lower()
+        attr, op, value = match.group(2), match.group(3), match.group(4)
+        if op is None:
+            condition = f"@{attr}"
+        elif op == "=":
+            condition = f"@{attr}='{value}'"
+        elif op == "*=":
+            condition = f"contains(@{attr}, '{value}')"
+        else:
+            condition = f"starts-with(@{attr}, '{value}')"
+        return f".//{tag}[{condition}]"
+    raise ValueError(f"Unsupported selector for lxml backend: {selector}")
+
+
+class LxmlDocument(HtmlDocument):
+    backend = "lxml"
+
+    _xpath_cache: Dict[str, object] = {}
+
+    def __init__(self, markup: Markup):
+        from lxml import etree, html
+        self._etree = etree
+        if isinstance(markup, bytes):
+            markup = _decode(markup)
+        if markup.lstrip().startswith("<?xml"):
+            # lxml refuses str input that carries an encoding declaration
+            markup = markup.split("?>", 1)[1]
+        try:
+            self.root = html.document_fromstring(markup)
+        except etree.ParserError:
+            self.root = html.document_fromstring("<html></html>")
+        self._anchors: Optional[List[Anchor]] = None
+        self._text: Optional[str] = None
+
+    def _xpath(self, selector: str):
+        compiled = self._xpath_cache.get(selector)
+        if compiled is None:
+            compiled = self._etree.XPath(css_to_xpath(selector))
+            self._xpath_cache[selector] = compiled
+        return compiled
+
+    def _strings(self, element):
+        """Text nodes under element in document order, skipping hidden tags and comments"""
+        hidden = set(_HIDDEN_TAGS)
+        stack = [(element, False)]
+        while stack:
+            node, closing = stack.pop()
+            if closing:
+                if node.tail and node is not element:
+                    yield node.tail
+                continue
+            stack.append((node, True))
+            if not isinstance(node.tag, str) or node.tag in hidden:
+                continue
+            if node.text:
+                yield node.text
+            for child in reversed(node):
+                stack.append((child, False))
+
+    def _string(self, element) -> Optional[str]:
+        """Mirror of BeautifulSoup's .string: follow single children down to a text node"""
+        while True:
+            contents = []
+            if element.text:
+                contents.append(element.text)
+            for child in element:
+                contents.append(child)
+                if child.tail:
+                    contents.append(child.tail)
+            if len(contents) != 1:
+                return None
+            only = contents[0]
+            if isinstance(only, str):
+                return only
+            if not isinstance(only.tag, str):
+                # comment or processing instruction
+                return only.text
+            element = only
+
+    def _stripped_text(self, element) -> str:
+        return "".join(s.strip() for s in self._strings(element))
+
+    def anchors(self) -> List[Anchor]:
+        if self._anchors is None:
+            self._anchors = [
+                Anchor(a.get("href"), self._stripped_text(a), self._string(a))
+                for a in self.root.iter("a")
+            ]
+        return self._anchors
+
+    def text(self) -> str:
+        if self._text is None:
+            stripped = (s.strip() for s in self._strings(self.root))
+            self._text = "\n".join(s for s in stripped if s)
+        return self._text
+
+    def select_text(self, selector: str) -> Optional[str]:
+        found = self._xpath(selector)(self.root)
+        if not found:
+            return None
+        return self._stripped_text(found[0])
+
+    def select_attr(self, selector: str, attr: str) -> Optional[str]:
+        found = self._xpath(selector)(self.root)
+        if not found:
+            return None
+        return found[0].get(attr)
+
+
+BACKENDS = {
+    "soup": SoupDocument,
+    "lxml": LxmlDocument,
+}
+
+
+def available_backends() -> List[str]:
+    """Backends whose parser library is installed"""
+    names = ["soup"]
+    try:
+        import lxml.html  # noqa: F401
+        names.append("lxml")
+    except ImportError:
+        pass
+    return names
+
+
+def parse_html(markup: Markup, backend: Optional[str] = None) -> HtmlDocument:
+    """
+    Parse a page with the configured backend.
+    Falls back to the BeautifulSoup reference backend if lxml is not installed.
+    """
+    name = backend or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown HTML parser backend: {name} (choose from {', '.join(BACKENDS)})")
+    if name == "lxml" and "lxml" not in available_backends():
+        if backend:
+            raise ImportError("lxml is not installed")
+        name = "soup"
+    return BACKENDS[name](markup)
@@ -0,0 +1,387 @@
+"""
+Resilient HTTP client shared by the scrapers and the crawler.
+
+ResilientSession wraps a requests.Session and adds, per host:
+
+- error classification: transient errors (timeouts, connection errors, 5xx,
+  408) are retried, throttling (429, 503 with Retry-After) slows the host
+  down, everything else is returned to the caller as before
+- retries with full-jitter exponential backoff, honouring Retry-After
+- a circuit breaker that fails fast while a host keeps failing and lets a
+  single probe through after a cool-down
+- AIMD pacing: the gap between requests and the number of requests in
+  flight grow back slowly while the host is healthy and are cut hard on
+  429s or when latency goes above target
+
+When a request cannot be completed FetchError is raised (it is a
+requests.RequestException), so callers can record the hole instead of
+silently skipping data.
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import timezone
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from .metrics import METRICS, get_logger
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Error classes
+OK = "ok"
+RETRY = "retry"        # transient, try again after backoff
+THROTTLE = "throttle"  # the server asks us to slow down
+FATAL = "fatal"        # retrying will not help (404, 400, ...)
+
+# Per-host pacing and circuit state, shared by every ResilientSession in the
+# process: LawDataScraper instances come and go, the host stays the same
+_HOSTS: Dict[str, Dict[str, Any]] = {}
+_HOSTS_LOCK = threading.Lock()
+
+logger = get_logger("httpclient")
+
+RETRY_STATUSES = {408, 500, 502, 503, 504, 520, 521, 522, 523, 524}
+THROTTLE_STATUSES = {429}
+
+
+class FetchError(requests.RequestException):
+    """A request that could not be completed after retries (or with the circuit open)"""
+
+    def __init__(self, url: str, kind: str, message: str, status: Optional[int] = None, attempts: int = 0):
+        super().__init__(f"{message} ({url})")
+        self.url = url
+        self.kind = kind
+        self.status = status
+        self.attempts = attempts
+
+
+def classify(response: Optional[requests.Response] = None, error: Optional[Exception] = None) -> str:
+    """Classify the outcome of one attempt as OK, RETRY, THROTTLE or FATAL"""
+    if error is not None:
+        if isinstance(error, (requests.Timeout, requests.ConnectionError, requests.exceptions.ChunkedEncodingError)):
+            return RETRY
+        return FATAL
+    status = response.status_code
+    if status in THROTTLE_STATUSES:
+        return THROTTLE
+    if status == 503 and response.headers.get('Retry-After'):
+        return THROTTLE
+    if status in RETRY_STATUSES:
+        return RETRY
+    return OK if status < 400 else FATAL
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    now = now if now is not None else time.time()
+    return max(when.timestamp() - now, 0.0)
+
+
+def backoff_delay(attempt: int, base: float, cap: float, rng: random.Random) -> float:
+    """Full-jitter exponential backoff: uniform(0, min(cap, base * 2**attempt))"""
+    return rng.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures;
+    open -> half-open after `reset_timeout` seconds, where one probe is let
+    through; the probe closes the circuit again or re-opens it. Every probe
+    must end in record_success, record_alive, record_failure or release.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = "half-open"
+                self._probing = False
+            if self.state == "half-open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def retry_in(self) -> float:
+        """Seconds until the circuit lets a probe through"""
+        if self.state != "open":
+            return 0.0
+        return max(self.reset_timeout - (self.clock() - self.opened_at), 0.0)
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half-open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = self.clock()
+                self._probing = False
+
+    def record_alive(self):
+        """The host answered but refused the request (429): a probe closes the circuit, nothing else changes"""
+        with self._lock:
+            if self.state == "half-open":
+                self.state = "closed"
+                self.failures = 0
+                self._probing = False
+
+    def release(self):
+        """The attempt ended without saying anything about the host; let the next probe through"""
+        with self._lock:
+            self._probing = False
+
+
+class AimdLimiter:
+    """
+    Additive-increase / multiplicative-decrease pacing for one host.
+
+    `rate` (requests/s) sets the minimum gap between request starts and
+    `limit` the number of requests allowed in flight. A fast success raises
+    the rate by `rate_step` and the limit by 1/limit; a 429, a slow response
+    or a transient error halves both.
+    """
+
+    def __init__(self, rate: float = 1.0, min_rate: float = 1 / 60, max_rate: float = 5.0,
+                 rate_step: float = 0.1, limit: float = 1.0, max_limit: float = 8.0,
+                 target_latency: float = 5.0, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate_step = rate_step
+        self.limit = limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.clock = clock
+        self.sleep = sleep
+        self.in_flight = 0
+        self.not_before = 0.0
+        self._last_start: Optional[float] = None
+        self._cond = threading.Condition()
+
+    @property
+    def interval(self) -> float:
+        return 1 / self.rate
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= max(int(self.limit), 1):
+                self._cond.wait()
+            self.in_flight += 1
+            now = self.clock()
+            start = max(now, self.not_before)
+            if self._last_start is not None:
+                start = max(start, self._last_start + self.interval)
+            self._last_start = start
+        if start > now:
+            self.sleep(start - now)
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def hold_off(self, seconds: float):
+        """Make every request to this host wait at least `seconds` (Retry-After)"""
+        with self._cond:
+            self.not_before = max(self.not_before, self.clock() + seconds)
+
+    def on_success(self, latency: float):
+        with self._cond:
+            if latency > self.target_latency:
+                self._decrease()
+                return
+            self.rate = min(self.max_rate, self.rate + self.rate_step)
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._cond.notify()
+
+    def on_congestion(self):
+        with self._cond:
+            self._decrease()
+
+    def _decrease(self):
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.limit = max(1.0, self.limit / 2)
+
+
+class ResilientSession:
+    """
+    Drop-in replacement for the requests.Session the scrapers use:
+
+        session = ResilientSession()
+        response = session.get(url, timeout=30)
+        response.raise_for_status()
+
+    Successful and non-retryable responses (e.g. 404) are returned as-is;
+    FetchError is raised once retries are used up or the host's circuit is open.
+    Host state is process-wide unless share_hosts=False; the first session to
+    contact a host decides its limiter options.
+    """
+
+    def __init__(self, session: Optional[requests.Session] = None, max_retries: int = 5,
+                 backoff_base: float = 1.0, backoff_cap: float = 60.0, max_retry_after: float = 600.0,
+                 limiter_options: Optional[Dict[str, Any]] = None, failure_threshold: int = 5,
+                 reset_timeout: float = 60.0, share_hosts: bool = True, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep, rng: Optional[random.Random] = None):
+        if session is None:
+            session = requests.Session()
+            session.headers.update({'User-Agent': USER_AGENT})
+        self.session = session
+        self.headers = session.headers
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_retry_after = max_retry_after
+        self.limiter_options = limiter_options or {}
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        if share_hosts:
+            self._hosts, self._lock = _HOSTS, _HOSTS_LOCK
+        else:
+            self._hosts, self._lock = {}, threading.Lock()
+
+    def _host(self, url: str) -> Dict[str, Any]:
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = {
+                    'breaker': CircuitBreaker(self.failure_threshold, self.reset_timeout, clock=self.clock),
+                    'limiter': AimdLimiter(clock=self.clock, sleep=self.sleep, **self.limiter_options),
+                    'stats': {'requests': 0, 'retries': 0, 'throttled': 0, 'failed': 0, 'circuit_rejections': 0},
+                }
+            return self._hosts[host]
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        host = self._host(url)
+        breaker, limiter, stats = host['breaker'], host['limiter'], host['stats']
+        host_name = urlparse(url).netloc
+        last_status = None
+        last_error = "no attempt made"
+
+        for attempt in range(self.max_retries + 1):
+            if not breaker.allow():
+                stats['circuit_rejections'] += 1
+                METRICS.inc('http_failures_total', host=host_name, outcome="circuit_open")
+                raise FetchError(url, "circuit_open",
+                                 f"Circuit open for {urlparse(url).netloc}, retry in {breaker.retry_in():.0f}s",
+                                 status=last_status, attempts=attempt)
+            limiter.acquire()
+            started = self.clock()
+            response, error = None, None
+            try:
+                stats['requests'] += 1
+                response = self.session.request(method, url, **kwargs)
+            except requests.RequestException as e:
+                error = e
+            except BaseException:
+                breaker.release()
+                raise
+            finally:
+                limiter.release()
+            latency = self.clock() - started
+            outcome = classify(response, error)
+            METRICS.observe('http_request_seconds', latency, host=host_name, outcome=outcome)
+            if response is not None:
+                # Streamed bodies (PDFs, law pages) are not read here; their size comes from the header
+                size = response.headers.get('Content-Length')
+                if size is None and not kwargs.get('stream'):
+                    size = len(response.content)
+                if size is not None:
+                    METRICS.observe('http_response_bytes', float(size), host=host_name)
+
+            if outcome == OK or (outcome == FATAL and response is not None):
+                breaker.record_success()
+                limiter.on_success(latency)
+                return response
+            if outcome == FATAL:
+                breaker.record_failure()
+                stats['failed'] += 1
+                METRICS.inc('http_failures_total', host=host_name, outcome=FATAL)
+                raise FetchError(url, FATAL, str(error), attempts=attempt + 1) from error
+
+            last_status = response.status_code if response is not None else None
+            last_error = f"HTTP {last_status}" if response is not None else str(error)
+            retry_after = parse_retry_after(response.headers.get('Retry-After')) if response is not None else None
+            if response is not None:
+                response.close()
+            limiter.on_congestion()
+            if outcome == THROTTLE:
+                stats['throttled'] += 1
+                # Throttling says the host is up, not down
+                breaker.record_alive()
+            else:
+                breaker.record_failure()
+
+            if attempt == self.max_retries:
+                break
+            if retry_after is not None and retry_after > self.max_retry_after:
+                stats['failed'] += 1
+                METRICS.inc('http_failures_total', host=host_name, outcome=outcome)
+                raise FetchError(url, outcome, f"Retry-After {retry_after:.0f}s exceeds limit",
+                                 status=last_status, attempts=attempt + 1)
+            delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap, self.rng)
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+                limiter.hold_off(retry_after)
+            stats['retries'] += 1
+            METRICS.inc('http_retries_total', host=host_name, outcome=outcome)
+            logger.warning("%s for %s, retrying in %.1fs (%d/%d)", last_error, url, delay, attempt + 1, self.max_retries)
+            self.sleep(delay)
+
+        stats['failed'] += 1
+        METRICS.inc('http_failures_total', host=host_name, outcome=outcome)
+        raise FetchError(url, outcome, f"Giving up after {self.max_retries + 1} attempts: {last_error}",
+                         status=last_status, attempts=self.max_retries + 1)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-host counters plus the current pacing and circuit state"""
+        with self._lock:
+            hosts = dict(self._hosts)
+        return {
+            host: dict(state['stats'], interval=round(state['limiter'].interval, 3),
+                       limit=round(state['limiter'].limit, 2), circuit=state['breaker'].state)
+            for host, state in hosts.items()
+        }
+
+    def close(self):
+        self.session.close()
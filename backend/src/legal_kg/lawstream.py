@@ -0,0 +1,335 @@
+"""
+Streaming parser for lagboken law pages.
+
+Consolidated statutes (brottsbalken, rättegångsbalken, ...) are large pages.
+Instead of building a full tree and several full-text copies, feed the
+response to LawStreamParser chunk by chunk and consume the events as they
+appear:
+
+    ("title", "Semesterlag (1977:480)")
+    ("metadata", {"SFS nr": "1977:480", ...})
+    ("section", {"chapter": "3", "chapter_title": "...", "paragraph": "5 a",
+                 "heading": "...", "text": "..."})
+    ("important_law", {"title": ..., "reference": ..., "url": ...})
+    ("link", {"href": ..., "text": ...})
+
+Only the section being read, the metadata block and the unparsed tail of the
+last chunk are kept in memory.
+"""
+
+import codecs
+import re
+from collections import deque
+from html.parser import HTMLParser
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .citations import split_sfs
+
+Event = Tuple[str, Any]
+
+# Metadata block fields, shared with LawDataScraper._extract_metadata_strict
+METADATA_PATTERNS = {
+    'Utfärdad': r'Utfärdad:\s*([\d-]+)',
+    'Ikraftträdandedatum': r'Ikraftträdandedatum:\s*([\d-]+)',
+    'Källa': r'Källa:\s*([^\n]+)',
+    'SFS nr': r'SFS nr:\s*([^\n]+)',
+    'Departement': r'Departement(?:/myndighet)?:\s*([^\n]+)',
+    'Ändring införd': r'Ändring införd:\s*([^\n]+)',
+    'Ändrad': r'Ändrad:\s*([^\n]+(?:\n[^\n]+)*?)(?=\n\w+:|$)',
+    'Övrigt': r'Övrigt:\s*([^\n]+)',
+    'Övrig text': r'Övrig text:\s*([^\n]+)',
+    'Länk': r'Länk:\s*([^\n]+)'
+}
+
+IMPORTANT_LAWS_HEADING = "Viktiga lagar inom arbetsrätten"
+IMPORTANT_LAWS_END = ("JP Infonets", "Om Lagboken")
+
+# Bound on the metadata buffer for pages that never reach a § marker
+MAX_METADATA_LINES = 200
+
+_HIDDEN_TAGS = {"script", "style", "template"}
+_HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+_BLOCK_TAGS = {"p", "div", "li", "td", "dd", "section", "article", "blockquote"} | _HEADING_TAGS
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+_SECTION_START = re.compile(r'^(\d+\s?[a-z]?)\s*§(?:\s+(.*))?$', re.DOTALL)
+_CHAPTER = re.compile(r'^(\d+\s?[a-z]?)\s*kap\.\s*(.*)$')
+_SECTION_MARK = re.compile(r'\d+\s*§')
+
+
+def parse_metadata(section_text: str) -> Dict[str, str]:
+    """Parse the 'SFS nr: ... Länk: ...' block of a law page"""
+    metadata = {}
+    for key, pattern in METADATA_PATTERNS.items():
+        match = re.search(pattern, section_text, re.MULTILINE | re.DOTALL)
+        if match:
+            value = match.group(1).strip()
+            value = re.sub(r'\s+', ' ', value)
+            metadata[key] = value
+
+    # Normalize keys: if both 'Övrigt' and 'Övrig text', prefer 'Övrigt'
+    if 'Övrig text' in metadata and 'Övrigt' not in metadata:
+        metadata['Övrigt'] = metadata.pop('Övrig text')
+    return metadata
+
+
+class LawStreamParser(HTMLParser):
+    """
+    Incremental law-page parser. feed() / feed_bytes() return the events that
+    became complete with that chunk, close() returns the rest.
+    """
+
+    def __init__(self, encoding: str = "utf-8"):
+        super().__init__(convert_charrefs=True)
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self._events: deque = deque()
+
+        self._stack: List[str] = []
+        self._hidden_depth = 0
+        self._text_parts: List[str] = []
+        self._block_started = False  # no text seen yet in the current block
+        self._heading_depth = 0
+        self._heading_tag: Optional[str] = None
+        self._heading_parts: List[str] = []
+
+        self._anchor: Optional[Dict[str, Any]] = None
+        self._links_seen: List[Dict[str, str]] = []  # only kept until metadata is emitted
+
+        self._title: Optional[str] = None
+        self._metadata_lines: Optional[List[str]] = None
+        self._metadata_done = False
+
+        self._chapter: Optional[str] = None
+        self._chapter_title: Optional[str] = None
+        self._heading: Optional[str] = None
+        self._section: Optional[Dict[str, Any]] = None
+        self._section_lines: List[str] = []
+        self._section_depth = 0
+
+        self._in_important = False
+
+    # Public API
+
+    def feed(self, data: str) -> List[Event]:
+        super().feed(data)
+        return self._drain()
+
+    def feed_bytes(self, data: bytes) -> List[Event]:
+        return self.feed(self._decoder.decode(data))
+
+    def close(self) -> List[Event]:
+        tail = self._decoder.decode(b"", final=True)
+        if tail:
+            super().feed(tail)
+        super().close()
+        self._flush_text()
+        self._end_section()
+        self._emit_metadata()
+        if self._title is None:
+            self._events.append(("title", "Unknown Law"))
+        return self._drain()
+
+    def _drain(self) -> List[Event]:
+        events = list(self._events)
+        self._events.clear()
+        return events
+
+    # HTMLParser callbacks
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_text()
+        if tag in _HIDDEN_TAGS:
+            self._hidden_depth += 1
+        if tag not in _VOID_TAGS:
+            self._stack.append(tag)
+        if tag in _BLOCK_TAGS:
+            self._block_started = True
+        if tag in _HEADING_TAGS and self._heading_tag is None:
+            self._heading_tag = tag
+            self._heading_depth = len(self._stack)
+            self._heading_parts = []
+        if tag == "a":
+            self._anchor = {"href": dict(attrs).get("href"), "parts": []}
+
+    def handle_startendtag(self, tag, attrs):
+        self._flush_text()
+
+    def handle_endtag(self, tag):
+        self._flush_text()
+        if tag == "a" and self._anchor is not None:
+            self._end_anchor()
+        if tag in _VOID_TAGS or tag not in self._stack:
+            return
+        # Pop up to and including the matching open tag (implicitly closing the rest)
+        while self._stack:
+            open_tag = self._stack.pop()
+            if open_tag in _HIDDEN_TAGS:
+                self._hidden_depth -= 1
+            if self._heading_tag and len(self._stack) < self._heading_depth:
+                self._end_heading()
+            if self._section is not None and len(self._stack) < self._section_depth:
+                self._end_section()
+            if open_tag == tag:
+                break
+        if tag in _BLOCK_TAGS:
+            self._block_started = True
+
+    def handle_data(self, data):
+        if self._hidden_depth:
+            return
+        self._text_parts.append(data)
+
+    # Text handling
+
+    def _flush_text(self):
+        """Turn the text collected since the last tag into one line (like a bs4 string)"""
+        if not self._text_parts:
+            return
+        line = "".join(self._text_parts).strip()
+        self._text_parts = []
+        if not line:
+            return
+        if self._anchor is not None:
+            self._anchor["parts"].append(line)
+        if self._heading_tag is not None:
+            self._heading_parts.append(line)
+        block_start = self._block_started
+        self._block_started = False
+        self._handle_line(line, block_start)
+
+    def _handle_line(self, line: str, block_start: bool):
+        if self._metadata_lines is None and not self._metadata_done and "SFS nr:" in line:
+            self._metadata_lines = []
+            line = line[line.index("SFS nr:"):]
+        if self._metadata_lines is not None:
+            if _SECTION_MARK.search(line) or len(self._metadata_lines) >= MAX_METADATA_LINES:
+                self._emit_metadata()
+            else:
+                self._metadata_lines.append(line)
+
+        if self._in_important:
+            self._important_line(line)
+            return
+        if line == IMPORTANT_LAWS_HEADING:
+            self._end_section()
+            self._in_important = True
+            return
+
+        if self._heading_tag is not None:
+            # Headings are handled as a whole when they close
+            return
+
+        match = _SECTION_START.match(line) if block_start else None
+        if match:
+            self._emit_metadata()
+            self._start_section(match.group(1), match.group(2))
+        elif self._section is not None:
+            self._section_lines.append(line)
+
+    def _end_heading(self):
+        text = " ".join(self._heading_parts).strip()
+        tag = self._heading_tag
+        self._heading_tag = None
+        self._heading_parts = []
+        if not text or self._in_important:
+            return
+        if tag == "h1" and self._title is None and len(text) > 5:
+            self._title = text
+            self._events.append(("title", text))
+            return
+        self._end_section()
+        chapter = _CHAPTER.match(text)
+        if chapter:
+            self._chapter = chapter.group(1).replace(" ", "")
+            self._chapter_title = chapter.group(2).strip() or None
+            self._heading = None
+        else:
+            self._heading = text
+
+    def _end_anchor(self):
+        anchor = self._anchor
+        self._anchor = None
+        href = anchor["href"]
+        law = anchor.get("important_law")
+        if law is not None:
+            if href and not href.startswith("javascript:"):
+                law["url"] = f"https://www.lagboken.se{href}" if href.startswith("/") else href
+            self._events.append(("important_law", law))
+        if href is None:
+            return
+        link = {"href": href, "text": "".join(anchor["parts"])}
+        if not self._metadata_done:
+            self._links_seen.append(link)
+        self._events.append(("link", link))
+
+    # Metadata
+
+    def _emit_metadata(self):
+        if self._metadata_done:
+            return
+        self._metadata_done = True
+        lines = self._metadata_lines or []
+        self._metadata_lines = None
+        metadata = parse_metadata("\n".join(lines))
+        if 'Länk' in metadata:
+            register = next((l for l in self._links_seen if re.search(r'Länk till register', l["text"], re.IGNORECASE)), None)
+            if register is None:
+                register = next((l for l in self._links_seen if 'register' in l["href"].lower() or 'lagrum' in l["href"].lower()), None)
+            if register is not None:
+                metadata['Länk URL'] = register["href"]
+        self._links_seen = []
+        self._events.append(("metadata", metadata))
+
+    # Sections
+
+    def _start_section(self, paragraph: str, first_text: Optional[str]):
+        self._end_section()
+        self._section = {
+            "chapter": self._chapter,
+            "chapter_title": self._chapter_title,
+            "paragraph": re.sub(r'\s+', ' ', paragraph.strip()),
+            "heading": self._heading,
+        }
+        self._section_lines = [first_text.strip()] if first_text and first_text.strip() else []
+        # The section lives in the container of the block that holds the § marker
+        # and ends when that container closes
+        block_index = max((i for i, tag in enumerate(self._stack) if tag in _BLOCK_TAGS), default=len(self._stack))
+        self._section_depth = block_index
+
+    def _end_section(self):
+        if self._section is None:
+            return
+        section = self._section
+        section["text"] = "\n".join(self._section_lines)
+        self._section = None
+        self._section_lines = []
+        self._events.append(("section", section))
+
+    # 'Viktiga lagar inom arbetsrätten' block
+
+    def _important_line(self, line: str):
+        if line.startswith(IMPORTANT_LAWS_END):
+            self._in_important = False
+            return
+        title, reference = split_sfs(line)
+        if not reference:
+            return
+        law = {
+            "title": title,
+            "reference": reference,
+            "url": None,
+        }
+        if self._anchor is not None:
+            # The href is known once the anchor closes
+            self._anchor["important_law"] = law
+        else:
+            self._events.append(("important_law", law))
+
+
+def iter_law_events(chunks: Iterable[bytes], encoding: str = "utf-8") -> Iterator[Event]:
+    """Run the stream parser over an iterable of byte chunks (e.g. response.iter_content())"""
+    parser = LawStreamParser(encoding=encoding)
+    for chunk in chunks:
+        if chunk:
+            yield from parser.feed_bytes(chunk)
+    yield from parser.close()
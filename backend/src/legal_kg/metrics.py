@@ -0,0 +1,228 @@
+"""
+Process-wide counters, gauges and histograms, and leveled logging.
+
+    from legal_kg.metrics import METRICS, get_logger
+
+    METRICS.inc('cases_saved_total', court='HDO')
+    METRICS.observe('http_response_bytes', len(body), host='lagboken.se')
+    with METRICS.timer('parse_seconds', extractor='law_metadata'):
+        ...
+    METRICS.write('run.prom')          # Prometheus text format
+    METRICS.write('run.json')          # JSON summary: count, sum, p50/p95/p99 per histogram
+
+Metric names follow Prometheus conventions: counters end in _total, timers
+in _seconds, sizes in _bytes (and get byte-sized buckets). Histograms have
+fixed buckets, so observing is O(log buckets) and quantiles are estimated
+by interpolating inside a bucket, like Prometheus' histogram_quantile.
+
+Environment:
+    LEGAL_KG_METRICS=<path>        write the metrics (.prom or .json) when the process exits
+    LEGAL_KG_LOG_LEVEL=DEBUG       log level for the legal_kg loggers (default INFO)
+"""
+
+import atexit
+import bisect
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import ContextDecorator
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BYTES_BUCKETS = tuple(float(256 * 4 ** i) for i in range(10))     # 256 B .. 64 MiB
+QUANTILES = (0.5, 0.95, 0.99)
+
+METRICS_ENV = "LEGAL_KG_METRICS"
+LOG_LEVEL_ENV = "LEGAL_KG_LOG_LEVEL"
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _series(name: str, labels: Labels, extra: Labels = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return name
+    return name + "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)       # the last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+
+class _Timer(ContextDecorator):
+    def __init__(self, metrics: "Metrics", name: str, labels: Dict[str, object]):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def _recreate_cm(self):
+        # Used as a decorator, each call gets its own start time (calls may overlap in threads)
+        return _Timer(self.metrics, self.name, self.labels)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.started
+        self.metrics.observe(self.name, self.elapsed, **self.labels)
+        return False
+
+
+class Metrics:
+    """Thread-safe registry; the scrapers share the module-level METRICS"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.gauges: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        with self._lock:
+            self.gauges[(name, _labels(labels))] = value
+
+    def observe(self, name: str, value: float, buckets: Optional[Tuple[float, ...]] = None, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = Histogram(buckets or (BYTES_BUCKETS if name.endswith("_bytes") else LATENCY_BUCKETS))
+                self.histograms[key] = histogram
+            histogram.observe(value)
+
+    def timer(self, name: str, **labels) -> _Timer:
+        """Context manager (or decorator) observing the elapsed seconds into a histogram"""
+        return _Timer(self, name, labels)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for kind, series in (("counter", self.counters), ("gauge", self.gauges)):
+                for name in sorted({name for name, _ in series}):
+                    lines.append(f"# TYPE {name} {kind}")
+                    for (n, labels), value in sorted(series.items()):
+                        if n == name:
+                            lines.append(f"{_series(name, labels)} {value:g}")
+            for name in sorted({name for name, _ in self.histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (n, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+                    if n != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        lines.append(f"{_series(name + '_bucket', labels, (('le', le),))} {cumulative}")
+                    lines.append(f"{_series(name + '_sum', labels)} {histogram.sum:g}")
+                    lines.append(f"{_series(name + '_count', labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict[str, Dict[str, object]]:
+        """Counters, gauges and per-histogram count/sum/mean/max and estimated quantiles"""
+        with self._lock:
+            histograms = {}
+            for (name, labels), h in sorted(self.histograms.items(), key=lambda item: item[0]):
+                stats = {'count': h.count, 'sum': round(h.sum, 6), 'mean': round(h.sum / h.count, 6),
+                         'max': round(h.max, 6)}
+                stats.update({f"p{int(q * 100)}": round(h.quantile(q), 6) for q in QUANTILES})
+                histograms[_series(name, labels)] = stats
+            return {
+                'counters': {_series(name, labels): value for (name, labels), value in sorted(self.counters.items())},
+                'gauges': {_series(name, labels): value for (name, labels), value in sorted(self.gauges.items())},
+                'histograms': histograms,
+            }
+
+    def write(self, path) -> Path:
+        """Write to path: JSON summary for .json, Prometheus text otherwise"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        text = json.dumps(self.summary(), ensure_ascii=False, indent=2) if path.suffix == ".json" else self.prometheus()
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(text, encoding="utf-8")
+        tmp_path.replace(path)
+        return path
+
+
+METRICS = Metrics()
+
+_logging_configured = False
+
+
+def configure_logging(level: Optional[str] = None):
+    """Send the legal_kg loggers to stdout at level (default: LEGAL_KG_LOG_LEVEL or INFO)"""
+    global _logging_configured
+    logger = logging.getLogger("legal_kg")
+    logger.setLevel((level or os.environ.get(LOG_LEVEL_ENV) or "INFO").upper())
+    if not _logging_configured:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        logger.addHandler(handler)
+        logger.propagate = False
+        _logging_configured = True
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under legal_kg (e.g. get_logger('court_scraper') -> legal_kg.court_scraper)"""
+    if not _logging_configured:
+        configure_logging()
+    return logging.getLogger(name if name.startswith("legal_kg") else f"legal_kg.{name}")
+
+
+def _write_at_exit():
+    path = os.environ.get(METRICS_ENV)
+    if path and (METRICS.counters or METRICS.histograms or METRICS.gauges):
+        METRICS.write(path)
+
+
+atexit.register(_write_at_exit)
@@ -1,10 +1,56 @@
+"""
+Record types for crawled pages, laws, cases and the topics laws are listed under.
 
+They are slotted dataclasses: no per-instance __dict__, so a record costs a
+fixed number of pointers instead of a hash table. Strings repeated across
+records (court names, keywords, metadata keys, the static law description)
+are interned, and a law refers to its topic instead of carrying a copy of it:
 
-from dataclasses import dataclass
+    topics = TopicTable()
+    law = LawRecord.from_dict(law_data, topic=topics.intern(topic_url, topic_info))
+    law.to_dict()          # the scrapers' dict again, 'topic_id' in place of the topic
+    topics.to_list()       # [{'id', 'url', 'title', 'description'}, ...] stored once
+
+    case = CaseRecord.from_dict(parse_case(item))
+    CaseRecord.from_json(case.to_json()) == case
+
+Keys a record has no field for are kept in `extra` and written back by
+to_dict(), so a dict survives the round trip.
+
+LawRecord.to_dict() is the law format every producer writes: a 'topic_id'
+into the topics of the same output, which a document holds as its 'topics'
+list and a JSON-lines file in a sidecar (topics_path(), TopicTable.save).
+from_dict() still reads the older topic_page_url/topic_page_info copies.
+"""
+
+import json
+import sys
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, Dict, Any
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .sections import law_sfs
+
+# slots= needs Python 3.10; older versions get plain dataclasses
+record = dataclass(slots=True) if sys.version_info >= (3, 10) else dataclass
+
+_intern = sys.intern
+
+
+def _intern_or_none(value: Optional[str]) -> Optional[str]:
+    return _intern(value) if isinstance(value, str) else value
+
+
+def _intern_list(values) -> List[str]:
+    return [_intern(v) if isinstance(v, str) else v for v in values or ()]
+
 
-@dataclass
+def _intern_keys(mapping: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {_intern(k): v for k, v in (mapping or {}).items()}
+
+
+@record
 class CrawledPage:
     url: str
     domain: str
@@ -15,3 +61,216 @@ class CrawledPage:
     status_code: Optional[int] = None
     crawled_at: Optional[datetime] = None
     metadata: Optional[Dict[str, Any]] = None
+
+    def __post_init__(self):
+        self.domain = _intern(self.domain)
+
+
+@record
+class TopicRef:
+    id: int
+    url: Optional[str]
+    title: Optional[str] = None
+    description: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'id': self.id, 'url': self.url, 'title': self.title, 'description': self.description}
+
+    def info(self) -> Dict[str, Any]:
+        """The topic as the topic scraper's topic_info dict"""
+        return {k: v for k, v in (('title', self.title), ('description', self.description)) if v is not None}
+
+
+class TopicTable:
+    """Intern pool of topics: the same topic is one TopicRef, referred to by id"""
+
+    def __init__(self):
+        self.topics: List[TopicRef] = []
+        self._ids: Dict[tuple, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.topics)
+
+    def __getitem__(self, topic_id: int) -> TopicRef:
+        return self.topics[topic_id]
+
+    def intern(self, url: Optional[str], info: Optional[Dict[str, Any]] = None) -> TopicRef:
+        info = info or {}
+        title, description = info.get('title'), info.get('description')
+        key = (url, title, description)
+        topic_id = self._ids.get(key)
+        if topic_id is None:
+            topic_id = self._ids[key] = len(self.topics)
+            self.topics.append(TopicRef(topic_id, url, title, description))
+        return self.topics[topic_id]
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return [topic.to_dict() for topic in self.topics]
+
+    @classmethod
+    def from_list(cls, topics: List[Dict[str, Any]]) -> "TopicTable":
+        table = cls()
+        for topic in sorted(topics, key=lambda t: t['id']):
+            ref = table.intern(topic.get('url'), topic)
+            if ref.id != topic['id']:
+                raise ValueError(f"Topic ids are not 0..n-1 without duplicates: {topic['id']}")
+        return table
+
+    def save(self, path: Path):
+        """Write the table as a JSON list (the sidecar of a JSON-lines law file)"""
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_list(), f, ensure_ascii=False, indent=2)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "TopicTable":
+        """A saved table; empty if there is none yet"""
+        path = Path(path)
+        if not path.exists():
+            return cls()
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_list(json.load(f))
+
+
+def topics_path(laws_path: Path) -> Path:
+    """The topic table of a JSON-lines law file: data/pipeline/laws.jsonl -> data/pipeline/laws.topics.json"""
+    laws_path = Path(laws_path)
+    return laws_path.with_name(laws_path.name.split(".")[0] + ".topics.json")
+
+
+@record
+class LawRecord:
+    reference: Optional[str]
+    title: Optional[str] = None
+    url: Optional[str] = None
+    scraped_at: Optional[str] = None
+    description: Optional[str] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    important_laws: List[Dict[str, Any]] = field(default_factory=list)
+    sections: Optional[List[Dict[str, Any]]] = None
+    topic: Optional[TopicRef] = None
+    extra: Optional[Dict[str, Any]] = None
+
+    # dict keys read into fields; topic_page_url/topic_page_info become the topic
+    _KEYS = ('reference', 'title', 'url', 'scraped_at', 'description', 'metadata', 'important_laws', 'sections')
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], topic: Optional[TopicRef] = None,
+                  topics: Optional[TopicTable] = None) -> "LawRecord":
+        """
+        A law dict from the scrapers. Its topic_page_info/topic_page_url are
+        interned in topics (or replaced by topic); a 'topic_id' is looked up
+        in topics.
+        """
+        if topic is None and topics is not None:
+            if data.get('topic_id') is not None:
+                topic = topics[data['topic_id']]
+            elif data.get('topic_page_info') or data.get('topic_page_url'):
+                topic = topics.intern(data.get('topic_page_url'), data.get('topic_page_info'))
+        reference = data.get('reference') or law_sfs(data)
+        extra = {k: v for k, v in data.items()
+                 if k not in cls._KEYS and k not in ('topic_id', 'topic_page_url', 'topic_page_info')}
+        return cls(
+            reference=_intern_or_none(reference),
+            title=data.get('title'),
+            url=data.get('url'),
+            scraped_at=data.get('scraped_at'),
+            description=_intern_or_none(data.get('description')),
+            metadata=_intern_keys(data.get('metadata')),
+            important_laws=data.get('important_laws') or [],
+            sections=data.get('sections'),
+            topic=topic,
+            extra=extra or None,
+        )
+
+    def to_dict(self, expand_topic: bool = False) -> Dict[str, Any]:
+        """
+        The law as a dict; the topic as 'topic_id', or with expand_topic as
+        the scrapers' topic_page_url/topic_page_info copies.
+        """
+        data = {
+            'reference': self.reference,
+            'title': self.title,
+            'url': self.url,
+            'scraped_at': self.scraped_at,
+            'description': self.description,
+            'metadata': self.metadata,
+            'important_laws': self.important_laws,
+        }
+        if self.sections is not None:
+            data['sections'] = self.sections
+        if self.topic is not None:
+            if expand_topic:
+                data['topic_page_url'] = self.topic.url
+                data['topic_page_info'] = self.topic.info()
+            else:
+                data['topic_id'] = self.topic.id
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, text: str, topics: Optional[TopicTable] = None) -> "LawRecord":
+        return cls.from_dict(json.loads(text), topics=topics)
+
+
+@record
+class CaseRecord:
+    case_number: str
+    nickname: str = ""
+    summary: str = ""
+    decision_date: str = ""
+    publication_time: str = ""
+    case_id: str = ""
+    case_type: str = ""
+    is_precedent: bool = False
+    court: str = ""
+    court_code: str = ""
+    keywords: List[str] = field(default_factory=list)
+    legal_areas: List[str] = field(default_factory=list)
+    legal_references: List[Dict[str, str]] = field(default_factory=list)
+    referenced_publications: List[str] = field(default_factory=list)
+    pdf_documents: List[Dict[str, str]] = field(default_factory=list)
+    case_url: str = ""
+    correlation_number: str = ""
+    extra: Optional[Dict[str, Any]] = None
+
+    # (field, key in court_scraper.parse_case's dict)
+    _KEYS = (('case_number', 'case_number'), ('nickname', 'nickname'), ('summary', 'summary'),
+             ('decision_date', 'decision_date'), ('publication_time', 'publication_time'), ('case_id', 'case_id'),
+             ('case_type', 'type'), ('is_precedent', 'is_precedent'), ('court', 'court'),
+             ('court_code', 'court_code'), ('keywords', 'keywords'), ('legal_areas', 'legal_areas'),
+             ('legal_references', 'legal_references'), ('referenced_publications', 'referenced_publications'),
+             ('pdf_documents', 'pdf_documents'), ('case_url', 'case_url'),
+             ('correlation_number', 'correlation_number'))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CaseRecord":
+        keys = {key for _, key in cls._KEYS}
+        extra = {k: v for k, v in data.items() if k not in keys}
+        values = {name: data[key] for name, key in cls._KEYS if key in data}
+        for name in ('court', 'court_code', 'case_type'):
+            if name in values:
+                values[name] = _intern_or_none(values[name])
+        for name in ('keywords', 'legal_areas'):
+            if name in values:
+                values[name] = _intern_list(values[name])
+        return cls(**values, extra=extra or None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {key: getattr(self, name) for name, key in self._KEYS}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, text: str) -> "CaseRecord":
+        return cls.from_dict(json.loads(text))
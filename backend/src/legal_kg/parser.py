@@ -1,6 +1,6 @@
 from typing import List, Dict
-from bs4 import BeautifulSoup
 from .database import get_connection
+from .htmlparse import parse_html
 
 def get_links_from_db(url: str) -> List[str]:
     """
@@ -19,9 +19,9 @@ def get_links_from_db(url: str) -> List[str]:
     if not row or not row[0]:
         return []
     html = row[0]
-    soup = BeautifulSoup(html, "html.parser")
+    doc = parse_html(html)
     links = []
-    for a_tag in soup.find_all("a", href=True):
-        links.append(a_tag["href"])
+    for a_tag in doc.links():
+        links.append(a_tag.href)
     return links
 
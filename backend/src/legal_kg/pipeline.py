@@ -0,0 +1,362 @@
+"""
+Stage DAG runner with content-hash staleness.
+
+A stage declares its inputs and outputs as glob patterns (relative to the
+pipeline root), the stages it depends on and its parameters. Before a
+stage runs, its fingerprint is computed from
+
+    the content hashes of the files its inputs match
+    the output digests of the stages it depends on
+    its parameters
+
+and the stage is skipped when the fingerprint equals the one recorded
+after its last successful run and its outputs still exist. The output
+digest a stage records (the hash of its output files, or what it returns
+as 'digest') is what its dependants see: a stage that reruns but produces
+the same files does not make them stale.
+
+Network stages (network=True) rerun with refresh=True even when nothing
+changed, and are skipped with offline=True: their dependants then work from
+whatever outputs are already on disk.
+
+    pipeline = Pipeline(stages, root, conn)
+    for decision in pipeline.plan():          # what would run, and why
+        print(decision.stage, decision.action, decision.reasons)
+    results = pipeline.run(workers=4)
+
+File digests are cached by (size, mtime) in pipeline_files, so an
+unchanged corpus is not re-read to find out that it is unchanged.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .metrics import METRICS
+
+from .snapshots import hash_file
+
+# Changed files named in an explanation
+EXPLAIN_FILES = 3
+
+
+def init_pipeline_tables(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS pipeline_state (
+            stage TEXT PRIMARY KEY,
+            fingerprint TEXT NOT NULL,
+            params TEXT,
+            output_digest TEXT NOT NULL,
+            finished_at TEXT NOT NULL,
+            seconds REAL
+        )
+    """)
+    # The input files (and upstream digests) a stage last ran with, to explain what changed
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS pipeline_inputs (
+            stage TEXT NOT NULL,
+            path TEXT NOT NULL,
+            digest TEXT NOT NULL,
+            PRIMARY KEY (stage, path)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS pipeline_files (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            digest TEXT NOT NULL
+        )
+    """)
+    conn.commit()
+
+
+@dataclass
+class Stage:
+    name: str
+    run: Callable[[], Optional[Dict[str, Any]]]
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    deps: Tuple[str, ...] = ()
+    params: Dict[str, Any] = field(default_factory=dict)
+    network: bool = False
+    description: str = ""
+
+
+@dataclass
+class Decision:
+    stage: str
+    action: str                     # 'run', 'skip', or 'maybe' (runs if an upstream output changes)
+    reasons: List[str]
+    fingerprint: Optional[str] = None
+    manifest: Dict[str, str] = field(default_factory=dict)
+
+
+def digest_of(manifest: Dict[str, str]) -> str:
+    digest = hashlib.sha256()
+    for path in sorted(manifest):
+        digest.update(f"{path}\0{manifest[path]}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class FileHasher:
+    """Content hashes of the files matching glob patterns, cached by (size, mtime)"""
+
+    def __init__(self, conn, root: Path):
+        self.conn = conn
+        self.root = Path(root)
+        self.cache = {path: (size, mtime, digest) for path, size, mtime, digest in
+                      conn.execute("SELECT path, size, mtime_ns, digest FROM pipeline_files")}
+        self.hashed = 0
+
+    def files(self, patterns: Iterable[str]) -> List[str]:
+        found = set()
+        for pattern in patterns:
+            for path in glob.glob(str(self.root / pattern), recursive=True):
+                if os.path.isfile(path):
+                    found.add(os.path.relpath(path, self.root))
+        return sorted(found)
+
+    def manifest(self, patterns: Iterable[str]) -> Dict[str, str]:
+        manifest = {}
+        updates = []
+        for rel in self.files(patterns):
+            stat = os.stat(self.root / rel)
+            cached = self.cache.get(rel)
+            if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+                manifest[rel] = cached[2]
+                continue
+            digest = hash_file(self.root / rel)
+            self.hashed += 1
+            self.cache[rel] = (stat.st_size, stat.st_mtime_ns, digest)
+            updates.append((rel, stat.st_size, stat.st_mtime_ns, digest))
+            manifest[rel] = digest
+        if updates:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO pipeline_files (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)", updates
+            )
+            self.conn.commit()
+        return manifest
+
+
+def _describe_changes(old: Dict[str, str], new: Dict[str, str]) -> Optional[str]:
+    changed = sorted(p for p in new if p in old and old[p] != new[p])
+    added = sorted(p for p in new if p not in old)
+    removed = sorted(p for p in old if p not in new)
+    if not (changed or added or removed):
+        return None
+    counts = ", ".join(f"{len(paths)} {label}" for label, paths in
+                       (("changed", changed), ("added", added), ("removed", removed)) if paths)
+    paths = changed + added + removed
+    examples = ", ".join(paths[:EXPLAIN_FILES]) + (", ..." if len(paths) > EXPLAIN_FILES else "")
+    return f"inputs {counts}: {examples}"
+
+
+class Pipeline:
+    def __init__(self, stages: Iterable[Stage], root: Path, conn):
+        init_pipeline_tables(conn)
+        self.conn = conn
+        self.root = Path(root)
+        self.stages = {stage.name: stage for stage in stages}
+        self.order = self._topological_order()
+        self.hasher = FileHasher(conn, self.root)
+
+    def _topological_order(self) -> List[str]:
+        for stage in self.stages.values():
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"stage {stage.name} depends on unknown stage {dep}")
+        order, placed = [], set()
+        # Declaration order among stages whose dependencies are placed
+        while len(order) < len(self.stages):
+            ready = [name for name, stage in self.stages.items()
+                     if name not in placed and all(dep in placed for dep in stage.deps)]
+            if not ready:
+                raise ValueError(f"dependency cycle among {sorted(set(self.stages) - placed)}")
+            order.extend(ready)
+            placed.update(ready)
+        return order
+
+    def select(self, targets: Optional[Iterable[str]] = None) -> List[str]:
+        """The targets and everything they depend on, in run order (all stages when None)"""
+        if not targets:
+            return list(self.order)
+        wanted, pending = set(), list(targets)
+        while pending:
+            name = pending.pop()
+            if name not in self.stages:
+                raise ValueError(f"unknown stage {name}")
+            if name not in wanted:
+                wanted.add(name)
+                pending.extend(self.stages[name].deps)
+        return [name for name in self.order if name in wanted]
+
+    def state(self, name: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(
+            "SELECT fingerprint, params, output_digest, finished_at, seconds FROM pipeline_state WHERE stage = ?", (name,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {'fingerprint': row[0], 'params': json.loads(row[1] or '{}'), 'output_digest': row[2],
+                'finished_at': row[3], 'seconds': row[4]}
+
+    def _recorded_inputs(self, name: str) -> Dict[str, str]:
+        return dict(self.conn.execute("SELECT path, digest FROM pipeline_inputs WHERE stage = ?", (name,)))
+
+    def decide(self, name: str, upstream: Dict[str, Optional[str]], force: Iterable[str] = (),
+               refresh: bool = False, offline: bool = False) -> Decision:
+        """
+        Whether a stage is stale. upstream maps each dependency to its output
+        digest, or None when the dependency has not run yet (dry run).
+        """
+        stage = self.stages[name]
+        manifest = self.hasher.manifest(stage.inputs)
+        for dep in stage.deps:
+            if upstream.get(dep) is not None:
+                manifest[f"stage:{dep}"] = upstream[dep]
+        params = json.dumps(stage.params, sort_keys=True, default=str)
+        fingerprint = digest_of({**manifest, 'params:': params})
+        state = self.state(name)
+        outputs_present = all(self.hasher.files([pattern]) for pattern in stage.outputs)
+
+        if stage.network and offline:
+            return Decision(name, 'skip', ["offline (network stage)"], fingerprint, manifest)
+        reasons = []
+        if name in force:
+            reasons.append("forced")
+        if stage.network and refresh:
+            reasons.append("refresh (reads from the network)")
+        if state is None:
+            reasons.append("never run")
+        else:
+            if not outputs_present:
+                reasons.append(f"outputs missing: {', '.join(p for p in stage.outputs if not self.hasher.files([p]))}")
+            if state['fingerprint'] != fingerprint:
+                old = self._recorded_inputs(name)
+                files_changed = _describe_changes({p: d for p, d in old.items() if not p.startswith('stage:')},
+                                                  {p: d for p, d in manifest.items() if not p.startswith('stage:')})
+                if files_changed:
+                    reasons.append(files_changed)
+                for dep in stage.deps:
+                    if upstream.get(dep) is not None and old.get(f"stage:{dep}") != upstream[dep]:
+                        reasons.append(f"{dep} output changed")
+                changed_params = sorted(k for k in set(state['params']) | set(stage.params)
+                                        if json.dumps(state['params'].get(k), default=str)
+                                        != json.dumps(stage.params.get(k), default=str))
+                if changed_params:
+                    reasons.append(f"parameters changed: {', '.join(changed_params)}")
+        if reasons:
+            return Decision(name, 'run', reasons, fingerprint, manifest)
+        waiting = [dep for dep in stage.deps if upstream.get(dep) is None]
+        if waiting:
+            return Decision(name, 'maybe', [f"if the output of {', '.join(waiting)} changes"], fingerprint, manifest)
+        return Decision(name, 'skip', ["up to date"], fingerprint, manifest)
+
+    def plan(self, targets: Optional[Iterable[str]] = None, force: Iterable[str] = (), refresh: bool = False,
+             offline: bool = False) -> List[Decision]:
+        """Dry run: the decision for every selected stage, without running anything"""
+        decisions, digests = [], {}
+        for name in self.select(targets):
+            decision = self.decide(name, digests, force, refresh, offline)
+            # A stage that may run has an unknown output digest until it does
+            digests[name] = self._skipped_digest(self.stages[name], decision) if decision.action == 'skip' else None
+            decisions.append(decision)
+        return decisions
+
+    def _output_digest(self, stage: Stage, result: Optional[Dict[str, Any]], fingerprint: str) -> str:
+        if result and result.get('digest'):
+            return result['digest']
+        if stage.outputs:
+            return digest_of(self.hasher.manifest(stage.outputs))
+        return fingerprint
+
+    def _skipped_digest(self, stage: Stage, decision: Decision) -> str:
+        state = self.state(stage.name)
+        # An offline network stage may never have run here (outputs copied in by hand)
+        return state['output_digest'] if state else self._output_digest(stage, None, decision.fingerprint)
+
+    def _record(self, stage: Stage, decision: Decision, output_digest: str, seconds: float):
+        self.conn.execute("DELETE FROM pipeline_inputs WHERE stage = ?", (stage.name,))
+        self.conn.executemany("INSERT INTO pipeline_inputs (stage, path, digest) VALUES (?, ?, ?)",
+                              [(stage.name, path, digest) for path, digest in decision.manifest.items()])
+        self.conn.execute("""
+            INSERT OR REPLACE INTO pipeline_state (stage, fingerprint, params, output_digest, finished_at, seconds)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (stage.name, decision.fingerprint, json.dumps(stage.params, sort_keys=True, default=str),
+              output_digest, datetime.now().isoformat(), seconds))
+        self.conn.commit()
+
+    def run(self, targets: Optional[Iterable[str]] = None, force: Iterable[str] = (), refresh: bool = False,
+            offline: bool = False, workers: int = 4,
+            on_event: Callable[[str, str, str], None] = lambda stage, event, detail: None) -> List[Dict[str, Any]]:
+        """
+        Run the stale stages, each as soon as its dependencies are done,
+        up to workers at a time. A failed stage blocks its dependants but
+        not the independent branches. Returns one result per stage:
+        {'stage', 'status' (ran/skipped/failed/blocked), 'reasons', 'seconds', 'stats'}.
+        """
+        names = self.select(targets)
+        force = set(force)
+        digests: Dict[str, str] = {}
+        results: Dict[str, Dict[str, Any]] = {}
+        decisions: Dict[str, Decision] = {}
+        running = {}
+
+        def finish(name, status, reasons, seconds=0.0, stats=None, **extra):
+            results[name] = {'stage': name, 'status': status, 'reasons': reasons, 'seconds': seconds,
+                             'stats': stats, **extra}
+            METRICS.inc('pipeline_stages_total', stage=name, status=status)
+            if status == 'ran':
+                METRICS.observe('pipeline_stage_seconds', seconds, stage=name)
+
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+            while len(results) < len(names):
+                for name in names:
+                    stage = self.stages[name]
+                    if name in results or name in decisions:
+                        continue
+                    if any(results.get(dep, {}).get('status') in ('failed', 'blocked') for dep in stage.deps):
+                        finish(name, 'blocked', ["a dependency failed"])
+                        on_event(name, 'blocked', "a dependency failed")
+                        continue
+                    if not all(dep in digests for dep in stage.deps):
+                        continue
+                    decision = self.decide(name, {dep: digests[dep] for dep in stage.deps}, force, refresh, offline)
+                    if decision.action == 'skip':
+                        digests[name] = self._skipped_digest(stage, decision)
+                        finish(name, 'skipped', decision.reasons)
+                        on_event(name, 'skipped', "; ".join(decision.reasons))
+                        continue
+                    decisions[name] = decision
+                    running[pool.submit(self._timed, stage.run)] = name
+                    on_event(name, 'started', "; ".join(decision.reasons))
+                if not running:
+                    continue
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    stage, decision = self.stages[name], decisions.pop(name)
+                    try:
+                        stats, seconds = future.result()
+                    except Exception as e:
+                        finish(name, 'failed', decision.reasons, error=str(e))
+                        on_event(name, 'failed', str(e))
+                        continue
+                    digests[name] = self._output_digest(stage, stats, decision.fingerprint)
+                    self._record(stage, decision, digests[name], seconds)
+                    finish(name, 'ran', decision.reasons, seconds, stats)
+                    on_event(name, 'finished', f"{seconds:.1f}s")
+        return [results[name] for name in names]
+
+    @staticmethod
+    def _timed(fn):
+        started = time.perf_counter()
+        result = fn()
+        return result, time.perf_counter() - started
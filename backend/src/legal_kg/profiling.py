@@ -0,0 +1,310 @@
+"""
+Opt-in profiling of scrape and ingest runs, per stage.
+
+    from legal_kg.profiling import PROFILER, profiling
+
+    with profiling(run_dir, 'court_ingest'):      # no-op when run_dir is None
+        with PROFILER.stage('search'):
+            ...
+        with PROFILER.stage('full_text'):
+            ...
+
+A stage may be entered many times (once per law page, say); its numbers
+add up. For each stage the run directory gets
+
+    <stage>.folded     sampled stacks in folded format: flamegraph.pl, speedscope, inferno
+    <stage>.pstats     cProfile statistics (python -m pstats, snakeviz)
+    <stage>.txt        top functions by cumulative time and top allocations
+    summary.json       wall time, entries, samples, peak traced memory, top allocations
+
+The sampler looks at every thread every `interval` seconds and counts the
+stack under each stage active in that thread (threads a stage starts, such
+as a harvest pool, count under the most recently entered stage), so a
+stage's flame graph includes the stages nested in it. cProfile can only
+hook one thread at a time: it follows the first thread that enters a
+stage, and its time goes to the innermost stage, so a stage's .pstats
+leave out its nested stages. Peak traced memory is measured on every
+entry; top allocations come from tracemalloc snapshots taken when a stage
+is entered and left, on its 1st, 2nd, 4th, 8th, ... entry only, as a
+snapshot costs time in proportion to the live objects. The profiler's own
+bookkeeping is kept out of the timings, samples and cProfile output.
+trace_memory=False turns tracemalloc off altogether.
+"""
+
+import cProfile
+import json
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_PROFILE_DIR = Path(__file__).parent.parent.parent / "data" / "profiles"
+SAMPLE_INTERVAL = 0.005
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 20
+TRACEBACK_FRAMES = 1
+
+# Allocations by the profiler itself, tracemalloc and the import system are left out
+_IGNORED_FILES = (tracemalloc.__file__, __file__, "<frozen importlib._bootstrap>",
+                  "<frozen importlib._bootstrap_external>")
+
+
+def _snapshot_entry(entries: int) -> bool:
+    """Snapshots are taken on the 1st, 2nd, 4th, 8th, ... entry of a stage"""
+    return entries & (entries - 1) == 0
+
+
+def _frame_name(code) -> str:
+    # ';' separates frames in the folded format
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _folded_stack(frame, thread_name: str) -> str:
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    names.append(thread_name)
+    return ";".join(reversed(names))
+
+
+class _StageStats:
+    def __init__(self):
+        self.entries = 0
+        self.seconds = 0.0
+        self.peak_bytes = 0
+        self.snapshots = 0
+        self.samples: Counter = Counter()
+        self.allocations: Dict[str, List[int]] = {}     # "file:line" -> [size_diff, count_diff]
+        self.profile: Optional[cProfile.Profile] = None
+
+
+class Profiler:
+    """Process-wide; the scrapers share the module-level PROFILER"""
+
+    def __init__(self):
+        self.run_dir: Optional[Path] = None
+        self.stats: Dict[str, _StageStats] = {}
+        self._lock = threading.Lock()
+        # thread id -> [stage, cProfile or None, traced peak so far or None] entered there
+        self._active: Dict[int, List[list]] = {}
+        self._last_stage: Optional[str] = None
+        self._profiling_thread: Optional[int] = None
+        self._busy: set = set()                         # threads in the profiler's bookkeeping, not sampled
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def enabled(self) -> bool:
+        return self.run_dir is not None
+
+    def start(self, run_dir, interval: float = SAMPLE_INTERVAL, use_cprofile: bool = True,
+              trace_memory: bool = True) -> Path:
+        """Start profiling into run_dir; stages entered from now on are recorded"""
+        if self.enabled:
+            raise RuntimeError(f"Already profiling into {self.run_dir}")
+        self.run_dir = Path(run_dir)
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        self.stats = {}
+        self.interval = interval
+        self.use_cprofile = use_cprofile
+        self.trace_memory = trace_memory
+        self.started = time.perf_counter()
+        self.started_at = datetime.now()
+        self._started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start(TRACEBACK_FRAMES)
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample, name="legal_kg-profiler", daemon=True)
+        self._sampler.start()
+        return self.run_dir
+
+    def stop(self) -> Optional[Path]:
+        """Stop profiling and write the run directory; returns it"""
+        if not self.enabled:
+            return None
+        self._stop.set()
+        self._sampler.join()
+        if self._started_tracing:
+            tracemalloc.stop()
+        run_dir = self.write()
+        self.run_dir = None
+        self.stats = {}
+        return run_dir
+
+    @contextmanager
+    def stage(self, name: str):
+        """Record the wrapped block under name; does nothing unless profiling"""
+        if not self.enabled:
+            yield
+            return
+        thread = threading.get_ident()
+        with self._lock:
+            self._busy.add(thread)
+            stats = self.stats.setdefault(name, _StageStats())
+            stats.entries += 1
+            entered = self._active.setdefault(thread, [])
+            outer = entered[-1][1] if entered else None
+            profile = None
+            if self.use_cprofile and self._profiling_thread in (None, thread):
+                profile = stats.profile = stats.profile or cProfile.Profile()
+                self._profiling_thread = thread
+            entry = [name, profile, None]
+            entered.append(entry)
+            self._last_stage = name
+            tracing = self.trace_memory and tracemalloc.is_tracing()
+            before = None
+            if tracing and _snapshot_entry(stats.entries):
+                stats.snapshots += 1
+                before = True
+        if outer is not None:
+            outer.disable()
+        if before:
+            before = tracemalloc.take_snapshot()
+        if tracing:
+            with self._lock:
+                # reset_peak() is process-wide: fold the peak so far into every stage still open
+                peak = tracemalloc.get_traced_memory()[1]
+                for stack in self._active.values():
+                    for open_entry in stack:
+                        if open_entry[2] is not None:
+                            open_entry[2] = max(open_entry[2], peak)
+                tracemalloc.reset_peak()
+                base = entry[2] = tracemalloc.get_traced_memory()[0]
+        if profile is not None:
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiler (a debugger, coverage) owns the hook
+                entry[1] = profile = None
+        self._busy.discard(thread)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self._busy.add(thread)
+            if profile is not None:
+                profile.disable()
+            diff = tracemalloc.take_snapshot().compare_to(before, "lineno") if before else []
+            with self._lock:
+                stats.seconds += elapsed
+                if tracing:
+                    peak = max(entry[2], tracemalloc.get_traced_memory()[1]) - base
+                    stats.peak_bytes = max(stats.peak_bytes, peak)
+                for stat in diff:
+                    frame = stat.traceback[0]
+                    if stat.size_diff and frame.filename not in _IGNORED_FILES:
+                        totals = stats.allocations.setdefault(f"{frame.filename}:{frame.lineno}", [0, 0])
+                        totals[0] += stat.size_diff
+                        totals[1] += stat.count_diff
+                entered.pop()
+                if not entered:
+                    del self._active[thread]
+                    if self._profiling_thread == thread:
+                        self._profiling_thread = None
+            if outer is not None:
+                outer.enable()
+            self._busy.discard(thread)
+
+    def _sample(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            with self._lock:
+                if not self._active:
+                    continue
+                for thread, frame in frames.items():
+                    if thread == own or thread in self._busy:
+                        continue
+                    stages = [open_entry[0] for open_entry in self._active.get(thread, ())] or [self._last_stage]
+                    stack = _folded_stack(frame, names.get(thread, str(thread)))
+                    for name in set(stages):
+                        self.stats[name].samples[stack] += 1
+
+    def summary(self) -> Dict[str, object]:
+        stages = {}
+        for name, stats in self.stats.items():
+            top = sorted(stats.allocations.items(), key=lambda item: -abs(item[1][0]))[:TOP_ALLOCATIONS]
+            stages[name] = {
+                'entries': stats.entries,
+                'seconds': round(stats.seconds, 6),
+                'samples': sum(stats.samples.values()),
+                'peak_traced_bytes': stats.peak_bytes,
+                'allocation_snapshots': stats.snapshots,
+                'top_allocations': [{'line': line, 'size_diff': size, 'count_diff': count}
+                                    for line, (size, count) in top],
+            }
+        return {
+            'started_at': self.started_at.isoformat(),
+            'wall_seconds': round(time.perf_counter() - self.started, 6),
+            'sample_interval': self.interval,
+            'stages': stages,
+        }
+
+    def write(self) -> Path:
+        run_dir = self.run_dir
+        summary = self.summary()
+        for name, stats in self.stats.items():
+            with open(run_dir / f"{name}.folded", "w", encoding="utf-8") as f:
+                for stack, count in stats.samples.most_common():
+                    f.write(f"{stack} {count}\n")
+            lines = [f"{name}: {stats.entries} entries, {stats.seconds:.3f}s, "
+                     f"peak {stats.peak_bytes / 2 ** 20:.1f} MiB traced", ""]
+            if stats.profile is not None:
+                stats.profile.dump_stats(run_dir / f"{name}.pstats")
+                report = _StringWriter()
+                pstats.Stats(stats.profile, stream=report).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+                lines.append(report.text.strip())
+                lines.append("")
+            lines.append("Top allocations (bytes still held when the stage was left):")
+            for entry in summary['stages'][name]['top_allocations']:
+                lines.append(f"  {entry['size_diff']:>12}  {entry['count_diff']:>8}  {entry['line']}")
+            (run_dir / f"{name}.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+        with open(run_dir / "summary.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        return run_dir
+
+
+class _StringWriter:
+    def __init__(self):
+        self.text = ""
+
+    def write(self, text):
+        self.text += text
+
+
+PROFILER = Profiler()
+
+
+def profile_dir(label: str, base: Path = DEFAULT_PROFILE_DIR) -> Path:
+    """A fresh run directory, e.g. data/profiles/20250701-120000-court_ingest"""
+    return Path(base) / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{label}"
+
+
+def profiling(run_dir, label: str = "run", **options):
+    """
+    Profile the wrapped block into run_dir (True: a new directory under
+    data/profiles). A no-op when run_dir is falsy or profiling is already on,
+    so entry points that call each other can all accept a profile argument.
+    """
+    if not run_dir or PROFILER.enabled:
+        return nullcontext()
+    return _profiling(profile_dir(label) if run_dir is True else Path(run_dir), label, options)
+
+
+@contextmanager
+def _profiling(run_dir: Path, label: str, options):
+    PROFILER.start(run_dir, **options)
+    try:
+        with PROFILER.stage(label):
+            yield PROFILER
+    finally:
+        print(f"Profile written to {PROFILER.stop()}")
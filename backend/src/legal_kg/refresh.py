@@ -0,0 +1,259 @@
+"""
+Amendment-aware refresh scheduling for statutes.
+
+Each tracked law keeps its last seen amendment marker (the 'Ändring införd',
+'Ändrad' and 'Ikraftträdandedatum' metadata) and how often that marker has
+changed. The re-check interval of a law shrinks when it changes often or was
+amended recently and grows when it stays stable. A law whose fetch fails is
+retried after FAILURE_RETRY_DAYS, doubling with every further failure up to
+MAX_INTERVAL_DAYS, so dead pages stop eating the budget. plan() hands out the
+most overdue laws within a fixed daily request budget.
+"""
+
+import math
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+MIN_INTERVAL_DAYS = 1.0
+MAX_INTERVAL_DAYS = 90.0
+FAILURE_RETRY_DAYS = 1.0
+# Prior for the change rate: one change per PRIOR_DAYS, so new laws are neither
+# hammered nor forgotten before we have observed them
+PRIOR_DAYS = 60.0
+# Aim to re-check a law before this probability of it having changed is reached
+TARGET_CHANGE_PROBABILITY = 0.2
+RECENT_AMENDMENT_YEARS = 2
+
+MARKER_FIELDS = ('Ändring införd', 'Ändrad', 'Ikraftträdandedatum')
+
+_SFS_YEAR = re.compile(r'SFS\s*(\d{4}):\d+')
+
+
+def init_refresh_tables(conn):
+    """Create the scheduler tables if they do not exist"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS law_refresh (
+            url TEXT PRIMARY KEY,
+            sfs TEXT,
+            title TEXT,
+            amendment_marker TEXT,
+            last_amended_year INTEGER,
+            first_seen TIMESTAMP NOT NULL,
+            last_checked TIMESTAMP,
+            last_changed TIMESTAMP,
+            checks INTEGER DEFAULT 0,
+            changes INTEGER DEFAULT 0,
+            failures INTEGER DEFAULT 0,
+            interval_days REAL,
+            next_due TIMESTAMP NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_law_refresh_next_due ON law_refresh (next_due)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS law_changes (
+            url TEXT NOT NULL,
+            observed_at TIMESTAMP NOT NULL,
+            old_marker TEXT,
+            new_marker TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS refresh_budget (
+            day TEXT PRIMARY KEY,
+            used INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.commit()
+
+
+def amendment_marker(metadata: Dict[str, str]) -> str:
+    """The metadata fields that change when a law is amended, as one comparable string"""
+    return " | ".join(f"{key}: {metadata.get(key, '')}" for key in MARKER_FIELDS)
+
+
+def last_amended_year(metadata: Dict[str, str]) -> Optional[int]:
+    """Year of the latest amending SFS ('t.o.m. SFS 2023:325' -> 2023)"""
+    years = [int(y) for key in MARKER_FIELDS[:2] for y in _SFS_YEAR.findall(metadata.get(key, ''))]
+    return max(years) if years else None
+
+
+def _parse(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+class RefreshScheduler:
+    def __init__(self, conn, daily_budget: int = 200):
+        self.conn = conn
+        self.daily_budget = daily_budget
+        init_refresh_tables(conn)
+
+    # Tracking
+
+    def register(self, url: str, sfs: Optional[str] = None, title: Optional[str] = None, now: Optional[datetime] = None):
+        """Start tracking a law. New laws are due immediately."""
+        now = now or datetime.now()
+        self.conn.execute("""
+            INSERT OR IGNORE INTO law_refresh (url, sfs, title, first_seen, next_due)
+            VALUES (?, ?, ?, ?, ?)
+        """, (url, sfs, title, now.isoformat(), now.isoformat()))
+        self.conn.commit()
+
+    def register_laws(self, laws: Iterable[Dict[str, Any]], now: Optional[datetime] = None):
+        """Track the laws listed by the topic scraper ({'url', 'reference', 'title'})"""
+        for law in laws:
+            if law.get('url'):
+                self.register(law['url'], law.get('reference'), law.get('title'), now=now)
+
+    def interval_days(self, row: Dict[str, Any], now: datetime) -> float:
+        """
+        Days until the next check: the time after which the law has changed with
+        TARGET_CHANGE_PROBABILITY, given its observed change rate.
+        """
+        first_seen = _parse(row['first_seen']) or now
+        observed_days = max((now - first_seen).total_seconds() / 86400, 0.0)
+        rate = (row['changes'] + 1) / (observed_days + PRIOR_DAYS)
+        interval = -math.log(1 - TARGET_CHANGE_PROBABILITY) / rate
+
+        year = row.get('last_amended_year')
+        if year and now.year - year < RECENT_AMENDMENT_YEARS:
+            interval /= 2
+        return min(max(interval, MIN_INTERVAL_DAYS), MAX_INTERVAL_DAYS)
+
+    def _row(self, url: str) -> Optional[Dict[str, Any]]:
+        cursor = self.conn.execute("SELECT * FROM law_refresh WHERE url = ?", (url,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([c[0] for c in cursor.description], row))
+
+    def record(self, url: str, law_data: Dict[str, Any], now: Optional[datetime] = None) -> bool:
+        """
+        Record a successful fetch. Returns True if the amendment marker changed.
+        """
+        now = now or datetime.now()
+        row = self._row(url)
+        if row is None:
+            self.register(url, title=law_data.get('title'), now=now)
+            row = self._row(url)
+
+        metadata = law_data.get('metadata') or {}
+        marker = amendment_marker(metadata)
+        changed = row['amendment_marker'] is not None and marker != row['amendment_marker']
+        if changed:
+            self.conn.execute(
+                "INSERT INTO law_changes (url, observed_at, old_marker, new_marker) VALUES (?, ?, ?, ?)",
+                (url, now.isoformat(), row['amendment_marker'], marker),
+            )
+            row['changes'] += 1
+            row['last_changed'] = now.isoformat()
+        row['last_amended_year'] = last_amended_year(metadata) or row['last_amended_year']
+
+        interval = self.interval_days(row, now)
+        self.conn.execute("""
+            UPDATE law_refresh SET
+                sfs = COALESCE(?, sfs), title = COALESCE(?, title), amendment_marker = ?,
+                last_amended_year = ?, last_checked = ?, last_changed = ?, checks = checks + 1,
+                changes = ?, failures = 0, interval_days = ?, next_due = ?
+            WHERE url = ?
+        """, (
+            metadata.get('SFS nr'), law_data.get('title'), marker, row['last_amended_year'],
+            now.isoformat(), row['last_changed'], row['changes'], interval,
+            (now + timedelta(days=interval)).isoformat(), url,
+        ))
+        self._spend(now)
+        self.conn.commit()
+        return changed
+
+    def record_failure(self, url: str, now: Optional[datetime] = None):
+        """Record a failed fetch; the law is retried with exponential backoff"""
+        now = now or datetime.now()
+        row = self.conn.execute("SELECT failures FROM law_refresh WHERE url = ?", (url,)).fetchone()
+        failures = row[0] if row else 0
+        delay = min(FAILURE_RETRY_DAYS * 2 ** failures, MAX_INTERVAL_DAYS)
+        self.conn.execute("""
+            UPDATE law_refresh SET last_checked = ?, failures = failures + 1, next_due = ?
+            WHERE url = ?
+        """, (now.isoformat(), (now + timedelta(days=delay)).isoformat(), url))
+        self._spend(now)
+        self.conn.commit()
+
+    # Budget
+
+    def _spend(self, now: datetime):
+        self.conn.execute("""
+            INSERT INTO refresh_budget (day, used) VALUES (?, 1)
+            ON CONFLICT(day) DO UPDATE SET used = used + 1
+        """, (now.date().isoformat(),))
+
+    def remaining_budget(self, now: Optional[datetime] = None) -> int:
+        now = now or datetime.now()
+        row = self.conn.execute(
+            "SELECT used FROM refresh_budget WHERE day = ?", (now.date().isoformat(),)
+        ).fetchone()
+        return max(self.daily_budget - (row[0] if row else 0), 0)
+
+    # Planning
+
+    def plan(self, limit: Optional[int] = None, now: Optional[datetime] = None) -> List[str]:
+        """
+        URLs to fetch now, most overdue first, capped by today's remaining budget.
+        Never-checked laws come first; overdue-ness is measured in intervals,
+        so a law checked daily that is one day late ranks with a stable law
+        that is three months late.
+        """
+        now = now or datetime.now()
+        budget = self.remaining_budget(now)
+        if limit is not None:
+            budget = min(budget, limit)
+        if budget <= 0:
+            return []
+        rows = self.conn.execute("""
+            SELECT url, last_checked, interval_days FROM law_refresh WHERE next_due <= ?
+        """, (now.isoformat(),)).fetchall()
+
+        def priority(row):
+            _, last_checked, interval = row
+            if last_checked is None:
+                return math.inf
+            age = (now - _parse(last_checked)).total_seconds() / 86400
+            return age / (interval or MIN_INTERVAL_DAYS)
+
+        rows.sort(key=priority, reverse=True)
+        return [row[0] for row in rows[:budget]]
+
+    def freshness_report(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """How fresh the tracked corpus is"""
+        now = now or datetime.now()
+        rows = self.conn.execute("""
+            SELECT last_checked, next_due, changes, first_seen, failures FROM law_refresh
+        """).fetchall()
+        ages = []
+        expected_stale = 0.0
+        never, overdue, failing = 0, 0, 0
+        for last_checked, next_due, changes, first_seen, failures in rows:
+            if failures:
+                failing += 1
+            if last_checked is None:
+                never += 1
+                continue
+            age = (now - _parse(last_checked)).total_seconds() / 86400
+            ages.append(age)
+            if _parse(next_due) <= now:
+                overdue += 1
+            observed = max((now - _parse(first_seen)).total_seconds() / 86400, 0.0)
+            rate = (changes + 1) / (observed + PRIOR_DAYS)
+            expected_stale += 1 - math.exp(-rate * age)
+        ages.sort()
+        return {
+            'tracked': len(rows),
+            'never_checked': never,
+            'overdue': overdue,
+            'failing': failing,
+            'checked_last_7_days': sum(1 for a in ages if a <= 7),
+            'checked_last_30_days': sum(1 for a in ages if a <= 30),
+            'median_age_days': round(ages[len(ages) // 2], 1) if ages else None,
+            'max_age_days': round(ages[-1], 1) if ages else None,
+            'expected_stale_laws': round(expected_stale, 1),
+            'budget_remaining_today': self.remaining_budget(now),
+        }
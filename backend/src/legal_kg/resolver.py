@@ -0,0 +1,165 @@
+"""
+Persistent SFS reference -> law page URL cache, with negative entries.
+
+A law's URL is only trusted once it has been seen working: the sitemaps
+list it (legal_kg.sitemap), or a scraper fetched it and recorded where it
+ended up after redirects. URLs that answered 404/410 are remembered as bad,
+and a reference with no usable URL at all is remembered as missing, so
+neither is requested again until its entry expires.
+
+    resolver = UrlResolver(conn)
+    url = resolver.resolve('1977:480', candidates=[href_from_page])   # no network
+    ...fetch url...
+    resolver.record('1977:480', response.url)        # verified, after redirects
+    resolver.record_bad(url, '1977:480', 404)        # known-bad
+
+    resolver.lookup('1977:480')                      # verified URL or None
+
+Entries are trusted for RESOLVED_TTL_DAYS (verified) and NEGATIVE_TTL_DAYS
+(bad URLs, missing references); after that the reference is resolved again.
+"""
+
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from .sitemap import init_sitemap_tables
+
+RESOLVED_TTL_DAYS = 30.0
+NEGATIVE_TTL_DAYS = 7.0
+DAY = 86400.0
+
+# Where a verified URL came from
+SITEMAP = "sitemap"
+FETCH = "fetch"
+
+
+def init_resolver_tables(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS law_url_cache (
+            reference TEXT PRIMARY KEY,
+            url TEXT,
+            source TEXT NOT NULL,
+            checked_at REAL NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS bad_law_urls (
+            url TEXT PRIMARY KEY,
+            reference TEXT,
+            status INTEGER,
+            checked_at REAL NOT NULL
+        )
+    """)
+    conn.commit()
+    init_sitemap_tables(conn)
+
+
+class UrlResolver:
+    def __init__(self, conn, ttl_days: float = RESOLVED_TTL_DAYS, negative_ttl_days: float = NEGATIVE_TTL_DAYS,
+                 clock=time.time):
+        self.conn = conn
+        self.ttl = ttl_days * DAY
+        self.negative_ttl = negative_ttl_days * DAY
+        self.clock = clock
+        # reference -> (url or None for missing, source, checked_at); filled as references are looked up
+        self._memo: Dict[str, Optional[Tuple[Optional[str], str, float]]] = {}
+        init_resolver_tables(conn)
+
+    def _entry(self, reference: str) -> Optional[Tuple[Optional[str], str, float]]:
+        if reference not in self._memo:
+            row = self.conn.execute(
+                "SELECT url, source, checked_at FROM law_url_cache WHERE reference = ?", (reference,)
+            ).fetchone()
+            if row is None or row[0] is None:
+                # The sitemaps list canonical URLs and discovery re-reads them, so they do not
+                # expire here; a law they list since it was cached as missing is found again
+                sitemap = self.conn.execute("SELECT url FROM law_urls WHERE reference = ?", (reference,)).fetchone()
+                if sitemap:
+                    row = (sitemap[0], SITEMAP, self.clock())
+            self._memo[reference] = tuple(row) if row else None
+        return self._memo[reference]
+
+    def _fresh(self, entry) -> bool:
+        url, source, checked_at = entry
+        if source == SITEMAP:
+            return not self.is_bad(url)
+        return self.clock() - checked_at < (self.ttl if url else self.negative_ttl)
+
+    def lookup(self, reference: Optional[str]) -> Optional[str]:
+        """The verified URL of a law, or None (unknown, expired or known missing)"""
+        if not reference:
+            return None
+        entry = self._entry(reference)
+        if entry is None or not self._fresh(entry):
+            return None
+        return entry[0]
+
+    def is_missing(self, reference: Optional[str]) -> bool:
+        """True while a reference is cached as having no usable URL"""
+        entry = self._entry(reference) if reference else None
+        return entry is not None and entry[0] is None and self._fresh(entry)
+
+    def is_bad(self, url: Optional[str]) -> bool:
+        """True while url is cached as a 404/410"""
+        if not url:
+            return False
+        row = self.conn.execute("SELECT checked_at FROM bad_law_urls WHERE url = ?", (url,)).fetchone()
+        return row is not None and self.clock() - row[0] < self.negative_ttl
+
+    def resolve(self, reference: Optional[str], candidates: Iterable[Optional[str]] = ()) -> Optional[str]:
+        """
+        The verified URL if there is one, else the first candidate not known
+        to be bad, which is still to be verified by fetching it. When every
+        candidate is known to be bad the reference is cached as missing.
+        """
+        url = self.lookup(reference)
+        if url:
+            return url
+        tried = False
+        for candidate in candidates:
+            if not candidate or candidate.startswith("javascript:"):
+                continue
+            if not self.is_bad(candidate):
+                return candidate
+            tried = True
+        if reference and tried:
+            self._store(reference, None, FETCH)
+        return None
+
+    def record(self, reference: Optional[str], url: str, source: str = FETCH):
+        """url (the final one, after redirects) serves reference"""
+        if reference and url:
+            self._store(reference, url, source)
+            self.conn.execute("DELETE FROM bad_law_urls WHERE url = ?", (url,))
+            self.conn.commit()
+
+    def record_bad(self, url: str, reference: Optional[str] = None, status: Optional[int] = None):
+        """url answered 404/410; a verified entry pointing at it is dropped"""
+        self.conn.execute("INSERT OR REPLACE INTO bad_law_urls (url, reference, status, checked_at) VALUES (?, ?, ?, ?)",
+                          (url, reference, status, self.clock()))
+        for (ref,) in self.conn.execute("SELECT reference FROM law_url_cache WHERE url = ?", (url,)).fetchall():
+            self.conn.execute("DELETE FROM law_url_cache WHERE reference = ?", (ref,))
+            self._memo.pop(ref, None)
+        if reference:
+            self._memo.pop(reference, None)
+        self.conn.commit()
+
+    def _store(self, reference: str, url: Optional[str], source: str):
+        checked_at = self.clock()
+        self.conn.execute("""
+            INSERT OR REPLACE INTO law_url_cache (reference, url, source, checked_at) VALUES (?, ?, ?, ?)
+        """, (reference, url, source, checked_at))
+        self.conn.commit()
+        self._memo[reference] = (url, source, checked_at)
+
+    def known_urls(self) -> Dict[str, str]:
+        """reference -> URL of every law with a fresh verified entry, sitemap ones included"""
+        now = self.clock()
+        bad = {url for url, checked_at in self.conn.execute("SELECT url, checked_at FROM bad_law_urls")
+               if now - checked_at < self.negative_ttl}
+        urls = {reference: url for reference, url in self.conn.execute("SELECT reference, url FROM law_urls")
+                if url not in bad}
+        for reference, url, checked_at in self.conn.execute("SELECT reference, url, checked_at FROM law_url_cache"):
+            if url and now - checked_at < self.ttl:
+                urls[reference] = url
+        return urls
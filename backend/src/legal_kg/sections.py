@@ -0,0 +1,192 @@
+"""
+Section-level law model.
+
+A law page is split into chapter/§ records (see lawstream.LawStreamParser).
+Every section gets a stable id built from SFS number, chapter and paragraph,
+and a content hash. When a law is scraped again only the sections whose hash
+changed are rewritten, have their references re-extracted and are re-linked;
+unchanged sections are skipped.
+"""
+
+import hashlib
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+from .citations import SECTION_REF, SFS_IN_PARENS, SFS_NUMBER
+from .metrics import METRICS
+
+# A § reference followed by a statute name and an SFS number points into that statute
+_EXTERNAL_WINDOW = 80
+_NOT_A_STATUTE_NAME = re.compile(r'[,.;]|\b(?:och|eller|samt)\b')
+
+
+def _compact(value: Optional[str]) -> str:
+    return re.sub(r'\s+', '', value or '')
+
+
+def section_id(sfs: str, chapter: Optional[str], paragraph: str) -> str:
+    """
+    Stable id of a section, e.g. '1942:740/10kap/17§' or '1977:480/2a§'.
+    """
+    if chapter:
+        return f"{sfs}/{_compact(chapter)}kap/{_compact(paragraph)}§"
+    return f"{sfs}/{_compact(paragraph)}§"
+
+
+def content_hash(section: Dict[str, Any]) -> str:
+    """Hash of the parts of a section that matter for extraction (whitespace-insensitive)"""
+    normalized = "\x1f".join(
+        re.sub(r'\s+', ' ', section.get(key) or '').strip()
+        for key in ('heading', 'text')
+    )
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def law_sfs(law_data: Dict[str, Any]) -> Optional[str]:
+    """SFS number of a scraped law: metadata 'SFS nr', else the one in the title"""
+    sfs = (law_data.get('metadata') or {}).get('SFS nr')
+    if sfs:
+        match = SFS_NUMBER.search(sfs)
+        if match:
+            return match.group(1)
+    match = SFS_IN_PARENS.search(law_data.get('title') or '')
+    return match.group(1) if match else law_data.get('reference')
+
+
+def extract_references(sfs: str, section: Dict[str, Any]) -> List[Dict[str, Optional[str]]]:
+    """
+    References from a section's text to other laws and sections.
+    '18 §' and '47 kap. 3 §' point into the same law unless an SFS number
+    follows closely ('7 kap. 1 § socialförsäkringsbalken (2010:110)').
+    """
+    text = section.get('text') or ''
+    references = []
+    covered = set()
+
+    for match in SECTION_REF.finditer(text):
+        chapter = match.group(1)
+        paragraph = match.group(2)
+        target_sfs = sfs
+        window = text[match.end():match.end() + _EXTERNAL_WINDOW]
+        window = window.split('§', 1)[0]
+        external = SFS_NUMBER.search(window)
+        if external:
+            between = window[:external.start()]
+            if _NOT_A_STATUTE_NAME.search(between) or len(between.split()) > 6:
+                external = None
+        if external:
+            target_sfs = external.group(1)
+            covered.add(match.end() + external.start())
+        elif chapter is None:
+            chapter = section.get('chapter')
+        references.append({
+            'reference': match.group(0),
+            'target_sfs': target_sfs,
+            'target_section_id': section_id(target_sfs, chapter, paragraph),
+        })
+
+    for match in SFS_NUMBER.finditer(text):
+        if match.start() in covered or match.group(1) == sfs:
+            continue
+        references.append({
+            'reference': match.group(1),
+            'target_sfs': match.group(1),
+            'target_section_id': None,
+        })
+    return references
+
+
+class SectionSync:
+    """
+    Incrementally store the sections of one or more laws.
+
+        sync = SectionSync(conn)
+        for section in sections:
+            sync.add(sfs, section)
+        stats = sync.finish()
+
+    add() writes a section only if it is new or its content hash changed.
+    finish() deletes sections that were not seen again and commits.
+    """
+
+    def __init__(self, conn, extract=extract_references):
+        self.conn = conn
+        self.extract = extract
+        self._existing: Dict[str, Dict[str, tuple]] = {}
+        self._seen: Dict[str, set] = {}
+        self._positions: Dict[str, int] = {}
+        self.stats = {'added': 0, 'changed': 0, 'unchanged': 0, 'removed': 0}
+
+    def _load(self, sfs: str):
+        if sfs not in self._existing:
+            rows = self.conn.execute(
+                "SELECT id, content_hash, position FROM law_sections WHERE sfs = ?", (sfs,)
+            ).fetchall()
+            self._existing[sfs] = {sid: (digest, position) for sid, digest, position in rows}
+            self._seen[sfs] = set()
+            self._positions[sfs] = 0
+
+    def add(self, sfs: str, section: Dict[str, Any]) -> Optional[str]:
+        """Store one section. Returns its id if it was written, None if unchanged."""
+        if not sfs:
+            raise ValueError(f"No SFS number for section {section.get('paragraph')} §")
+        self._load(sfs)
+        sid = section_id(sfs, section.get('chapter'), section['paragraph'])
+        # Repealed and future versions of a § can appear side by side
+        base, n = sid, 2
+        while sid in self._seen[sfs]:
+            sid = f"{base}~{n}"
+            n += 1
+        self._seen[sfs].add(sid)
+        position = self._positions[sfs]
+        self._positions[sfs] += 1
+
+        digest = content_hash(section)
+        old_digest, old_position = self._existing[sfs].get(sid, (None, None))
+        if old_digest == digest:
+            self.stats['unchanged'] += 1
+            if old_position != position:
+                self.conn.execute("UPDATE law_sections SET position = ? WHERE id = ?", (position, sid))
+            return None
+        self.stats['changed' if old_digest else 'added'] += 1
+
+        self.conn.execute("""
+            INSERT OR REPLACE INTO law_sections
+            (id, sfs, chapter, chapter_title, paragraph, heading, text, content_hash, position, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        """, (
+            sid, sfs, section.get('chapter'), section.get('chapter_title'), section['paragraph'],
+            section.get('heading'), section.get('text'), digest, position,
+        ))
+        self._relink(sid, sfs, section)
+        return sid
+
+    def _relink(self, sid: str, sfs: str, section: Dict[str, Any]):
+        self.conn.execute("DELETE FROM section_references WHERE section_id = ?", (sid,))
+        self.conn.executemany("""
+            INSERT OR IGNORE INTO section_references (section_id, target_sfs, target_section_id, reference)
+            VALUES (?, ?, ?, ?)
+        """, [
+            (sid, ref['target_sfs'], ref['target_section_id'], ref['reference'])
+            for ref in self.extract(sfs, section)
+        ])
+
+    def finish(self) -> Dict[str, int]:
+        """Remove sections that disappeared from the re-scraped laws and commit"""
+        with METRICS.timer('db_write_seconds', table='law_sections'):
+            for sfs, existing in self._existing.items():
+                removed = [sid for sid in existing if sid not in self._seen[sfs]]
+                self.conn.executemany("DELETE FROM law_sections WHERE id = ?", [(sid,) for sid in removed])
+                self.conn.executemany("DELETE FROM section_references WHERE section_id = ?",
+                                      [(sid,) for sid in removed])
+                self.stats['removed'] += len(removed)
+            self.conn.commit()
+        return dict(self.stats)
+
+
+def sync_law_sections(conn, sfs: str, sections: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+    """Store all sections of one law, skipping the unchanged ones"""
+    sync = SectionSync(conn)
+    for section in sections:
+        sync.add(sfs, section)
+    return sync.finish()
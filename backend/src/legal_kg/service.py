@@ -0,0 +1,402 @@
+"""
+Local HTTP query service over the knowledge graph (asyncio, no framework).
+
+    GET /health
+    GET /laws/{sfs}                               law node, section and citation counts
+    GET /laws/{sfs}/cases?offset=0&limit=50       cases citing the law, newest first
+                                                  (sort=authority: highest PageRank first)
+    GET /nodes/{node_id}/neighbourhood?k=2&kind=case&offset=0&limit=50
+    GET /nodes/{node_id}/related?limit=10          TF-IDF most similar cases / laws
+    GET /search?q=provokation&kind=case&offset=0&limit=20
+    GET /context?seed=1962:700&budget=2000       token-budgeted context pack
+    GET /facets?court_code=HDO,HFD&is_precedent=true&date_from=2020-01-01&top=20
+                                                  matching cases and counts per facet value
+
+List endpoints are paginated ({"items", "offset", "limit", "next_offset"});
+add stream=1 to get every item as chunked NDJSON instead. Neighbourhoods come
+from the in-memory Graph (LRU cached), everything else from a pool of
+read-only SQLite connections, queried off the event loop.
+
+    python3 main.py serve --port 8080
+"""
+
+import asyncio
+import json
+import queue
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from .database import DB_PATH
+from .context import ContextBuilder, default_case_text
+from .facets import FACETS, MULTI_FACETS, FacetIndex
+from .graph import Graph, case_node, fts_query, graph_version, law_node
+from .metrics import get_logger
+from .similarity import SIMILARITY_DIR, SimilarityIndex
+
+logger = get_logger("service")
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+# Cap for stream=1 responses, which are not paginated
+MAX_STREAM_ITEMS = 100000
+MAX_HOPS = 3
+MAX_CONTEXT_BUDGET = 32000
+STREAM_BATCH = 100
+# How often the server checks whether the graph was rebuilt
+RELOAD_INTERVAL_SECONDS = 30.0
+
+class ReadPool:
+    """Fixed pool of read-only SQLite connections, shared between threads"""
+
+    def __init__(self, path: Path = DB_PATH, size: int = 4):
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(size):
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            self._pool.put(conn)
+        self.size = size
+
+    @contextmanager
+    def connection(self):
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self):
+        for _ in range(self.size):
+            self._pool.get().close()
+
+
+def load_facet_index(conn) -> FacetIndex:
+    """Facet index over the case nodes of the graph"""
+    fields = ('case_number', 'decision_date') + FACETS
+    rows = conn.execute(f"""
+        SELECT {", ".join(f"json_extract(data, '$.{field}')" for field in fields)}
+        FROM graph_nodes WHERE kind = 'case' AND data IS NOT NULL
+    """)
+    cases = []
+    for row in rows:
+        case = dict(zip(fields, row))
+        for name in MULTI_FACETS:
+            case[name] = json.loads(case[name]) if case[name] else []
+        if case['is_precedent'] is not None:
+            case['is_precedent'] = bool(case['is_precedent'])
+        cases.append(case)
+    return FacetIndex.from_cases(cases)
+
+
+def load_authority_scores(conn) -> Dict[str, float]:
+    """Stored PageRank scores (legal_kg.authority); empty before the first build-graph"""
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'graph_authority'").fetchone():
+        return {}
+    return dict(conn.execute("SELECT node_id, score FROM graph_authority"))
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _int_param(params: Dict[str, str], name: str, default: int, maximum: int) -> int:
+    try:
+        value = int(params.get(name, default))
+    except ValueError:
+        raise BadRequest(f"{name} must be an integer")
+    if value < 0:
+        raise BadRequest(f"{name} must not be negative")
+    return min(value, maximum)
+
+
+def _page(params: Dict[str, str], default_limit: int = DEFAULT_LIMIT) -> Tuple[int, int]:
+    """offset/limit of a list request; streamed requests get everything from offset on"""
+    offset = _int_param(params, 'offset', 0, 10 ** 9)
+    if params.get('stream') in ('1', 'true'):
+        return offset, MAX_STREAM_ITEMS
+    return offset, _int_param(params, 'limit', default_limit, MAX_LIMIT)
+
+
+class QueryService:
+    """The queries behind the endpoints; synchronous, run in a thread pool"""
+
+    def __init__(self, db_path: Path = DB_PATH, pool_size: int = 4, cache_size: int = 4096,
+                 similarity_dir: Path = SIMILARITY_DIR):
+        self.pool = ReadPool(db_path, pool_size)
+        # Built by scripts/similarity_index.py; /related is a 404 without them
+        self.similarity = {
+            kind: SimilarityIndex.load(similarity_dir / name)
+            for kind, name in (('case', 'cases'), ('law', 'laws'))
+            if (similarity_dir / name / "index.json").exists()
+        }
+        with self.pool.connection() as conn:
+            self.graph = Graph.load(conn, cache_size=cache_size)
+            self.facet_index = load_facet_index(conn)
+            self.authority = load_authority_scores(conn)
+        self.case_text = default_case_text()
+        self.contexts = ContextBuilder(self.graph, self.case_text)
+
+    def reload_if_changed(self) -> bool:
+        """Swap in a fresh Graph (and empty cache) when the stored graph version changed"""
+        with self.pool.connection() as conn:
+            if graph_version(conn) == self.graph.version:
+                return False
+            self.graph = Graph.load(conn, cache_size=self.graph.cache_info().maxsize)
+            self.facet_index = load_facet_index(conn)
+            self.authority = load_authority_scores(conn)
+        self.contexts = ContextBuilder(self.graph, self.case_text)
+        return True
+
+    def health(self, params) -> Dict[str, Any]:
+        info = self.graph.cache_info()
+        return {
+            'graph_version': self.graph.version,
+            'nodes': len(self.graph.nodes),
+            'edges': self.graph.edge_count,
+            'neighbourhood_cache': {'hits': info.hits, 'misses': info.misses, 'size': info.currsize},
+            'context_cache': self.contexts.cache_info(),
+        }
+
+    def law(self, params, sfs: str) -> Optional[Dict[str, Any]]:
+        node = law_node(sfs)
+        if node not in self.graph:
+            return None
+        with self.pool.connection() as conn:
+            label, data = conn.execute("SELECT label, data FROM graph_nodes WHERE id = ?", (node,)).fetchone()
+        return {
+            'id': node,
+            'label': label,
+            'data': json.loads(data) if data else None,
+            'sections': len(self.graph.incoming(node, 'part_of')),
+            'citing_cases': sum(1 for n in self.graph.incoming(node, 'cites') if n.startswith('case:')),
+            'authority': self.authority.get(node),
+        }
+
+    def citing_cases(self, params, sfs: str) -> Optional[Tuple[int, int, List[Dict[str, Any]]]]:
+        node = law_node(sfs)
+        if node not in self.graph:
+            return None
+        offset, limit = _page(params)
+        sort = params.get('sort', 'date')
+        if sort not in ('date', 'authority'):
+            raise BadRequest("sort must be date or authority")
+        # Authority order is applied here, from the in-memory scores, so that sort reads every citing case
+        page = "" if sort == 'authority' else "LIMIT ? OFFSET ?"
+        with self.pool.connection() as conn:
+            rows = conn.execute(f"""
+                SELECT n.id, n.label, json_extract(n.data, '$.decision_date'), json_extract(n.data, '$.court'),
+                       json_extract(n.data, '$.summary')
+                FROM graph_edges e JOIN graph_nodes n ON n.id = e.src
+                WHERE e.dst = ? AND e.kind = 'cites' AND n.kind = 'case'
+                ORDER BY 3 DESC, n.id
+                {page}
+            """, (node, limit, offset) if page else (node,)).fetchall()
+        if sort == 'authority':
+            rows.sort(key=lambda row: -self.authority.get(row[0], 0.0))
+            rows = rows[offset:offset + limit]
+        items = [
+            {'id': node_id, 'label': label, 'decision_date': decided, 'court': court, 'summary': summary,
+             'authority': self.authority.get(node_id)}
+            for node_id, label, decided, court, summary in rows
+        ]
+        return offset, limit, items
+
+    def neighbourhood(self, params, node_id: str) -> Optional[Tuple[int, int, List[Dict[str, Any]]]]:
+        if node_id not in self.graph:
+            return None
+        k = max(_int_param(params, 'k', 1, MAX_HOPS), 1)
+        offset, limit = _page(params)
+        kind = params.get('kind')
+        nodes = self.graph.neighbourhood(node_id, k)
+        if kind:
+            nodes = [n for n in nodes if n[1] == kind]
+        items = [{'id': n, 'kind': nk, 'label': label, 'distance': d} for n, nk, label, d in nodes[offset:offset + limit]]
+        return offset, limit, items
+
+    def related(self, params, node_id: str) -> Optional[Tuple[int, int, List[Dict[str, Any]]]]:
+        kind, _, doc_id = node_id.partition(':')
+        index = self.similarity.get(kind)
+        if index is None or doc_id not in index.row_of:
+            return None
+        offset, limit = _page(params, 10)
+        hits = index.related(doc_id, min(offset + limit, MAX_LIMIT))[offset:]
+        return offset, limit, [{'id': f"{kind}:{other}", 'score': score} for other, score in hits]
+
+    def search(self, params) -> Tuple[int, int, List[Dict[str, Any]]]:
+        match = fts_query(params.get('q', ''))
+        if not match:
+            raise BadRequest("q is required")
+        offset, limit = _page(params, 20)
+        kind_filter, args = "", [match]
+        if params.get('kind'):
+            kind_filter = "AND kind = ?"
+            args.append(params['kind'])
+        with self.pool.connection() as conn:
+            rows = conn.execute(f"""
+                SELECT node_id, kind, title, snippet(graph_search, 3, '[', ']', '…', 16)
+                FROM graph_search WHERE graph_search MATCH ? {kind_filter}
+                ORDER BY bm25(graph_search) LIMIT ? OFFSET ?
+            """, args + [limit, offset]).fetchall()
+        items = [{'id': n, 'kind': k, 'label': t, 'snippet': s} for n, k, t, s in rows]
+        return offset, limit, items
+
+    def context(self, params) -> Dict[str, Any]:
+        seed = params.get('seed', '').strip()
+        if not seed:
+            raise BadRequest("seed is required")
+        budget = max(_int_param(params, 'budget', 2000, MAX_CONTEXT_BUDGET), 1)
+        with self.pool.connection() as conn:
+            return self.contexts.build(conn, seed, budget)
+
+    def facets(self, params) -> Dict[str, Any]:
+        filters = {}
+        for name in FACETS:
+            if params.get(name):
+                values = [v.strip() for v in params[name].split(',') if v.strip()]
+                filters[name] = [v == 'true' for v in values] if name == 'is_precedent' else values
+        offset, limit = _page(params)
+        result = self.facet_index.query(date_from=params.get('date_from'), date_to=params.get('date_to'), **filters)
+        return {
+            'count': result.count,
+            'counts': result.counts(top=_int_param(params, 'top', 20, MAX_LIMIT)),
+            'items': [case_node(n) for n in result.case_numbers(offset, limit)],
+            'offset': offset,
+            'limit': limit,
+        }
+
+    def close(self):
+        self.pool.close()
+
+
+ROUTES = [
+    (re.compile(r'^/health$'), 'health', False),
+    (re.compile(r'^/laws/(\d{4}:\d+)$'), 'law', False),
+    (re.compile(r'^/laws/(\d{4}:\d+)/cases$'), 'citing_cases', True),
+    (re.compile(r'^/nodes/(.+)/neighbourhood$'), 'neighbourhood', True),
+    (re.compile(r'^/nodes/(.+)/related$'), 'related', True),
+    (re.compile(r'^/search$'), 'search', True),
+    (re.compile(r'^/context$'), 'context', False),
+    (re.compile(r'^/facets$'), 'facets', False),
+]
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class QueryServer:
+    def __init__(self, service: QueryService, threads: Optional[int] = None):
+        self.service = service
+        self.executor = ThreadPoolExecutor(max_workers=threads or service.pool.size)
+
+    async def dispatch(self, method: str, target: str):
+        """Returns (status, body) where body is a dict, or (200, items) to stream"""
+        if method != "GET":
+            return 405, {'error': 'only GET is supported'}
+        parts = urlsplit(target)
+        params = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        for pattern, name, is_list in ROUTES:
+            match = pattern.match(parts.path)
+            if not match:
+                continue
+            args = [unquote(a) for a in match.groups()]
+            loop = asyncio.get_running_loop()
+            try:
+                result = await loop.run_in_executor(self.executor, getattr(self.service, name), params, *args)
+            except BadRequest as e:
+                return 400, {'error': str(e)}
+            if result is None:
+                return 404, {'error': f"{args[0] if args else parts.path} not found"}
+            if not is_list:
+                return 200, result
+            offset, limit, items = result
+            if params.get('stream') in ('1', 'true'):
+                return 200, items
+            return 200, {
+                'items': items,
+                'offset': offset,
+                'limit': limit,
+                'next_offset': offset + limit if len(items) == limit else None,
+            }
+        return 404, {'error': f"no route for {parts.path}"}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+
+                try:
+                    status, body = await self.dispatch(method, target)
+                except Exception as e:
+                    logger.warning("Error handling %s: %s", target, e)
+                    status, body = 500, {'error': str(e)}
+                if isinstance(body, list):
+                    await self._write_stream(writer, body, keep_alive)
+                else:
+                    payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                    writer.write(self._head(status, 'application/json', keep_alive, len(payload)) + payload)
+                    await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _head(self, status: int, content_type: str, keep_alive: bool, length: Optional[int] = None) -> bytes:
+        lines = [
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+            f"Content-Type: {content_type}; charset=utf-8",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+            f"Content-Length: {length}" if length is not None else "Transfer-Encoding: chunked",
+        ]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1')
+
+    async def _write_stream(self, writer, items, keep_alive: bool):
+        writer.write(self._head(200, 'application/x-ndjson', keep_alive))
+        for i in range(0, len(items), STREAM_BATCH):
+            chunk = "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in items[i:i + STREAM_BATCH]).encode('utf-8')
+            writer.write(f"{len(chunk):x}\r\n".encode('latin-1') + chunk + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def _watch_graph_version(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(RELOAD_INTERVAL_SECONDS)
+            if await loop.run_in_executor(self.executor, self.service.reload_if_changed):
+                logger.info("Reloaded graph version %s", self.service.graph.version)
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8080):
+        server = await asyncio.start_server(self.handle, host, port)
+        watcher = asyncio.create_task(self._watch_graph_version())
+        print(f"Serving graph version {self.service.graph.version} "
+              f"({len(self.service.graph.nodes)} nodes) on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+
+
+def serve(host: str = "127.0.0.1", port: int = 8080, db_path: Path = DB_PATH, pool_size: int = 4):
+    service = QueryService(db_path, pool_size=pool_size)
+    try:
+        asyncio.run(QueryServer(service).serve(host, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
@@ -0,0 +1,242 @@
+"""
+"Related cases" / "related laws" by TF-IDF cosine similarity (CPU only).
+
+Documents are tokenized with a light Swedish normalizer (lowercase,
+stopwords, suffix stripping), weighted with sublinear tf * smoothed idf,
+L2-normalized and stored as one scipy CSR matrix. Top-k for a batch of
+documents is one sparse-times-dense matrix product and a row-wise
+argpartition.
+
+    index = SimilarityIndex()
+    index.add_many((case['case_number'], case_document(case)) for case in load_case_dir())
+    index.related('B 1462-25', k=10)        # [('B 1865-25', 0.41), ...]
+    index.save(SIMILARITY_DIR / 'cases')
+    index = SimilarityIndex.load(SIMILARITY_DIR / 'cases')   # memory-mapped, no rebuild
+
+add() only tokenizes the new documents; idf and the normalized matrix are
+recomputed from the stored term counts (vectorized) on the next query.
+"""
+
+import json
+import re
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+SIMILARITY_DIR = Path(__file__).parent.parent.parent / "data" / "similarity"
+
+# Characters of full_text used per case; the summary and keywords carry most of the signal
+FULL_TEXT_CHARS = 20000
+QUERY_BATCH = 64
+DENSE_SCORE_CELLS = 1 << 24
+
+STOPWORDS = frozenset("""
+alla allt att av blev bli blir blivit de dem den denna deras dess dessa det detta dig din dina ditt du där då
+efter ej eller en er era ert ett från för ha hade han hans har henne hennes hon honom hur här i icke ingen inom
+inte jag ju kan kunde man med mellan men mig min mina mitt mot mycket ni nu när någon något några och om oss
+på samma sedan sig sin sina sitta själv skulle som så sådan sådana sådant till under upp ut utan vad var vara
+varför varit varje vars vart vem vi vid vilka vilkas vilken vilket vår våra vårt än är åt över även enligt
+""".split())
+
+# Longest first; stripped only if at least MIN_STEM characters remain
+SUFFIXES = sorted("""
+heterna hetens heten heter arnas ernas ornas andes arens andet arna erna orna ande arne aste aren ades erns
+ade are ern ens ets het ast ad an en ar er or as es at et a e s
+""".split(), key=len, reverse=True)
+MIN_STEM = 3
+
+_WORD = re.compile(r'[a-zåäöéü0-9]+')
+
+
+@lru_cache(maxsize=1 << 18)
+def stem(word: str) -> str:
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Swedish-normalized terms; numbers are kept only when long enough to mean something (years, SFS parts)"""
+    terms = []
+    for word in _WORD.findall(text.lower()):
+        if word in STOPWORDS or len(word) < 2:
+            continue
+        if word.isdigit():
+            if len(word) >= 3:
+                terms.append(word)
+            continue
+        terms.append(stem(word))
+    return terms
+
+
+def case_document(case: Dict[str, Any]) -> str:
+    keywords = " ".join(case.get('keywords') or [])
+    parts = [case.get('nickname') or '', case.get('summary') or '', keywords, keywords,
+             (case.get('full_text') or '')[:FULL_TEXT_CHARS]]
+    return "\n".join(parts)
+
+
+def law_document(law: Dict[str, Any]) -> str:
+    return law.get('title') or ''
+
+
+class SimilarityIndex:
+    def __init__(self):
+        self.ids: List[str] = []
+        self.row_of: Dict[str, int] = {}
+        self.vocabulary: Dict[str, int] = {}
+        # Raw term counts, one row per document; grows by vstack on add
+        self.counts = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self._pending: List[Dict[int, int]] = []
+        self._matrix: Optional[sparse.csr_matrix] = None
+        self._idf: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _term_counts(self, text: str, grow: bool) -> Dict[int, int]:
+        counts: Dict[int, int] = {}
+        vocabulary = self.vocabulary
+        for term, n in Counter(tokenize(text)).items():
+            col = vocabulary.get(term)
+            if col is None:
+                if not grow:
+                    continue
+                col = vocabulary[term] = len(vocabulary)
+            counts[col] = n
+        return counts
+
+    def add(self, doc_id: str, text: str):
+        if doc_id in self.row_of:
+            raise ValueError(f"Document already indexed: {doc_id}")
+        self.row_of[doc_id] = len(self.ids)
+        self.ids.append(doc_id)
+        self._pending.append(self._term_counts(text, grow=True))
+        self._matrix = None
+
+    def add_many(self, docs: Iterable[Tuple[str, str]]) -> int:
+        count = 0
+        for doc_id, text in docs:
+            self.add(doc_id, text)
+            count += 1
+        return count
+
+    def _flush(self):
+        """Append pending documents to the count matrix"""
+        if not self._pending:
+            return
+        indptr = np.zeros(len(self._pending) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(doc) for doc in self._pending])
+        indices = np.fromiter((col for doc in self._pending for col in doc), dtype=np.int32, count=indptr[-1])
+        data = np.fromiter((n for doc in self._pending for n in doc.values()), dtype=np.float32, count=indptr[-1])
+        new = sparse.csr_matrix((data, indices, indptr), shape=(len(self._pending), len(self.vocabulary)))
+        old = self.counts
+        old.resize((old.shape[0], len(self.vocabulary)))
+        self.counts = sparse.vstack([old, new], format='csr')
+        self._pending = []
+
+    @property
+    def matrix(self) -> sparse.csr_matrix:
+        """L2-normalized tf-idf rows"""
+        if self._matrix is None:
+            self._flush()
+            counts = self.counts
+            df = np.bincount(counts.indices, minlength=counts.shape[1])
+            self._idf = (np.log((1 + counts.shape[0]) / (1 + df)) + 1).astype(np.float32)
+            weighted = counts.copy()
+            weighted.data = (1 + np.log(weighted.data)) * self._idf[weighted.indices]
+            norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+            norms[norms == 0] = 1
+            weighted.data /= np.repeat(norms, np.diff(weighted.indptr)).astype(np.float32)
+            self._matrix = weighted
+        return self._matrix
+
+    def vectorize(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        """Normalized vectors for texts outside the index (unknown terms are dropped)"""
+        matrix = self.matrix
+        rows = [self._term_counts(text, grow=False) for text in texts]
+        indptr = np.concatenate([[0], np.cumsum([len(r) for r in rows])])
+        indices = np.array([c for r in rows for c in r], dtype=np.int32)
+        data = np.array([n for r in rows for n in r.values()], dtype=np.float32)
+        data = (1 + np.log(data)) * self._idf[indices] if len(data) else data
+        vectors = sparse.csr_matrix((data, indices, indptr), shape=(len(texts), matrix.shape[1]))
+        norms = np.sqrt(np.asarray(vectors.multiply(vectors).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sparse.csr_matrix(sparse.diags(1 / norms) @ vectors)
+
+    def top_k(self, vectors: sparse.csr_matrix, k: int = 10, exclude: Optional[Sequence[int]] = None
+              ) -> List[List[Tuple[str, float]]]:
+        """Best k documents per query vector, by cosine similarity"""
+        matrix = self.matrix
+        n_docs = matrix.shape[0]
+        k = min(k, n_docs)
+        if k <= 0:
+            return [[] for _ in range(vectors.shape[0])]
+        # Sparse corpus times a dense block of queries; the score block stays under DENSE_SCORE_CELLS
+        batch = max(1, min(QUERY_BATCH, DENSE_SCORE_CELLS // max(n_docs, matrix.shape[1])))
+        results = []
+        for start in range(0, vectors.shape[0], batch):
+            block = vectors[start:start + batch]
+            scores = np.ascontiguousarray((matrix @ block.T.toarray()).T)
+            if exclude is not None:
+                scores[np.arange(block.shape[0]), exclude[start:start + block.shape[0]]] = -1
+            best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            values = np.take_along_axis(scores, best, axis=1)
+            order = np.argsort(-values, axis=1, kind='stable')
+            best, values = np.take_along_axis(best, order, axis=1), np.take_along_axis(values, order, axis=1)
+            for cols, row in zip(best, values):
+                results.append([(self.ids[c], round(float(v), 4)) for c, v in zip(cols, row) if v > 0])
+        return results
+
+    def related_batch(self, doc_ids: Sequence[str], k: int = 10) -> List[List[Tuple[str, float]]]:
+        rows = [self.row_of[doc_id] for doc_id in doc_ids]
+        return self.top_k(self.matrix[rows], k, exclude=rows)
+
+    def related(self, doc_id: str, k: int = 10) -> List[Tuple[str, float]]:
+        return self.related_batch([doc_id], k)[0]
+
+    def search(self, text: str, k: int = 10) -> List[Tuple[str, float]]:
+        return self.top_k(self.vectorize([text]), k)[0]
+
+    def nbytes(self) -> int:
+        matrix = self.matrix
+        return sum(m.data.nbytes + m.indices.nbytes + m.indptr.nbytes for m in (matrix, self.counts))
+
+    def save(self, path: Path):
+        """Counts and normalized matrix as .npy arrays, ids and vocabulary as JSON"""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        matrix = self.matrix
+        for name, m in (('counts', self.counts), ('tfidf', matrix)):
+            np.save(path / f"{name}_data.npy", m.data)
+            np.save(path / f"{name}_indices.npy", m.indices)
+            np.save(path / f"{name}_indptr.npy", m.indptr)
+        np.save(path / "idf.npy", self._idf)
+        with open(path / "index.json", "w", encoding="utf-8") as f:
+            json.dump({'ids': self.ids, 'vocabulary': self.vocabulary}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = True) -> "SimilarityIndex":
+        path = Path(path)
+        mode = 'r' if mmap else None
+        with open(path / "index.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        index = cls()
+        index.ids = meta['ids']
+        index.row_of = {doc_id: row for row, doc_id in enumerate(index.ids)}
+        index.vocabulary = meta['vocabulary']
+        shape = (len(index.ids), len(index.vocabulary))
+
+        def matrix(name):
+            arrays = [np.load(path / f"{name}_{part}.npy", mmap_mode=mode) for part in ('data', 'indices', 'indptr')]
+            return sparse.csr_matrix(tuple(arrays), shape=shape, copy=False)
+
+        index.counts = matrix('counts')
+        index._matrix = matrix('tfidf')
+        index._idf = np.load(path / "idf.npy", mmap_mode=mode)
+        return index
@@ -0,0 +1,241 @@
+"""
+Law discovery from lagboken's sitemaps.
+
+Walking topic pages means following pagination heuristics and guessing law
+URLs from titles. The sitemaps list every law page with its lastmod, so
+discovery can read them instead:
+
+    discovery = SitemapDiscovery(conn, fetch=http_chunks(session))
+    stats = discovery.discover()                 # SITEMAP_URL, or a sitemap index/urlset URL
+    for law in stats['changed']:                 # new laws and laws whose lastmod moved
+        ...                                      # {'reference': '1977:480', 'url': ..., 'lastmod': ...}
+    url = resolve_law_url(conn, '1977:480')      # None if the sitemaps never listed it
+
+The XML is parsed incrementally (XMLPullParser fed the response chunk by
+chunk, gzipped or not) and each <url> is dropped once read, so a sitemap of
+any size is read in constant memory. A child sitemap whose lastmod in the
+index has not changed since the last run is not fetched at all.
+
+Tables:
+    sitemap_files   url, lastmod of each child sitemap when it was last read
+    law_urls        reference (SFS number) -> url, lastmod
+"""
+
+import re
+import zlib
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+from xml.etree.ElementTree import XMLPullParser
+
+from .metrics import METRICS, get_logger
+
+logger = get_logger("sitemap")
+
+SITEMAP_URL = "https://www.lagboken.se/sitemap.xml"
+CHUNK_SIZE = 65536
+
+Event = Tuple[str, Dict[str, Optional[str]]]
+Fetch = Callable[[str], Iterable[bytes]]
+
+_GZIP_MAGIC = b"\x1f\x8b"
+# A law document is the last path segment: d_<id>-<slug with its own SFS number as yyyy_nnn>
+_LAW_SEGMENT = re.compile(r'^d_\d+-.*?(?<!\d)(\d{4})_(\d+)(?!\d)')
+
+
+def init_sitemap_tables(conn):
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sitemap_files (
+            url TEXT PRIMARY KEY,
+            lastmod TEXT,
+            read_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS law_urls (
+            reference TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            lastmod TEXT,
+            seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.commit()
+
+
+def law_reference_from_url(url: str) -> Optional[str]:
+    """SFS number of a lagboken law page URL ('.../d_1564-semesterlag-1977_480' -> '1977:480'), else None"""
+    segments = [s for s in urlparse(url).path.split("/") if s]
+    if not segments or segments[0] != "lagboken":
+        return None
+    match = _LAW_SEGMENT.match(segments[-1])
+    return f"{match.group(1)}:{int(match.group(2))}" if match else None
+
+
+def normalize_lastmod(value: Optional[str]) -> Optional[str]:
+    """W3C datetime (date, or date and time with any offset) as a comparable UTC ISO string; None if unreadable"""
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _changed(old: Optional[Tuple[str, Optional[str]]], url: str, lastmod: Optional[str]) -> bool:
+    if old is None:
+        return True
+    old_url, old_lastmod = old
+    if lastmod and old_lastmod and lastmod > old_lastmod:
+        return True
+    # Without a lastmod to compare there is no telling whether the page changed;
+    # the same law listed under another topic keeps the URL already resolved
+    return old_url == url and (not lastmod or not old_lastmod)
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def iter_sitemap(chunks: Iterable[bytes]) -> Iterator[Event]:
+    """
+    Events of a sitemap read incrementally: ("url", {"loc", "lastmod"}) for a
+    urlset, ("sitemap", {"loc", "lastmod"}) for a sitemap index. Gzipped
+    sitemaps (.xml.gz) are recognised by their magic bytes.
+    """
+    parser = XMLPullParser(events=("start", "end"))
+    inflate = None
+    first = True
+    root = None
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if first:
+            first = False
+            if chunk[:2] == _GZIP_MAGIC:
+                inflate = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        parser.feed(inflate.decompress(chunk) if inflate else chunk)
+        root = yield from _drain(parser, root)
+    if inflate:
+        parser.feed(inflate.flush())
+    parser.close()
+    yield from _drain(parser, root)
+
+
+def _drain(parser: XMLPullParser, root):
+    for event, element in parser.read_events():
+        if event == "start":
+            if root is None:
+                root = element
+            continue
+        kind = _local(element.tag)
+        if kind in ("url", "sitemap"):
+            entry = {"loc": None, "lastmod": None}
+            for child in element:
+                name = _local(child.tag)
+                if name in entry:
+                    entry[name] = (child.text or "").strip() or None
+            entry["lastmod"] = normalize_lastmod(entry["lastmod"])
+            if entry["loc"]:
+                yield kind, entry
+            # Read entries are dropped from the tree, which otherwise grows with the file
+            root.clear()
+    return root
+
+
+def http_chunks(session, chunk_size: int = CHUNK_SIZE) -> Fetch:
+    """fetch() over a requests-like session, streaming the body"""
+    def fetch(url: str) -> Iterator[bytes]:
+        response = session.get(url, timeout=60, stream=True)
+        response.raise_for_status()
+        with response:
+            yield from response.iter_content(chunk_size=chunk_size)
+    return fetch
+
+
+def load_law_urls(conn) -> Dict[str, str]:
+    """reference -> url of every law the sitemaps listed ({} before the first discovery)"""
+    init_sitemap_tables(conn)
+    return dict(conn.execute("SELECT reference, url FROM law_urls"))
+
+
+def resolve_law_url(conn, reference: str) -> Optional[str]:
+    init_sitemap_tables(conn)
+    row = conn.execute("SELECT url FROM law_urls WHERE reference = ?", (reference,)).fetchone()
+    return row[0] if row else None
+
+
+class SitemapDiscovery:
+    def __init__(self, conn, fetch: Fetch):
+        self.conn = conn
+        self.fetch = fetch
+        init_sitemap_tables(conn)
+
+    def discover(self, url: str = SITEMAP_URL, force: bool = False) -> Dict[str, Any]:
+        """
+        Read the sitemap (index) at url and update law_urls. With force, child
+        sitemaps are read even when their lastmod did not change. Returns counts
+        and 'changed': the laws that are new or whose lastmod moved. A child
+        sitemap that fails to download is reported in 'failed' and read again
+        next time; a failing root raises.
+        """
+        stats: Dict[str, Any] = {'sitemaps_read': 0, 'sitemaps_skipped': 0, 'urls': 0, 'laws': 0,
+                                 'unchanged': 0, 'changed': {}, 'failed': []}
+        known = {ref: (law_url, lastmod) for ref, law_url, lastmod in
+                 self.conn.execute("SELECT reference, url, lastmod FROM law_urls")}
+        read = dict(self.conn.execute("SELECT url, lastmod FROM sitemap_files"))
+        pending = deque([(url, None)])
+        while pending:
+            sitemap_url, sitemap_lastmod = pending.popleft()
+            try:
+                children = self._read(sitemap_url, known, stats)
+            except Exception as e:
+                if sitemap_url == url:
+                    raise
+                logger.warning("Sitemap %s failed: %s", sitemap_url, e)
+                METRICS.inc('sitemap_failures_total')
+                stats['failed'].append(sitemap_url)
+                self.conn.commit()
+                continue
+            for child in children:
+                if not force and child['lastmod'] and read.get(child['loc']) == child['lastmod']:
+                    stats['sitemaps_skipped'] += 1
+                    continue
+                pending.append((child['loc'], child['lastmod']))
+            if sitemap_url != url:
+                self.conn.execute("INSERT OR REPLACE INTO sitemap_files (url, lastmod) VALUES (?, ?)",
+                                  (sitemap_url, sitemap_lastmod))
+            self.conn.commit()
+        stats['changed'] = list(stats['changed'].values())
+        METRICS.inc('sitemap_urls_total', stats['urls'])
+        METRICS.inc('sitemap_laws_changed_total', len(stats['changed']))
+        return stats
+
+    def _read(self, sitemap_url: str, known: Dict[str, Tuple[str, Optional[str]]],
+              stats: Dict[str, Any]) -> List[Dict[str, Optional[str]]]:
+        children = []
+        stats['sitemaps_read'] += 1
+        with METRICS.timer('parse_seconds', extractor='sitemap'):
+            for kind, entry in iter_sitemap(self.fetch(sitemap_url)):
+                if kind == "sitemap":
+                    children.append(entry)
+                    continue
+                stats['urls'] += 1
+                reference = law_reference_from_url(entry['loc'])
+                if reference is None:
+                    continue
+                stats['laws'] += 1
+                if not _changed(known.get(reference), entry['loc'], entry['lastmod']):
+                    stats['unchanged'] += 1
+                    continue
+                known[reference] = (entry['loc'], entry['lastmod'])
+                self.conn.execute("""
+                    INSERT OR REPLACE INTO law_urls (reference, url, lastmod, seen_at)
+                    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                """, (reference, entry['loc'], entry['lastmod']))
+                stats['changed'][reference] = {'reference': reference, 'url': entry['loc'], 'lastmod': entry['lastmod']}
+        return children
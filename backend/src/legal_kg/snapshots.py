@@ -0,0 +1,258 @@
+"""
+Content-addressed snapshot store for scraped data (cases, PDFs, law JSON).
+
+Layout of a store directory:
+
+    objects/ab/abcdef...   one blob per unique file content (sha256)
+    snapshots/<name>.json  manifest per run: relative path -> hash, size, mtime
+
+Scrapers write through the store with write() and adopt(): a file whose
+content is unchanged is left alone (same mtime, no write), and new content is
+stored as a blob once. Taking a snapshot after the run then only writes blobs
+that are not already in the store, and files whose size and mtime match the
+previous snapshot are not even re-read, so a rescrape costs I/O in proportion
+to what changed. Checking out a snapshot copies the blobs: the working tree is
+written to in place by the scrapers and must not share inodes with the store.
+
+Blobs are stored before any manifest refers to them, so gc() only collects
+unreferenced blobs that have not been written or reused for GC_GRACE_SECONDS:
+a run in progress keeps its blobs fresh until its snapshot is taken.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+DEFAULT_STORE_DIR = Path(__file__).parent.parent.parent / "data" / "snapshots"
+
+CHUNK_SIZE = 1024 * 1024
+# Unreferenced blobs younger than this are kept by gc(): a run may still be writing them
+GC_GRACE_SECONDS = 7 * 24 * 3600
+
+
+def hash_file(path: Path) -> str:
+    """sha256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _tmp_path(path: Path) -> Path:
+    # Per process, so workers writing the same blob do not share a temp file
+    return path.with_name(f"{path.name}.{os.getpid()}.tmp")
+
+
+def _holds(path: Path, size: int, digest: str) -> bool:
+    """Whether path exists with this content"""
+    return path.is_file() and path.stat().st_size == size and hash_file(path) == digest
+
+
+class SnapshotStore:
+    def __init__(self, root: Path = DEFAULT_STORE_DIR):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.snapshots_dir = self.root / "snapshots"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.snapshots_dir.mkdir(parents=True, exist_ok=True)
+
+    # Objects
+
+    def object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest
+
+    def has_object(self, digest: str) -> bool:
+        return self.object_path(digest).exists()
+
+    def _reuse(self, target: Path) -> bool:
+        """Whether the blob is already stored; if so, mark it as in use for gc()"""
+        try:
+            os.utime(target)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def put_file(self, path: Path, digest: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Add a file to the store. Returns its hash and how many bytes were written
+        (0 if the content was already stored).
+        """
+        digest = digest or hash_file(path)
+        target = self.object_path(digest)
+        if self._reuse(target):
+            return {"hash": digest, "written": 0}
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = _tmp_path(target)
+        shutil.copyfile(path, tmp)
+        os.chmod(tmp, 0o444)
+        tmp.replace(target)
+        return {"hash": digest, "written": target.stat().st_size}
+
+    def put_bytes(self, data: bytes) -> str:
+        """Add raw bytes to the store and return the hash"""
+        digest = hashlib.sha256(data).hexdigest()
+        target = self.object_path(digest)
+        if not self._reuse(target):
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp = _tmp_path(target)
+            tmp.write_bytes(data)
+            os.chmod(tmp, 0o444)
+            tmp.replace(target)
+        return digest
+
+    # Writing the working tree
+
+    def write(self, path: Path, data: bytes) -> bool:
+        """
+        Store data and write it to path, unless path already holds it.
+        Returns whether the file was written.
+        """
+        path = Path(path)
+        digest = self.put_bytes(data)
+        if _holds(path, len(data), digest):
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = _tmp_path(path)
+        tmp.write_bytes(data)
+        tmp.replace(path)
+        return True
+
+    def adopt(self, tmp: Path, path: Path) -> bool:
+        """
+        Store a freshly written file (a download) and move it to path, unless
+        path already holds the same content. Returns whether path was replaced.
+        """
+        tmp, path = Path(tmp), Path(path)
+        digest = self.put_file(tmp)["hash"]
+        if _holds(path, tmp.stat().st_size, digest):
+            tmp.unlink()
+            return False
+        tmp.replace(path)
+        return True
+
+    # Snapshots
+
+    def list_snapshots(self) -> List[str]:
+        """Snapshot names, oldest first by their manifest's created_at"""
+        created = {p.stem: self.load_manifest(p.stem)["created_at"] for p in self.snapshots_dir.glob("*.json")}
+        return sorted(created, key=lambda name: (created[name], name))
+
+    def load_manifest(self, name: str) -> Dict[str, Any]:
+        with open(self.snapshots_dir / f"{name}.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def take_snapshot(self, source_dir: Path, name: Optional[str] = None, parent: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Snapshot every file under source_dir.
+
+        parent defaults to the latest snapshot of the same source directory;
+        files whose size and mtime are unchanged since the parent are
+        referenced by their old hash without being read.
+        """
+        source_dir = Path(source_dir).resolve()
+        name = name or datetime.now().strftime("%Y%m%d_%H%M%S")
+        if (self.snapshots_dir / f"{name}.json").exists():
+            raise ValueError(f"Snapshot already exists: {name}")
+
+        if parent is None:
+            same_source = [n for n in self.list_snapshots() if self.load_manifest(n)["source"] == str(source_dir)]
+            parent = same_source[-1] if same_source else None
+        previous = self.load_manifest(parent)["files"] if parent else {}
+
+        files = {}
+        stats = {"files": 0, "hashed": 0, "new_objects": 0, "bytes_written": 0}
+        for path in sorted(p for p in source_dir.rglob("*") if p.is_file()):
+            rel = path.relative_to(source_dir).as_posix()
+            st = path.stat()
+            entry = {"size": st.st_size, "mtime": st.st_mtime_ns}
+
+            old = previous.get(rel)
+            if old and old["size"] == entry["size"] and old["mtime"] == entry["mtime"] and self.has_object(old["hash"]):
+                entry["hash"] = old["hash"]
+            else:
+                result = self.put_file(path)
+                entry["hash"] = result["hash"]
+                stats["hashed"] += 1
+                if result["written"]:
+                    stats["new_objects"] += 1
+                    stats["bytes_written"] += result["written"]
+            files[rel] = entry
+            stats["files"] += 1
+
+        manifest = {
+            "name": name,
+            "created_at": datetime.now().isoformat(),
+            "source": str(source_dir),
+            "parent": parent,
+            "files": files,
+        }
+        tmp = self.snapshots_dir / f"{name}.json.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        tmp.replace(self.snapshots_dir / f"{name}.json")
+
+        stats["name"] = name
+        stats["parent"] = parent
+        return stats
+
+    def diff(self, old_name: str, new_name: str) -> Dict[str, List[str]]:
+        """Paths added, removed and changed between two snapshots"""
+        old_files = self.load_manifest(old_name)["files"]
+        new_files = self.load_manifest(new_name)["files"]
+        return {
+            "added": sorted(p for p in new_files if p not in old_files),
+            "removed": sorted(p for p in old_files if p not in new_files),
+            "changed": sorted(
+                p for p in new_files
+                if p in old_files and new_files[p]["hash"] != old_files[p]["hash"]
+            ),
+        }
+
+    def checkout(self, name: str, dest_dir: Path) -> int:
+        """
+        Materialize a snapshot in dest_dir. Objects are copied, not hardlinked,
+        so writing to a checked-out file cannot change the stored blob.
+        """
+        dest_dir = Path(dest_dir)
+        files = self.load_manifest(name)["files"]
+        for rel, entry in files.items():
+            target = dest_dir / rel
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp = _tmp_path(target)
+            shutil.copyfile(self.object_path(entry["hash"]), tmp)
+            tmp.replace(target)
+        return len(files)
+
+    def _objects(self) -> List[Path]:
+        # Not the temp files of a blob still being written
+        return [p for p in self.objects_dir.glob("*/*") if not p.name.endswith(".tmp")]
+
+    def gc(self, grace_seconds: float = GC_GRACE_SECONDS) -> int:
+        """
+        Delete objects that no snapshot references and that have not been
+        stored or reused for grace_seconds. Returns the number removed.
+        """
+        cutoff = time.time() - grace_seconds
+        referenced = set()
+        for name in self.list_snapshots():
+            referenced.update(e["hash"] for e in self.load_manifest(name)["files"].values())
+        removed = 0
+        for path in self._objects():
+            try:
+                if path.name in referenced or path.stat().st_mtime > cutoff:
+                    continue
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            removed += 1
+        return removed
+
+    def disk_usage(self) -> int:
+        """Bytes used by stored objects"""
+        return sum(p.stat().st_size for p in self._objects())
@@ -0,0 +1,424 @@
+"""
+Synthetic corpora with the statistical shape of the scraped one, for scale
+and load tests of the loaders, indexes and query paths.
+
+    profile = CorpusProfile.from_corpus()            # cases/ and the scraped law files
+    corpus = SyntheticCorpus(profile, cases=1_000_000, laws=50_000, seed=0)
+    for case in corpus.cases(with_text=False): ...   # dicts as in cases/<nr>/<nr>.json
+    for law in corpus.laws(): ...                    # dicts as the law scrapers write them
+
+The profile is measured from the corpus: case number prefixes, courts, case
+types, precedent and nickname rates, keywords and legal areas (the values
+and how many per case), references per case and the references themselves,
+publications per case, decision years, summary and full-text lengths, and
+word frequencies of the texts. The law files rarely carry §-sections, so
+the section shape falls back to DEFAULT_LAW_SHAPE when none of them do.
+
+Scaling up, laws and keywords are drawn with Zipf-like popularity: the real
+ones, most used first, hold the top ranks and generated ones fill the tail.
+Citations of a real law reuse its observed references half of the time;
+the rest cite a § within the law's generated size.
+
+Generation is deterministic for a seed and is done in blocks of BLOCK
+records with their own random streams, so cases(start, stop) yields exactly
+that slice of the full run and ranges can be generated in parallel. Texts
+come from a separate stream: with_text=False gives the same records minus
+full_text.
+"""
+
+import json
+import random
+import re
+import uuid
+from bisect import bisect
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from itertools import accumulate
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .casepack import CASES_DIR, load_case_dir
+from .citations import Citation, parse_citation
+from .models import TopicTable
+from .sections import law_sfs
+
+BLOCK = 1000
+MAX_WORDS = 20000
+LAW_ZIPF = 1.1
+KEYWORD_ZIPF = 1.0
+# One distinct keyword per this many cases once the real ones run out
+CASES_PER_KEYWORD = 25
+TOPICS = 30
+
+# Rough shape of Swedish statutes, used when the law files have no sections
+DEFAULT_LAW_SHAPE = {
+    'sections_per_law': [2, 3, 4, 5, 6, 8, 10, 12, 15, 18, 22, 28, 35, 45, 60, 80, 120, 200],
+    'section_lengths': [100, 150, 200, 250, 300, 350, 450, 600, 800, 1200],
+    'chaptered_rate': 0.3,
+    'important_laws_per_law': [[0, 1], [5, 1]],
+}
+
+_WORD = re.compile(r'[^\W\d_]{2,}')
+_CASE_PREFIX = re.compile(r'^(.*?)\s*\d')
+
+
+def _citable(reference: str) -> bool:
+    # References the generator can cite again: a statute with an SFS number
+    citation = parse_citation(reference)
+    return bool(citation and citation.sfs)
+
+
+def _pairs(counter: Counter) -> List[List[Any]]:
+    return [[value, count] for value, count in counter.most_common()]
+
+
+@dataclass
+class CorpusProfile:
+    """Empirical distributions of a corpus; counts are [value, count] pairs, most common first"""
+    cases: int = 0
+    case_prefixes: List[List[Any]] = field(default_factory=lambda: [["B", 1]])
+    courts: List[List[Any]] = field(default_factory=lambda: [[["Högsta domstolen", "HDO"], 1]])
+    types: List[List[Any]] = field(default_factory=lambda: [["DOM_ELLER_BESLUT", 1]])
+    precedent_rate: float = 0.5
+    nickname_rate: float = 0.5
+    keywords: List[List[Any]] = field(default_factory=list)
+    keywords_per_case: List[List[Any]] = field(default_factory=lambda: [[0, 1]])
+    legal_areas: List[List[Any]] = field(default_factory=list)
+    areas_per_case: List[List[Any]] = field(default_factory=lambda: [[0, 1]])
+    references_per_case: List[List[Any]] = field(default_factory=lambda: [[1, 1]])
+    references: List[List[Any]] = field(default_factory=list)
+    publications: List[List[Any]] = field(default_factory=list)
+    publications_per_case: List[List[Any]] = field(default_factory=lambda: [[0, 1]])
+    decision_years: List[List[Any]] = field(default_factory=lambda: [["2025", 1]])
+    summary_lengths: List[int] = field(default_factory=lambda: [240])
+    text_lengths: List[int] = field(default_factory=lambda: [7000])
+    words: List[List[Any]] = field(default_factory=lambda: [["och", 1]])
+    laws: List[str] = field(default_factory=list)
+    sections_per_law: List[int] = field(default_factory=lambda: list(DEFAULT_LAW_SHAPE['sections_per_law']))
+    section_lengths: List[int] = field(default_factory=lambda: list(DEFAULT_LAW_SHAPE['section_lengths']))
+    chaptered_rate: float = DEFAULT_LAW_SHAPE['chaptered_rate']
+    important_laws_per_law: List[List[Any]] = field(
+        default_factory=lambda: [list(p) for p in DEFAULT_LAW_SHAPE['important_laws_per_law']])
+
+    @classmethod
+    def from_corpus(cls, cases: Optional[Iterable[Dict[str, Any]]] = None,
+                    laws: Optional[Iterable[Dict[str, Any]]] = None) -> "CorpusProfile":
+        """Measure cases (default: cases/) and laws (default: the scrapers' law files)"""
+        if laws is None:
+            from .graph import iter_law_files
+            laws = iter_law_files()
+        counters = {name: Counter() for name in (
+            'case_prefixes', 'courts', 'types', 'keywords', 'keywords_per_case', 'legal_areas', 'areas_per_case',
+            'references_per_case', 'references', 'publications', 'publications_per_case', 'decision_years',
+            'words', 'important_laws_per_law')}
+        n = precedents = nicknames = 0
+        summary_lengths, text_lengths = [], []
+        for case in (cases if cases is not None else load_case_dir(CASES_DIR)):
+            n += 1
+            precedents += bool(case.get('is_precedent'))
+            nicknames += bool(case.get('nickname'))
+            prefix = _CASE_PREFIX.match(case.get('case_number') or '')
+            counters['case_prefixes'][prefix.group(1) if prefix else 'B'] += 1
+            counters['courts'][(case.get('court') or '', case.get('court_code') or '')] += 1
+            counters['types'][case.get('type') or ''] += 1
+            counters['keywords'].update(case.get('keywords') or [])
+            counters['keywords_per_case'][len(case.get('keywords') or [])] += 1
+            counters['legal_areas'].update(case.get('legal_areas') or [])
+            counters['areas_per_case'][len(case.get('legal_areas') or [])] += 1
+            references = [r for r in case.get('legal_references') or [] if r.get('reference')]
+            counters['references_per_case'][len(references)] += 1
+            counters['references'].update(r['reference'].strip() for r in references if _citable(r['reference']))
+            counters['publications'].update(case.get('referenced_publications') or [])
+            counters['publications_per_case'][len(case.get('referenced_publications') or [])] += 1
+            counters['decision_years'][(case.get('decision_date') or '2025')[:4]] += 1
+            summary_lengths.append(len(case.get('summary') or ''))
+            if case.get('full_text'):
+                text_lengths.append(len(case['full_text']))
+            counters['words'].update(_WORD.findall(case.get('summary') or ''))
+            counters['words'].update(_WORD.findall(case.get('full_text') or ''))
+
+        law_numbers, sections_per_law, section_lengths, chaptered = [], [], [], 0
+        for law in laws:
+            sfs = law_sfs(law)
+            if sfs and sfs not in law_numbers:
+                law_numbers.append(sfs)
+            counters['important_laws_per_law'][len(law.get('important_laws') or [])
+                                               if isinstance(law.get('important_laws'), list) else 0] += 1
+            sections = law.get('sections') or []
+            if sections:
+                sections_per_law.append(len(sections))
+                section_lengths.extend(len(s.get('text') or '') for s in sections)
+                chaptered += any(s.get('chapter') for s in sections)
+
+        profile = cls(cases=n, laws=law_numbers,
+                      precedent_rate=precedents / n if n else cls.precedent_rate,
+                      nickname_rate=nicknames / n if n else cls.nickname_rate)
+        for name, counter in counters.items():
+            if name == 'words':
+                counter = Counter(dict(counter.most_common(MAX_WORDS)))
+            if counter:
+                pairs = _pairs(counter)
+                if name == 'courts':
+                    pairs = [[list(value), count] for value, count in pairs]
+                setattr(profile, name, pairs)
+        if summary_lengths:
+            profile.summary_lengths = sorted(summary_lengths)
+        if text_lengths:
+            profile.text_lengths = sorted(text_lengths)
+        if sections_per_law:
+            profile.sections_per_law = sorted(sections_per_law)
+            profile.section_lengths = sorted(section_lengths)
+            profile.chaptered_rate = chaptered / len(sections_per_law)
+        return profile
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CorpusProfile":
+        return cls(**data)
+
+    def save(self, path: Path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=1)
+
+    @classmethod
+    def load(cls, path: Path) -> "CorpusProfile":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+class _Weighted:
+    """Weighted choice: bisect over cumulative weights"""
+
+    def __init__(self, values: List[Any], weights: Iterable[float]):
+        self.values = values
+        self.cumulative = list(accumulate(weights))
+
+    @classmethod
+    def from_pairs(cls, pairs: List[List[Any]]) -> "_Weighted":
+        return cls([value for value, _ in pairs], [count for _, count in pairs])
+
+    @classmethod
+    def zipf(cls, values: List[Any], s: float) -> "_Weighted":
+        return cls(values, (1.0 / rank ** s for rank in range(1, len(values) + 1)))
+
+    def __call__(self, rng: random.Random):
+        return self.values[bisect(self.cumulative, rng.random() * self.cumulative[-1])]
+
+    def sample(self, rng: random.Random, k: int) -> List[Any]:
+        return rng.choices(self.values, cum_weights=self.cumulative, k=k)
+
+
+def _length(rng: random.Random, lengths: List[int]) -> int:
+    # An observed length, jittered so a small corpus does not repeat the same few values
+    return max(1, int(rng.choice(lengths) * rng.uniform(0.7, 1.3)))
+
+
+class SyntheticCorpus:
+    def __init__(self, profile: CorpusProfile, cases: int = 100000, laws: int = 5000, seed: int = 0):
+        self.profile = profile
+        self.n_cases = cases
+        self.n_laws = laws
+        self.seed = seed
+
+        self._words = _Weighted.from_pairs(profile.words)
+        # Names of generated laws and keywords: lower-case words, not the short function words
+        content = [[w, c] for w, c in profile.words if len(w) >= 6 and w.islower()] or profile.words
+        self._content = _Weighted.from_pairs(content)
+        average = sum(len(w) * c for w, c in profile.words) / sum(c for _, c in profile.words)
+        self._chars_per_word = average + 1
+        self._prefixes = _Weighted.from_pairs(profile.case_prefixes)
+        self._courts = _Weighted.from_pairs(profile.courts)
+        self._types = _Weighted.from_pairs(profile.types)
+        self._areas = _Weighted.from_pairs(profile.legal_areas) if profile.legal_areas else None
+        self._keyword_counts = _Weighted.from_pairs(profile.keywords_per_case)
+        self._area_counts = _Weighted.from_pairs(profile.areas_per_case)
+        self._reference_counts = _Weighted.from_pairs(profile.references_per_case)
+        self._publication_counts = _Weighted.from_pairs(profile.publications_per_case)
+        self._publications = _Weighted.from_pairs(profile.publications) if profile.publications else None
+        self._years = _Weighted.from_pairs(profile.decision_years)
+        self._important_counts = _Weighted.from_pairs(profile.important_laws_per_law)
+
+        rng = random.Random(f"{seed}:tables")
+        self._build_law_table(rng)
+        self._build_keywords()
+        # The laws' topic_id indexes this table, as in the topic scraper's output
+        self.topics = TopicTable()
+        for t in range(TOPICS):
+            self.topics.intern(f"https://www.lagboken.se/lagboken/start/amne-{t}/",
+                               {'title': " och ".join(self._content.sample(rng, 2)).capitalize(),
+                                'description': self.text(rng, 240)})
+
+    # Tables shared by every block
+
+    def _build_law_table(self, rng: random.Random):
+        """SFS number, statute name, size and chapters of every law, most cited first"""
+        cited: Dict[str, List[List[Any]]] = {}
+        names: Dict[str, str] = {}
+        for reference, count in self.profile.references:
+            citation = parse_citation(reference)
+            cited.setdefault(citation.sfs, []).append([reference, count])
+            if citation.statute and citation.sfs not in names:
+                names[citation.sfs] = citation.statute
+        order = sorted(cited, key=lambda sfs: -sum(c for _, c in cited[sfs]))
+        order += [sfs for sfs in self.profile.laws if sfs not in cited]
+        self._cited = {sfs: _Weighted.from_pairs(pairs) for sfs, pairs in cited.items()}
+
+        self.law_table = []
+        used = set()
+        for rank in range(self.n_laws):
+            if rank < len(order):
+                sfs = order[rank]
+                statute = names.get(sfs) or "lagen"
+            else:
+                # Numbers from 3000 up are not taken in any year yet
+                sfs = f"{1900 + rank % 126}:{3000 + rank // 126}"
+                statute = f"lagen om {' och '.join(self._content.sample(rng, 2))}"
+            if sfs in used:
+                continue
+            used.add(sfs)
+            sections = _length(rng, self.profile.sections_per_law)
+            chapters = max(1, sections // 12) if rng.random() < self.profile.chaptered_rate else 0
+            self.law_table.append((sfs, statute, sections, chapters))
+        self._law_ranks = _Weighted.zipf(list(range(len(self.law_table))), LAW_ZIPF)
+
+    def _build_keywords(self):
+        real = [keyword for keyword, _ in self.profile.keywords]
+        size = max(len(real), self.n_cases // CASES_PER_KEYWORD, 1)
+        self._real_keywords = real
+        self._keyword_ranks = _Weighted.zipf(list(range(size)), KEYWORD_ZIPF)
+
+    def keyword(self, rank: int) -> str:
+        """Keyword at a popularity rank: the real ones first, then word pairs"""
+        if rank < len(self._real_keywords):
+            return self._real_keywords[rank]
+        words = self._content.values
+        rank -= len(self._real_keywords)
+        return f"{words[rank % len(words)].capitalize()} {words[(rank // len(words) + 1) % len(words)]}"
+
+    def text(self, rng: random.Random, length: int) -> str:
+        """About length characters of words drawn by their corpus frequency"""
+        words = self._words.sample(rng, max(1, int(length / self._chars_per_word)))
+        sentences = [" ".join(words[i:i + 14]).capitalize() + "." for i in range(0, len(words), 14)]
+        return " ".join(sentences)
+
+    def reference(self, rng: random.Random) -> Dict[str, str]:
+        sfs, statute, sections, chapters = self.law_table[self._law_ranks(rng)]
+        if sfs in self._cited and rng.random() < 0.5:
+            return {'reference': self._cited[sfs](rng), 'sfs_number': sfs}
+        chapter = str(rng.randint(1, chapters)) if chapters else None
+        section = str(rng.randint(1, 20 if chapters else sections))
+        return {'reference': Citation(sfs, statute, chapter, section).normalized(), 'sfs_number': sfs}
+
+    # Records
+
+    def _blocks(self, stream: str, total: int, start: int, stop: Optional[int]):
+        stop = total if stop is None else min(stop, total)
+        for block in range(start // BLOCK, (stop + BLOCK - 1) // BLOCK):
+            rng = random.Random(f"{self.seed}:{stream}:{block}")
+            text_rng = random.Random(f"{self.seed}:{stream}-text:{block}")
+            for i in range(block * BLOCK, min((block + 1) * BLOCK, total)):
+                yield i, rng, text_rng, start <= i < stop
+
+    def cases(self, start: int = 0, stop: Optional[int] = None, with_text: bool = True) -> Iterator[Dict[str, Any]]:
+        """Cases start..stop-1, shaped like the scraper's cases/<nr>/<nr>.json"""
+        for i, rng, text_rng, wanted in self._blocks("cases", self.n_cases, start, stop):
+            case = self._case(i, rng)
+            # The text stream is drawn for every case, so skipping it does not shift the others
+            length = _length(text_rng, self.profile.text_lengths)
+            if wanted:
+                if with_text:
+                    case['full_text'] = self.text(text_rng, length)
+                yield case
+
+    def _case(self, i: int, rng: random.Random) -> Dict[str, Any]:
+        court, court_code = self._courts(rng)
+        year = self._years(rng)
+        case_number = f"{self._prefixes(rng)} {i + 1}-{int(year) % 100:02d}"
+        decision_date = f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        keywords = {self.keyword(self._keyword_ranks(rng)) for _ in range(self._keyword_counts(rng))}
+        areas = {self._areas(rng) for _ in range(self._area_counts(rng))} if self._areas else set()
+        references = {}
+        for _ in range(self._reference_counts(rng)):
+            ref = self.reference(rng)
+            references.setdefault(ref['reference'], ref)
+        publications = []
+        for _ in range(self._publication_counts(rng)):
+            if self._publications and rng.random() < 0.5:
+                publications.append(self._publications(rng))
+            else:
+                publications.append(f"NJA {rng.randint(1950, int(year))} s. {rng.randint(1, 1200)}")
+        case_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        return {
+            'case_number': case_number,
+            'nickname': f"”{self.text(rng, 16).rstrip('.')}”" if rng.random() < self.profile.nickname_rate else "",
+            'summary': self.text(rng, _length(rng, self.profile.summary_lengths)),
+            'decision_date': decision_date,
+            'publication_time': f"{decision_date}T08:45:00",
+            'case_id': case_id,
+            'type': self._types(rng),
+            'is_precedent': rng.random() < self.profile.precedent_rate,
+            'court': court,
+            'court_code': court_code,
+            'keywords': sorted(keywords),
+            'legal_areas': sorted(areas),
+            'legal_references': list(references.values()),
+            'referenced_publications': sorted(set(publications)),
+            'pdf_documents': [{'filename': f"{case_number}.pdf", 'file_id': case_id}],
+            'case_url': f"https://rattspraxis.etjanst.domstol.se/sok/publicering/{case_id}",
+            'correlation_number': case_id,
+        }
+
+    def laws(self, start: int = 0, stop: Optional[int] = None, with_sections: bool = True) -> Iterator[Dict[str, Any]]:
+        """Laws start..stop-1 as LawRecord dicts, with a topic_id into self.topics"""
+        for i, rng, text_rng, wanted in self._blocks("laws", len(self.law_table), start, stop):
+            law = self._law(i, rng)
+            sections = self._sections(i, text_rng)
+            if wanted:
+                if with_sections:
+                    law['sections'] = sections
+                yield law
+
+    def _law(self, i: int, rng: random.Random) -> Dict[str, Any]:
+        sfs, statute, _, _ = self.law_table[i]
+        name, om, subject = statute.partition(" om ")
+        title = f"{'Lag' if name == 'lagen' else name.capitalize()} ({sfs})" + (f" om {subject}" if om else "")
+        topic = rng.choice(self.topics.topics)
+        slug = re.sub(r'[^a-z0-9]+', '-', title.lower()).strip('-')
+        year = int(sfs.split(':')[0])
+        important = []
+        for _ in range(self._important_counts(rng)):
+            other, other_name, _, _ = self.law_table[self._law_ranks(rng)]
+            important.append({'title': other_name.capitalize(), 'reference': other,
+                              'url': f"https://www.lagboken.se/lagboken/start/lag-{other.replace(':', '')}"})
+        return {
+            'reference': sfs,
+            'url': f"{topic.url}{slug}/d_{i + 1}-{slug}",
+            'scraped_at': f"2025-07-01T12:{i % 60:02d}:00",
+            'title': title,
+            'description': self.text(rng, 200),
+            'metadata': {
+                'Utfärdad': f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                'Ikraftträdandedatum': f"{year + 1}-01-01",
+                'SFS nr': sfs,
+                'Departement': "Justitiedepartementet L5",
+                'Ändring införd': f"t.o.m. SFS {rng.randint(max(year, 1990), 2025)}:{rng.randint(1, 1500)}",
+            },
+            'important_laws': important,
+            'topic_id': topic.id,
+        }
+
+    def _sections(self, i: int, rng: random.Random) -> List[Dict[str, Any]]:
+        _, _, count, chapters = self.law_table[i]
+        sections = []
+        for n in range(count):
+            chapter = str(n * chapters // count + 1) if chapters else None
+            sections.append({
+                'chapter': chapter,
+                'chapter_title': f"Kapitel {chapter}" if chapter else None,
+                'paragraph': str(n + 1),
+                'heading': self.text(rng, 30).rstrip('.') if rng.random() < 0.3 else None,
+                'text': self.text(rng, _length(rng, self.profile.section_lengths)),
+            })
+        return sections
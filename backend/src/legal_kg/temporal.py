@@ -0,0 +1,284 @@
+"""
+Versioned law store: every version of a law and of each of its sections,
+with the interval [valid_from, valid_to) in which it was in force.
+
+    store = TemporalLawStore(conn)
+    store.record_law(law_data)                   # after a (re)scrape; a new version only when something changed
+    store.law_as_of('1977:480', '2015-06-01')    # the law with the sections in force that day
+    store.section_as_of('1977:480/4§', '2015-06-01')
+    store.version_for_case(case)                 # {sfs: version in force on the case's decision_date}
+
+Section texts are stored once per content hash (section_texts), so a
+section that did not change across versions takes no extra space, and its
+version row is carried over rather than copied: a new law version only
+writes rows for the sections that were added, changed or repealed.
+
+Intervals are half-open ISO dates; valid_to is NULL for the version in force
+now. The primary keys (sfs, valid_from) and (section_id, valid_from) are the
+interval index: "in force on D" is a B-tree seek to the last version that
+started on or before D, i.e. O(log n).
+
+Lagboken only shows the consolidated text ('Ändring införd: t.o.m. SFS
+2023:325'), so the first version of a law is dated from its
+Ikraftträdandedatum and stands in for the versions before it; later
+versions are dated from when the change was scraped unless the caller
+knows better (record_version(valid_from=...)).
+"""
+
+import re
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from .citations import SFS_NUMBER
+from .sections import content_hash, law_sfs, section_id
+
+_DATE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+
+def init_temporal_tables(conn):
+    """Create the versioned law tables if they do not exist"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS section_texts (
+            content_hash TEXT PRIMARY KEY,
+            heading TEXT,
+            text TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS law_versions (
+            sfs TEXT NOT NULL,
+            valid_from TEXT NOT NULL,
+            valid_to TEXT,
+            amended_by TEXT,
+            PRIMARY KEY (sfs, valid_from)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS section_versions (
+            section_id TEXT NOT NULL,
+            valid_from TEXT NOT NULL,
+            valid_to TEXT,
+            sfs TEXT NOT NULL,
+            chapter TEXT,
+            chapter_title TEXT,
+            paragraph TEXT NOT NULL,
+            position INTEGER,
+            content_hash TEXT NOT NULL,
+            PRIMARY KEY (section_id, valid_from)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_section_versions_sfs ON section_versions (sfs, valid_from)")
+    conn.commit()
+
+
+def as_day(value) -> str:
+    """'YYYY-MM-DD' of a date, datetime or ISO string ('2024-03-01T12:00:00' -> '2024-03-01')"""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    match = _DATE.search(value or '')
+    if not match:
+        raise ValueError(f"Not a date: {value!r}")
+    return date.fromisoformat(match.group(0)).isoformat()
+
+
+def amended_by(metadata: Dict[str, str]) -> Optional[str]:
+    """SFS number of the latest amendment in the text ('t.o.m. SFS 2023:325' -> '2023:325')"""
+    for key in ('Ändring införd', 'Ändrad'):
+        numbers = SFS_NUMBER.findall(metadata.get(key) or '')
+        if numbers:
+            return numbers[-1]
+    return None
+
+
+def in_force_from(metadata: Dict[str, str]) -> Optional[str]:
+    """Day the law entered into force: Ikraftträdandedatum, else Utfärdad"""
+    for key in ('Ikraftträdandedatum', 'Utfärdad'):
+        if _DATE.search(metadata.get(key) or ''):
+            return as_day(metadata[key])
+    return None
+
+
+class TemporalLawStore:
+    def __init__(self, conn):
+        self.conn = conn
+        init_temporal_tables(conn)
+
+    def current(self, sfs: str) -> Optional[Dict[str, Any]]:
+        """The latest recorded version of a law (without sections)"""
+        row = self.conn.execute(
+            "SELECT valid_from, valid_to, amended_by FROM law_versions WHERE sfs = ? "
+            "ORDER BY valid_from DESC LIMIT 1", (sfs,)
+        ).fetchone()
+        return self._version(sfs, row)
+
+    def versions(self, sfs: str) -> List[Dict[str, Any]]:
+        rows = self.conn.execute(
+            "SELECT valid_from, valid_to, amended_by FROM law_versions WHERE sfs = ? ORDER BY valid_from", (sfs,)
+        )
+        return [self._version(sfs, row) for row in rows]
+
+    @staticmethod
+    def _version(sfs: str, row) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        return {'sfs': sfs, 'valid_from': row[0], 'valid_to': row[1], 'amended_by': row[2]}
+
+    def record_law(self, law_data: Dict[str, Any], observed=None) -> Dict[str, Any]:
+        """
+        Record a scraped law as its newest version. The first version is dated
+        from when the law entered into force, later ones from when they were
+        observed (the scrape's date unless given).
+        """
+        sfs = law_sfs(law_data)
+        if not sfs:
+            raise ValueError(f"No SFS number for law {law_data.get('title')!r}")
+        metadata = law_data.get('metadata') or {}
+        if self.current(sfs) is None and in_force_from(metadata):
+            valid_from = in_force_from(metadata)
+        else:
+            valid_from = as_day(observed or law_data.get('scraped_at') or date.today())
+        return self.record_version(sfs, law_data.get('sections') or [], valid_from, amended_by(metadata))
+
+    def record_version(self, sfs: str, sections: Iterable[Dict[str, Any]], valid_from,
+                       amended_by: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Store the sections of a law as the version in force from valid_from.
+        Unchanged sections keep their open interval; changed, added and
+        repealed ones close the old interval at valid_from. Nothing is written
+        when neither the sections nor amended_by changed.
+        """
+        valid_from = as_day(valid_from)
+        latest = self.current(sfs)
+        open_rows = {
+            sid: (digest, chapter_title, position)
+            for sid, digest, chapter_title, position in self.conn.execute(
+                "SELECT section_id, content_hash, chapter_title, position FROM section_versions "
+                "WHERE sfs = ? AND valid_to IS NULL", (sfs,)
+            )
+        }
+        stats = {'sfs': sfs, 'valid_from': valid_from, 'added': 0, 'changed': 0, 'unchanged': 0, 'repealed': 0}
+        rows, moved, texts, seen = [], [], {}, set()
+        for position, section in enumerate(sections):
+            sid = section_id(sfs, section.get('chapter'), section['paragraph'])
+            # Same numbering as SectionSync: repealed and future versions of a § side by side
+            base, n = sid, 2
+            while sid in seen:
+                sid = f"{base}~{n}"
+                n += 1
+            seen.add(sid)
+            digest = content_hash(section)
+            old = open_rows.get(sid)
+            if old and old[:2] == (digest, section.get('chapter_title')):
+                stats['unchanged'] += 1
+                if old[2] != position:
+                    # Only the order moved (a § inserted before it): not a new version of the section
+                    moved.append((position, sid))
+                continue
+            stats['changed' if old else 'added'] += 1
+            texts[digest] = (digest, section.get('heading'), section.get('text'))
+            rows.append((sid, valid_from, sfs, section.get('chapter'), section.get('chapter_title'),
+                         section['paragraph'], position, digest))
+        gone = [sid for sid in open_rows if sid not in seen]
+        stats['repealed'] = len(gone)
+
+        if latest and not rows and not gone and latest['amended_by'] == amended_by:
+            stats['valid_from'] = latest['valid_from']
+            return stats
+        if latest and valid_from < latest['valid_from']:
+            raise ValueError(f"{sfs}: version from {valid_from} is older than the latest ({latest['valid_from']})")
+
+        self.conn.executemany("UPDATE section_versions SET position = ? WHERE section_id = ? AND valid_to IS NULL",
+                              moved)
+        self._close("section_versions", "section_id", [r[0] for r in rows if r[0] in open_rows] + gone, valid_from)
+        self._close("law_versions", "sfs", [sfs], valid_from)
+        self.conn.executemany("INSERT OR IGNORE INTO section_texts (content_hash, heading, text) VALUES (?, ?, ?)",
+                              texts.values())
+        self.conn.executemany("""
+            INSERT INTO section_versions
+            (section_id, valid_from, sfs, chapter, chapter_title, paragraph, position, content_hash)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        self.conn.execute("INSERT INTO law_versions (sfs, valid_from, amended_by) VALUES (?, ?, ?)",
+                          (sfs, valid_from, amended_by))
+        self.conn.commit()
+        return stats
+
+    def _close(self, table: str, key: str, ids: List[str], valid_to: str):
+        # A version that would end the day it started was superseded the same day: drop it
+        self.conn.executemany(f"DELETE FROM {table} WHERE {key} = ? AND valid_from = ? AND valid_to IS NULL",
+                              [(i, valid_to) for i in ids])
+        self.conn.executemany(f"UPDATE {table} SET valid_to = ? WHERE {key} = ? AND valid_to IS NULL",
+                              [(valid_to, i) for i in ids])
+
+    def repeal(self, sfs: str, valid_to) -> bool:
+        """Close a law and all its sections: nothing of it is in force from valid_to"""
+        latest = self.current(sfs)
+        if latest is None or latest['valid_to'] is not None:
+            return False
+        valid_to = as_day(valid_to)
+        open_ids = [sid for sid, in self.conn.execute(
+            "SELECT section_id FROM section_versions WHERE sfs = ? AND valid_to IS NULL", (sfs,))]
+        self._close("section_versions", "section_id", open_ids, valid_to)
+        self._close("law_versions", "sfs", [sfs], valid_to)
+        self.conn.commit()
+        return True
+
+    def version_as_of(self, sfs: str, day) -> Optional[Dict[str, Any]]:
+        """The version of a law in force on a day (without sections), or None"""
+        day = as_day(day)
+        row = self.conn.execute(
+            "SELECT valid_from, valid_to, amended_by FROM law_versions WHERE sfs = ? AND valid_from <= ? "
+            "ORDER BY valid_from DESC LIMIT 1", (sfs, day)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= day):
+            return None
+        return self._version(sfs, row)
+
+    def law_as_of(self, sfs: str, day) -> Optional[Dict[str, Any]]:
+        """The version of a law in force on a day with its sections in order, or None"""
+        version = self.version_as_of(sfs, day)
+        if version is None:
+            return None
+        day = as_day(day)
+        rows = self.conn.execute("""
+            SELECT v.section_id, v.chapter, v.chapter_title, v.paragraph, t.heading, t.text, v.content_hash
+            FROM section_versions v JOIN section_texts t ON t.content_hash = v.content_hash
+            WHERE v.sfs = ? AND v.valid_from <= ? AND (v.valid_to IS NULL OR v.valid_to > ?)
+            ORDER BY v.position
+        """, (sfs, day, day))
+        version['sections'] = [
+            dict(zip(('id', 'chapter', 'chapter_title', 'paragraph', 'heading', 'text', 'content_hash'), row))
+            for row in rows
+        ]
+        return version
+
+    def section_as_of(self, sid: str, day) -> Optional[Dict[str, Any]]:
+        """One section as it read on a day, or None if it was not in force"""
+        day = as_day(day)
+        row = self.conn.execute("""
+            SELECT v.valid_from, v.valid_to, v.sfs, v.chapter, v.chapter_title, v.paragraph, t.heading, t.text
+            FROM section_versions v JOIN section_texts t ON t.content_hash = v.content_hash
+            WHERE v.section_id = ? AND v.valid_from <= ?
+            ORDER BY v.valid_from DESC LIMIT 1
+        """, (sid, day)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= day):
+            return None
+        return {'id': sid, **dict(zip(('valid_from', 'valid_to', 'sfs', 'chapter', 'chapter_title', 'paragraph',
+                                       'heading', 'text'), row))}
+
+    def version_for_case(self, case: Dict[str, Any], sfs: Optional[str] = None) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        The version of each law a case cites (or just of sfs) that was in
+        force on the case's decision_date. None for a law with no version then.
+        """
+        if not case.get('decision_date'):
+            raise ValueError(f"Case {case.get('case_number')} has no decision_date")
+        if sfs:
+            cited = [sfs]
+        else:
+            cited = list(dict.fromkeys(
+                ref['sfs_number'] for ref in case.get('legal_references') or [] if ref.get('sfs_number')
+            ))
+        return {number: self.version_as_of(number, case['decision_date']) for number in cited}
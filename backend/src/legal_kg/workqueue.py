@@ -0,0 +1,287 @@
+"""
+SQLite work queue with visibility-timeout leases.
+
+Any number of worker processes on one machine pull items with lease(),
+process them and ack() or fail() them. A leased item is invisible to other
+workers until its lease expires, so the work of a worker that dies is handed
+out again once `lease_seconds` have passed.
+
+The database runs in WAL mode, whose shared-memory index needs every process
+on the same host: do not put the queue file on a network filesystem.
+
+    queue = WorkQueue()
+    queue.enqueue('law', url)
+    for item in queue.lease('worker-1', kinds=['law']):
+        ...
+        queue.ack(item['id'], 'worker-1', result)
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .metrics import METRICS, get_logger
+
+logger = get_logger("workqueue")
+
+DEFAULT_QUEUE_PATH = Path(__file__).parent.parent.parent / "data" / "workqueue.db"
+DEFAULT_LEASE_SECONDS = 300.0
+DEFAULT_MAX_ATTEMPTS = 5
+RETRY_DELAY_SECONDS = 30.0
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+def worker_name(index: int = 0) -> str:
+    """Unique name of a worker: host, pid and index"""
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+class WorkQueue:
+    def __init__(self, path: Path = DEFAULT_QUEUE_PATH, timeout: float = 30.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode; writes take the lock with BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(str(self.path), timeout=timeout, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_tables()
+
+    def _init_tables(self):
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS work_items (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                payload TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                priority INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL DEFAULT 5,
+                not_before REAL NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                last_error TEXT,
+                result TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                UNIQUE (kind, key)
+            )
+        """)
+        self.conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_work_items_ready
+            ON work_items (status, kind, priority, not_before)
+        """)
+
+    def _write(self, fn):
+        """Run fn(conn) in one write transaction"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(self.conn)
+            self.conn.execute("COMMIT")
+            return result
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    # Producing
+
+    def enqueue(self, kind: str, key: str, payload: Any = None, priority: int = 0,
+                max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> bool:
+        """Add an item. Returns False if (kind, key) is already queued."""
+        return self.enqueue_many(kind, [(key, payload)], priority, max_attempts) == 1
+
+    def enqueue_many(self, kind: str, items: Iterable[Tuple[str, Any]], priority: int = 0,
+                     max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> int:
+        """Add (key, payload) pairs, skipping keys already queued. Returns the number added."""
+        now = time.time()
+        rows = [
+            (kind, key, json.dumps(payload, ensure_ascii=False) if payload is not None else None,
+             priority, max_attempts, now, now)
+            for key, payload in items
+        ]
+
+        def insert(conn):
+            before = conn.total_changes
+            conn.executemany("""
+                INSERT OR IGNORE INTO work_items (kind, key, payload, priority, max_attempts, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            return conn.total_changes - before
+        return self._write(insert)
+
+    # Consuming
+
+    def lease(self, worker: str, kinds: Optional[List[str]] = None, batch: int = 1,
+              lease_seconds: float = DEFAULT_LEASE_SECONDS) -> List[Dict[str, Any]]:
+        """
+        Lease up to `batch` ready items: pending ones whose not_before has passed
+        and leased ones whose lease has expired. Highest priority, oldest first.
+        """
+        now = time.time()
+        kind_filter = ""
+        params: List[Any] = [now, now]
+        if kinds:
+            kind_filter = f"AND kind IN ({','.join('?' * len(kinds))})"
+            params.extend(kinds)
+        params.append(batch)
+
+        def take(conn):
+            # Items whose workers keep dying are not handed out forever
+            conn.execute("""
+                UPDATE work_items SET status = 'failed', last_error = 'lease expired', lease_owner = NULL,
+                    lease_expires = NULL, updated_at = ?
+                WHERE status = 'leased' AND lease_expires <= ? AND attempts >= max_attempts
+            """, (now, now))
+            rows = conn.execute(f"""
+                SELECT id, kind, key, payload, attempts FROM work_items
+                WHERE ((status = 'pending' AND not_before <= ?) OR (status = 'leased' AND lease_expires <= ?))
+                {kind_filter}
+                ORDER BY priority DESC, id
+                LIMIT ?
+            """, params).fetchall()
+            conn.executemany("""
+                UPDATE work_items SET status = 'leased', lease_owner = ?, lease_expires = ?,
+                    attempts = attempts + 1, updated_at = ?
+                WHERE id = ?
+            """, [(worker, now + lease_seconds, now, row[0]) for row in rows])
+            return rows
+        rows = self._write(take)
+        return [
+            {
+                'id': item_id,
+                'kind': kind,
+                'key': key,
+                'payload': json.loads(payload) if payload is not None else None,
+                'attempt': attempts + 1,
+            }
+            for item_id, kind, key, payload, attempts in rows
+        ]
+
+    def extend(self, item_id: int, worker: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        """Keep a long-running item leased. False if the lease was lost."""
+        now = time.time()
+        return self._write(lambda conn: conn.execute("""
+            UPDATE work_items SET lease_expires = ?, updated_at = ?
+            WHERE id = ? AND status = 'leased' AND lease_owner = ?
+        """, (now + lease_seconds, now, item_id, worker)).rowcount) == 1
+
+    def ack(self, item_id: int, worker: str, result: Any = None) -> bool:
+        """
+        Mark an item done. False if the lease expired and another worker took
+        the item over (the result is then dropped).
+        """
+        now = time.time()
+        encoded = json.dumps(result, ensure_ascii=False) if result is not None else None
+        return self._write(lambda conn: conn.execute("""
+            UPDATE work_items SET status = 'done', result = ?, lease_owner = NULL,
+                lease_expires = NULL, last_error = NULL, updated_at = ?
+            WHERE id = ? AND status = 'leased' AND lease_owner = ?
+        """, (encoded, now, item_id, worker)).rowcount) == 1
+
+    def fail(self, item_id: int, worker: str, error: str, retry_delay: float = RETRY_DELAY_SECONDS) -> bool:
+        """
+        Give an item back after an error. It is retried after retry_delay * attempts
+        seconds, or marked failed once it has used up its attempts.
+        """
+        now = time.time()
+        return self._write(lambda conn: conn.execute("""
+            UPDATE work_items SET
+                status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END,
+                not_before = ? + ? * attempts,
+                lease_owner = NULL, lease_expires = NULL, last_error = ?, updated_at = ?
+            WHERE id = ? AND status = 'leased' AND lease_owner = ?
+        """, (now, retry_delay, error, now, item_id, worker)).rowcount) == 1
+
+    # Maintenance
+
+    def requeue_failed(self, kind: Optional[str] = None) -> int:
+        """Give failed items a fresh set of attempts"""
+        now = time.time()
+        query = "UPDATE work_items SET status = 'pending', attempts = 0, not_before = 0, updated_at = ? WHERE status = 'failed'"
+        params: List[Any] = [now]
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        return self._write(lambda conn: conn.execute(query, params).rowcount)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Item counts per kind and status; expired leases count as pending"""
+        now = time.time()
+        rows = self.conn.execute("""
+            SELECT kind,
+                   CASE WHEN status = 'leased' AND lease_expires <= ? THEN 'pending' ELSE status END,
+                   COUNT(*)
+            FROM work_items GROUP BY 1, 2
+        """, (now,)).fetchall()
+        stats: Dict[str, Dict[str, int]] = {}
+        for kind, status, count in rows:
+            counts = stats.setdefault(kind, {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0})
+            counts[status] += count
+        for kind, counts in stats.items():
+            for status, count in counts.items():
+                METRICS.set('queue_depth', count, kind=kind, status=status)
+        return stats
+
+    def is_drained(self, kinds: Optional[List[str]] = None) -> bool:
+        """True when no item of these kinds is pending or leased"""
+        return all(
+            counts[PENDING] == 0 and counts[LEASED] == 0
+            for kind, counts in self.stats().items()
+            if not kinds or kind in kinds
+        )
+
+    def results(self, kind: str) -> Iterable[Tuple[str, Any]]:
+        """(key, result) of the done items of a kind"""
+        for key, result in self.conn.execute(
+            "SELECT key, result FROM work_items WHERE kind = ? AND status = 'done' ORDER BY id", (kind,)
+        ):
+            yield key, json.loads(result) if result is not None else None
+
+    def close(self):
+        self.conn.close()
+
+
+def run_worker(path: Path, handlers: Dict[str, Any], index: int = 0, kinds: Optional[List[str]] = None,
+               batch: int = 1, lease_seconds: float = DEFAULT_LEASE_SECONDS, poll_seconds: float = 0.5,
+               exit_when_drained: bool = True) -> Dict[str, int]:
+    """
+    Worker loop: lease items, run handlers[item['kind']](item, queue) and ack the
+    returned result, or fail the item if the handler raises. Handlers may enqueue
+    follow-up work. Returns done/failed counts.
+    """
+    queue = WorkQueue(path)
+    worker = worker_name(index)
+    kinds = kinds or list(handlers)
+    counts = {'done': 0, 'failed': 0}
+    try:
+        while True:
+            items = queue.lease(worker, kinds=kinds, batch=batch, lease_seconds=lease_seconds)
+            if not items:
+                if exit_when_drained and queue.is_drained(kinds):
+                    break
+                time.sleep(poll_seconds)
+                continue
+            for item in items:
+                try:
+                    with METRICS.timer('queue_item_seconds', kind=item['kind']):
+                        result = handlers[item['kind']](item, queue)
+                except Exception as e:
+                    logger.warning("[%s] %s %s failed (attempt %d): %s", worker, item['kind'], item['key'], item['attempt'], e)
+                    queue.fail(item['id'], worker, str(e))
+                    METRICS.inc('queue_items_total', kind=item['kind'], outcome='failed')
+                    counts['failed'] += 1
+                else:
+                    queue.ack(item['id'], worker, result)
+                    METRICS.inc('queue_items_total', kind=item['kind'], outcome='done')
+                    counts['done'] += 1
+    finally:
+        queue.close()
+    return counts
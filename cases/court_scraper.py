@@ -1,11 +1,25 @@
-import requests
+import argparse
 import json
+import logging
 import os
 import urllib.parse
 from selenium import webdriver
 from selenium.webdriver.common.by import By
+import sys
 import time
 import math
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "backend" / "src"))
+from legal_kg.database import get_connection
+from legal_kg.dedup import DedupIndex, case_text
+from legal_kg.httpclient import ResilientSession
+from legal_kg.metrics import METRICS, get_logger
+from legal_kg.models import CaseRecord
+from legal_kg.profiling import PROFILER, profiling
+from legal_kg.snapshots import SnapshotStore
+
+logger = get_logger("court_scraper")
 
 API_URL = "https://rattspraxis.etjanst.domstol.se/api/v1/sok"
 
@@ -19,23 +33,65 @@ HEADERS = {
 CASES_PER_PAGE = 50
 NUM_PAGES = 3
 
-all_cases = []
+# Decision-date filter of the search API, used by the partitioned harvest
+# (legal_kg.harvest checks that it narrows the totals)
+DATE_FILTER_KEY = "avgorandedatumIntervall"
+DATE_FROM_KEY = "fromDatum"
+DATE_TO_KEY = "tomDatum"
+# Keys the API may report the number of hits under
+TOTAL_KEYS = ("total", "totalAntal", "antalTraffar")
+
+CASES_DIR = 'cases'
+
+failed_downloads = []
+
+# Retries, Retry-After and pacing for the API and the PDF downloads
+http = ResilientSession()
 
-os.makedirs('cases', exist_ok=True)
+# Case JSONs and PDFs are written through the snapshot store: unchanged files
+# are not rewritten, and each run ends with a snapshot of cases/
+_snapshots = None
+
+
+def snapshot_store():
+    global _snapshots
+    if _snapshots is None:
+        _snapshots = SnapshotStore()
+    return _snapshots
+
+# Near-duplicate index over saved cases, opened on first use
+dedup_index = None
+
+def find_duplicate(case):
+    """The already saved case this one near-duplicates (legal_kg.dedup), or None"""
+    global dedup_index
+    if dedup_index is None:
+        dedup_index = DedupIndex(get_connection(), 'case')
+    return dedup_index.check(case['case_number'], case_text(case))
 
 def download_pdf_bilagor(fillagringId, dest_path):
     url_encoded_id = urllib.parse.quote(fillagringId, safe='')
     pdf_url = f"https://rattspraxis.etjanst.domstol.se/api/v1/bilagor/{url_encoded_id}"
+    part_path = dest_path + '.part'
     try:
-        r = requests.get(pdf_url, stream=True)
-        r.raise_for_status()
-        with open(dest_path, 'wb') as f:
-            for chunk in r.iter_content(chunk_size=8192):
-                f.write(chunk)
-        print(f"Downloaded PDF: {dest_path}")
+        size = 0
+        with METRICS.timer('pdf_download_seconds'):
+            r = http.get(pdf_url, stream=True, timeout=60)
+            r.raise_for_status()
+            with r, open(part_path, 'wb') as f:
+                for chunk in r.iter_content(chunk_size=8192):
+                    f.write(chunk)
+                    size += len(chunk)
+        METRICS.observe('pdf_download_bytes', size)
+        snapshot_store().adopt(part_path, dest_path)
+        logger.debug("Downloaded PDF: %s", dest_path)
         return True
     except Exception as e:
-        print(f"Failed to download {pdf_url}: {e}")
+        logger.warning("Failed to download %s: %s", pdf_url, e)
+        METRICS.inc('pdf_download_failures_total')
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        failed_downloads.append({"file_id": fillagringId, "dest_path": dest_path, "error": str(e)})
         return False
 
 def get_case_full_text_selenium(case_url):
@@ -59,29 +115,21 @@ def get_case_full_text_selenium(case_url):
                 show_more.click()
                 button_clicked = True
             except Exception:
-                print("No 'Visa mer innehåll' button found.")
+                logger.debug("No 'Visa mer innehåll' button found.")
         if button_clicked:
-            print("'Visa mer innehåll' button clicked, waiting for content to expand...")
+            logger.debug("'Visa mer innehåll' button clicked, waiting for content to expand...")
             time.sleep(4)
-        # Print all divs' text lengths for debug
-        divs = driver.find_elements(By.TAG_NAME, 'div')
-        for i, div in enumerate(divs):
-            text = div.text.strip()
-            print(f"DEBUG: div[{i}] text length: {len(text)}")
-        # Now extract the largest div's text as before
-        main_text = ''
-        max_len = 0
-        for div in divs:
-            text = div.text.strip()
-            if len(text) > max_len:
-                main_text = text
-                max_len = len(text)
-        if "Laserpekaren" in main_text:
-            print("DEBUG: Extracted text for Laserpekaren IV:")
-            print(main_text)
+        # The largest div holds the decision; each .text is a round trip to the browser, so read it once
+        with METRICS.timer('parse_seconds', extractor='case_full_text'):
+            texts = [div.text.strip() for div in driver.find_elements(By.TAG_NAME, 'div')]
+            main_text = max(texts, key=len, default='')
+        if logger.isEnabledFor(logging.DEBUG):
+            for i, text in enumerate(texts):
+                logger.debug("div[%d] text length: %d", i, len(text))
+        logger.debug("%s: %d characters from %d divs", case_url, len(main_text), len(texts))
         return main_text
     except Exception as e:
-        print(f"Failed to get full text from {case_url}: {e}")
+        logger.warning("Failed to get full text from %s: %s", case_url, e)
         return ""
     finally:
         driver.quit()
@@ -89,93 +137,164 @@ def get_case_full_text_selenium(case_url):
 def process_case(case, case_dir, pdf_dir):
     # Get full text from public page
     if case['case_url']:
-        case['full_text'] = get_case_full_text_selenium(case['case_url'])
+        with PROFILER.stage('full_text'):
+            case['full_text'] = get_case_full_text_selenium(case['case_url'])
     else:
         case['full_text'] = ""
-    # Save individual case JSON
-    with open(os.path.join(case_dir, f"{case['case_number']}.json"), 'w', encoding='utf-8') as f:
-        json.dump(case, f, ensure_ascii=False, indent=2)
-    print(f"Saving case {case['case_number']} with full_text length: {len(case['full_text'])}")
+    # Duplicates are saved with a pointer to the original, without their PDFs
+    with PROFILER.stage('dedup'):
+        duplicate = find_duplicate(case)
+    if duplicate:
+        case['duplicate_of'] = duplicate.original
+        logger.info("%s duplicates %s (similarity %.2f), skipping its PDFs",
+                    case['case_number'], duplicate.original, duplicate.similarity)
+    # Save individual case JSON (left untouched when it has not changed)
+    snapshot_store().write(os.path.join(case_dir, f"{case['case_number']}.json"),
+                           json.dumps(case, ensure_ascii=False, indent=2).encode('utf-8'))
+    logger.debug("Saving case %s with full_text length: %d", case['case_number'], len(case['full_text']))
+    METRICS.inc('cases_saved_total', duplicate='yes' if duplicate else 'no')
+    if duplicate:
+        return
     # Download PDFs
     for pdf in case['pdf_documents']:
         fillagringId = pdf['file_id']
         filename = pdf['filename'] or fillagringId.replace('/', '_')
         dest_path = os.path.join(pdf_dir, filename)
-        download_pdf_bilagor(fillagringId, dest_path)
+        with PROFILER.stage('pdfs'):
+            download_pdf_bilagor(fillagringId, dest_path)
 
 
-for page in range(NUM_PAGES):
+def search_payload(page, court_codes=("HDO",), per_page=CASES_PER_PAGE, date_from=None, date_to=None):
     payload = {
-        "antalPerSida": CASES_PER_PAGE,
+        "antalPerSida": per_page,
         "asc": False,
         "filter": {
-            "domstolKodLista": ["HDO"],
+            "domstolKodLista": list(court_codes),
             
         },
         "sidIndex": page,
         "sokfras": {"andLista": [], "notLista": [], "orLista": []},
         "sortorder": "avgorandedatum"
     }
-    response = requests.post(API_URL, headers=HEADERS, json=payload)
-    response.raise_for_status()
-    data = response.json()
-    if page == 0:
-        print("First page API response (truncated):", json.dumps(data, ensure_ascii=False)[:1000])
-    for item in data.get("publiceringLista", []):
-        case_id = item.get("id", "")
-        case_number = item.get("malNummerLista", [""])[0] if item.get("malNummerLista") else ""
-        if not case_number:
-            continue
-        nickname = item.get("benamning", "")
-        summary = item.get("sammanfattning", "") or item.get("rubrik", "") or ""
-        decision_date = item.get("avgorandedatum", "")
-        publication_time = item.get("publiceringstid", "")
-        case_type = item.get("typ", "")
-        is_precedent = item.get("arVagledande", False)
-        court = item.get("domstol", {}).get("domstolNamn", "")
-        court_code = item.get("domstol", {}).get("domstolKod", "")
-        keywords = item.get("nyckelordLista", [])
-        legal_areas = item.get("rattsomradeLista", [])
-        legal_references = [
-            {
-                "reference": ref.get("referens", ""),
-                "sfs_number": ref.get("sfsNummer", "")
-            } for ref in item.get("lagrumLista", [])
-        ]
-        referenced_publications = [pub.get("fritext", "") for pub in item.get("hanvisadePubliceringarLista", [])]
-        pdf_documents = [
-            {
-                "filename": pdf.get("filnamn", ""),
-                "file_id": pdf.get("fillagringId", ""),
-            } for pdf in item.get("bilagaLista", [])
-        ]
-        correlation_number = item.get("gruppKorrelationsnummer", "")
-        case_url = f"https://rattspraxis.etjanst.domstol.se/sok/publicering/{correlation_number}" if correlation_number else ""
-        case = {
-            "case_number": case_number,
-            "nickname": nickname,
-            "summary": summary,
-            "decision_date": decision_date,
-            "publication_time": publication_time,
-            "case_id": case_id,
-            "type": case_type,
-            "is_precedent": is_precedent,
-            "court": court,
-            "court_code": court_code,
-            "keywords": keywords,
-            "legal_areas": legal_areas,
-            "legal_references": legal_references,
-            "referenced_publications": referenced_publications,
-            "pdf_documents": pdf_documents,
-            "case_url": case_url,
-            "correlation_number": correlation_number
+    if date_from or date_to:
+        payload["filter"][DATE_FILTER_KEY] = {
+            DATE_FROM_KEY: str(date_from) if date_from else None,
+            DATE_TO_KEY: str(date_to) if date_to else None
         }
-        all_cases.append(case)
-        # Save and download per case
-        case_dir = os.path.join('cases', case_number)
-        os.makedirs(case_dir, exist_ok=True)
-        pdf_dir = os.path.join(case_dir, 'pdfs')
-        os.makedirs(pdf_dir, exist_ok=True)
-        process_case(case, case_dir, pdf_dir)
-    time.sleep(15)
+    return payload
+
+def search_page(page, court_codes=("HDO",), per_page=CASES_PER_PAGE, date_from=None, date_to=None):
+    """Fetch one page of the search API"""
+    payload = search_payload(page, court_codes, per_page, date_from, date_to)
+    response = http.post(API_URL, headers=HEADERS, json=payload, timeout=60)
+    response.raise_for_status()
+    return response.json()
+
+def result_total(data):
+    """Number of hits the API reports for a search (None if it does not say)"""
+    for key in TOTAL_KEYS:
+        if isinstance(data.get(key), int):
+            return data[key]
+    return None
+
+@METRICS.timer('parse_seconds', extractor='case_hit')
+def parse_case(item):
+    """Turn one search hit into a case dict (None if it has no case number)"""
+    case_id = item.get("id", "")
+    case_number = item.get("malNummerLista", [""])[0] if item.get("malNummerLista") else ""
+    if not case_number:
+        return None
+    nickname = item.get("benamning", "")
+    summary = item.get("sammanfattning", "") or item.get("rubrik", "") or ""
+    decision_date = item.get("avgorandedatum", "")
+    publication_time = item.get("publiceringstid", "")
+    case_type = item.get("typ", "")
+    is_precedent = item.get("arVagledande", False)
+    court = item.get("domstol", {}).get("domstolNamn", "")
+    court_code = item.get("domstol", {}).get("domstolKod", "")
+    keywords = item.get("nyckelordLista", [])
+    legal_areas = item.get("rattsomradeLista", [])
+    legal_references = [
+        {
+            "reference": ref.get("referens", ""),
+            "sfs_number": ref.get("sfsNummer", "")
+        } for ref in item.get("lagrumLista", [])
+    ]
+    referenced_publications = [pub.get("fritext", "") for pub in item.get("hanvisadePubliceringarLista", [])]
+    pdf_documents = [
+        {
+            "filename": pdf.get("filnamn", ""),
+            "file_id": pdf.get("fillagringId", ""),
+        } for pdf in item.get("bilagaLista", [])
+    ]
+    correlation_number = item.get("gruppKorrelationsnummer", "")
+    case_url = f"https://rattspraxis.etjanst.domstol.se/sok/publicering/{correlation_number}" if correlation_number else ""
+    return {
+        "case_number": case_number,
+        "nickname": nickname,
+        "summary": summary,
+        "decision_date": decision_date,
+        "publication_time": publication_time,
+        "case_id": case_id,
+        "type": case_type,
+        "is_precedent": is_precedent,
+        "court": court,
+        "court_code": court_code,
+        "keywords": keywords,
+        "legal_areas": legal_areas,
+        "legal_references": legal_references,
+        "referenced_publications": referenced_publications,
+        "pdf_documents": pdf_documents,
+        "case_url": case_url,
+        "correlation_number": correlation_number
+    }
+
+def save_case(case, cases_dir=CASES_DIR):
+    """Fetch the full text and PDFs of a case and save it under cases_dir/<case_number>/"""
+    case_dir = os.path.join(cases_dir, case['case_number'])
+    os.makedirs(case_dir, exist_ok=True)
+    pdf_dir = os.path.join(case_dir, 'pdfs')
+    os.makedirs(pdf_dir, exist_ok=True)
+    process_case(case, case_dir, pdf_dir)
+
+def write_failed_downloads(cases_dir=CASES_DIR):
+    if failed_downloads:
+        with open(os.path.join(cases_dir, 'failed_downloads.json'), 'w', encoding='utf-8') as f:
+            json.dump(failed_downloads, f, ensure_ascii=False, indent=2)
+        print(f"{len(failed_downloads)} PDF downloads failed, see {cases_dir}/failed_downloads.json")
+
+def main(profile=None):
+    """Ingest the latest NUM_PAGES search pages; profile: a directory (or True) to profile the run into"""
+    with profiling(profile, 'court_ingest'):
+        return ingest()
+
+def ingest():
+    """Save the cases of the latest search pages; returns them as CaseRecords"""
+    os.makedirs(CASES_DIR, exist_ok=True)
+    all_cases = []
+    for page in range(NUM_PAGES):
+        with PROFILER.stage('search'):
+            data = search_page(page)
+        if page == 0:
+            print("First page API response (truncated):", json.dumps(data, ensure_ascii=False)[:1000])
+        for item in data.get("publiceringLista", []):
+            case = parse_case(item)
+            if case is None:
+                continue
+            # The search hit only; the full text stays on disk
+            all_cases.append(CaseRecord.from_dict(case))
+            # Save and download per case
+            save_case(case)
+    write_failed_downloads()
+    with PROFILER.stage('snapshot'):
+        stats = snapshot_store().take_snapshot(CASES_DIR)
+    print(f"Snapshot {stats['name']}: {stats['files']} files, {stats['new_objects']} new objects "
+          f"({stats['bytes_written']} bytes)")
+    return all_cases
+
 
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Ingest the latest cases from rattspraxis.etjanst.domstol.se")
+    arg_parser.add_argument("--profile", nargs="?", const=True, default=None, metavar="DIR",
+                            help="Profile the run (default directory: backend/data/profiles/<time>-court_ingest)")
+    main(profile=arg_parser.parse_args().profile)
@@ -1,18 +1,38 @@
-import requests
-from bs4 import BeautifulSoup
-from bs4.element import Tag
+import argparse
 import json
+import logging
 import re
+import sys
 from datetime import datetime
-import time
+from pathlib import Path
 from typing import List, Dict, Optional
 
+sys.path.append(str(Path(__file__).parent / "backend" / "src"))
+from legal_kg.citations import SFS_NUMBER, split_sfs
+from legal_kg.database import get_connection
+from legal_kg.dedup import DedupIndex, law_text
+from legal_kg.htmlparse import parse_html
+from legal_kg.httpclient import ResilientSession
+from legal_kg.metrics import METRICS, get_logger
+from legal_kg.models import LawRecord, TopicTable
+from legal_kg.profiling import PROFILER, profiling
+from legal_kg.resolver import UrlResolver
+
+logger = get_logger("topic_scraper")
+
+# Stop guessing further topic pages after this many failures in a row
+MAX_CONSECUTIVE_PAGE_FAILURES = 3
+
 class GetLawsOnTopicScraper:
     def __init__(self):
         """
         Initialize the Get Laws On Topic Scraper
         """
-        self.session = requests.Session()
+        self.session = ResilientSession()
+        # Near-duplicate index over scraped law pages, opened on first use
+        self.law_dedup = None
+        # SFS number -> verified law page URL (legal_kg.resolver), opened on first use
+        self.url_resolver = None
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
@@ -22,12 +42,12 @@ class GetLawsOnTopicScraper:
         Scrape a topic page to get all law links (single page only)
         """
         try:
-            print(f"Scraping topic page: {url}")
+            logger.info("Scraping topic page: %s", url)
             response = self.session.get(url, timeout=30)
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            law_links = self._extract_all_law_links(soup)
-            topic_info = self._extract_topic_info(soup, url)
+            doc = parse_html(response.content)
+            law_links = self._extract_all_law_links(doc)
+            topic_info = self._extract_topic_info(doc, url)
             topic_page_data = {
                 'url': url,
                 'scraped_at': datetime.now().isoformat(),
@@ -37,14 +57,18 @@ class GetLawsOnTopicScraper:
             }
             return topic_page_data
         except Exception as e:
-            print(f"Error scraping topic page: {e}")
+            logger.warning("Error scraping topic page %s: %s", url, e)
             return None
 
     def scrape_topic_all_pages(self, url):
         """
         Scrape all paginated pages for a topic and collect all law links.
+        Pages that fail are listed in 'failed_pages'; pagination continues
+        with the next page number instead of stopping.
         """
         all_laws = []
+        failed_pages = []
+        consecutive_failures = 0
         page_num = 1
         next_url = url
         topic_info = None
@@ -52,64 +76,93 @@ class GetLawsOnTopicScraper:
         
         while next_url and next_url not in visited_urls:
             visited_urls.add(next_url)
-            print(f"Scraping topic page {page_num}: {next_url}")
+            logger.info("Scraping topic page %d: %s", page_num, next_url)
             
             try:
                 response = self.session.get(next_url, timeout=30)
                 response.raise_for_status()
-                soup = BeautifulSoup(response.content, 'html.parser')
+                with METRICS.timer('parse_seconds', extractor='html'):
+                    doc = parse_html(response.content)
                 
                 if topic_info is None:
-                    topic_info = self._extract_topic_info(soup, url)
+                    with METRICS.timer('parse_seconds', extractor='topic_info'):
+                        topic_info = self._extract_topic_info(doc, url)
                 
-                page_laws = self._extract_all_law_links(soup)
-                print(f"  Found {len(page_laws)} laws on this page.")
+                with METRICS.timer('parse_seconds', extractor='topic_law_links'):
+                    page_laws = self._extract_all_law_links(doc)
+                logger.debug("Found %d laws on page %d", len(page_laws), page_num)
                 all_laws.extend(page_laws)
+                METRICS.inc('topic_pages_total')
+                METRICS.inc('law_links_found_total', len(page_laws))
                 
-                # DEBUG: Print all <a> tags and their text to inspect pagination
-                print("  Pagination links on this page:")
-                for a in soup.find_all('a', href=True):
-                    print(f"    text: '{a.get_text(strip=True)}' | href: {a['href']}")
+                # Every anchor on the page, to inspect pagination (LEGAL_KG_LOG_LEVEL=DEBUG)
+                if logger.isEnabledFor(logging.DEBUG):
+                    for a in doc.links():
+                        logger.debug("pagination link text=%r href=%s", a.text, a.href)
                 
                 # Find next page link with multiple strategies
-                next_url = self._find_next_page_link(soup, next_url)
-                
-                page_num += 1
+                with METRICS.timer('parse_seconds', extractor='topic_next_page'):
+                    next_url = self._find_next_page_link(doc, next_url)
+                consecutive_failures = 0
                 
             except Exception as e:
-                print(f"Error scraping page {next_url}: {e}")
-                break
+                logger.warning("Error scraping page %s: %s", next_url, e)
+                METRICS.inc('topic_page_failures_total')
+                status = getattr(e, 'status', None) or getattr(getattr(e, 'response', None), 'status_code', None)
+                failed_pages.append({
+                    'url': next_url,
+                    'page': page_num,
+                    'status': status,
+                    'error': str(e)
+                })
+                consecutive_failures += 1
+                # The next link is on the page we could not read, so guess it,
+                # unless the page does not exist or the site keeps failing
+                if status == 404 or consecutive_failures >= MAX_CONSECUTIVE_PAGE_FAILURES:
+                    break
+                next_url = self._page_url(url, page_num + 1)
+            
+            page_num += 1
         
         print(f"Total laws collected from all pages: {len(all_laws)}")
+        if failed_pages:
+            print(f"Failed to scrape {len(failed_pages)} pages: {[p['url'] for p in failed_pages]}")
         
         topic_page_data = {
             'url': url,
             'scraped_at': datetime.now().isoformat(),
             'topic_info': topic_info or {},
             'total_laws_found': len(all_laws),
-            'laws': all_laws
+            'laws': all_laws,
+            'failed_pages': failed_pages
         }
         return topic_page_data
     
-    def _find_next_page_link(self, soup, current_url):
+    def _page_url(self, url, page_num):
+        """URL of page `page_num` of a topic, e.g. https://.../arbetsratt/?page=2"""
+        base_url = re.sub(r'[?&]page=\d+', '', url)
+        separator = '&' if '?' in base_url else '?'
+        return f"{base_url}{separator}page={page_num}"
+    
+    def _find_next_page_link(self, doc, current_url):
         """
         Find the next page link using multiple strategies, including the → arrow.
         """
+        anchors = doc.anchors()
+        
         # Strategy 1: Look for right arrow (→) link
-        arrow_link = soup.find('a', string=lambda s: s and s.strip() == '→')
-        if isinstance(arrow_link, Tag):
-            href = arrow_link.get('href')
+        arrow_link = next((a for a in anchors if a.string and a.string.strip() == '→'), None)
+        if arrow_link:
+            href = arrow_link.href
             if isinstance(href, str) and href:
                 return self._construct_full_url(href, current_url)
         
         # Strategy 2: Look for next page number
-        pagination_links = soup.find_all('a', href=True)
+        pagination_links = doc.links()
         current_page_num = self._extract_page_number(current_url)
         for link in pagination_links:
-            href = link.get('href', '')
-            if not isinstance(href, str):
-                continue
-            link_text = link.get_text(strip=True)
+            href = link.href
+            link_text = link.text
             if re.match(r'^\d+$', link_text):
                 page_num = int(link_text)
                 if page_num == current_page_num + 1:
@@ -117,22 +170,20 @@ class GetLawsOnTopicScraper:
         
         # Fallback: previous strategies
         # Look for "nästa" link
-        next_link = soup.find('a', string=re.compile(r'nästa', re.IGNORECASE))
-        if isinstance(next_link, Tag):
-            href = next_link.get('href')
+        next_link = next((a for a in anchors if a.string and re.search(r'nästa', a.string, re.IGNORECASE)), None)
+        if next_link:
+            href = next_link.href
             if isinstance(href, str) and href:
                 return self._construct_full_url(href, current_url)
         # Look for "next" link
-        next_link = soup.find('a', string=re.compile(r'next', re.IGNORECASE))
-        if isinstance(next_link, Tag):
-            href = next_link.get('href')
+        next_link = next((a for a in anchors if a.string and re.search(r'next', a.string, re.IGNORECASE)), None)
+        if next_link:
+            href = next_link.href
             if isinstance(href, str) and href:
                 return self._construct_full_url(href, current_url)
         # Look for links containing "page" or "sida"
         for link in pagination_links:
-            href = link.get('href', '')
-            if not isinstance(href, str):
-                continue
+            href = link.href
             if 'page' in href.lower() or 'sida' in href.lower():
                 if self._is_next_page_link(href, current_url):
                     return self._construct_full_url(href, current_url)
@@ -197,22 +248,30 @@ class GetLawsOnTopicScraper:
         """
         try:
             all_topic_data = []
+            # Laws as slotted records referring to their topic, which is stored once
+            topics = TopicTable()
             all_laws = []
+            duplicate_laws = []
+            # The same law is listed under several topics; fetch it once
+            scraped_refs = {}
             total_laws_scraped = 0
             
             print(f"Starting to scrape {len(topic_urls)} topic pages...")
             
             for i, topic_url in enumerate(topic_urls, 1):
-                print(f"\n--- Topic {i}/{len(topic_urls)} ---")
+                logger.info("Topic %d/%d: %s", i, len(topic_urls), topic_url)
                 
                 # Scrape all paginated pages for this topic
-                topic_page_data = self.scrape_topic_all_pages(topic_url)
+                with PROFILER.stage('topic_pages'):
+                    topic_page_data = self.scrape_topic_all_pages(topic_url)
                 if not topic_page_data:
-                    print(f"Failed to scrape topic page {i}: {topic_url}")
+                    logger.warning("Failed to scrape topic page %d: %s", i, topic_url)
                     continue
                 
                 all_topic_data.append(topic_page_data)
-                print(f"Found {len(topic_page_data['laws'])} laws on topic: {topic_page_data['topic_info'].get('title', 'Unknown')}")
+                topic = topics.intern(topic_url, topic_page_data['topic_info'])
+                logger.info("Found %d laws on topic: %s", len(topic_page_data['laws']),
+                            topic_page_data['topic_info'].get('title', 'Unknown'))
                 
                 # Limit laws per topic if specified
                 laws_to_process = topic_page_data['laws']
@@ -238,41 +297,47 @@ class GetLawsOnTopicScraper:
                         print("Warning: law_datascraper not found. Individual law details will not be scraped.")
                         # Add topic page info to laws without individual details
                         for law in laws_to_process:
-                            law['topic_page_info'] = topic_page_data['topic_info']
-                            all_laws.append(law)
+                            all_laws.append(LawRecord.from_dict(law, topic=topic))
                         total_laws_scraped += len(laws_to_process)
                         continue
                     
                     # Scrape each individual law
                     for j, law in enumerate(laws_to_process, 1):
-                        print(f"  Scraping law {j}/{len(laws_to_process)}: {law.get('title', 'Unknown')} ({law.get('reference', 'Unknown')})")
+                        logger.info("Scraping law %d/%d: %s (%s)", j, len(laws_to_process),
+                                    law.get('title', 'Unknown'), law.get('reference', 'Unknown'))
+                        ref = law.get('reference') or law['url']
+                        if ref in scraped_refs:
+                            logger.info("%s already scraped under %s", law['url'], scraped_refs[ref])
+                            duplicate_laws.append({'url': law['url'], 'topic_page_url': topic_url, 'duplicate_of': scraped_refs[ref]})
+                            continue
+                        scraped_refs[ref] = law['url']
+                        law_url = self._law_url(law)
+                        if not law_url:
+                            logger.info("Link known to be broken, skipped: %s", law['url'])
+                            continue
                         
                         try:
-                            law_data = scrape_law_data(law['url'], save_to_file=False)
-                            if law_data:
+                            law_data = scrape_law_data(law_url, save_to_file=False)
+                            duplicate = self._find_duplicate_law(law['url'], law_data) if law_data else None
+                            if duplicate:
+                                logger.info("%s near-duplicates %s (similarity %.2f)",
+                                            law['url'], duplicate.original, duplicate.similarity)
+                                duplicate_laws.append({'url': law['url'], 'topic_page_url': topic_url, 'duplicate_of': duplicate.original})
+                            elif law_data:
                                 # Add the law info from topic page
-                                law_data['topic_page_info'] = topic_page_data['topic_info']
-                                law_data['topic_page_url'] = topic_url
-                                all_laws.append(law_data)
+                                all_laws.append(LawRecord.from_dict(law_data, topic=topic))
                                 total_laws_scraped += 1
                             else:
-                                print(f"    Failed to scrape {law.get('title', 'Unknown')}")
+                                logger.warning("Failed to scrape %s", law.get('title', 'Unknown'))
                                 # Add basic law info even if scraping failed
-                                law['topic_page_info'] = topic_page_data['topic_info']
-                                law['topic_page_url'] = topic_url
-                                all_laws.append(law)
+                                all_laws.append(LawRecord.from_dict(law, topic=topic))
                                 total_laws_scraped += 1
                         except Exception as e:
-                            print(f"    Error scraping {law.get('title', 'Unknown')}: {e}")
+                            logger.warning("Error scraping %s: %s", law.get('title', 'Unknown'), e)
                             # Add basic law info even if scraping failed
-                            law['topic_page_info'] = topic_page_data['topic_info']
-                            law['topic_page_url'] = topic_url
-                            all_laws.append(law)
+                            all_laws.append(LawRecord.from_dict(law, topic=topic))
                             total_laws_scraped += 1
                         
-                        # Add a small delay to be respectful to the server
-                        time.sleep(1)
-                        
                         # Check if we've reached the total limit
                         if max_total_laws and total_laws_scraped >= max_total_laws:
                             print(f"Reached total limit of {max_total_laws} laws, stopping...")
@@ -280,9 +345,7 @@ class GetLawsOnTopicScraper:
                 else:
                     # Just add the law links without individual details
                     for law in laws_to_process:
-                        law['topic_page_info'] = topic_page_data['topic_info']
-                        law['topic_page_url'] = topic_url
-                        all_laws.append(law)
+                        all_laws.append(LawRecord.from_dict(law, topic=topic))
                         total_laws_scraped += len(laws_to_process)
                 
                 if max_total_laws and total_laws_scraped >= max_total_laws:
@@ -291,7 +354,10 @@ class GetLawsOnTopicScraper:
             # Create complete dataset
             complete_data = {
                 'topic_pages': all_topic_data,
-                'all_laws': all_laws,
+                # Each law's 'topic_id' indexes 'topics'
+                'topics': topics.to_list(),
+                'all_laws': [law.to_dict() for law in all_laws],
+                'duplicate_laws': duplicate_laws,
                 'total_topics_scraped': len(all_topic_data),
                 'total_laws_scraped': total_laws_scraped,
                 'scraped_at': datetime.now().isoformat()
@@ -303,6 +369,19 @@ class GetLawsOnTopicScraper:
             print(f"Error in scrape_multiple_topic_pages: {e}")
             return None
     
+    def _find_duplicate_law(self, url, law_data):
+        """The already scraped law page this one near-duplicates (legal_kg.dedup), or None"""
+        with PROFILER.stage('dedup'):
+            if self.law_dedup is None:
+                self.law_dedup = DedupIndex(get_connection(), 'law')
+            return self.law_dedup.check(url, law_text(law_data))
+    
+    def _law_url(self, law):
+        """The law's verified URL, else its link on the topic page; None if that link is known to be broken"""
+        if self.url_resolver is None:
+            self.url_resolver = UrlResolver(get_connection())
+        return self.url_resolver.resolve(law.get('reference'), [law['url']])
+    
     def scrape_all_laws_from_topic(self, url, max_laws=None):
         """
         Scrape a topic page and then scrape all individual law pages
@@ -316,7 +395,8 @@ class GetLawsOnTopicScraper:
         """
         try:
             # First scrape the topic page
-            topic_page_data = self.scrape_topic_page(url)
+            with PROFILER.stage('topic_pages'):
+                topic_page_data = self.scrape_topic_page(url)
             if not topic_page_data:
                 return None
             
@@ -336,28 +416,36 @@ class GetLawsOnTopicScraper:
                 return topic_page_data
             
             # Scrape each individual law
+            topics = TopicTable()
+            topic = topics.intern(url, topic_page_data['topic_info'])
             detailed_laws = []
+            failed_laws = []
             for i, law in enumerate(laws_to_scrape, 1):
-                print(f"Scraping law {i}/{len(laws_to_scrape)}: {law['title']} ({law['reference']})")
+                logger.info("Scraping law %d/%d: %s (%s)", i, len(laws_to_scrape), law['title'], law['reference'])
+                law_url = self._law_url(law)
+                if not law_url:
+                    logger.info("Link known to be broken, skipped: %s", law['url'])
+                    failed_laws.append({'url': law['url'], 'error': 'known broken link'})
+                    continue
                 
                 try:
-                    law_data = scrape_law_data(law['url'], save_to_file=False)
+                    law_data = scrape_law_data(law_url, save_to_file=False)
                     if law_data:
-                        # Add the law info from topic page
-                        law_data['topic_page_info'] = law
-                        detailed_laws.append(law_data)
+                        detailed_laws.append(LawRecord.from_dict(law_data, topic=topic).to_dict())
                     else:
-                        print(f"Failed to scrape {law['title']}")
+                        logger.warning("Failed to scrape %s", law['title'])
+                        failed_laws.append({'url': law['url'], 'error': 'no data'})
                 except Exception as e:
-                    print(f"Error scraping {law['title']}: {e}")
-                
-                # Add a small delay to be respectful to the server
-                time.sleep(1)
+                    logger.warning("Error scraping %s: %s", law['title'], e)
+                    failed_laws.append({'url': law['url'], 'error': str(e)})
             
             # Create complete dataset
             complete_data = {
                 'topic_page': topic_page_data,
+                # Each law's 'topic_id' indexes 'topics'
+                'topics': topics.to_list(),
                 'detailed_laws': detailed_laws,
+                'failed_laws': failed_laws,
                 'total_laws_scraped': len(detailed_laws),
                 'scraped_at': datetime.now().isoformat()
             }
@@ -368,7 +456,7 @@ class GetLawsOnTopicScraper:
             print(f"Error in scrape_all_laws_from_topic: {e}")
             return None
     
-    def _extract_topic_info(self, soup, url):
+    def _extract_topic_info(self, doc, url):
         """Extract topic information from the page"""
         topic_info = {}
         
@@ -382,12 +470,10 @@ class GetLawsOnTopicScraper:
         ]
         
         for selector in title_selectors:
-            element = soup.select_one(selector)
-            if element:
-                text = element.get_text(strip=True)
-                if text and len(text) > 5:
-                    topic_info['title'] = text
-                    break
+            text = doc.select_text(selector)
+            if text and len(text) > 5:
+                topic_info['title'] = text
+                break
         
         # If no title found, try to extract from URL
         if 'title' not in topic_info:
@@ -410,30 +496,28 @@ class GetLawsOnTopicScraper:
         
         for selector in description_selectors:
             if selector.startswith('meta'):
-                element = soup.select_one(selector)
-                if element and element.get('content'):
-                    topic_info['description'] = element.get('content')
+                content = doc.select_attr(selector, 'content')
+                if content:
+                    topic_info['description'] = content
                     break
             else:
-                element = soup.select_one(selector)
-                if element:
-                    text = element.get_text(strip=True)
-                    if text and len(text) > 50 and len(text) < 500:
-                        topic_info['description'] = text
-                        break
+                text = doc.select_text(selector)
+                if text and len(text) > 50 and len(text) < 500:
+                    topic_info['description'] = text
+                    break
         
         return topic_info
     
-    def _extract_all_law_links(self, soup):
+    def _extract_all_law_links(self, doc):
         """Extract all law links from the topic page"""
         law_links = []
         
         # Look for law links in the main content area
-        links = soup.find_all('a', href=True)
+        links = doc.links()
         
         for link in links:
-            href = link.get('href', '')
-            link_text = link.get_text(strip=True)
+            href = link.href
+            link_text = link.text
             
             # Check if this looks like a law link
             if self._is_law_link(href, link_text):
@@ -467,10 +551,8 @@ class GetLawsOnTopicScraper:
     def _extract_law_info_from_link(self, link_text, href):
         """Extract law information from a link"""
         # Try to extract SFS number from link text
-        sfs_match = re.search(r'\((\d{4}:\d+)\)', link_text)
-        if sfs_match:
-            reference = sfs_match.group(1)
-            title = re.sub(r'\s*\(\d{4}:\d+\)', '', link_text).strip()
+        title, reference = split_sfs(link_text)
+        if reference:
             
             # Convert relative URLs to absolute
             if href.startswith('/'):
@@ -485,11 +567,9 @@ class GetLawsOnTopicScraper:
             }
         
         # If no SFS number found, try to extract from href
-        href_match = re.search(r'(\d{4}):(\d+)', href)
+        href_match = SFS_NUMBER.search(href)
         if href_match:
-            year = href_match.group(1)
-            number = href_match.group(2)
-            reference = f"{year}:{number}"
+            reference = href_match.group(1)
             
             # Clean up title
             title = link_text.strip()
@@ -519,7 +599,7 @@ class GetLawsOnTopicScraper:
         except Exception as e:
             print(f"Error saving to JSON: {e}")
 
-def get_laws_on_topic(url, save_to_file=True, filename=None, scrape_all_pages=True, max_laws=None):
+def get_laws_on_topic(url, save_to_file=True, filename=None, scrape_all_pages=True, max_laws=None, profile=None):
     """
     Main function to get all laws from a topic page and optionally scrape all individual law pages
     
@@ -529,10 +609,16 @@ def get_laws_on_topic(url, save_to_file=True, filename=None, scrape_all_pages=Tr
         filename (str): Optional custom filename for the JSON file
         scrape_all_pages (bool): Whether to scrape all individual law pages (True) or just get links (False)
         max_laws (int): Maximum number of laws to scrape (None for all)
+        profile (str or bool): Profile the run into this directory (True: a new
+            one under backend/data/profiles), see legal_kg.profiling
         
     Returns:
         dict: Scraped topic data with law links and optionally detailed laws, or None if failed
     """
+    with profiling(profile, 'get_laws_on_topic'):
+        return _get_laws_on_topic(url, save_to_file, filename, scrape_all_pages, max_laws)
+
+def _get_laws_on_topic(url, save_to_file, filename, scrape_all_pages, max_laws):
     # Initialize scraper
     scraper = GetLawsOnTopicScraper()
     
@@ -562,7 +648,8 @@ def get_laws_on_topic(url, save_to_file=True, filename=None, scrape_all_pages=Tr
                     else:
                         filename = f"topic_laws_{clean_title}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
                 
-                scraper.save_to_json(topic_data, filename)
+                with PROFILER.stage('save_json'):
+                    scraper.save_to_json(topic_data, filename)
             
             # Print summary
             print(f"\nTopic scraping completed successfully!")
@@ -600,7 +687,7 @@ def get_laws_on_topic(url, save_to_file=True, filename=None, scrape_all_pages=Tr
         print(f"Error in get_laws_on_topic: {e}")
         return None
 
-def get_laws_from_multiple_topics(topic_urls, save_to_file=True, filename=None, scrape_individual_laws=True, max_laws_per_topic=None, max_total_laws=None):
+def get_laws_from_multiple_topics(topic_urls, save_to_file=True, filename=None, scrape_individual_laws=True, max_laws_per_topic=None, max_total_laws=None, profile=None):
     """
     Main function to get all laws from multiple topic pages and combine into one comprehensive list
     
@@ -611,10 +698,18 @@ def get_laws_from_multiple_topics(topic_urls, save_to_file=True, filename=None,
         scrape_individual_laws (bool): Whether to scrape individual law details
         max_laws_per_topic (int): Maximum number of laws to scrape per topic (None for all)
         max_total_laws (int): Maximum total number of laws to scrape across all topics (None for all)
+        profile (str or bool): Profile the run into this directory (True: a new
+            one under backend/data/profiles), see legal_kg.profiling
         
     Returns:
         dict: Complete data with all topic pages and combined law data, or None if failed
     """
+    with profiling(profile, 'get_laws_from_multiple_topics'):
+        return _get_laws_from_multiple_topics(topic_urls, save_to_file, filename, scrape_individual_laws,
+                                              max_laws_per_topic, max_total_laws)
+
+def _get_laws_from_multiple_topics(topic_urls, save_to_file, filename, scrape_individual_laws,
+                                   max_laws_per_topic, max_total_laws):
     # Initialize scraper
     scraper = GetLawsOnTopicScraper()
     
@@ -637,7 +732,8 @@ def get_laws_from_multiple_topics(topic_urls, save_to_file=True, filename=None,
                     else:
                         filename = f"multiple_topics_links_{timestamp}.json"
                 
-                scraper.save_to_json(complete_data, filename)
+                with PROFILER.stage('save_json'):
+                    scraper.save_to_json(complete_data, filename)
             
             # Print summary
             print(f"\nMultiple topic scraping completed successfully!")
@@ -655,10 +751,11 @@ def get_laws_from_multiple_topics(topic_urls, save_to_file=True, filename=None,
             
             # Show first few laws as preview
             all_laws = complete_data.get('all_laws', [])
+            topics = complete_data.get('topics', [])
             if all_laws:
                 print(f"\nFirst 5 laws from all topics:")
                 for i, law in enumerate(all_laws[:5], 1):
-                    topic_info = law.get('topic_page_info', {})
+                    topic_info = topics[law['topic_id']] if law.get('topic_id') is not None else {}
                     topic_title = topic_info.get('title', 'Unknown')
                     print(f"  {i}. {law['title']} ({law['reference']}) - from {topic_title}")
             
@@ -672,6 +769,11 @@ def get_laws_from_multiple_topics(topic_urls, save_to_file=True, filename=None,
         return None
 
 if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Scrape the laws on lagboken.se topic pages")
+    arg_parser.add_argument("--profile", nargs="?", const=True, default=None, metavar="DIR",
+                            help="Profile the run (default directory: backend/data/profiles/<time>-get_laws_from_multiple_topics)")
+    args = arg_parser.parse_args()
+
     # Example usage for multiple topic pages
     topic_urls = [
         "https://www.lagboken.se/lagboken/start/arbetsratt-och-arbetsmiljoratt/",
@@ -683,5 +785,6 @@ if __name__ == "__main__":
         topic_urls=topic_urls,
         scrape_individual_laws=True,
         max_laws_per_topic=2,  # Limit to first 2 laws per topic
-        max_total_laws=5       # Limit to total 5 laws across all topics
+        max_total_laws=5,      # Limit to total 5 laws across all topics
+        profile=args.profile
     ) 
\ No newline at end of file
@@ -1,8 +1,10 @@
+import argparse
 import requests
-from bs4 import BeautifulSoup
 import json
 import re
+import sys
 from datetime import datetime
+from pathlib import Path
 import time
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -10,7 +12,24 @@ from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 from typing import Optional
 
+sys.path.append(str(Path(__file__).parent / "backend" / "src"))
+from legal_kg.citations import NAME_AND_SFS, SFS_NUMBER, find_sfs, split_sfs
+from legal_kg.htmlparse import parse_html
+from legal_kg.httpclient import ResilientSession
+from legal_kg.lawstream import iter_law_events, parse_metadata
+from legal_kg.metrics import METRICS, get_logger
+from legal_kg.profiling import PROFILER, profiling
+from legal_kg.database import get_connection, init_database
+from legal_kg.sections import SectionSync, law_sfs
+from legal_kg.refresh import RefreshScheduler
+from legal_kg.resolver import UrlResolver
+
+logger = get_logger("law_scraper")
+
 class LawDataScraper:
+    # SFS number -> verified law page URL (legal_kg.resolver), opened on first use
+    resolver = None
+    
     def __init__(self, headless=True):
         """
         Initialize the Law Data Scraper
@@ -18,7 +37,7 @@ class LawDataScraper:
         Args:
             headless (bool): Whether to run browser in headless mode
         """
-        self.session = requests.Session()
+        self.session = ResilientSession()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
@@ -57,27 +76,97 @@ class LawDataScraper:
             dict: Structured data containing the law information
         """
         try:
-            print(f"Scraping law page: {url}")
+            logger.info("Scraping law page: %s", url)
             response = self.session.get(url, timeout=30)
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
+            with METRICS.timer('parse_seconds', extractor='html'):
+                doc = parse_html(response.content)
+            law_data = {
+                'url': url,
+                'scraped_at': datetime.now().isoformat(),
+                'title': self._extract_title(doc),
+                'description': self._get_static_description(),
+                'metadata': self._extract_metadata_strict(doc),
+                'important_laws': self._extract_important_laws(doc)
+            }
+            # Where the page really is, after redirects
+            self._url_resolver().record(law_sfs(law_data), response.url)
+            METRICS.inc('laws_scraped_total', mode='page')
+            return law_data
+        except requests.RequestException as e:
+            logger.warning("Error with requests for %s: %s", url, e)
+            self._record_bad_url(url, e)
+            METRICS.inc('law_scrape_failures_total', reason='http')
+            return None
+        except Exception as e:
+            logger.warning("Error scraping law page %s: %s", url, e)
+            METRICS.inc('law_scrape_failures_total', reason='parse')
+            return None
+    
+    def scrape_law_page_streaming(self, url, on_section=None):
+        """
+        Scrape a law page incrementally, without holding the whole page in memory.
+        Meant for consolidated statutes such as brottsbalken or rättegångsbalken.
+        
+        Args:
+            url (str): URL of the law page to scrape
+            on_section (callable): Called as on_section(section, law_data) with each
+                §-section as it is parsed; law_data holds the title and metadata
+                parsed so far. If not given, sections are collected in law_data['sections'].
+            
+        Returns:
+            dict: Structured data containing the law information
+        """
+        try:
+            logger.info("Streaming law page: %s", url)
+            response = self.session.get(url, timeout=30, stream=True)
+            response.raise_for_status()
+            # requests assumes ISO-8859-1 when the server sends no charset
+            content_type = response.headers.get('Content-Type', '')
+            encoding = response.encoding if 'charset' in content_type.lower() else 'utf-8'
+            
             law_data = {
                 'url': url,
                 'scraped_at': datetime.now().isoformat(),
-                'title': self._extract_title(soup),
+                'title': None,
                 'description': self._get_static_description(),
-                'metadata': self._extract_metadata_strict(soup),
-                'important_laws': self._extract_important_laws(soup)
+                'metadata': {},
+                'important_laws': [],
+                'sections': []
             }
+            sections = 0
+            with response, METRICS.timer('parse_seconds', extractor='law_stream'):
+                for kind, value in iter_law_events(response.iter_content(chunk_size=65536), encoding=encoding):
+                    if kind == 'title':
+                        law_data['title'] = value
+                    elif kind == 'metadata':
+                        law_data['metadata'] = value
+                    elif kind == 'section':
+                        sections += 1
+                        if on_section:
+                            on_section(value, law_data)
+                        else:
+                            law_data['sections'].append(value)
+                    elif kind == 'important_law':
+                        # As in _extract_important_laws: never a link known to be broken
+                        value['url'] = self._resolve_law_url(value['reference'], [value['url']])
+                        law_data['important_laws'].append(value)
+            self._url_resolver().record(law_sfs(law_data), response.url)
+            METRICS.inc('laws_scraped_total', mode='streaming')
+            METRICS.inc('law_sections_parsed_total', sections)
             return law_data
         except requests.RequestException as e:
-            print(f"Error with requests: {e}")
+            logger.warning("Error with requests for %s: %s", url, e)
+            self._record_bad_url(url, e)
+            METRICS.inc('law_scrape_failures_total', reason='http')
             return None
         except Exception as e:
-            print(f"Error scraping law page: {e}")
+            logger.warning("Error scraping law page %s: %s", url, e)
+            METRICS.inc('law_scrape_failures_total', reason='parse')
             return None
     
-    def _extract_title(self, soup):
+    @METRICS.timer('parse_seconds', extractor='law_title')
+    def _extract_title(self, doc):
         """Extract the law title from the page"""
         # Try to find the title in various locations
         title_selectors = [
@@ -89,21 +178,18 @@ class LawDataScraper:
         ]
         
         for selector in title_selectors:
-            element = soup.select_one(selector)
-            if element:
-                text = element.get_text(strip=True)
-                if text and len(text) > 5:  # Avoid very short texts
-                    return text
+            text = doc.select_text(selector)
+            if text and len(text) > 5:  # Avoid very short texts
+                return text
         
         # Fallback: try to extract from URL or page content
-        full_text = soup.get_text(separator='\n', strip=True)
+        full_text = doc.text()
         
         # Look for SFS number pattern
-        sfs_match = re.search(r'\((\d{4}:\d+)\)', full_text)
-        if sfs_match:
-            reference = sfs_match.group(1)
+        reference = find_sfs(full_text)
+        if reference:
             # Try to find the law name
-            law_name_match = re.search(r'([^,\.]+?)\s*\(\d{4}:\d+\)', full_text)
+            law_name_match = NAME_AND_SFS.search(full_text)
             if law_name_match:
                 law_name = law_name_match.group(1).strip()
                 return f"{law_name} ({reference})"
@@ -119,49 +205,24 @@ class LawDataScraper:
             "I lagen finns även regler om hur semester ska förläggas. Lagen är semidispositiv vilket innebär att avtal som avviker från den kan vara gällande, så länge inte arbetstagarens rättigheter inskränks."
         )
     
-    def _extract_metadata_strict(self, soup):
+    @METRICS.timer('parse_seconds', extractor='law_metadata')
+    def _extract_metadata_strict(self, doc):
         """Extract metadata in the exact format specified, robust to label variants."""
-        full_text = soup.get_text(separator='\n', strip=True)
+        full_text = doc.text()
         metadata_section = self._find_metadata_section(full_text)
-        metadata = {}
-        
-        # Patterns for all possible variants
-        patterns = {
-            'Utfärdad': r'Utfärdad:\s*([\d-]+)',
-            'Ikraftträdandedatum': r'Ikraftträdandedatum:\s*([\d-]+)',
-            'Källa': r'Källa:\s*([^\n]+)',
-            'SFS nr': r'SFS nr:\s*([^\n]+)',
-            'Departement': r'Departement(?:/myndighet)?:\s*([^\n]+)',
-            'Ändring införd': r'Ändring införd:\s*([^\n]+)',
-            'Ändrad': r'Ändrad:\s*([^\n]+(?:\n[^\n]+)*?)(?=\n\w+:|$)',
-            'Övrigt': r'Övrigt:\s*([^\n]+)',
-            'Övrig text': r'Övrig text:\s*([^\n]+)',
-            'Länk': r'Länk:\s*([^\n]+)'
-        }
-        
-        # Try to extract each field, prefer the first match
-        for key, pattern in patterns.items():
-            match = re.search(pattern, metadata_section, re.MULTILINE | re.DOTALL)
-            if match:
-                value = match.group(1).strip()
-                value = re.sub(r'\s+', ' ', value)
-                metadata[key] = value
-        
-        # Normalize keys: if both 'Övrigt' and 'Övrig text', prefer 'Övrigt'
-        if 'Övrig text' in metadata and 'Övrigt' not in metadata:
-            metadata['Övrigt'] = metadata.pop('Övrig text')
+        metadata = parse_metadata(metadata_section)
         
         # Extract actual URL link for 'Länk' field
         if 'Länk' in metadata:
             # Look for actual link in HTML
-            link_element = soup.find('a', string=re.compile(r'Länk till register', re.IGNORECASE))
-            if link_element and link_element.get('href'):
-                metadata['Länk URL'] = link_element.get('href')
+            link_element = next((a for a in doc.anchors() if a.string and re.search(r'Länk till register', a.string, re.IGNORECASE)), None)
+            if link_element and link_element.href:
+                metadata['Länk URL'] = link_element.href
             else:
                 # Fallback: look for any link that might be the register link
-                links = soup.find_all('a', href=True)
+                links = doc.links()
                 for link in links:
-                    href = link.get('href')
+                    href = link.href
                     if 'register' in href.lower() or 'lagrum' in href.lower():
                         metadata['Länk URL'] = href
                         break
@@ -189,9 +250,10 @@ class LawDataScraper:
         
         return full_text[start_pos:end_pos]
     
-    def _extract_important_laws(self, soup):
+    @METRICS.timer('parse_seconds', extractor='law_important_laws')
+    def _extract_important_laws(self, doc):
         """Extract the 'Viktiga lagar inom arbetsrätten' block as a list of laws with title, reference, and URL."""
-        full_text = soup.get_text(separator='\n', strip=True)
+        full_text = doc.text()
         # Find the block
         block_pattern = r'Viktiga lagar inom arbetsrätten\n([\s\S]+?)(?:\nJP Infonets|\nOm Lagboken|$)'
         block_match = re.search(block_pattern, full_text)
@@ -208,21 +270,21 @@ class LawDataScraper:
                     continue
                     
                 # Try to extract SFS number
-                sfs_match = re.search(r'\((\d{4}:\d+)\)', line)
-                if sfs_match:
-                    reference = sfs_match.group(1)
-                    title = re.sub(r'\s*\(\d{4}:\d+\)', '', line).strip()
-                    
-                    # Try to find the actual URL for this law
-                    url = self._find_law_url(soup, title, reference)
+                title, reference = split_sfs(line)
+                if reference:
                     
-                    # Convert relative URLs to absolute
-                    if url and url.startswith('/'):
-                        url = f"https://www.lagboken.se{url}"
-                    
-                    # If no URL found or it's JavaScript, try to construct one
-                    if not url or url.startswith('javascript:'):
-                        url = self._construct_law_url(title, reference)
+                    # The law's verified URL (sitemaps, earlier fetches), else a link
+                    # on the page that is not known to be broken
+                    url = self._resolve_law_url(reference)
+                    if not url:
+                        url = self._find_law_url(doc, title, reference, line)
+                        
+                        # Convert relative URLs to absolute
+                        if url.startswith('/'):
+                            url = f"https://www.lagboken.se{url}"
+                        
+                        # Never a guessed URL: unresolved laws are left without one
+                        url = self._resolve_law_url(reference, [url])
                     
                     laws.append({
                         'title': title, 
@@ -231,13 +293,19 @@ class LawDataScraper:
                     })
         return laws
     
-    def _find_law_url(self, soup, title, reference):
+    def _find_law_url(self, doc, title, reference, line=None):
         """Find the actual URL for a law based on title and reference."""
+        links = doc.links()
+        # The link on the block's own line first, as the streaming parser takes it,
+        # not another link that happens to carry the same SFS number
+        if line:
+            for link in links:
+                if link.text.strip() == line:
+                    return link.href
         # Look for links that contain the reference number
-        links = soup.find_all('a', href=True)
         for link in links:
-            href = link.get('href')
-            link_text = link.get_text(strip=True)
+            href = link.href
+            link_text = link.text
             
             # Check if the link contains the reference number
             if reference in link_text or reference in href:
@@ -247,30 +315,24 @@ class LawDataScraper:
             if title.lower() in link_text.lower():
                 return href
         
-        # If no direct match found, try to construct a URL based on the reference
-        if reference:
-            # Common pattern for lagboken.se URLs
-            return f"https://www.lagboken.se/lagboken/start/arbetsratt-och-arbetsmiljoratt/{reference.lower().replace(':', '')}/"
-        
         return ""
     
-    def _construct_law_url(self, title, reference):
-        """Construct a URL for a law based on title and reference."""
+    def _url_resolver(self):
+        if self.resolver is None:
+            self.resolver = UrlResolver(get_connection())
+        return self.resolver
+    
+    def _resolve_law_url(self, reference, candidates=()):
+        """The law's verified URL, else the first candidate not known to be broken, or ''"""
         if not reference:
             return ""
-        
-        # Common patterns for lagboken.se URLs
-        base_url = "https://www.lagboken.se/lagboken/start/arbetsratt-och-arbetsmiljoratt/"
-        
-        # Create URL-friendly title
-        title_lower = title.lower().replace('lag', '').replace('om', '').strip()
-        title_clean = re.sub(r'[^a-zåäö0-9\s]', '', title_lower)
-        title_clean = re.sub(r'\s+', '-', title_clean).strip('-')
-        
-        # Create URL-friendly reference
-        ref_clean = reference.lower().replace(':', '')
-        
-        return f"{base_url}{title_clean}-{ref_clean}/"
+        return self._url_resolver().resolve(reference, candidates) or ""
+    
+    def _record_bad_url(self, url, error):
+        """Remember a law URL that is gone, so no scraper requests it again for a while"""
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+        if status in (404, 410):
+            self._url_resolver().record_bad(url, status=status)
     
     def save_to_json(self, data, filename):
         """Save scraped data to JSON file"""
@@ -285,7 +347,7 @@ class LawDataScraper:
         """Cleanup when object is destroyed"""
         self.close_driver()
 
-def scrape_law_data(url, save_to_file=True, filename=None):
+def scrape_law_data(url, save_to_file=True, filename=None, streaming=False, sync_sections=False, profile=None):
     """
     Main function to scrape law data from a given URL
     
@@ -293,30 +355,58 @@ def scrape_law_data(url, save_to_file=True, filename=None):
         url (str): URL of the law page to scrape
         save_to_file (bool): Whether to save the data to a JSON file
         filename (str): Optional custom filename for the JSON file
+        streaming (bool): Parse the page incrementally and keep its §-sections
+        sync_sections (bool): Store the §-sections in the database, rewriting and
+            re-linking only those whose content hash changed (implies streaming)
+        profile (str or bool): Profile the run into this directory (True: a new
+            one under backend/data/profiles), see legal_kg.profiling
         
     Returns:
         dict: Scraped law data or None if failed
     """
+    with profiling(profile, 'scrape_law_data'):
+        return _scrape_law_data(url, save_to_file, filename, streaming, sync_sections)
+
+def _scrape_law_data(url, save_to_file, filename, streaming, sync_sections):
     # Initialize scraper
     scraper = LawDataScraper(headless=True)
     
     try:
         # Scrape the law page
-        law_data = scraper.scrape_law_page(url)
+        with PROFILER.stage('law_page'):
+            if sync_sections:
+                init_database()
+                conn = get_connection()
+                sync = SectionSync(conn)
+                try:
+                    law_data = scraper.scrape_law_page_streaming(
+                        url,
+                        on_section=lambda section, data: sync.add(law_sfs(data), section)
+                    )
+                    if law_data:
+                        law_data['section_sync'] = sync.finish()
+                        print(f"Sections: {law_data['section_sync']}")
+                finally:
+                    conn.close()
+            elif streaming:
+                law_data = scraper.scrape_law_page_streaming(url)
+            else:
+                law_data = scraper.scrape_law_page(url)
         
         if law_data:
             if save_to_file:
                 # Generate filename if not provided
                 if not filename:
                     # Extract law reference from URL or title
-                    ref_match = re.search(r'(\d{4}:\d+)', law_data.get('title', ''))
+                    ref_match = SFS_NUMBER.search(law_data.get('title', ''))
                     if ref_match:
                         ref = ref_match.group(1).replace(':', '')
                         filename = f"law_data_{ref}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
                     else:
                         filename = f"law_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
                 
-                scraper.save_to_json(law_data, filename)
+                with PROFILER.stage('save_json'):
+                    scraper.save_to_json(law_data, filename)
             
             # Print summary
             print(f"\nScraping completed successfully!")
@@ -336,7 +426,50 @@ def scrape_law_data(url, save_to_file=True, filename=None):
     finally:
         scraper.close_driver()
 
+def refresh_due_laws(daily_budget=200, limit=None, topic_laws=None):
+    """
+    Re-scrape the laws that are due according to the refresh scheduler,
+    within a fixed daily request budget.
+    
+    Args:
+        daily_budget (int): Maximum number of law page requests per day
+        limit (int): Maximum number of laws to refresh in this run (None for budget)
+        topic_laws (list): Law links from the topic scraper to start tracking
+        
+    Returns:
+        dict: Freshness report after the run
+    """
+    init_database()
+    conn = get_connection()
+    scheduler = RefreshScheduler(conn, daily_budget=daily_budget)
+    scraper = LawDataScraper(headless=True)
+    try:
+        if topic_laws:
+            scheduler.register_laws(topic_laws)
+        
+        due = scheduler.plan(limit=limit)
+        print(f"Refreshing {len(due)} laws (budget left today: {scheduler.remaining_budget()})")
+        for i, url in enumerate(due, 1):
+            logger.debug("Refresh %d/%d", i, len(due))
+            law_data = scraper.scrape_law_page(url)
+            if law_data:
+                if scheduler.record(url, law_data):
+                    logger.info("Amended: %s (%s)", url, law_data['metadata'].get('Ändring införd', ''))
+            else:
+                scheduler.record_failure(url)
+        
+        report = scheduler.freshness_report()
+        print(f"Freshness: {report}")
+        return report
+    finally:
+        scraper.close_driver()
+        conn.close()
+
 if __name__ == "__main__":
-    # Example usage
-    url = "https://www.lagboken.se/lagboken/start/arbetsratt-och-arbetsmiljoratt/semesterlag-1977480/d_1564-semesterlag-1977_480/"
-    result = scrape_law_data(url) 
\ No newline at end of file
+    arg_parser = argparse.ArgumentParser(description="Scrape a law page from lagboken.se")
+    # Example law
+    arg_parser.add_argument("url", nargs="?", default="https://www.lagboken.se/lagboken/start/arbetsratt-och-arbetsmiljoratt/semesterlag-1977480/d_1564-semesterlag-1977_480/")
+    arg_parser.add_argument("--profile", nargs="?", const=True, default=None, metavar="DIR",
+                            help="Profile the run (default directory: backend/data/profiles/<time>-scrape_law_data)")
+    args = arg_parser.parse_args()
+    result = scrape_law_data(args.url, profile=args.profile) 
\ No newline at end of file
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+PageRank authority scores: power iteration, warm start and graph storage.
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent / "backend" / "src"))
+
+from legal_kg.authority import load_authority, pagerank, transition_matrix, update_authority
+from legal_kg.graph import build_graph
+
+CASES = [
+    {"case_number": "B 1-25", "nickname": "”Provokationen”", "decision_date": "2025-01-10",
+     "legal_references": [{"reference": "brottsbalken (1962:700)", "sfs_number": "1962:700"}]},
+    {"case_number": "B 2-25", "nickname": "", "decision_date": "2025-02-10",
+     "legal_references": [{"reference": "brottsbalken (1962:700)", "sfs_number": "1962:700"}],
+     "referenced_publications": ["”Provokationen” NJA 2025 s. 1"]},
+    {"case_number": "B 3-25", "nickname": "", "decision_date": "2025-03-10",
+     "legal_references": [{"reference": "skadeståndslagen (1972:207)", "sfs_number": "1972:207"}],
+     "referenced_publications": ["”Provokationen” NJA 2025 s. 1", "NJA 2017 s. 589"]},
+]
+
+
+def test_pagerank_matches_dense_solution():
+    src = np.array([0, 0, 1, 2, 3])
+    dst = np.array([1, 2, 2, 0, 2])
+    matrix, dangling = transition_matrix(src, dst, 5)
+    scores, iterations, _ = pagerank(matrix, dangling, tolerance=1e-12)
+
+    # Dense Google matrix: dangling columns (node 4) are uniform
+    dense = matrix.toarray()
+    dense[:, dangling] = 1.0 / 5
+    google = 0.85 * dense + 0.15 / 5
+    values, vectors = np.linalg.eig(google)
+    expected = np.real(vectors[:, np.argmax(np.real(values))])
+    assert np.allclose(scores, expected / expected.sum(), atol=1e-9)
+    assert abs(scores.sum() - 1) < 1e-9 and scores.argmax() == 2
+
+    warm, warm_iterations, _ = pagerank(matrix, dangling, start=scores, tolerance=1e-12)
+    assert np.allclose(warm, scores) and warm_iterations < iterations
+
+
+def test_update_authority_warm_start(tmp_path):
+    conn = sqlite3.connect(tmp_path / "graph.db")
+    build_graph(conn, cases=CASES[:2], laws=[])
+    cold = update_authority(conn)
+    assert not cold['warm_start']
+
+    build_graph(conn, cases=CASES, laws=[])
+    warm = update_authority(conn)
+    assert warm['warm_start'] and warm['iterations'] < update_authority(conn, warm_start=False)['iterations']
+
+    scores = load_authority(conn)
+    assert abs(sum(scores.values()) - 1) < 1e-6
+    # The publication is resolved to the case it names, which now has two citing cases
+    assert "pub:”Provokationen” NJA 2025 s. 1" in scores
+    assert scores["case:B 1-25"] > scores["case:B 2-25"]
+    assert scores["law:1962:700"] > scores["law:1972:207"]
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Case pack: an exact round trip through write_pack and CasePack, and rewriting a
+pack while a reader still has it mapped.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "backend" / "src"))
+
+from legal_kg.casepack import INDEX_FILE, CasePack, write_pack
+
+CASES = [
+    {'case_number': "B 1-24", 'case_id': "id-1", 'summary': "Fråga om ansvar för grovt bedrägeri.",
+     'keywords': ["Bedrägeri"], 'full_text': "Högsta domstolen fastställer hovrättens dom. §"},
+    {'case_number': "T 2-24", 'case_id': "id-2", 'summary': "Tvist om hyra.", 'keywords': [], 'full_text': ""},
+    {'case_number': "Ö 3-25", 'case_id': "", 'summary': "Resning.", 'keywords': []},
+    {'case_number': "Ö 4-25", 'case_id': "id-4", 'summary': "Avvisning.", 'keywords': [], 'full_text': None},
+]
+
+
+def test_round_trip(tmp_path):
+    assert write_pack(CASES, tmp_path / "pack") == 4
+    with CasePack(tmp_path / "pack") as pack:
+        assert len(pack) == 4 and "T 2-24" in pack and "X 9-99" not in pack
+        assert pack.case_numbers() == ["B 1-24", "T 2-24", "Ö 3-25", "Ö 4-25"]
+        # Empty, missing and null text fields come back as they went in
+        assert [pack.get(case['case_number']) for case in CASES] == CASES
+        assert pack.get("B 1-24", with_text=False) == {k: v for k, v in CASES[0].items() if k != 'full_text'}
+        assert pack.get_by_id("id-2") == CASES[1]
+        assert pack.get_by_id("") is None and pack.get("X 9-99") is None
+        assert pack.text("B 1-24") == CASES[0]['full_text']
+        assert pack.text("T 2-24") == "" and pack.text("Ö 3-25") is None and pack.text("Ö 4-25") is None
+        assert [case['case_number'] for case in pack.iter_cases()] == pack.case_numbers()
+
+    # No case has a text field: the text column is empty
+    write_pack([{k: v for k, v in case.items() if k != 'full_text'} for case in CASES], tmp_path / "empty")
+    with CasePack(tmp_path / "empty") as pack:
+        assert pack.text("B 1-24") is None and 'full_text' not in pack.get("B 1-24")
+
+
+def test_rewrite_while_open(tmp_path):
+    pack_dir = tmp_path / "pack"
+    write_pack(CASES, pack_dir)
+    old = CasePack(pack_dir)
+    write_pack(CASES[:1] + [dict(CASES[1], full_text="Ny text.")], pack_dir)
+
+    # The open reader still sees its own generation
+    assert len(old) == len(CASES) and old.text("B 1-24") == CASES[0]['full_text'] and old.text("T 2-24") == ""
+    with CasePack(pack_dir) as new:
+        assert len(new) == 2 and new.text("T 2-24") == "Ny text."
+    old.close()
+    assert sorted(p.name for p in pack_dir.iterdir()) == [INDEX_FILE, "records.2.bin", "text.2.bin"]
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Citation parser: the grammar on references as they appear in the case
+corpus, memoization and the batch API, and the graph's section edges.
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent / "backend" / "src"))
+
+from legal_kg.citations import (Citation, normalize_reference, parse_batch, parse_citation, parse_citations,
+                                split_sfs)
+from legal_kg.graph import build_graph
+
+
+@pytest.mark.parametrize("reference, expected", [
+    ("29 kap. 3 § första stycket 1 brottsbalken (1962:700)",
+     [Citation('1962:700', 'brottsbalken', '29', '3', None, 1, '1')]),
+    ("8 a kap. 11 § utlänningslagen (2005:716) ", [Citation('2005:716', 'utlänningslagen', '8 a', '11')]),
+    ("26 kap. 14 a § brottsbalken (1962:700)", [Citation('1962:700', 'brottsbalken', '26', '14 a')]),
+    ("2 kap. 2 § plan- och bygglagen (2010:900)", [Citation('2010:900', 'plan- och bygglagen', '2', '2')]),
+    ("4 och 5 §§ lagen (1982:80) om anställningsskydd",
+     [Citation('1982:80', 'lagen om anställningsskydd', None, '4'),
+      Citation('1982:80', 'lagen om anställningsskydd', None, '5')]),
+    ("3 § 1 st. 2 p. lagen (1994:200) om mervärdesskatt",
+     [Citation('1994:200', 'lagen om mervärdesskatt', None, '3', None, 1, '2')]),
+    ("16 a-18 §§ semesterlagen (1977:480)", [Citation('1977:480', 'semesterlagen', None, '16 a', '18')]),
+    ("11 kap. 4 § regeringsformen och 2 kap. 1 § brottsbalken",
+     [Citation('1974:152', 'regeringsformen', '11', '4'), Citation('1962:700', 'brottsbalken', '2', '1')]),
+    ("3 kap. 4 §§ lagen (2015:96) om erkännande och verkställighet samt artikel 3 i barnkonventionen",
+     [Citation('2015:96', 'lagen om erkännande och verkställighet', '3', '4')]),
+    ("lag (1982:80)", [Citation('1982:80', 'lag')]),
+    ("Artikel 8 i Europakonventionen", []),
+    ("Europaparlamentets och rådets förordning (EU) 2016/679 av den 27 april 2016", []),
+])
+def test_grammar(reference, expected):
+    assert list(parse_citations(reference)) == expected
+
+
+def test_normalize_memoize_and_batch():
+    assert normalize_reference("3 § 1 st. 2 p. lagen (1994:200)  om mervärdesskatt") == \
+        "3 § första stycket 2 lagen (1994:200) om mervärdesskatt"
+    assert normalize_reference("1 kap. 2 och 3 §§ brottsbalken") == \
+        "1 kap. 2 § brottsbalken (1962:700); 1 kap. 3 § brottsbalken (1962:700)"
+    assert parse_citation("10-13 §§ semesterlagen (1977:480)").sections() == ["10", "11", "12", "13"]
+    assert parse_citation("Artikel 6 i Europakonventionen") is None
+
+    parse_citations.cache_clear()
+    references = ["10 kap. 17 § rättegångsbalken (1942:740)", "lag (1982:80)"] * 50 + [None]
+    results = parse_batch(references)
+    assert len(results) == len(references) and results[-1] == ()
+    assert results[0] is results[2]
+    info = parse_citations.cache_info()
+    assert info.misses == 3 and info.hits == 0
+    parse_citations("lag (1982:80)")
+    assert parse_citations.cache_info().hits == 1
+
+    assert split_sfs("Semesterlag (1977:480)") == ("Semesterlag", "1977:480")
+    assert split_sfs("Lag om anställningsskydd") == ("Lag om anställningsskydd", None)
+
+
+def test_graph_cites_every_section_of_a_reference():
+    conn = sqlite3.connect(":memory:")
+    case = {'case_number': "T 1-24", 'legal_references': [
+        {'reference': "10-12 §§ semesterlagen (1977:480)", 'sfs_number': "1977:480"},
+        {'reference': "24 kap. 1 § rättegångsbalken och 3 § lagen (1982:80)", 'sfs_number': "1942:740"},
+    ]}
+    build_graph(conn, cases=[case], laws=[])
+    cited = {dst for dst, in conn.execute("SELECT dst FROM graph_edges WHERE src = 'case:T 1-24' AND kind = 'cites'")}
+    assert cited == {"law:1977:480", "section:1977:480/10§", "section:1977:480/11§", "section:1977:480/12§",
+                     "law:1942:740", "section:1942:740/24kap/1§"}
+    conn.close()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Context packs on a small synthetic graph (no network).
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "backend" / "src"))
+
+from legal_kg.context import ContextBuilder, estimate_tokens
+from legal_kg.graph import Graph, build_graph
+
+BB = {"reference": "brottsbalken (1962:700)", "sfs_number": "1962:700"}
+NJA = "NJA 2017 s. 589"
+CASES = [
+    {"case_number": "B 1-25", "nickname": "Provokationen", "decision_date": "2025-01-10", "court": "Högsta domstolen",
+     "summary": "Fråga om provokation vid misshandel.", "keywords": ["Provokation"],
+     "legal_references": [BB], "referenced_publications": [NJA]},
+    # Shares the law and the publication with B 1-25
+    {"case_number": "B 2-25", "decision_date": "2024-05-01", "court": "Högsta domstolen",
+     "summary": "Nödvärn.", "keywords": [], "legal_references": [BB], "referenced_publications": [NJA]},
+    # Shares only the law; the newer of two equally related cases
+    {"case_number": "B 3-25", "decision_date": "2025-06-01", "court": "Högsta domstolen",
+     "summary": "Ringa stöld.", "keywords": [], "legal_references": [BB], "referenced_publications": []},
+    {"case_number": "B 4-25", "decision_date": "2023-06-01", "court": "Högsta domstolen",
+     "summary": "Rattfylleri.", "keywords": [], "legal_references": [BB], "referenced_publications": []},
+]
+LAWS = [{"title": "Brottsbalk (1962:700)", "url": "https://www.lagboken.se/bb", "metadata": {"SFS nr": "1962:700"}}]
+TEXTS = {"B 1-25": "Inledning. " * 50 + "Enligt 1962:700 ska provokation beaktas. " + "Slut. " * 50}
+
+
+def make_builder(tmp_path):
+    conn = sqlite3.connect(tmp_path / "graph.db")
+    build_graph(conn, cases=CASES, laws=LAWS)
+    return conn, ContextBuilder(Graph.load(conn), TEXTS.get)
+
+
+def test_ranking_and_budget(tmp_path):
+    conn, builder = make_builder(tmp_path)
+    pack = builder.build(conn, "B 1-25", budget=2000)
+    ids = [item['id'] for item in pack['items']]
+    assert ids[0] == "case:B 1-25"
+    # More shared neighbours first, then the newest decision
+    assert ids.index("case:B 2-25") < ids.index("case:B 3-25") < ids.index("case:B 4-25")
+    assert "Enligt 1962:700" in pack['text'] or "Inledning" in pack['text']
+    assert pack['tokens'] <= 2000
+
+    small = builder.build(conn, "1962:700", budget=60)
+    assert small['seed_nodes'] == ["law:1962:700"]
+    assert sum(item['tokens'] for item in small['items']) == small['tokens'] <= 60
+    assert estimate_tokens(small['text']) <= 60
+
+    excerpted = builder.build(conn, "1962:700", budget=400)
+    assert "Enligt 1962:700" in excerpted['text']
+
+
+def test_keyword_seed_and_cache(tmp_path):
+    conn, builder = make_builder(tmp_path)
+    pack = builder.build(conn, "provokation", budget=500)
+    assert "case:B 1-25" in pack['seed_nodes']
+    assert builder.build(conn, " provokation", budget=500) is pack
+    assert builder.cache_info()['hits'] == 1
+
+    # A rebuilt graph has a new version and gets fresh packs
+    build_graph(conn, cases=CASES[:1], laws=LAWS)
+    rebuilt = ContextBuilder(Graph.load(conn), TEXTS.get)
+    fresh = rebuilt.build(conn, "provokation", budget=500)
+    assert fresh['graph_version'] == pack['graph_version'] + 1
+    assert "case:B 2-25" not in [item['id'] for item in fresh['items']]
+    assert builder.build(conn, "nothing matches this", budget=500)['items'] == []
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+MinHash/LSH near-duplicate detection: flagging, persistence, re-evaluation
+of changed texts and graph skip.
+"""
+
+import random
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "backend" / "src"))
+
+from legal_kg.dedup import DedupIndex, LshIndex, MinHasher, law_text
+from legal_kg.graph import build_graph
+
+WORDS = ["målsäganden", "tingsrätten", "hovrätten", "skadestånd", "misshandel", "provokation", "hyresavtal",
+         "uppsägning", "lokal", "prövningstillstånd", "överklagande", "beslut", "domen", "fastställs", "yrkande",
+         "ersättning", "kränkning", "bevisning", "vittne", "påföljd", "fängelse", "villkorlig", "dom", "böter"]
+
+
+def text(seed, words=300):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) + str(rng.randint(0, 40)) for _ in range(words))
+
+
+def edited(original, changes, seed=0):
+    rng = random.Random(seed)
+    words = original.split()
+    for _ in range(changes):
+        words[rng.randrange(len(words))] = "ändrat"
+    return " ".join(words)
+
+
+def test_near_duplicate_flagged(tmp_path):
+    conn = sqlite3.connect(tmp_path / "dedup.db")
+    index = DedupIndex(conn, 'case')
+    original = text(1)
+    assert index.check("B 1-25", original) is None
+    assert index.check("B 2-25", text(2)) is None
+    duplicate = index.check("B 3-25", edited(original, 3))
+    assert duplicate.original == "B 1-25" and duplicate.similarity >= 0.8
+    # Re-checking an indexed document is not a duplicate of itself
+    assert index.check("B 1-25", original) is None
+    assert index.check("B 4-25", "för kort") is None
+
+    reopened = DedupIndex(conn, 'case')
+    assert reopened.check("B 3-25", "").original == "B 1-25"
+    assert reopened.check("B 5-25", edited(original, 2, seed=1)).original == "B 1-25"
+    assert DedupIndex(conn, 'law').check("1962:700", original) is None
+
+
+def test_changed_text_is_re_evaluated(tmp_path):
+    conn = sqlite3.connect(tmp_path / "dedup.db")
+    index = DedupIndex(conn, 'case')
+    original = text(1)
+    assert index.check("B 1-25", original) is None
+    assert index.check("B 2-25", edited(original, 3)).original == "B 1-25"
+    assert index.check("B 3-25", edited(original, 2, seed=1)).original == "B 1-25"
+
+    # A re-fetched duplicate whose text is now its own
+    assert index.check("B 2-25", text(2)) is None
+    assert DedupIndex(conn, 'case').check("B 2-25", "") is None
+    # The original is rewritten: its remaining duplicate is checked again
+    assert index.check("B 1-25", text(3)) is None
+    assert "B 3-25" not in index.duplicates
+    reopened = DedupIndex(conn, 'case')
+    assert sorted(reopened.lsh.signatures) == ["B 1-25", "B 2-25", "B 3-25"] and not reopened.duplicates
+    assert reopened.check("B 4-25", edited(original, 1)).original == "B 3-25"
+
+
+def test_candidates_sub_quadratic():
+    hasher = MinHasher()
+    lsh = LshIndex()
+    for i in range(300):
+        signature = hasher.signature(text(i, words=120))
+        assert not lsh.query(signature)
+        lsh.add(str(i), signature)
+    assert lsh.comparisons < 300 * 299 // 2 // 20
+
+
+def test_law_text_needs_sections():
+    assert law_text({'title': "Brottsbalk (1962:700)", 'sections': []}) == ""
+    assert "stöld" in law_text({'title': "Brottsbalk", 'sections': [{'text': "stöld"}]})
+
+
+def test_build_graph_skips_duplicates(tmp_path):
+    conn = sqlite3.connect(tmp_path / "graph.db")
+    cases = [
+        {'case_number': "B 1-25", 'court_code': "HDO", 'summary': "misshandel"},
+        {'case_number': "B 2-25", 'court_code': "HDO", 'summary': "misshandel", 'duplicate_of': "B 1-25"},
+    ]
+    stats = build_graph(conn, cases=cases, laws=[])
+    assert stats['duplicates_skipped'] == 1
+    assert conn.execute("SELECT COUNT(*) FROM graph_nodes WHERE kind = 'case'").fetchone()[0] == 1
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Bulk exporters: neo4j-admin CSVs checked as the importer would read them,
+GraphML parsed back, Parquet when pyarrow is installed. No Neo4j needed.
+"""
+
+import csv
+import json
+import sqlite3
+import sys
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent / "backend" / "src"))
+
+from legal_kg.authority import update_authority
+from legal_kg.export import export_graph, verify_neo4j_import
+from legal_kg.graph import build_graph
+
+CASES = [
+    {"case_number": f"B {i}-25", "nickname": "”Provokationen”\x0b" if i == 0 else "",
+     "summary": "Fråga om \"provokation\",\nmed radbrytning." if i == 0 else f"Mål {i}",
+     "keywords": ["Provokation", "Nödvärn"][:i % 3],
+     "legal_references": [{"reference": "29 kap. 3 § brottsbalken (1962:700)", "sfs_number": "1962:700"},
+                          {"reference": f"lag (1982:{80 + i % 4})", "sfs_number": f"1982:{80 + i % 4}"}],
+     "referenced_publications": ["NJA 2017 s. 589"] if i % 2 else []}
+    for i in range(12)
+]
+GRAPHML = "{http://graphml.graphdrawing.org/xmlns}"
+
+
+@pytest.fixture
+def graph_db(tmp_path):
+    path = tmp_path / "kg.db"
+    conn = sqlite3.connect(path)
+    build_graph(conn, cases=CASES, laws=[])
+    update_authority(conn)
+    nodes = dict(conn.execute("SELECT id, data FROM graph_nodes"))
+    edges = set(conn.execute("SELECT src, dst, kind FROM graph_edges"))
+    conn.close()
+    return path, nodes, edges
+
+
+def test_neo4j_export_in_parallel_partitions(graph_db, tmp_path):
+    path, nodes, edges = graph_db
+    out = tmp_path / "neo4j"
+    stats = export_graph(path, out, "neo4j", workers=2, rows_per_file=7)
+    assert stats['nodes'] == len(nodes) and stats['edges'] == len(edges)
+    assert len(list(out.glob("nodes-*.csv"))) == -(-len(nodes) // 7)
+
+    check = verify_neo4j_import(out)
+    assert check['nodes'] == len(nodes) and check['relationships'] == len(edges)
+    assert check['labels']['Case'] == len(CASES) and check['types']['CITES'] > 0
+    args = (out / "import.args").read_text().splitlines()
+    assert "--multiline-fields=true" in args and args[-1].startswith("--relationships=edges_header.csv,edges-00000.csv")
+
+    # JSON data with quotes and newlines survives the CSV quoting
+    rows = {}
+    for part in sorted(out.glob("nodes-*.csv")):
+        with open(part, encoding="utf-8", newline="") as f:
+            rows.update((row[0], row) for row in csv.reader(f))
+    case = rows["case:B 0-25"]
+    assert json.loads(case[3]) == json.loads(nodes["case:B 0-25"])
+    assert case[5] == "Case" and float(case[4]) > 0
+
+    # A relationship to a node that is not there is what neo4j-admin rejects
+    with open(out / "edges-00000.csv", "a", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerow(["case:B 0-25", "law:1999:1", "CITES"])
+    with pytest.raises(ValueError, match="unknown node"):
+        verify_neo4j_import(out)
+
+
+def test_graphml_export(graph_db, tmp_path):
+    path, nodes, edges = graph_db
+    out = tmp_path / "kg.graphml"
+    stats = export_graph(path, out, "graphml", workers=2, rows_per_file=5)
+    assert stats['files'] == [str(out)] and not (tmp_path / ".kg.graphml.parts").exists()
+
+    graph = ET.parse(out).getroot().find(f"{GRAPHML}graph")
+    parsed = {node.get("id"): {d.get("key"): d.text for d in node} for node in graph.iter(f"{GRAPHML}node")}
+    assert set(parsed) == set(nodes)
+    parsed_edges = {(e.get("source"), e.get("target"), e.find(f"{GRAPHML}data").text)
+                    for e in graph.iter(f"{GRAPHML}edge")}
+    assert parsed_edges == edges
+    assert json.loads(parsed["case:B 0-25"]["data"])["summary"] == CASES[0]["summary"]
+    # The vertical tab is not allowed in XML and is dropped
+    assert parsed["case:B 0-25"]["label"] == "”Provokationen”"
+    assert float(parsed["law:1962:700"]["authority"]) > 0
+
+
+def test_parquet_export(graph_db, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path, nodes, edges = graph_db
+    stats = export_graph(path, tmp_path / "parquet", "parquet", workers=2, rows_per_file=10, batch_size=3)
+    node_table = pq.read_table([f for f in stats['files'] if "nodes-" in f][0])
+    assert node_table.column_names == ["id", "kind", "label", "data", "authority"]
+    total = sum(pq.read_metadata(f).num_rows for f in stats['files'] if "edges-" in f)
+    assert total == len(edges)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Facet index against a brute-force scan of random cases.
+"""
+
+import random
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "backend" / "src"))
+
+from legal_kg.facets import FacetIndex
+
+
+def random_cases(n, seed=0):
+    rng = random.Random(seed)
+    keywords = [f"Ord {i}" for i in range(40)]
+    for i in range(n):
+        yield {
+            "case_number": f"B {i}-25",
+            # HDO is common enough to get a bitmap, the others stay id lists
+            "court_code": rng.choices(["HDO", "HFD", "ADO", "MMOD"], weights=[70, 20, 8, 2])[0],
+            "type": rng.choice(["DOM_ELLER_BESLUT", "PROVNINGSTILLSTAND", ""]),
+            "is_precedent": rng.random() < 0.3,
+            "keywords": rng.sample(keywords, rng.randint(0, 3)),
+            "legal_areas": rng.sample(["Straffrätt", "Skatterätt", "Arbetsrätt"], rng.randint(0, 2)),
+            "decision_date": f"{rng.randint(2000, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        }
+
+
+def brute_force(cases, date_from=None, date_to=None, **filters):
+    hits = []
+    for case in cases:
+        if date_from and case["decision_date"] < date_from or date_to and case["decision_date"] > date_to:
+            continue
+        ok = True
+        for name, values in filters.items():
+            values = values if isinstance(values, list) else [values]
+            have = case[name] if isinstance(case[name], list) else [case[name]]
+            ok = ok and any(v in have for v in values)
+        if ok:
+            hits.append(case)
+    return hits
+
+
+QUERIES = [
+    {},
+    {"court_code": "HDO"},
+    {"court_code": ["ADO", "MMOD"], "is_precedent": True},
+    {"court_code": ["HDO", "HFD"], "keywords": ["Ord 1", "Ord 2"]},
+    {"legal_areas": "Straffrätt", "date_from": "2010-01-01", "date_to": "2012-06-30"},
+    {"date_from": "2024-01-01"},
+    {"keywords": "Ord 7", "court_code": "HDO", "type": "PROVNINGSTILLSTAND", "date_to": "2015-01-01"},
+    {"keywords": "No such keyword"},
+]
+
+
+def test_queries_match_brute_force():
+    cases = {c["case_number"]: c for c in random_cases(3000)}
+    index = FacetIndex.from_cases(random_cases(3000))
+    # Re-ingest some cases with a new court; their old rows must disappear
+    for case in list(cases.values())[:200]:
+        case["court_code"] = "ADO"
+        index.add(case)
+
+    for query in QUERIES:
+        expected = brute_force(cases.values(), **query)
+        result = index.query(**query)
+        assert sorted(result.case_numbers()) == sorted(c["case_number"] for c in expected), query
+        counts = result.counts()
+        courts = {c["court_code"] for c in expected}
+        assert counts["court_code"] == {v: sum(c["court_code"] == v for c in expected) for v in courts}
+        for keyword, n in counts["keywords"].items():
+            assert n == sum(keyword in c["keywords"] for c in expected)
+
+    totals = index.counts(["court_code", "is_precedent"])
+    assert totals["court_code"]["ADO"] == sum(c["court_code"] == "ADO" for c in cases.values())
+    assert sum(totals["is_precedent"].values()) == len(cases) == len(index)
+
+
+def test_incremental_dates():
+    index = FacetIndex()
+    index.add({"case_number": "A", "decision_date": "2020-05-01", "court_code": "HDO"})
+    assert index.query(date_from="2020-01-01").case_numbers() == ["A"]
+    index.add({"case_number": "B", "decision_date": "2019-01-01", "court_code": "HDO"})
+    index.add({"case_number": "A", "decision_date": "2018-01-01", "court_code": "HDO"})
+    assert index.query(date_to="2019-12-31").case_numbers() == ["B", "A"]
+    assert index.query(date_from="2020-01-01").count == 0
+    assert index.counts()["court_code"] == {"HDO": 2}
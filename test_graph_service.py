@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Graph store and query service on a small synthetic graph (no network).
+"""
+
+import asyncio
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent / "backend" / "src"))
+
+from legal_kg.authority import update_authority
+from legal_kg.graph import Graph, build_graph, iter_law_files
+from legal_kg.service import QueryServer, QueryService
+
+CASES = [
+    {
+        "case_number": "B 1-25", "case_id": "a", "nickname": "Provokationen", "decision_date": "2025-01-10",
+        "court": "Högsta domstolen", "summary": "Fråga om provokation vid misshandel.", "keywords": ["Provokation"],
+        "legal_references": [{"reference": "29 kap. 3 § brottsbalken (1962:700)", "sfs_number": "1962:700"}],
+        "referenced_publications": ["NJA 2017 s. 589"], "full_text": "",
+    },
+    {
+        "case_number": "T 2-25", "case_id": "b", "nickname": "", "decision_date": "2025-03-01",
+        "court": "Högsta domstolen", "summary": "Skadestånd för vårdnadshavare.", "keywords": [],
+        "legal_references": [{"reference": "3 kap. 5 § skadeståndslagen (1972:207)", "sfs_number": "1972:207"},
+                             {"reference": "brottsbalken (1962:700)", "sfs_number": "1962:700"}],
+        "referenced_publications": ["NJA 2017 s. 589"], "full_text": "",
+    },
+]
+LAWS = [{"title": "Brottsbalk (1962:700)", "url": "https://www.lagboken.se/bb", "metadata": {"SFS nr": "1962:700"}}]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "graph.db"
+    conn = sqlite3.connect(path)
+    stats = build_graph(conn, cases=CASES, laws=LAWS)
+    update_authority(conn)
+    conn.close()
+    assert stats['version'] == 1
+    return path
+
+
+def test_law_files_from_every_scraper(tmp_path):
+    law = LAWS[0]
+    # law_datascraper.py, then get_laws_on_topic_scraper.py for several topics and for one
+    (tmp_path / "law_data_1962_700_20250101_120000.json").write_text(json.dumps(law), encoding="utf-8")
+    (tmp_path / "multiple_topics_comprehensive_20250101_120000.json").write_text(
+        json.dumps({'topics': [], 'all_laws': [dict(law, title="Brottsbalk, flera ämnen")]}), encoding="utf-8")
+    (tmp_path / "topic_all_laws_Straffratt_20250101_120000.json").write_text(
+        json.dumps({'topics': [], 'detailed_laws': [dict(law, title="Brottsbalk, ett ämne")]}), encoding="utf-8")
+    # Topic page links only, no law pages
+    (tmp_path / "topic_laws_Straffratt_20250101_120000.json").write_text(
+        json.dumps({'topic_info': {}, 'laws': [law]}), encoding="utf-8")
+    assert [law['title'] for law in iter_law_files(tmp_path)] == [
+        "Brottsbalk (1962:700)", "Brottsbalk, flera ämnen", "Brottsbalk, ett ämne"]
+
+
+def test_graph_edges_and_neighbourhood(db_path):
+    conn = sqlite3.connect(db_path)
+    graph = Graph.load(conn)
+    assert set(graph.incoming("law:1962:700", "cites")) == {"case:B 1-25", "case:T 2-25"}
+    assert set(graph.outgoing("case:B 1-25", "cites")) == {"law:1962:700", "section:1962:700/29kap/3§"}
+
+    # The two cases are two hops apart through the law and the shared publication
+    two_hops = {n: d for n, _, _, d in graph.neighbourhood("case:B 1-25", 2)}
+    assert two_hops["case:T 2-25"] == 2
+    assert "law:1972:207" not in two_hops
+    graph.neighbourhood("case:B 1-25", 2)
+    assert graph.cache_info().hits == 1
+
+
+def test_query_endpoints(db_path):
+    service = QueryService(db_path, pool_size=2)
+    server = QueryServer(service)
+
+    async def get(target):
+        return await server.dispatch("GET", target)
+
+    try:
+        status, law = asyncio.run(get("/laws/1962:700"))
+        assert status == 200 and law['data']['title'] == "Brottsbalk (1962:700)" and law['citing_cases'] == 2
+
+        status, page = asyncio.run(get("/laws/1962:700/cases?limit=1"))
+        assert [c['id'] for c in page['items']] == ["case:T 2-25"] and page['next_offset'] == 1
+
+        # Nothing cites either case, so they tie on authority and keep the date order
+        status, page = asyncio.run(get("/laws/1962:700/cases?sort=authority"))
+        assert [c['id'] for c in page['items']] == ["case:T 2-25", "case:B 1-25"]
+        assert page['items'][0]['authority'] > 0
+        status, _ = asyncio.run(get("/laws/1962:700/cases?sort=relevance"))
+        assert status == 400
+
+        status, page = asyncio.run(get("/nodes/case%3AB%201-25/neighbourhood?k=2&kind=case"))
+        assert {n['id'] for n in page['items']} == {"case:B 1-25", "case:T 2-25"}
+
+        status, page = asyncio.run(get("/search?q=provokation&kind=case"))
+        assert page['items'][0]['id'] == "case:B 1-25"
+
+        status, facets = asyncio.run(get("/facets?keywords=Provokation"))
+        assert facets['items'] == ["case:B 1-25"] and facets['counts']['keywords'] == {"Provokation": 1}
+
+        assert asyncio.run(get("/search?q=%22%28"))[0] == 400
+        assert asyncio.run(get("/laws/1999:1"))[0] == 404
+        status, items = asyncio.run(get("/laws/1962:700/cases?stream=1"))
+        assert isinstance(items, list) and len(items) == 2
+        json.dumps(items)
+    finally:
+        service.close()
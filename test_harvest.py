@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Partitioned harvest against an in-memory fake of the search API: recursive
+splitting, dedup across partitions and total verification.
+"""
+
+import random
+import sys
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "backend" / "src"))
+
+from legal_kg.harvest import Harvester, Partition, year_partitions
+
+
+class FakeSearchApi:
+    """Sorted by decision date (newest first), paged like the real API"""
+
+    def __init__(self, cases, per_page=50, drop=None):
+        self.cases = cases
+        self.per_page = per_page
+        self.drop = drop  # case id silently missing from every page
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, court, date_from, date_to, page):
+        with self._lock:
+            self.requests += 1
+        hits = sorted(
+            (c for c in self.cases if c['court'] == court and date_from <= c['date'] <= date_to),
+            key=lambda c: c['date'], reverse=True,
+        )
+        page_hits = hits[page * self.per_page:(page + 1) * self.per_page]
+        return len(hits), [dict(h) for h in page_hits if h['id'] != self.drop]
+
+
+def corpus(n=1500, seed=7):
+    rng = random.Random(seed)
+    start = date(2020, 1, 1)
+    cases = []
+    for i in range(n):
+        court = rng.choice(["HDO", "HFD", "ADO"])
+        # Bursty: a third of the cases land on a handful of days
+        day = start + timedelta(days=rng.choice([40, 41, 400]) if i % 3 == 0 else rng.randrange(1800))
+        cases.append({'id': f"id-{i}", 'court': court, 'date': day})
+    return cases
+
+
+def test_harvest_is_complete_and_verified():
+    cases = corpus()
+    api = FakeSearchApi(cases)
+    harvester = Harvester(api, max_hits=100, workers=4)
+    result = harvester.harvest(year_partitions(["HDO", "HFD", "ADO"], date(2020, 1, 1), date(2024, 12, 31)))
+
+    assert set(result.cases) == {c['id'] for c in cases}
+    assert result.problems() == []
+    assert any(p.status == "split" for p in result.partitions)
+    assert result.requests == api.requests
+
+
+def test_overlapping_partitions_are_deduplicated():
+    cases = corpus(300)
+    harvester = Harvester(FakeSearchApi(cases), max_hits=1000)
+    overlapping = [
+        Partition("HDO", date(2020, 1, 1), date(2022, 12, 31)),
+        Partition("HDO", date(2022, 1, 1), date(2024, 12, 31)),
+    ]
+    result = harvester.harvest(overlapping)
+    hdo = {c['id'] for c in cases if c['court'] == "HDO"}
+    assert set(result.cases) == hdo
+    assert result.duplicates == sum(1 for c in cases if c['court'] == "HDO" and c['date'].year == 2022)
+
+
+def test_missing_hits_are_reported():
+    cases = corpus(300)
+    harvester = Harvester(FakeSearchApi(cases, drop="id-5"), max_hits=1000)
+    result = harvester.harvest(year_partitions([cases[5]['court']], date(2020, 1, 1), date(2024, 12, 31)))
+    [problem] = result.problems()
+    assert problem.status == "mismatch"
+    assert problem.date_from <= cases[5]['date'] <= problem.date_to
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Retry, Retry-After and circuit-breaker behaviour of the shared HTTP client,
+against a scripted session and a fake clock (no network).
+"""
+
+import random
+import sys
+from pathlib import Path
+
+import pytest
+import requests
+
+sys.path.append(str(Path(__file__).parent / "backend" / "src"))
+
+from legal_kg.httpclient import FetchError, ResilientSession, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class ScriptedSession:
+    """Returns (or raises) the scripted outcomes in order"""
+
+    def __init__(self, outcomes):
+        self.headers = {}
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        response = requests.Response()
+        response.status_code, headers = outcome
+        response.headers.update(headers)
+        response._content = b""
+        response.raw = None
+        response.close = lambda: None
+        return response
+
+
+def make_session(outcomes, **kwargs):
+    clock = FakeClock()
+    session = ResilientSession(session=ScriptedSession(outcomes), share_hosts=False,
+                               clock=clock, sleep=clock.sleep, rng=random.Random(0), **kwargs)
+    return session, clock
+
+
+def test_transient_errors_are_retried():
+    session, clock = make_session([(503, {}), requests.ConnectionError("reset"), (200, {})])
+    assert session.get("https://www.lagboken.se/x").status_code == 200
+    assert session.session.calls == 3
+    assert session.stats()["www.lagboken.se"]["retries"] == 2
+
+
+def test_retry_after_is_honoured():
+    session, clock = make_session([(429, {"Retry-After": "30"}), (200, {})])
+    assert session.get("https://www.lagboken.se/x").status_code == 200
+    assert clock.now >= 30
+    assert session.stats()["www.lagboken.se"]["throttled"] == 1
+
+
+def test_client_errors_are_returned_not_retried():
+    session, _ = make_session([(404, {})])
+    assert session.get("https://www.lagboken.se/missing").status_code == 404
+    assert session.session.calls == 1
+
+
+def test_gives_up_and_opens_circuit():
+    session, _ = make_session([(500, {})] * 10, max_retries=2, failure_threshold=3)
+    with pytest.raises(FetchError) as error:
+        session.get("https://www.lagboken.se/x")
+    assert error.value.status == 500
+    assert error.value.attempts == 3
+    with pytest.raises(FetchError) as error:
+        session.get("https://www.lagboken.se/y")
+    assert error.value.kind == "circuit_open"
+    assert session.session.calls == 3
+
+
+def open_circuit(session, clock):
+    with pytest.raises(FetchError):
+        session.get("https://www.lagboken.se/x")
+    clock.now += 60
+
+
+def test_throttled_probe_closes_circuit():
+    session, clock = make_session([(500, {}), (429, {}), (200, {})], max_retries=0, failure_threshold=1)
+    open_circuit(session, clock)
+    with pytest.raises(FetchError) as error:
+        session.get("https://www.lagboken.se/probe")
+    assert error.value.kind == "throttle"
+    assert session.get("https://www.lagboken.se/y").status_code == 200
+    assert session.session.calls == 3
+
+
+def test_fatal_probe_reopens_circuit():
+    session, clock = make_session([(500, {}), requests.exceptions.InvalidURL("bad"), (200, {})],
+                                  max_retries=0, failure_threshold=1)
+    open_circuit(session, clock)
+    with pytest.raises(FetchError) as error:
+        session.get("https://www.lagboken.se/probe")
+    assert error.value.kind == "fatal"
+    with pytest.raises(FetchError) as error:
+        session.get("https://www.lagboken.se/y")
+    assert error.value.kind == "circuit_open" and "retry in 60s" in str(error.value)
+    clock.now += 60
+    assert session.get("https://www.lagboken.se/y").status_code == 200
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("120") == 120
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", now=1445412470) == 10
+    assert parse_retry_after("soon") is None
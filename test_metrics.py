@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Metrics registry: counters, histogram quantiles, Prometheus and JSON output,
+and what the HTTP client records per request (no network).
+"""
+
+import json
+import random
+import sys
+from pathlib import Path
+
+import requests
+
+sys.path.append(str(Path(__file__).parent / "backend" / "src"))
+
+from legal_kg.httpclient import ResilientSession
+from legal_kg.metrics import METRICS, Histogram, Metrics
+
+
+def test_histogram_quantiles():
+    histogram = Histogram((1.0, 2.0, 5.0, 10.0))
+    for value in [0.5] * 50 + [1.5] * 45 + [8.0] * 5:
+        histogram.observe(value)
+    assert histogram.count == 100 and histogram.max == 8.0
+    assert 0.0 < histogram.quantile(0.5) <= 1.0
+    assert 1.0 < histogram.quantile(0.95) <= 2.0
+    assert 5.0 < histogram.quantile(0.99) <= 8.0
+    assert Histogram((1.0,)).quantile(0.5) == 0.0
+
+
+def test_prometheus_and_json(tmp_path):
+    metrics = Metrics()
+    metrics.inc('cases_saved_total', court='HDO')
+    metrics.inc('cases_saved_total', 2, court='HDO')
+    metrics.set('queue_depth', 7, kind='law', status='pending')
+    metrics.observe('http_response_bytes', 3000, host='lagboken.se')
+    with metrics.timer('parse_seconds', extractor='law_title'):
+        pass
+
+    @metrics.timer('parse_seconds', extractor='law_title')
+    def extract():
+        return 'title'
+
+    assert extract() == 'title'
+
+    text = metrics.prometheus()
+    assert 'cases_saved_total{court="HDO"} 3' in text
+    assert 'queue_depth{kind="law",status="pending"} 7' in text
+    assert '# TYPE parse_seconds histogram' in text
+    assert 'parse_seconds_count{extractor="law_title"} 2' in text
+    # _bytes names get byte-sized buckets
+    assert 'http_response_bytes_bucket{host="lagboken.se",le="4096"} 1' in text
+    assert 'http_response_bytes_bucket{host="lagboken.se",le="1024"} 0' in text
+
+    summary = json.loads(metrics.write(tmp_path / "run.json").read_text())
+    assert summary['counters']['cases_saved_total{court="HDO"}'] == 3
+    assert summary['histograms']['parse_seconds{extractor="law_title"}']['count'] == 2
+    assert set(summary['histograms']['http_response_bytes{host="lagboken.se"}']) >= {'p50', 'p95', 'p99'}
+    assert metrics.write(tmp_path / "run.prom").read_text() == text
+
+
+class FakeSession:
+    def __init__(self, statuses):
+        self.headers = {}
+        self.statuses = list(statuses)
+
+    def request(self, method, url, **kwargs):
+        response = requests.Response()
+        response.status_code = self.statuses.pop(0)
+        response._content = b"x" * 2000
+        return response
+
+
+def test_http_client_records_latency_bytes_and_retries():
+    METRICS.reset()
+    session = ResilientSession(session=FakeSession([503, 200]), share_hosts=False, sleep=lambda s: None,
+                               rng=random.Random(0))
+    assert session.get("https://www.lagboken.se/x").status_code == 200
+    summary = METRICS.summary()
+    assert summary['histograms']['http_request_seconds{host="www.lagboken.se",outcome="ok"}']['count'] == 1
+    assert summary['histograms']['http_request_seconds{host="www.lagboken.se",outcome="retry"}']['count'] == 1
+    assert summary['histograms']['http_response_bytes{host="www.lagboken.se"}']['sum'] == 4000
+    assert summary['counters']['http_retries_total{host="www.lagboken.se",outcome="retry"}'] == 1
+    METRICS.reset()
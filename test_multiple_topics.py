@@ -32,10 +32,11 @@ def test_multiple_topics():
         
         # Show what we got
         all_laws = result.get('all_laws', [])
+        topics = {topic['id']: topic for topic in result.get('topics', [])}
         if all_laws:
             print("\nLaws scraped:")
             for i, law in enumerate(all_laws, 1):
-                topic_info = law.get('topic_page_info', {})
+                topic_info = topics.get(law.get('topic_id'), {})
                 topic_title = topic_info.get('title', 'Unknown')
                 law_title = law.get('title', 'Unknown')
                 law_ref = law.get('reference', 'Unknown')
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Pipeline runner: content-hash staleness, early cutoff, parallel stages,
+dry-run explanations and failure isolation, on toy stages.
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "backend" / "src"))
+
+from legal_kg.pipeline import Pipeline, Stage
+
+
+def make_pipeline(root, calls, barrier=None, fail=()):
+    def stage(name, fn):
+        def run():
+            calls.append(name)
+            if barrier is not None and name in ("lower", "count"):
+                # Both branches must be running at once to get past this
+                barrier.wait(timeout=5)
+            if name in fail:
+                raise RuntimeError(f"{name} broke")
+            return fn()
+        return run
+
+    def lower():
+        (root / "lower.txt").write_text((root / "raw.txt").read_text().lower())
+
+    def count():
+        (root / "count.txt").write_text(str(len((root / "raw.txt").read_text().split())))
+
+    def report():
+        (root / "report.txt").write_text((root / "lower.txt").read_text() + (root / "count.txt").read_text())
+
+    stages = [
+        Stage("lower", stage("lower", lower), inputs=("raw.txt",), outputs=("lower.txt",)),
+        Stage("count", stage("count", count), inputs=("raw.txt",), outputs=("count.txt",)),
+        Stage("report", stage("report", report), outputs=("report.txt",), deps=("lower", "count"),
+              params={'format': 'txt'}),
+    ]
+    return Pipeline(stages, root, sqlite3.connect(root / "state.db"))
+
+
+def test_incremental_runs(tmp_path):
+    (tmp_path / "raw.txt").write_text("Hello World")
+    calls = []
+    results = make_pipeline(tmp_path, calls, barrier=threading.Barrier(2)).run(workers=2)
+    assert [r['status'] for r in results] == ["ran", "ran", "ran"]
+    assert calls[2] == "report" and set(calls[:2]) == {"lower", "count"}
+
+    calls.clear()
+    results = make_pipeline(tmp_path, calls).run()
+    assert calls == [] and {r['status'] for r in results} == {"skipped"}
+
+    # A new mtime with the same content is not a change
+    os.utime(tmp_path / "raw.txt", ns=(1, 1))
+    assert make_pipeline(tmp_path, calls).run() and calls == []
+
+    # Same word count and same lower-case text: both rerun, their outputs do not change, report is skipped
+    (tmp_path / "raw.txt").write_text("HELLO world")
+    make_pipeline(tmp_path, calls).run()
+    assert sorted(calls) == ["count", "lower"]
+
+    calls.clear()
+    (tmp_path / "raw.txt").write_text("hello world again")
+    make_pipeline(tmp_path, calls).run()
+    assert sorted(calls) == ["count", "lower", "report"]
+    assert (tmp_path / "report.txt").read_text() == "hello world again3"
+
+
+def test_dry_run_explains(tmp_path):
+    (tmp_path / "raw.txt").write_text("Hello World")
+    calls = []
+    plan = make_pipeline(tmp_path, calls).plan()
+    assert [(d.stage, d.action) for d in plan] == [("lower", "run"), ("count", "run"), ("report", "run")]
+    assert plan[0].reasons == ["never run"] and calls == []
+
+    make_pipeline(tmp_path, calls).run()
+    (tmp_path / "raw.txt").write_text("Hello there World")
+    (tmp_path / "count.txt").unlink()
+    plan = {d.stage: d for d in make_pipeline(tmp_path, calls).plan(force=["lower"])}
+    assert plan["lower"].action == "run" and plan["lower"].reasons[0] == "forced"
+    assert "inputs 1 changed: raw.txt" in plan["lower"].reasons
+    assert "outputs missing: count.txt" in plan["count"].reasons
+    assert plan["report"].action == "maybe"
+
+    pipeline = make_pipeline(tmp_path, calls)
+    pipeline.stages["report"].params = {'format': 'html'}
+    pipeline.run(["lower", "count"])
+    reasons = pipeline.plan(["report"])[-1].reasons
+    assert "lower output changed" in reasons and "parameters changed: format" in reasons
+
+
+def test_failure_blocks_dependants_only(tmp_path):
+    (tmp_path / "raw.txt").write_text("Hello World")
+    calls = []
+    results = {r['stage']: r for r in make_pipeline(tmp_path, calls, fail=("lower",)).run()}
+    assert results["lower"]['status'] == "failed" and "broke" in results["lower"]['error']
+    assert results["count"]['status'] == "ran" and results["report"]['status'] == "blocked"
+
+    calls.clear()
+    make_pipeline(tmp_path, calls).run()
+    assert calls == ["lower", "report"]
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Per-stage profiling: folded stacks, cProfile output, tracemalloc allocations
+and the summary, on a toy run.
+"""
+
+import json
+import pstats
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "backend" / "src"))
+
+from legal_kg.profiling import PROFILER, profiling
+
+
+def spin(n):
+    return sum(i * i for i in range(n))
+
+
+def allocate():
+    return [str(i) * 10 for i in range(5000)]
+
+
+def test_profile_run(tmp_path):
+    kept = []
+    with profiling(tmp_path / "run", "ingest", interval=0.001):
+        for _ in range(3):
+            with PROFILER.stage("parse"):
+                spin(50000)
+                kept.append(allocate())
+                with PROFILER.stage("write"):
+                    spin(20000)
+        # Nested entry points do not start a second run
+        with profiling(tmp_path / "other", "nested"):
+            spin(10000)
+    assert not PROFILER.enabled and not (tmp_path / "other").exists()
+
+    run = tmp_path / "run"
+    summary = json.loads((run / "summary.json").read_text())
+    stages = summary['stages']
+    assert set(stages) == {"ingest", "parse", "write"}
+    assert stages["parse"]['entries'] == 3 and stages["write"]['entries'] == 3
+    # 1st and 2nd entry are snapshotted, the 3rd is not
+    assert stages["parse"]['allocation_snapshots'] == 2
+    assert stages["parse"]['seconds'] >= stages["write"]['seconds'] > 0
+    assert stages["parse"]['peak_traced_bytes'] > 0
+    top = stages["parse"]['top_allocations'][0]
+    assert top['line'].endswith(f"test_profiling.py:{allocate.__code__.co_firstlineno + 1}")
+    assert top['size_diff'] > 0
+
+    # Folded stacks: "frame;frame;... count", the nested stage's frames also under the outer one
+    folded = (run / "parse.folded").read_text().splitlines()
+    assert folded and all(line.rsplit(" ", 1)[1].isdigit() for line in folded)
+    assert any("spin (test_profiling.py" in line for line in folded)
+    assert stages["parse"]['samples'] >= stages["write"]['samples']
+
+    # cProfile time goes to the innermost stage
+    parse_stats = pstats.Stats(str(run / "parse.pstats")).stats
+    write_stats = pstats.Stats(str(run / "write.pstats")).stats
+    assert any(func[2] == "allocate" for func in parse_stats)
+    assert not any(func[2] == "allocate" for func in write_stats)
+    assert "Top allocations" in (run / "parse.txt").read_text()
+
+
+def test_disabled_is_a_no_op(tmp_path):
+    with profiling(None, "off"):
+        with PROFILER.stage("parse"):
+            spin(1000)
+    assert not PROFILER.enabled and PROFILER.stats == {}
+
+
+def test_nested_stage_keeps_outer_peak(tmp_path):
+    with profiling(tmp_path / "run", "peaks", interval=0.01):
+        with PROFILER.stage("parse"):
+            # A large temporary freed before the inner stage resets the peak
+            allocate()
+            with PROFILER.stage("write"):
+                spin(1000)
+    stages = json.loads((tmp_path / "run" / "summary.json").read_text())['stages']
+    assert stages["parse"]['peak_traced_bytes'] > 5000 * 50 > stages["write"]['peak_traced_bytes']
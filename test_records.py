@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Slotted record types: round trips to dicts and JSON, interned topics.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent / "backend" / "src"))
+
+from legal_kg.models import CaseRecord, CrawledPage, LawRecord, TopicTable, topics_path
+
+TOPIC_URL = "https://www.lagboken.se/lagboken/start/arbetsratt-och-arbetsmiljoratt/"
+TOPIC_INFO = {'title': "Arbetsrätt och arbetsmiljörätt", 'description': "Lagar om arbete"}
+LAW = {
+    'url': "https://www.lagboken.se/lagboken/start/arbetsratt-och-arbetsmiljoratt/semesterlag-1977480/"
+           "d_1564-semesterlag-1977_480",
+    'scraped_at': "2025-07-01T12:00:00",
+    'title': "Semesterlag (1977:480)",
+    'description': "Lagboken är en juridisk databas",
+    'metadata': {'SFS nr': "1977:480", 'Utfärdad': "1977-06-09"},
+    'important_laws': [{'title': "Lag om anställningsskydd", 'reference': "1982:80", 'url': ""}],
+    'sitemap_lastmod': "2025-05-30T10:00:00Z",
+}
+CASE = {
+    "case_number": "B 1462-25", "nickname": "”Provokationen”", "summary": "Fråga om provokation.",
+    "decision_date": "2025-06-04", "publication_time": "2025-06-05T08:00:00", "case_id": "abc",
+    "type": "DOM_ELLER_BESLUT", "is_precedent": True, "court": "Högsta domstolen", "court_code": "HDO",
+    "keywords": ["Provokation"], "legal_areas": ["Straffrätt"],
+    "legal_references": [{"reference": "29 kap. 3 § brottsbalken (1962:700)", "sfs_number": "1962:700"}],
+    "referenced_publications": ["NJA 2017 s. 589"], "pdf_documents": [], "case_url": "", "correlation_number": "1",
+    "full_text": "Högsta domstolen meddelar ...",
+}
+
+
+def test_records_are_slotted():
+    for record in (CaseRecord.from_dict(CASE), LawRecord.from_dict(LAW),
+                   CrawledPage(url="https://www.lagboken.se/", domain="www.lagboken.se", path="/")):
+        assert not hasattr(record, "__dict__")
+        with pytest.raises(AttributeError):
+            record.not_a_field = 1
+
+
+def test_case_round_trip():
+    case = CaseRecord.from_dict(CASE)
+    assert case.case_type == "DOM_ELLER_BESLUT" and case.extra == {"full_text": CASE["full_text"]}
+    assert case.to_dict() == CASE
+    assert CaseRecord.from_json(case.to_json()) == case
+    # Repeated values are shared between records
+    other = CaseRecord.from_dict(json.loads(json.dumps(CASE)))
+    assert other.court is case.court and other.keywords[0] is case.keywords[0]
+
+
+def test_law_topics_are_interned():
+    topics = TopicTable()
+    first = LawRecord.from_dict({**LAW, 'topic_page_url': TOPIC_URL, 'topic_page_info': dict(TOPIC_INFO)},
+                                topics=topics)
+    second = LawRecord.from_dict({'title': "Lag (1982:80) om anställningsskydd", 'reference': "1982:80",
+                                  'url': "", 'topic_page_url': TOPIC_URL, 'topic_page_info': dict(TOPIC_INFO)},
+                                 topics=topics)
+    assert first.reference == "1977:480"
+    assert len(topics) == 1 and first.topic is second.topic
+
+    data = first.to_dict()
+    assert data['topic_id'] == 0 and 'topic_page_info' not in data
+    assert data['sitemap_lastmod'] == LAW['sitemap_lastmod']
+    expanded = first.to_dict(expand_topic=True)
+    assert expanded['topic_page_info'] == TOPIC_INFO and expanded['topic_page_url'] == TOPIC_URL
+
+    # The compact form reads back against the stored topic table
+    restored = TopicTable.from_list(json.loads(json.dumps(topics.to_list())))
+    again = LawRecord.from_json(first.to_json(), topics=restored)
+    assert again.topic == first.topic and again.to_dict() == data
+
+
+def test_jsonl_topic_sidecar(tmp_path):
+    laws = tmp_path / "laws.jsonl"
+    assert topics_path(laws) == tmp_path / "laws.topics.json"
+    assert len(TopicTable.load(topics_path(laws))) == 0
+
+    topics = TopicTable()
+    line = LawRecord.from_dict(LAW, topic=topics.intern(TOPIC_URL, TOPIC_INFO)).to_json()
+    topics.save(topics_path(laws))
+    law = LawRecord.from_json(line, topics=TopicTable.load(topics_path(laws)))
+    assert law.topic.url == TOPIC_URL and law.topic.info() == TOPIC_INFO
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Refresh scheduler: the re-check interval from the observed change rate and
+the prior, the daily request budget, and backoff for laws that keep failing.
+"""
+
+import math
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent / "backend" / "src"))
+
+from legal_kg.refresh import (MAX_INTERVAL_DAYS, MIN_INTERVAL_DAYS, PRIOR_DAYS, TARGET_CHANGE_PROBABILITY,
+                              RefreshScheduler)
+
+NOW = datetime(2025, 7, 1, 12, 0)
+
+
+def law(marker, sfs="1977:480"):
+    return {'title': "Semesterlag (1977:480)", 'metadata': {'SFS nr': sfs, 'Ändring införd': marker}}
+
+
+def row(days_observed, changes, year=None):
+    return {'first_seen': (NOW - timedelta(days=days_observed)).isoformat(), 'changes': changes,
+            'last_amended_year': year}
+
+
+def test_interval_from_change_rate_and_prior():
+    scheduler = RefreshScheduler(sqlite3.connect(":memory:"))
+    # Unobserved: the prior alone, one change per PRIOR_DAYS
+    prior = -math.log(1 - TARGET_CHANGE_PROBABILITY) * PRIOR_DAYS
+    assert scheduler.interval_days(row(0, 0), NOW) == pytest.approx(prior)
+    # Stable for a long time: capped
+    assert scheduler.interval_days(row(3650, 0), NOW) == MAX_INTERVAL_DAYS
+    # Changes often: shorter, down to the floor
+    assert scheduler.interval_days(row(300, 5), NOW) == pytest.approx(prior * (300 + PRIOR_DAYS) / PRIOR_DAYS / 6)
+    assert scheduler.interval_days(row(30, 200), NOW) == MIN_INTERVAL_DAYS
+    # Amended recently: halved
+    assert scheduler.interval_days(row(0, 0, year=2025), NOW) == pytest.approx(prior / 2)
+    assert scheduler.interval_days(row(0, 0, year=2010), NOW) == pytest.approx(prior)
+
+
+def test_record_and_daily_budget():
+    conn = sqlite3.connect(":memory:")
+    scheduler = RefreshScheduler(conn, daily_budget=2)
+    for n in range(3):
+        scheduler.register(f"https://www.lagboken.se/lag-{n}", now=NOW - timedelta(days=1))
+    assert len(scheduler.plan(now=NOW)) == 2
+
+    assert not scheduler.record("https://www.lagboken.se/lag-0", law("t.o.m. SFS 2024:1"), now=NOW)
+    assert scheduler.record("https://www.lagboken.se/lag-0", law("t.o.m. SFS 2025:10"), now=NOW)
+    assert scheduler.remaining_budget(NOW) == 0 and scheduler.plan(now=NOW) == []
+    assert conn.execute("SELECT COUNT(*) FROM law_changes").fetchone()[0] == 1
+
+    # A new day, a new budget; the two unchecked laws come first
+    tomorrow = NOW + timedelta(days=1)
+    assert sorted(scheduler.plan(now=tomorrow)) == ["https://www.lagboken.se/lag-1", "https://www.lagboken.se/lag-2"]
+
+
+def test_failures_back_off_exponentially():
+    conn = sqlite3.connect(":memory:")
+    scheduler = RefreshScheduler(conn, daily_budget=1000)
+    url = "https://www.lagboken.se/borttagen"
+    scheduler.register(url, now=NOW)
+
+    def next_due():
+        return datetime.fromisoformat(conn.execute("SELECT next_due FROM law_refresh").fetchone()[0])
+
+    now, delays = NOW, []
+    for _ in range(9):
+        scheduler.record_failure(url, now=now)
+        delays.append((next_due() - now).days)
+        now = next_due()
+    assert delays == [1, 2, 4, 8, 16, 32, 64, 90, 90]
+    assert scheduler.freshness_report(now)['failing'] == 1
+
+    # A success resets the backoff
+    scheduler.record(url, law("t.o.m. SFS 2024:1"), now=now)
+    scheduler.record_failure(url, now=now)
+    assert (next_due() - now).days == 1
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+The law URL resolver: verified and negative entries with their TTLs, the
+sitemap table as a source, and what the law scraper and the graph loader
+record and read (no network).
+"""
+
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+import requests
+
+sys.path.append(str(Path(__file__).parent / "backend" / "src"))
+
+from legal_kg.graph import build_graph
+from legal_kg.resolver import DAY, UrlResolver
+from law_datascraper import LawDataScraper
+
+FIXTURES = Path(__file__).parent / "fixtures" / "lagboken"
+SEMESTERLAG = ("https://www.lagboken.se/lagboken/start/arbetsratt-och-arbetsmiljoratt/semesterlag-1977480/"
+               "d_1564-semesterlag-1977_480")
+OLD_LINK = "https://www.lagboken.se/lagboken/start/arbetsratt/semesterlag"
+GONE = "https://www.lagboken.se/lagboken/start/arbetsratt/semesterlag-gammal"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeResponse:
+    def __init__(self, url, status=200, content=b""):
+        self.url = url
+        self.status_code = status
+        self.content = content
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} for {self.url}", response=self)
+
+
+class FakeSession:
+    """OLD_LINK redirects to SEMESTERLAG, GONE is a 404"""
+
+    def __init__(self):
+        self.requested = []
+
+    def get(self, url, **kwargs):
+        self.requested.append(url)
+        if url in (OLD_LINK, SEMESTERLAG):
+            return FakeResponse(SEMESTERLAG, content=(FIXTURES / "law_semesterlag.html").read_bytes())
+        return FakeResponse(url, status=404)
+
+
+def scraper_on(conn):
+    scraper = LawDataScraper.__new__(LawDataScraper)
+    scraper.driver = None
+    scraper.session = FakeSession()
+    scraper.resolver = UrlResolver(conn)
+    return scraper
+
+
+def test_entries_expire(tmp_path):
+    conn = sqlite3.connect(tmp_path / "kg.db")
+    clock = Clock()
+    resolver = UrlResolver(conn, clock=clock)
+    assert resolver.resolve("1977:480", [None, "javascript:void(0)", OLD_LINK]) == OLD_LINK
+    resolver.record("1977:480", SEMESTERLAG)
+    assert resolver.resolve("1977:480", [OLD_LINK]) == SEMESTERLAG
+    # Another process sees it, and it is trusted for 30 days
+    assert UrlResolver(conn, clock=clock).lookup("1977:480") == SEMESTERLAG
+    clock.now += 31 * DAY
+    assert resolver.lookup("1977:480") is None
+    assert resolver.resolve("1977:480", [OLD_LINK]) == OLD_LINK
+
+    # A broken guess is not handed out again; with only broken guesses the law is missing
+    resolver.record_bad(GONE, "1974:358", 404)
+    assert resolver.is_bad(GONE)
+    assert resolver.resolve("1974:358", [GONE]) is None
+    assert resolver.is_missing("1974:358")
+    # A link not tried before still is
+    assert resolver.resolve("1974:358", ["https://www.lagboken.se/other"]) == "https://www.lagboken.se/other"
+    # Negative entries are kept for 7 days
+    clock.now += 8 * DAY
+    assert not resolver.is_bad(GONE) and not resolver.is_missing("1974:358")
+    assert resolver.resolve("1974:358", [GONE]) == GONE
+
+
+def test_sitemap_urls_are_used_until_they_break(tmp_path):
+    conn = sqlite3.connect(tmp_path / "kg.db")
+    clock = Clock()
+    resolver = UrlResolver(conn, clock=clock)
+    resolver.record_bad(GONE, "1977:480", 404)
+    resolver.resolve("1977:480", [GONE])
+    assert resolver.is_missing("1977:480")
+
+    # Listed by the sitemaps since: no longer missing, and no TTL
+    conn.execute("INSERT INTO law_urls (reference, url, lastmod) VALUES (?, ?, ?)",
+                 ("1977:480", SEMESTERLAG, "2025-05-30T10:00:00Z"))
+    resolver = UrlResolver(conn, clock=clock)
+    clock.now += 100 * DAY
+    assert resolver.lookup("1977:480") == SEMESTERLAG
+    assert resolver.known_urls() == {"1977:480": SEMESTERLAG}
+
+    resolver.record_bad(SEMESTERLAG, "1977:480", 410)
+    assert resolver.lookup("1977:480") is None and resolver.known_urls() == {}
+
+
+def test_scraper_records_redirects_and_broken_links(tmp_path):
+    conn = sqlite3.connect(tmp_path / "kg.db")
+    scraper = scraper_on(conn)
+    law = scraper.scrape_law_page(OLD_LINK)
+    assert law['title'] and scraper.resolver.lookup("1977:480") == SEMESTERLAG
+
+    assert scraper.scrape_law_page(GONE) is None
+    assert scraper.resolver.is_bad(GONE)
+    # A new scraper resolves from the cache and never requests the guess
+    other = scraper_on(conn)
+    assert other._resolve_law_url("1977:480", [OLD_LINK]) == SEMESTERLAG
+    assert other._resolve_law_url("1974:358", [GONE]) == ""
+    assert other.session.requested == []
+
+
+def test_graph_law_nodes_get_verified_urls(tmp_path):
+    conn = sqlite3.connect(tmp_path / "kg.db")
+    resolver = UrlResolver(conn)
+    resolver.record("1977:480", SEMESTERLAG)
+    resolver.record_bad(GONE, "1982:80", 404)
+    cases = [{"case_number": "B 1-25", "legal_references": [
+        {"reference": "semesterlagen (1977:480)", "sfs_number": "1977:480"},
+        {"reference": "brottsbalken (1962:700)", "sfs_number": "1962:700"}]}]
+    laws = [{"title": "Lag (1982:80) om anställningsskydd", "url": GONE, "metadata": {"SFS nr": "1982:80"}}]
+    build_graph(conn, cases=cases, laws=laws)
+    data = {node: json.loads(value) if value else None for node, value in
+            conn.execute("SELECT id, data FROM graph_nodes WHERE kind = 'law'")}
+    assert data["law:1977:480"] == {'sfs': "1977:480", 'url': SEMESTERLAG}
+    assert data["law:1962:700"] is None
+    assert data["law:1982:80"]['url'] is None
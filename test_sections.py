@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Incremental section sync: unchanged sections are skipped by content hash,
+changed ones are rewritten and re-linked, removed ones are deleted, and a
+repeated § gets a '~n' id.
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "backend" / "src"))
+
+from legal_kg.database import init_section_tables
+from legal_kg.sections import sync_law_sections
+
+SFS = "1977:480"
+
+
+def sections(second_text, repealed=True):
+    law = [
+        {'paragraph': "1", 'heading': "Tillämpning", 'text': "Lagen gäller arbetstagare."},
+        {'paragraph': "2", 'text': second_text},
+        {'paragraph': "3", 'text': "Semesterledighet är 25 dagar. Se 1 §."},
+    ]
+    if repealed:
+        # A repealed version of 3 § printed next to the one in force
+        law.append({'paragraph': "3", 'text': "Upphävd genom lag (2009:1439)."})
+    return law
+
+
+def references(conn):
+    return sorted(conn.execute(
+        "SELECT section_id, target_sfs, target_section_id, reference FROM section_references"
+    ).fetchall(), key=lambda row: tuple(value or '' for value in row))
+
+
+def test_resync_skips_unchanged_relinks_changed_and_deletes_removed():
+    conn = sqlite3.connect(":memory:")
+    init_section_tables(conn)
+
+    first = sync_law_sections(conn, SFS, sections("Ledighet enligt 1 § ges efter ansökan."))
+    assert first == {'added': 4, 'changed': 0, 'unchanged': 0, 'removed': 0}
+    rows = conn.execute("SELECT id, position FROM law_sections ORDER BY position").fetchall()
+    assert rows == [("1977:480/1§", 0), ("1977:480/2§", 1), ("1977:480/3§", 2), ("1977:480/3§~2", 3)]
+    assert references(conn) == [
+        ("1977:480/2§", SFS, "1977:480/1§", "1 §"),
+        ("1977:480/3§", SFS, "1977:480/1§", "1 §"),
+        ("1977:480/3§~2", "2009:1439", None, "2009:1439"),
+    ]
+    hashes = dict(conn.execute("SELECT id, content_hash FROM law_sections"))
+
+    second = sync_law_sections(conn, SFS, sections("Ledighet enligt 3 § ges efter ansökan.", repealed=False))
+    assert second == {'added': 0, 'changed': 1, 'unchanged': 2, 'removed': 1}
+    rows = dict(conn.execute("SELECT id, text FROM law_sections"))
+    assert sorted(rows) == ["1977:480/1§", "1977:480/2§", "1977:480/3§"]
+    assert rows["1977:480/2§"] == "Ledighet enligt 3 § ges efter ansökan."
+    assert dict(conn.execute("SELECT id, content_hash FROM law_sections WHERE id != '1977:480/2§'")) == \
+        {sid: digest for sid, digest in hashes.items() if sid in ("1977:480/1§", "1977:480/3§")}
+    assert references(conn) == [
+        ("1977:480/2§", SFS, "1977:480/3§", "3 §"),
+        ("1977:480/3§", SFS, "1977:480/1§", "1 §"),
+    ]
+
+    # Nothing changed: nothing is written
+    assert sync_law_sections(conn, SFS, sections("Ledighet enligt 3 § ges efter ansökan.", repealed=False)) == \
+        {'added': 0, 'changed': 0, 'unchanged': 3, 'removed': 0}
+    conn.close()
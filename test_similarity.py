@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+TF-IDF similarity index on a handful of documents.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "backend" / "src"))
+
+from legal_kg.similarity import SimilarityIndex, tokenize
+
+DOCS = [
+    ("B 1-25", "Skadestånd till målsägande efter misshandel. Provokation från målsäganden."),
+    ("B 2-25", "Fråga om skadeståndet till målsäganden vid misshandel och provokation."),
+    ("T 3-25", "Hyresavtal för lokal, uppsägning av hyresgästen."),
+    ("T 4-25", "Uppsägning av hyresavtalet för lokalen och hyresgästens besittningsskydd."),
+    ("Ö 5-25", "Prövningstillstånd meddelas inte."),
+]
+
+
+def test_swedish_normalization():
+    assert tokenize("Skadeståndet och skadestånden, enligt 1972:207") == ["skadestånd", "skadestånd", "1972", "207"]
+
+
+def test_related_and_search():
+    index = SimilarityIndex()
+    index.add_many(DOCS)
+    assert index.related("B 1-25", k=1)[0][0] == "B 2-25"
+    assert [doc_id for doc_id, _ in index.related("T 3-25", k=4)][:1] == ["T 4-25"]
+    assert all(doc_id != "B 1-25" for doc_id, _ in index.related("B 1-25", k=10))
+    assert index.search("uppsägning av lokalhyra", k=2)[0][0] in ("T 3-25", "T 4-25")
+    assert index.search("ingenting känt", k=3) == []
+    batch = index.related_batch(["B 2-25", "T 4-25"], k=1)
+    assert [hits[0][0] for hits in batch] == ["B 1-25", "T 3-25"]
+
+
+def test_save_load_and_incremental_add(tmp_path):
+    index = SimilarityIndex()
+    index.add_many(DOCS[:4])
+    index.save(tmp_path / "cases")
+
+    loaded = SimilarityIndex.load(tmp_path / "cases")
+    assert loaded.related("B 1-25", k=3) == index.related("B 1-25", k=3)
+    loaded.add("B 6-25", "Misshandel och provokation, skadestånd till målsäganden.")
+    assert loaded.related("B 6-25", k=1)[0][0] in ("B 1-25", "B 2-25")
+    assert len(loaded) == 5 and loaded.matrix.shape[0] == 5
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Sitemap discovery against the recorded sitemaps: incremental parsing,
+lastmod skipping and the SFS -> URL table (no network).
+"""
+
+import gzip
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent / "backend" / "src"))
+
+from legal_kg.metrics import METRICS
+from legal_kg.sitemap import (SitemapDiscovery, iter_sitemap, law_reference_from_url, load_law_urls,
+                              normalize_lastmod, resolve_law_url)
+
+FIXTURES = Path(__file__).parent / "fixtures" / "lagboken"
+SITEMAPS = {
+    "https://www.lagboken.se/sitemap.xml": "sitemap_index.xml",
+    "https://www.lagboken.se/sitemap-laws.xml": "sitemap_laws.xml",
+    "https://www.lagboken.se/sitemap-pages.xml": "sitemap_pages.xml",
+}
+SEMESTERLAG = ("https://www.lagboken.se/lagboken/start/arbetsratt-och-arbetsmiljoratt/semesterlag-1977480/"
+               "d_1564-semesterlag-1977_480")
+
+
+class FixtureFetch:
+    """Serves the fixture files in small chunks, as a streamed response would"""
+
+    def __init__(self, files, chunk_size=97):
+        self.files = dict(files)
+        self.chunk_size = chunk_size
+        self.fetched = []
+
+    def __call__(self, url):
+        self.fetched.append(url)
+        if url not in self.files:
+            raise IOError(f"404 {url}")
+        data = self.files[url]
+        for i in range(0, len(data), self.chunk_size):
+            yield data[i:i + self.chunk_size]
+
+
+def fixture_files(**overrides):
+    files = {url: (FIXTURES / name).read_bytes() for url, name in SITEMAPS.items()}
+    files.update(overrides)
+    return files
+
+
+def test_law_reference_from_url():
+    assert law_reference_from_url(SEMESTERLAG) == "1977:480"
+    assert law_reference_from_url(SEMESTERLAG + "/") == "1977:480"
+    # An amendment is its own SFS number
+    assert law_reference_from_url("https://www.lagboken.se/lagboken/start/a/semesterlag-1977480/"
+                                  "d_1851956-sfs-2013_950-lag-om-andring-i-semesterlagen-1977_480/") == "2013:950"
+    assert law_reference_from_url("https://www.lagboken.se/lagboken/start/arbetsratt-och-arbetsmiljoratt/") is None
+    assert law_reference_from_url("https://www.lagboken.se/om-lagboken/") is None
+
+
+def test_iter_sitemap_plain_and_gzipped():
+    data = (FIXTURES / "sitemap_laws.xml").read_bytes()
+    plain = list(iter_sitemap(data[i:i + 50] for i in range(0, len(data), 50)))
+    assert len(plain) == 6 and all(kind == "url" for kind, _ in plain)
+    assert plain[0][1] == {'loc': SEMESTERLAG, 'lastmod': "2025-05-30T10:00:00Z"}
+    assert plain[4][1]['lastmod'] is None
+    packed = gzip.compress(data)
+    assert list(iter_sitemap(packed[i:i + 50] for i in range(0, len(packed), 50))) == plain
+    index = list(iter_sitemap([(FIXTURES / "sitemap_index.xml").read_bytes()]))
+    assert [kind for kind, _ in index] == ["sitemap", "sitemap"]
+    assert normalize_lastmod("2025-05-20") == "2025-05-20T00:00:00Z"
+    assert normalize_lastmod("not a date") is None
+
+
+def test_discovery_skips_unchanged(tmp_path):
+    conn = sqlite3.connect(tmp_path / "kg.db")
+    fetch = FixtureFetch(fixture_files())
+    stats = SitemapDiscovery(conn, fetch).discover()
+    assert stats['sitemaps_read'] == 3 and stats['urls'] == 9 and stats['laws'] == 6
+    assert sorted(law['reference'] for law in stats['changed']) == ["1974:358", "1977:1160", "1977:480",
+                                                                    "1997:1293", "2013:950"]
+    assert resolve_law_url(conn, "1977:480") == SEMESTERLAG
+    assert resolve_law_url(conn, "1982:80") is None
+    assert len(load_law_urls(conn)) == 5
+
+    # Same index: the child sitemaps are not fetched again
+    fetch = FixtureFetch(fixture_files())
+    stats = SitemapDiscovery(conn, fetch).discover()
+    assert fetch.fetched == ["https://www.lagboken.se/sitemap.xml"]
+    assert stats['sitemaps_skipped'] == 2 and stats['changed'] == []
+
+    # The laws sitemap moved: only the law whose lastmod moved is changed, and the
+    # law without a lastmod, which cannot be told apart from a changed one
+    laws = (FIXTURES / "sitemap_laws.xml").read_bytes().replace(b"2025-01-15", b"2025-06-01")
+    index = (FIXTURES / "sitemap_index.xml").read_bytes().replace(b"08:15:00", b"09:00:00")
+    fetch = FixtureFetch(fixture_files(**{"https://www.lagboken.se/sitemap.xml": index,
+                                          "https://www.lagboken.se/sitemap-laws.xml": laws}))
+    stats = SitemapDiscovery(conn, fetch).discover()
+    assert "https://www.lagboken.se/sitemap-pages.xml" not in fetch.fetched
+    assert sorted(law['reference'] for law in stats['changed']) == ["1974:358", "1977:1160"]
+    assert stats['unchanged'] == 4
+
+
+def test_failed_child_is_read_again(tmp_path):
+    conn = sqlite3.connect(tmp_path / "kg.db")
+    files = fixture_files()
+    del files["https://www.lagboken.se/sitemap-laws.xml"]
+    METRICS.reset()
+    stats = SitemapDiscovery(conn, FixtureFetch(files)).discover()
+    assert stats['failed'] == ["https://www.lagboken.se/sitemap-laws.xml"] and stats['changed'] == []
+    assert METRICS.summary()['counters']['sitemap_failures_total'] == 1
+    METRICS.reset()
+
+    fetch = FixtureFetch(fixture_files())
+    stats = SitemapDiscovery(conn, fetch).discover()
+    assert fetch.fetched == ["https://www.lagboken.se/sitemap.xml", "https://www.lagboken.se/sitemap-laws.xml"]
+    assert len(stats['changed']) == 5
+
+    with pytest.raises(IOError):
+        SitemapDiscovery(conn, FixtureFetch({})).discover()
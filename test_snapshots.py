@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Snapshot store: dedup by content hash across runs, writes that skip
+unchanged files, snapshot order, diff, checkout and gc during a run.
+"""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "backend" / "src"))
+
+from legal_kg.snapshots import SnapshotStore
+
+
+def test_snapshot_dedups_by_hash(tmp_path):
+    store = SnapshotStore(tmp_path / "store")
+    cases = tmp_path / "cases"
+    (cases / "B 1-24").mkdir(parents=True)
+    (cases / "B 1-24" / "B 1-24.json").write_text('{"case_number": "B 1-24"}', encoding="utf-8")
+    # Same content under two paths is stored once
+    (cases / "B 1-24" / "dom.pdf").write_bytes(b"%PDF-1.4 dom")
+    (cases / "B 1-24" / "kopia.pdf").write_bytes(b"%PDF-1.4 dom")
+
+    first = store.take_snapshot(cases, name="run1")
+    assert first["files"] == 3 and first["new_objects"] == 2
+
+    (cases / "B 1-24" / "dom.pdf").write_bytes("%PDF-1.4 dom, rättad".encode("utf-8"))
+    second = store.take_snapshot(cases, name="run2")
+    assert second["parent"] == "run1"
+    assert second["hashed"] == 1 and second["new_objects"] == 1
+    assert store.diff("run1", "run2") == {"added": [], "removed": [], "changed": ["B 1-24/dom.pdf"]}
+    assert len(list(store.objects_dir.glob("*/*"))) == 3
+
+
+def test_write_skips_unchanged_files(tmp_path):
+    store = SnapshotStore(tmp_path / "store")
+    path = tmp_path / "cases" / "B 1-24" / "B 1-24.json"
+    assert store.write(path, b'{"summary": "Fr\xc3\xa5ga"}')
+    os.utime(path, ns=(1, 1))
+    assert not store.write(path, b'{"summary": "Fr\xc3\xa5ga"}')
+    assert path.stat().st_mtime_ns == 1
+    assert store.write(path, b'{"summary": "Ny"}') and path.read_bytes() == b'{"summary": "Ny"}'
+
+    part = tmp_path / "dom.pdf.part"
+    part.write_bytes(b'{"summary": "Ny"}')
+    assert not store.adopt(part, path) and not part.exists()
+    assert len(list(store.objects_dir.glob("*/*"))) == 2
+
+
+def test_list_order_and_checkout(tmp_path):
+    store = SnapshotStore(tmp_path / "store")
+    cases = tmp_path / "cases"
+    cases.mkdir()
+    (cases / "a.json").write_text("1", encoding="utf-8")
+    store.take_snapshot(cases, name="b-later")
+    store.take_snapshot(cases, name="a-earlier")
+    # Listed by created_at, not by name or file mtime
+    manifest = store.snapshots_dir / "a-earlier.json"
+    data = json.loads(manifest.read_text(encoding="utf-8"))
+    data["created_at"] = "2000-01-01T00:00:00"
+    manifest.write_text(json.dumps(data), encoding="utf-8")
+    assert store.list_snapshots() == ["a-earlier", "b-later"]
+
+    out = tmp_path / "out"
+    assert store.checkout("b-later", out) == 1
+    # Writing to a checked-out file in place leaves the stored object alone
+    with open(out / "a.json", "w", encoding="utf-8") as f:
+        f.write("2")
+    store.checkout("b-later", tmp_path / "again")
+    assert (tmp_path / "again" / "a.json").read_text(encoding="utf-8") == "1"
+
+
+def test_gc_during_a_run(tmp_path):
+    store = SnapshotStore(tmp_path / "store")
+    cases = tmp_path / "cases"
+    store.write(cases / "old.json", b"gammal")
+    store.take_snapshot(cases, name="run1")
+    (cases / "old.json").unlink()
+
+    # A run in progress: its blobs are stored, no manifest refers to them yet
+    store.write(cases / "new.json", b"ny")
+    stray = store.object_path("ab" * 32).with_name("abab.123.tmp")
+    stray.parent.mkdir(parents=True, exist_ok=True)
+    stray.write_bytes(b"halvskriven")
+    assert store.gc() == 0 and stray.exists()
+    assert store.disk_usage() == len(b"gammal") + len(b"ny")
+    store.take_snapshot(cases, name="run2")
+    assert store.checkout("run2", tmp_path / "out") == 1
+
+    # Past the grace period, only what no snapshot refers to goes
+    past = time.time() - 3600
+    for path in store.objects_dir.glob("*/*"):
+        os.utime(path, (past, past))
+    store.snapshots_dir.joinpath("run1.json").unlink()
+    assert store.gc(grace_seconds=60) == 1 and stray.exists()
+    assert [p.name for p in store.objects_dir.glob("*/*") if not p.name.endswith(".tmp")] == \
+        [store.load_manifest("run2")["files"]["new.json"]["hash"]]
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Synthetic corpus: the profile measured from cases/, deterministic slices,
+citations that resolve to generated laws, and the graph built from them.
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "backend" / "src"))
+
+from legal_kg.citations import parse_citation
+from legal_kg.graph import build_graph
+from legal_kg.synthetic import BLOCK, CorpusProfile, SyntheticCorpus
+
+
+def test_profile_round_trip(tmp_path):
+    profile = CorpusProfile.from_corpus(laws=[])
+    assert profile.cases > 0 and profile.references and profile.words
+    profile.save(tmp_path / "profile.json")
+    assert CorpusProfile.load(tmp_path / "profile.json") == profile
+
+
+def test_deterministic_slices():
+    profile = CorpusProfile.from_corpus(laws=[])
+    corpus = SyntheticCorpus(profile, cases=3 * BLOCK, laws=200, seed=7)
+    full = list(corpus.cases(with_text=False))
+    assert len(full) == 3 * BLOCK and len({case['case_number'] for case in full}) == len(full)
+
+    again = SyntheticCorpus(profile, cases=3 * BLOCK, laws=200, seed=7)
+    assert list(again.cases(BLOCK - 5, BLOCK + 5, with_text=False)) == full[BLOCK - 5:BLOCK + 5]
+    with_text = list(again.cases(0, 20))
+    assert all(case['full_text'] for case in with_text)
+    assert [{k: v for k, v in case.items() if k != 'full_text'} for case in with_text] == full[:20]
+    assert list(SyntheticCorpus(profile, cases=20, laws=200, seed=8).cases(with_text=False)) != full[:20]
+
+    laws = {sfs for sfs, _, _, _ in corpus.law_table}
+    for case in full[:200]:
+        for ref in case['legal_references']:
+            citation = parse_citation(ref['reference'])
+            assert citation is not None and citation.sfs == ref['sfs_number'] in laws
+
+
+def test_graph_from_synthetic_corpus():
+    corpus = SyntheticCorpus(CorpusProfile.from_corpus(laws=[]), cases=300, laws=100, seed=1)
+    conn = sqlite3.connect(":memory:")
+    laws = list(corpus.laws())
+    assert all(corpus.topics[law['topic_id']].url in law['url'] for law in laws)
+    stats = build_graph(conn, cases=corpus.cases(), laws=laws)
+    kinds = dict(conn.execute("SELECT kind, COUNT(*) FROM graph_nodes GROUP BY kind").fetchall())
+    assert kinds['case'] == 300 and kinds['law'] >= 100
+    assert stats['edges'] > conn.execute("SELECT COUNT(*) FROM graph_edges WHERE kind = 'cites'").fetchone()[0] > 0
+    conn.close()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Versioned law store: intervals of law and section versions, shared texts
+for unchanged sections, and as-of lookups for a day and for a case.
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent / "backend" / "src"))
+
+from legal_kg.lawstream import iter_law_events
+from legal_kg.temporal import TemporalLawStore, amended_by, in_force_from
+
+FIXTURES = Path(__file__).parent / "fixtures" / "lagboken"
+
+
+def load_law(page):
+    law = {'sections': []}
+    for kind, value in iter_law_events([(FIXTURES / page).read_bytes()]):
+        if kind == "section":
+            law['sections'].append(value)
+        elif kind in ("title", "metadata"):
+            law[kind] = value
+    return law
+
+
+@pytest.fixture
+def store():
+    conn = sqlite3.connect(":memory:")
+    yield TemporalLawStore(conn)
+    conn.close()
+
+
+def amend(law, index, text, marker):
+    sections = [dict(s) for s in law['sections']]
+    if text is None:
+        del sections[index]
+    else:
+        sections[index] = {**sections[index], 'text': text}
+    return {**law, 'sections': sections, 'metadata': {**law['metadata'], 'Ändring införd': f"t.o.m. SFS {marker}"}}
+
+
+def test_versions_share_unchanged_sections(store):
+    law = load_law("law_semesterlag.html")
+    assert in_force_from(law['metadata']) == "1978-01-01" and amended_by(law['metadata']) == "2023:325"
+
+    first = store.record_law({**law, 'scraped_at': "2024-05-01T10:00:00"})
+    assert first['valid_from'] == "1978-01-01" and first['added'] == len(law['sections']) == 10
+    # Re-scraping the same text is not a new version
+    assert store.record_law({**law, 'scraped_at': "2024-06-01T10:00:00"})['valid_from'] == "1978-01-01"
+
+    second = store.record_law({**amend(law, 3, "Ny lydelse.", "2024:100"), 'scraped_at': "2024-07-01T08:00:00"})
+    assert (second['valid_from'], second['changed'], second['unchanged']) == ("2024-07-01", 1, 9)
+    third = store.record_law(amend(amend(law, 3, "Ny lydelse.", "2024:100"), 0, None, "2025:7"),
+                             observed="2025-02-01")
+    assert (third['repealed'], third['changed'], third['unchanged']) == (1, 0, 9)
+
+    conn = store.conn
+    # Ten sections, one changed, one repealed: eleven rows and texts, not thirty
+    assert conn.execute("SELECT COUNT(*) FROM section_versions").fetchone()[0] == 11
+    assert conn.execute("SELECT COUNT(*) FROM section_texts").fetchone()[0] == 11
+    assert [(v['valid_from'], v['valid_to'], v['amended_by']) for v in store.versions("1977:480")] == [
+        ("1978-01-01", "2024-07-01", "2023:325"), ("2024-07-01", "2025-02-01", "2024:100"),
+        ("2025-02-01", None, "2025:7")]
+
+    old = store.law_as_of("1977:480", "2015-06-01")
+    assert [s['text'] for s in old['sections']] == [s['text'] for s in law['sections']]
+    mid = store.law_as_of("1977:480", "2024-12-31")
+    assert mid['amended_by'] == "2024:100" and mid['sections'][3]['text'] == "Ny lydelse."
+    new = store.law_as_of("1977:480", "2025-02-01")
+    assert [s['id'] for s in new['sections']] == [s['id'] for s in mid['sections'][1:]]
+    assert store.law_as_of("1977:480", "1977-12-31") is None
+
+    sid = mid['sections'][3]['id']
+    assert store.section_as_of(sid, "2024-06-30")['text'] == law['sections'][3]['text']
+    assert store.section_as_of(sid, "2030-01-01")['valid_from'] == "2024-07-01"
+    assert store.section_as_of(old['sections'][0]['id'], "2025-03-01") is None
+
+    with pytest.raises(ValueError, match="older than the latest"):
+        store.record_version("1977:480", law['sections'], "2024-01-01", "2023:325")
+
+
+def test_same_day_version_replaces_and_repeal(store):
+    law = load_law("law_rattegangsbalken.html")
+    store.record_version("1942:740", law['sections'], "1948-01-01", "2024:1189")
+    store.record_version("1942:740", amend(law, 0, "Första lydelsen.", "2025:1")['sections'], "2025-03-01", "2025:1")
+    store.record_version("1942:740", amend(law, 0, "Rättad lydelse.", "2025:1")['sections'], "2025-03-01", "2025:1")
+    assert [v['valid_from'] for v in store.versions("1942:740")] == ["1948-01-01", "2025-03-01"]
+    assert store.law_as_of("1942:740", "2025-03-02")['sections'][0]['text'] == "Rättad lydelse."
+
+    assert store.repeal("1942:740", "2026-01-01") and not store.repeal("1942:740", "2026-02-01")
+    assert store.version_as_of("1942:740", "2026-01-01") is None
+    assert store.section_as_of("1942:740/1kap/1§", "2025-12-31")['text'] == "Rättad lydelse."
+    assert store.section_as_of("1942:740/1kap/1§", "2026-06-01") is None
+
+
+def test_version_for_case(store):
+    law = load_law("law_semesterlag.html")
+    store.record_law(law)
+    store.record_law(amend(law, 3, "Ny lydelse.", "2024:100"), observed="2024-07-01")
+    case = {'case_number': "T 1-23", 'decision_date': "2023-11-20",
+            'legal_references': [{'reference': "semesterlagen (1977:480)", 'sfs_number': "1977:480"},
+                                 {'reference': "1 § semesterlagen", 'sfs_number': "1977:480"},
+                                 {'reference': "lag (1982:80)", 'sfs_number': "1982:80"}]}
+    versions = store.version_for_case(case)
+    assert list(versions) == ["1977:480", "1982:80"]
+    assert versions["1977:480"]['amended_by'] == "2023:325" and versions["1982:80"] is None
+    later = store.version_for_case({**case, 'decision_date': "2024-09-01"}, "1977:480")
+    assert later["1977:480"]['valid_from'] == "2024-07-01"
+    with pytest.raises(ValueError):
+        store.version_for_case({'case_number': "T 2-23"})
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Lease semantics of the SQLite work queue: dedup, expiry of dead workers'
+leases, stale acks, retry limits and the case workers' failed downloads.
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "backend" / "src"))
+
+from legal_kg.workqueue import WorkQueue, run_worker
+
+
+def test_enqueue_dedups_by_kind_and_key(tmp_path):
+    queue = WorkQueue(tmp_path / "queue.db")
+    assert queue.enqueue('law', 'https://www.lagboken.se/a')
+    assert not queue.enqueue('law', 'https://www.lagboken.se/a')
+    assert queue.enqueue('topic', 'https://www.lagboken.se/a')
+    assert queue.stats()['law']['pending'] == 1
+
+
+def test_expired_lease_is_handed_out_again(tmp_path):
+    queue = WorkQueue(tmp_path / "queue.db")
+    queue.enqueue('law', 'u1', {'title': 'Semesterlag'})
+    [item] = queue.lease('dead-worker', lease_seconds=0.05)
+    assert queue.lease('other-worker') == []
+
+    time.sleep(0.1)
+    [retry] = queue.lease('other-worker')
+    assert retry['id'] == item['id'] and retry['attempt'] == 2
+    assert retry['payload'] == {'title': 'Semesterlag'}
+    # The dead worker's late ack must not overwrite the new owner's work
+    assert not queue.ack(item['id'], 'dead-worker', 'stale')
+    assert queue.ack(retry['id'], 'other-worker', 'fresh')
+    assert list(queue.results('law')) == [('u1', 'fresh')]
+
+
+def test_failed_items_stop_after_max_attempts(tmp_path):
+    queue = WorkQueue(tmp_path / "queue.db")
+    queue.enqueue('law', 'u1', max_attempts=2)
+    for _ in range(2):
+        [item] = queue.lease('w')
+        queue.fail(item['id'], 'w', 'HTTP 500', retry_delay=0)
+    assert queue.lease('w') == []
+    assert queue.stats()['law']['failed'] == 1
+    assert queue.requeue_failed() == 1
+
+
+def double(item, queue):
+    if item['payload'] < 3:
+        queue.enqueue('number', str(item['payload'] + 10), item['payload'] + 10)
+    return item['payload'] * 2
+
+
+def test_run_worker_drains_queue_including_follow_up_work(tmp_path):
+    path = tmp_path / "queue.db"
+    queue = WorkQueue(path)
+    queue.enqueue_many('number', [(str(n), n) for n in range(5)])
+    counts = run_worker(path, {'number': double}, batch=2)
+    assert counts == {'done': 8, 'failed': 0}
+    assert queue.is_drained()
+
+
+class FakeCourtScraper:
+    """save_case fails one PDF per case, into a list shared by every item of the process"""
+
+    def __init__(self):
+        self.failed_downloads = []
+
+    def save_case(self, case, cases_dir):
+        self.failed_downloads.append({'file_id': case['case_number'], 'error': "HTTP 500"})
+
+
+def test_case_workers_merge_failed_downloads_through_the_queue(tmp_path):
+    sys.path.append(str(Path(__file__).parent / "backend" / "scripts"))
+    import queue_worker
+
+    queue = WorkQueue(tmp_path / "queue.db")
+    queue.enqueue_many('case', [(f"B {n}-24", {'case_number': f"B {n}-24", 'full_text': "x"}) for n in range(3)])
+    queue_worker._scrapers['court'] = FakeCourtScraper()
+    try:
+        # Two workers: each only knows its own failures
+        for index in range(2):
+            run_worker(tmp_path / "queue.db", {'case': queue_worker.handle_case}, index=index, batch=2)
+    finally:
+        queue_worker._scrapers.pop('court')
+    assert queue_worker.write_failed_downloads(queue, tmp_path) == 3
+    failed = json.loads((tmp_path / "failed_downloads.json").read_text(encoding="utf-8"))
+    assert sorted(entry['file_id'] for entry in failed) == ["B 0-24", "B 1-24", "B 2-24"]
+
+
+def test_law_export_interns_topics(tmp_path):
+    sys.path.append(str(Path(__file__).parent / "backend" / "scripts"))
+    from queue_worker import export_results
+
+    queue = WorkQueue(tmp_path / "queue.db")
+    topic_url = "https://www.lagboken.se/lagboken/start/arbetsratt-och-arbetsmiljoratt/"
+    queue.enqueue('topic', topic_url)
+    [item] = queue.lease('w')
+    queue.ack(item['id'], 'w', {'topic_info': {'title': "Arbetsrätt"}})
+    for n in range(2):
+        queue.enqueue('law', f"https://www.lagboken.se/lag-{n}", {'topic_page_url': topic_url})
+        [item] = queue.lease('w')
+        queue.ack(item['id'], 'w', {'title': f"Lag (2000:{n})", 'metadata': {'SFS nr': f"2000:{n}"},
+                                    'topic_page_url': topic_url})
+
+    assert export_results(queue, 'law', tmp_path / "laws.jsonl") == 2
+    lines = [json.loads(line) for line in open(tmp_path / "laws.jsonl", encoding="utf-8")]
+    assert [line['result']['topic_id'] for line in lines] == [0, 0]
+    assert all('topic_page_url' not in line['result'] for line in lines)
+    topics = json.loads((tmp_path / "laws.topics.json").read_text(encoding="utf-8"))
+    assert topics == [{'id': 0, 'url': topic_url, 'title': "Arbetsrätt", 'description': None}]